@@ -0,0 +1,221 @@
+# coding: utf-8
+"""
+串流音訊解碼
+以 PyAV（faster-whisper 使用的解碼器，內含 FFmpeg 函式庫）逐窗解碼並重新取樣為 16 kHz 單聲道，
+不必把整個檔案解碼成一個 float32 陣列，記憶體用量只與窗長有關，與檔案長度無關
+
+- 每個窗在結尾前 DECODE_CHUNK_SEARCH_SECONDS 內找最安靜的位置切開，避免把單字切成兩半
+- 相鄰的窗在切點前後重疊，由呼叫端依保留範圍去除重複的單字
+- prefetch() 在背景執行緒解碼下一個窗，與模型推論同時進行
+"""
+import gc
+import queue
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from constants import DEFAULT_SAMPLE_RATE, DECODE_CHUNK_SEARCH_SECONDS
+
+_FRAME_SECONDS = 0.1  # 尋找切點時計算音量的區塊長度
+
+AudioWindow = namedtuple("AudioWindow", ["offset", "audio", "keep_start", "keep_end"])
+
+
+def _iter_pcm(file_path, sample_rate, start=0.0):
+    """
+    逐一產生解碼並重新取樣後的 int16 PCM 區塊
+
+    start 大於 0 時先跳到 start 之前的關鍵影格，再依第一個影格的時間戳捨去 start 之前的樣本；
+    時間以串流的起始時間為 0（與從頭解碼的 decode_audio 相同，例如 MP3 的起始時間通常不是 0）
+    """
+    import av
+
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    skip = None if start > 0 else 0  # 尚未知道第一個影格的時間前為 None
+    try:
+        with av.open(file_path, mode="r", metadata_errors="ignore") as container:
+            if start > 0:
+                stream = container.streams.audio[0]
+                origin = float(stream.start_time * stream.time_base) if stream.start_time is not None else 0.0
+                container.seek(int((start + origin) * av.time_base), backward=True, any_frame=False)
+            frames = container.decode(audio=0)
+            while True:
+                try:
+                    frame = next(frames)
+                except StopIteration:
+                    break
+                except av.error.InvalidDataError:
+                    continue  # 與 decode_audio 相同，略過損毀的封包
+                if skip is None:
+                    skip = max(0, round((start + origin - (frame.time or origin)) * sample_rate))
+                frame.pts = None  # 忽略時間戳檢查
+                for resampled in resampler.resample(frame):
+                    pcm = resampled.to_ndarray().reshape(-1)
+                    if skip:
+                        pcm, skip = pcm[skip:], max(0, skip - len(pcm))
+                    if len(pcm):
+                        yield pcm
+            # 送出 None 取出重新取樣器內剩餘的樣本
+            for resampled in resampler.resample(None):
+                yield resampled.to_ndarray().reshape(-1)[skip or 0:]
+    finally:
+        # 重新取樣器相關物件需要垃圾回收才會釋放（faster-whisper issue #390）
+        del resampler
+        gc.collect()
+
+
+def quietest_cut(audio, start, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    在 audio[start:] 中找音量最低的區塊，回傳其起點作為切點
+
+    Args:
+        audio: int16 或 float32 單聲道 PCM
+        start: 搜尋範圍起點（樣本）
+        sample_rate: 取樣率
+
+    Returns:
+        int: 切點（樣本），範圍太短時回傳 len(audio)
+    """
+    frame = max(1, int(_FRAME_SECONDS * sample_rate))
+    count = (len(audio) - start) // frame
+    if count < 2:
+        return len(audio)
+    frames = audio[start:start + count * frame].astype(np.float32).reshape(count, frame)
+    energy = np.einsum("ij,ij->i", frames, frames)
+    return start + int(np.argmin(energy)) * frame
+
+
+def iter_audio_windows(file_path, window_seconds, sample_rate=DEFAULT_SAMPLE_RATE,
+                       search_seconds=DECODE_CHUNK_SEARCH_SECONDS, overlap_seconds=0.0, first_window_seconds=None):
+    """
+    逐窗解碼音訊，相鄰的窗在切點前後各重疊 overlap_seconds
+
+    切點落在窗內最安靜的位置；每個窗另外標示「保留範圍」[keep_start, keep_end)，
+    相鄰兩窗的保留範圍在切點相接，呼叫端只保留中點落在範圍內的單字 / 片段即可去除重疊部分的重複
+
+    Args:
+        file_path: 音訊/影片檔案路徑
+        window_seconds: 每個窗的長度上限（秒，不含結尾的重疊）
+        sample_rate: 取樣率
+        search_seconds: 在每個窗結尾前此範圍內找最安靜的切點
+        overlap_seconds: 切點前後重疊的秒數
+        first_window_seconds: 第一個窗的長度（較短可讓第一句字幕更早出現），None 表示與 window_seconds 相同
+
+    Yields:
+        AudioWindow: (offset, audio, keep_start, keep_end)，時間為秒，最後一個窗的 keep_end 為 None；
+                     audio 為 float32 PCM，與 decode_audio 的數值相同
+    """
+    limit = max(1, int((first_window_seconds or window_seconds) * sample_rate))
+    overlap = int(overlap_seconds * sample_rate)
+    pending = []
+    buffered = 0
+    position = 0  # 緩衝區第一個樣本的位置
+    keep_start = 0
+
+    for pcm in _iter_pcm(file_path, sample_rate):
+        pending.append(pcm)
+        buffered += len(pcm)
+        if buffered < limit + overlap:
+            continue
+        audio = np.concatenate(pending)
+        while len(audio) >= limit + overlap:
+            search = min(limit // 2, int(search_seconds * sample_rate))
+            cut = quietest_cut(audio[:limit], limit - search, sample_rate)
+            yield AudioWindow(position / sample_rate, audio[:cut + overlap].astype(np.float32) / 32768.0,
+                              keep_start / sample_rate, (position + cut) / sample_rate)
+            keep_start = position + cut
+            # 下一個窗從切點前 overlap 開始（不早於本窗開頭）
+            step = max(1, cut - overlap)
+            position += step
+            audio = audio[step:]
+            limit = max(1, int(window_seconds * sample_rate))
+        pending = [audio]
+        buffered = len(audio)
+
+    if buffered:
+        audio = np.concatenate(pending)
+        yield AudioWindow(position / sample_rate, audio.astype(np.float32) / 32768.0, keep_start / sample_rate, None)
+
+
+def decode_range(file_path, start, end, sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    只解碼 [start, end) 秒的音訊（重新轉錄部分範圍時使用，不必解碼整個檔案）
+
+    Args:
+        file_path: 音訊/影片檔案路徑
+        start: 開始秒數
+        end: 結束秒數，None 表示到檔案結尾
+        sample_rate: 取樣率
+
+    Returns:
+        np.ndarray: float32 PCM，與 decode_audio 結果的同一段對齊（壓縮格式因解碼器狀態，開頭的數值略有差異）
+    """
+    limit = None if end is None else max(0, round((end - start) * sample_rate))
+    chunks = []
+    total = 0
+    pcm_blocks = _iter_pcm(file_path, sample_rate, start)
+    try:
+        for pcm in pcm_blocks:
+            chunks.append(pcm)
+            total += len(pcm)
+            if limit is not None and total >= limit:
+                break
+    finally:
+        pcm_blocks.close()
+    audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16)
+    return audio[:limit].astype(np.float32) / 32768.0
+
+
+def prefetch(iterable, depth=1):
+    """
+    在背景執行緒預先取出下一個項目（解碼下一個窗時模型繼續轉錄目前的窗）
+
+    Args:
+        iterable: 來源（例如 iter_audio_windows）
+        depth: 最多預先取出的項目數
+
+    Yields:
+        來源的項目；來源的例外在取用端重新拋出
+    """
+    items = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        items.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            items.put((done, None))
+        except BaseException as e:
+            items.put((done, e))
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()  # 關閉來源產生器（釋放檔案與解碼器）
+
+    thread = threading.Thread(target=produce, name="AudioPrefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # 取用端提前結束（例外或取消）時停止背景解碼
+        stop.set()
+        while thread.is_alive():
+            try:
+                items.get(timeout=0.1)
+            except queue.Empty:
+                pass
@@ -0,0 +1,387 @@
+# coding: utf-8
+"""
+硬體自動調校工具
+以參考音訊實測不同的 compute_type / cpu_threads / num_workers / beam_size / batch_size 組合，
+量測即時率 (RTF) 與峰值記憶體 (RSS)，並將 Pareto 最佳設定依模型寫入 whisper_settings.json
+
+每個組合在獨立子行程中執行，避免模型快取與記憶體峰值互相干擾
+
+用法:
+  python autotune.py                         # 調校目前設定的模型（合成音訊）
+  python autotune.py --model small --audio sample.wav
+  python autotune.py --target-rtf 0.3 --max-rss-mb 2000
+  python autotune.py --dry-run               # 只顯示結果，不寫入設定
+"""
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config import Config
+from config_manager import ConfigManager
+from resource_utils import physical_cpu_count, peak_rss_mb
+
+_RESULT_PREFIX = "AUTOTUNE_RESULT "
+
+# 各裝置的 compute_type 候選（實際會與 CTranslate2 支援的類型取交集）
+COMPUTE_TYPE_CANDIDATES = {
+    "cpu": ("int8", "int8_float32", "float32"),
+    "cuda": ("float16", "int8_float16", "int8"),
+}
+# 精度排名：RTF 都達標時優先選擇精度較高的組合
+_PRECISION_RANK = {"int8": 1, "int8_float16": 2, "int8_float32": 2, "int16": 2, "float16": 3, "float32": 3}
+BEAM_SIZE_CANDIDATES = (1, 3, 5)
+BATCH_SIZE_CANDIDATES = (8, 16, 32)
+DEFAULT_TARGET_RTF = 0.5  # 保留一半的即時餘裕
+
+
+# === 子行程：單一組合的量測 ===
+
+def _run_trial(spec):
+    """
+    在目前行程中載入模型並轉錄參考音訊（由子行程呼叫）
+
+    Args:
+        spec: 試驗參數（model_size, device, compute_type, cpu_threads, num_workers, beam_size, batch_size, audio）
+
+    Returns:
+        dict: {"rtf", "load_time", "elapsed", "peak_rss_mb", "chars"}
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from transcription import _import_faster_whisper, _prepare_transcription_params
+
+    WhisperModel, BatchedInferencePipeline = _import_faster_whisper()
+    audio = np.load(spec["audio"])
+    duration = len(audio) / Config.SAMPLE_RATE
+    num_workers = spec["num_workers"]
+
+    load_start = time.perf_counter()
+    model = WhisperModel(
+        spec["model_size"],
+        device=spec["device"],
+        compute_type=spec["compute_type"],
+        cpu_threads=spec["cpu_threads"],
+        num_workers=num_workers
+    )
+    load_time = time.perf_counter() - load_start
+
+    batch_size = spec.get("batch_size")
+    params = _prepare_transcription_params(overrides={
+        "beam_size": spec["beam_size"],
+        "vad_enabled": bool(batch_size),
+    })
+    if batch_size:
+        model = BatchedInferencePipeline(model=model)
+        params["batch_size"] = batch_size
+
+    def transcribe(clip):
+        segments, _ = model.transcribe(clip, **params)
+        # segments 為產生器，必須完整消耗才會真正解碼
+        return sum(len(segment.text) for segment in segments)
+
+    # 暖機：排除第一次呼叫的初始化成本
+    transcribe(audio[: 2 * Config.SAMPLE_RATE])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        chars = sum(pool.map(transcribe, [audio] * num_workers))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rtf": elapsed / (duration * num_workers),
+        "load_time": load_time,
+        "elapsed": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "chars": chars,
+    }
+
+
+# === 主行程：搜尋與選擇 ===
+
+def run_trial(spec, timeout):
+    """
+    在子行程中執行單一組合
+
+    Args:
+        spec: 試驗參數
+        timeout: 逾時秒數
+
+    Returns:
+        dict: spec 加上量測結果；失敗時包含 "error"
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--trial", json.dumps(spec)]
+    try:
+        proc = subprocess.run(
+            command, capture_output=True, text=True, timeout=timeout,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+    except subprocess.TimeoutExpired:
+        return {**spec, "error": f"逾時 ({timeout:.0f}s)"}
+
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(_RESULT_PREFIX):
+            return {**spec, **json.loads(line[len(_RESULT_PREFIX):])}
+    error = (proc.stderr.strip().splitlines() or [f"exit code {proc.returncode}"])[-1]
+    return {**spec, "error": error}
+
+
+def _accuracy(result):
+    """精度排序鍵：beam_size 優先，其次 compute_type 的精度"""
+    return result["beam_size"], _PRECISION_RANK.get(result["compute_type"], 0)
+
+
+def _dominates(a, b):
+    """a 的 RTF、峰值記憶體與精度都不比 b 差，且至少一項較好"""
+    a_key = (a["rtf"], a["peak_rss_mb"] or 0)
+    b_key = (b["rtf"], b["peak_rss_mb"] or 0)
+    no_worse = a_key[0] <= b_key[0] and a_key[1] <= b_key[1] and _accuracy(a) >= _accuracy(b)
+    return no_worse and (a_key != b_key or _accuracy(a) != _accuracy(b))
+
+
+def pareto_front(results):
+    """
+    取出 RTF、峰值記憶體與精度 (beam_size、compute_type) 無法被其他組合同時改善的結果
+
+    較慢但精度較高的組合（例如 beam_size 5）會保留在前緣，供 choose_best 在 RTF 達標時選用
+
+    Args:
+        results: 成功的試驗結果列表
+
+    Returns:
+        list: Pareto 前緣，依 RTF 排序
+    """
+    front = [r for r in results if not any(_dominates(other, r) for other in results)]
+    return sorted(front, key=lambda r: (r["rtf"], r["peak_rss_mb"] or 0))
+
+
+def choose_best(front, target_rtf=DEFAULT_TARGET_RTF, max_rss_mb=None):
+    """
+    從 Pareto 前緣選擇設定：在 RTF 與記憶體限制內選擇精度最高（beam_size、compute_type）的組合，
+    沒有組合達標時選擇最快的
+
+    Args:
+        front: Pareto 前緣
+        target_rtf: RTF 上限
+        max_rss_mb: 峰值記憶體上限 (MB)，None 表示不限制
+
+    Returns:
+        dict | None: 選中的結果
+    """
+    if not front:
+        return None
+    within_memory = [r for r in front if max_rss_mb is None or (r["peak_rss_mb"] or 0) <= max_rss_mb]
+    candidates = [r for r in within_memory if r["rtf"] <= target_rtf]
+    if not candidates:
+        return min(within_memory or front, key=lambda r: r["rtf"])
+    return max(candidates, key=lambda r: (*_accuracy(r), -r["rtf"]))
+
+
+def _thread_candidates(device):
+    """cpu_threads 候選值（GPU 上 cpu_threads 影響不大，只測預設值）"""
+    if device != "cpu":
+        return [0]
+    cores = physical_cpu_count()
+    return sorted({max(1, cores // 2), max(1, cores - 1), cores})
+
+
+def _compute_type_candidates(device):
+    """與 CTranslate2 實際支援類型取交集的 compute_type 候選"""
+    try:
+        import ctranslate2
+        supported = ctranslate2.get_supported_compute_types(device)
+    except Exception:
+        supported = set(COMPUTE_TYPE_CANDIDATES.get(device, ()))
+    return [c for c in COMPUTE_TYPE_CANDIDATES.get(device, ("default",)) if c in supported] or ["default"]
+
+
+def _load_reference_audio(audio_path, duration):
+    """
+    載入參考音訊（16kHz mono float32），未指定時產生合成訊號
+
+    Returns:
+        tuple: (audio, 說明文字)
+    """
+    if audio_path:
+        from faster_whisper import decode_audio
+        audio = decode_audio(audio_path, sampling_rate=Config.SAMPLE_RATE)
+        return audio[: int(duration * Config.SAMPLE_RATE)].astype(np.float32), os.path.basename(audio_path)
+
+    print("[WARN] 未指定 --audio，使用合成訊號；建議使用一段真實語音以取得準確的 RTF")
+    rng = np.random.default_rng(0)
+    t = np.arange(int(duration * Config.SAMPLE_RATE)) / Config.SAMPLE_RATE
+    # 以 4Hz 調變的諧波模擬語音的能量起伏
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    voice = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 720, 1440), start=1))
+    audio = 0.1 * envelope * voice + 0.01 * rng.standard_normal(len(t))
+    return audio.astype(np.float32), "synthetic"
+
+
+def autotune(model_size, audio_path=None, duration=30.0, batched=None,
+             target_rtf=DEFAULT_TARGET_RTF, max_rss_mb=None, quick=False):
+    """
+    分階段搜尋最佳設定
+
+    1. compute_type x cpu_threads（beam_size=1）
+    2. num_workers（總執行緒數不變，改為多個模型副本）
+    3. beam_size
+    4. batch_size（僅批次模式）
+
+    Args:
+        model_size: 模型大小
+        audio_path: 參考音訊路徑，None 時使用合成訊號
+        duration: 參考音訊長度上限（秒）
+        batched: 是否調校 BatchedInferencePipeline 的 batch_size，None 表示依 Config.VAD_ENABLED
+        target_rtf: 選擇設定時的 RTF 上限
+        max_rss_mb: 峰值記憶體上限 (MB)
+        quick: 只測試 compute_type 與 beam_size
+
+    Returns:
+        dict | None: 可寫入 settings["tuned"][model_size] 的結果，全部失敗時為 None
+    """
+    device = Config.DEVICE
+    audio, reference = _load_reference_audio(audio_path, duration)
+    if batched is None:
+        batched = Config.VAD_ENABLED
+    if batched and reference == "synthetic":
+        print("[WARN] 合成訊號會被 VAD 濾除，略過 batch_size 調校")
+        batched = False
+
+    fd, clip_path = tempfile.mkstemp(suffix=".npy")
+    os.close(fd)
+    np.save(clip_path, audio)
+    clip_seconds = len(audio) / Config.SAMPLE_RATE
+    timeout = max(120.0, clip_seconds * 20)
+    results = []
+
+    def measure(specs, stage):
+        print(f"\n【{stage}】")
+        stage_results = []
+        for spec in specs:
+            spec = {"model_size": model_size, "device": device, "audio": clip_path, **spec}
+            label = (f"{spec['compute_type']:<13} threads={spec['cpu_threads']:<3} "
+                     f"workers={spec['num_workers']} beam={spec['beam_size']}"
+                     + (f" batch={spec['batch_size']}" if spec.get("batch_size") else ""))
+            result = run_trial(spec, timeout)
+            if "error" in result:
+                print(f"  [FAIL] {label}: {result['error']}")
+                continue
+            rss = f"{result['peak_rss_mb']:.0f} MB" if result["peak_rss_mb"] else "N/A"
+            print(f"  [OK] {label} -> RTF {result['rtf']:.3f}, 峰值記憶體 {rss}")
+            stage_results.append(result)
+        results.extend(stage_results)
+        return min(stage_results, key=lambda r: r["rtf"]) if stage_results else None
+
+    try:
+        print(f"調校模型 {model_size} ({device})，參考音訊: {reference} ({clip_seconds:.1f}s)")
+        threads = _thread_candidates(device) if not quick else [_thread_candidates(device)[-1]]
+        best = measure([
+            {"compute_type": c, "cpu_threads": t, "num_workers": 1, "beam_size": 1}
+            for c in _compute_type_candidates(device) for t in threads
+        ], "1. compute_type / cpu_threads")
+        if best is None:
+            return None
+
+        base = {k: best[k] for k in ("compute_type", "cpu_threads", "num_workers", "beam_size")}
+        if not quick and device == "cpu" and best["cpu_threads"] >= 2:
+            split = measure([{**base, "num_workers": 2, "cpu_threads": best["cpu_threads"] // 2}], "2. num_workers")
+            if split is not None and split["rtf"] < best["rtf"]:
+                base = {k: split[k] for k in ("compute_type", "cpu_threads", "num_workers", "beam_size")}
+
+        measure([{**base, "beam_size": b} for b in BEAM_SIZE_CANDIDATES if b != base["beam_size"]], "3. beam_size")
+
+        if batched and not quick:
+            measure([{**base, "batch_size": b} for b in BATCH_SIZE_CANDIDATES], "4. batch_size")
+    finally:
+        os.remove(clip_path)
+
+    front = pareto_front(results)
+    chosen = choose_best(front, target_rtf, max_rss_mb)
+    keys = ("compute_type", "cpu_threads", "num_workers", "beam_size", "batch_size", "rtf", "peak_rss_mb")
+    entry = {k: chosen[k] for k in keys if chosen.get(k) is not None}
+    entry.update({
+        "device": device,
+        "reference": reference,
+        "tuned_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "pareto": [{k: r[k] for k in keys if r.get(k) is not None} for r in front],
+    })
+    return entry
+
+
+def save_tuned(model_size, entry, settings=None):
+    """
+    將調校結果寫入 whisper_settings.json 的 "tuned" 區塊
+
+    Args:
+        model_size: 模型大小
+        entry: autotune() 的結果
+        settings: 已載入的設定（互動式配置使用），None 表示從檔案載入並直接儲存
+
+    Returns:
+        dict: 更新後的設定
+    """
+    save = settings is None
+    if save:
+        settings = ConfigManager.load_settings()
+    # 建立新的 dict，避免修改到 DEFAULT_SETTINGS 共用的物件
+    settings["tuned"] = {**settings.get("tuned", {}), model_size: entry}
+    if save:
+        ConfigManager.save_settings(settings)
+    return settings
+
+
+def print_summary(model_size, entry):
+    """印出 Pareto 前緣與選中的設定"""
+    print("\n" + "=" * 60)
+    print(f"{model_size} Pareto 最佳組合 (RTF 越低越快)")
+    print("=" * 60)
+    for r in entry["pareto"]:
+        rss = f"{r['peak_rss_mb']:.0f} MB" if r.get("peak_rss_mb") else "N/A"
+        print(f"  RTF {r['rtf']:.3f}  {rss:>8}  {r['compute_type']}, threads={r['cpu_threads']}, "
+              f"workers={r['num_workers']}, beam={r['beam_size']}"
+              + (f", batch={r['batch_size']}" if r.get("batch_size") else ""))
+    print(f"\n選用: compute_type={entry['compute_type']}, cpu_threads={entry['cpu_threads']}, "
+          f"num_workers={entry['num_workers']}, beam_size={entry['beam_size']}"
+          + (f", batch_size={entry['batch_size']}" if entry.get("batch_size") else ""))
+    print("=" * 60)
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="Whisper 硬體自動調校")
+    parser.add_argument("--model", action="append", help="要調校的模型（可重複指定，預設為目前設定的模型）")
+    parser.add_argument("--audio", help="參考音訊檔（建議 30 秒左右的真實語音）")
+    parser.add_argument("--duration", type=float, default=30.0, help="參考音訊長度上限（秒）")
+    parser.add_argument("--batched", action="store_true", default=None, help="同時調校批次模式的 batch_size")
+    parser.add_argument("--target-rtf", type=float, default=DEFAULT_TARGET_RTF, help="可接受的 RTF 上限")
+    parser.add_argument("--max-rss-mb", type=float, help="峰值記憶體上限 (MB)")
+    parser.add_argument("--quick", action="store_true", help="只測試 compute_type 與 beam_size")
+    parser.add_argument("--dry-run", action="store_true", help="只顯示結果，不寫入設定檔")
+    parser.add_argument("--trial", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.trial:
+        result = _run_trial(json.loads(args.trial))
+        print(_RESULT_PREFIX + json.dumps(result))
+        return
+
+    for model_size in args.model or [Config.MODEL_SIZE]:
+        entry = autotune(
+            model_size, args.audio, args.duration, args.batched,
+            args.target_rtf, args.max_rss_mb, args.quick
+        )
+        if entry is None:
+            print(f"[ERROR] {model_size}: 所有組合皆失敗")
+            continue
+        print_summary(model_size, entry)
+        if not args.dry_run:
+            save_tuned(model_size, entry)
+
+
+if __name__ == "__main__":
+    main()
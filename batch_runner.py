@@ -0,0 +1,245 @@
+# coding: utf-8
+"""
+無介面批次執行器
+從持久化工作佇列 (whisper_jobs.db) 領取並轉錄檔案，可與 GUI 或其他執行器同時運作
+
+用法:
+  python batch_runner.py add <檔案或資料夾...> [--model small] [--priority 1] [--formats srt,vtt]
+  python batch_runner.py add <檔案> --range 1:02:00-1:05:30 --model large-v3   只重新轉錄一段
+  python batch_runner.py run [--workers 2] [--watch]
+  python batch_runner.py status
+  python batch_runner.py retry [工作ID...]
+  python batch_runner.py clear
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import traceback
+
+from config import Config
+from cpu_affinity import pin_inference_thread
+from constants import JOB_POLL_INTERVAL, SUBTITLE_FORMATS
+from exceptions import ClipTimestampsError, ModelLoadError, SubtitleGenerationError
+from file_scanner import ScanStats, iter_media_files
+from job_queue import JobStore, make_worker_id, STATE_PENDING, STATE_FAILED
+from logging_utils import log_error, log_transcription_stats
+from memory_governor import MemoryGovernor, memory_budget_mb
+from metrics import observe_transcription, observe_failure, watch_job_queue, start_metrics
+from config_service import ConfigService
+from model_registry import ModelRegistry
+from subtitle_writers import parse_time
+from transcription import transcribe_file, format_elapsed
+
+
+def _collect_paths(targets):
+    """展開檔案與資料夾參數為支援格式的檔案列表"""
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            stats = ScanStats()
+            paths.extend(iter_media_files(
+                target, Config.SCAN_INCLUDE, Config.SCAN_EXCLUDE, Config.SCAN_SKIP_TRANSCRIBED, stats=stats
+            ))
+            if stats.skipped:
+                print(f"[INFO] 略過 {stats.skipped} 個已有較新字幕的檔案: {target}")
+        elif os.path.isfile(target):
+            paths.append(os.path.abspath(target))
+        else:
+            print(f"[WARN] 找不到: {target}")
+    return paths
+
+
+def worker_loop(store, registry, name, watch, stop_event, arbiter=None, governor=None, wait_retries=True):
+    """
+    單一執行緒的領取-轉錄迴圈（批次執行器與轉錄服務共用）
+
+    Args:
+        store: JobStore
+        registry: ModelRegistry
+        name: 執行緒名稱（用於工作者識別與輸出）
+        watch: 佇列清空後是否持續等待新工作
+        stop_event: 停止事件
+        arbiter: 可選的 ResourceArbiter，即時工作階段進行中時於片段邊界讓出 CPU
+        governor: 執行緒共用的 MemoryGovernor，None 表示每個執行緒各自計算（不限制同時處理數）
+        wait_retries: 非 watch 模式下是否等待退避中的工作；False 表示沒有可開始的工作即返回
+    """
+    governor = governor or MemoryGovernor()
+    worker_id = make_worker_id(name)
+    # 限制在推論核心（模型在領取到工作的執行緒中載入，CTranslate2 執行緒會繼承）
+    pin_inference_thread()
+    while not stop_event.is_set():
+        job = store.claim(worker_id)
+        if job is None:
+            next_time = store.next_pending_time()
+            if not watch and (next_time is None or not wait_retries):
+                break
+            # 等待退避中的工作或新加入的工作
+            delay = JOB_POLL_INTERVAL if next_time is None else max(0.0, next_time - time.time())
+            stop_event.wait(min(delay, JOB_POLL_INTERVAL) if watch else delay)
+            continue
+
+        file_path = job["path"]
+        model_size = job["params"].get("model_size", Config.MODEL_SIZE)
+        print(f"[{name}] #{job['id']} 轉錄中 ({model_size}): {file_path}")
+        try:
+            model, use_batched = registry.get(model_size)
+            checkpoint = arbiter.checkpoint_for(stop_event.is_set) if arbiter else None
+            # 依記憶體預算調整批次大小 / 分段解碼，超出預算時等待其他執行緒的工作完成
+            with governor.admit(model_size, file_path, job["params"], use_batched) as plan:
+                options = {**job["params"], **plan["overrides"]}
+                result = transcribe_file(model, file_path, use_batched, options, checkpoint)
+            result["estimated_mb"] = plan["estimated_mb"]
+            store.complete(job["id"], result)
+            log_transcription_stats(file_path, result, model_size)
+            observe_transcription(result, model_size)
+            print(f"[{name}] #{job['id']} [OK] 完成 (耗時: {format_elapsed(result['elapsed'])}, "
+                  f"{result['segment_count']} 個片段)")
+        except (ClipTimestampsError, ModelLoadError, SubtitleGenerationError) as e:
+            observe_failure(model_size)
+            log_error(str(e))
+            store.fail(job["id"], str(e), retry=False)
+            print(f"[{name}] #{job['id']} [ERROR] {e}")
+        except Exception as e:
+            observe_failure(model_size)
+            log_error(f"檔案轉錄失敗 ({file_path}): {e}\n{traceback.format_exc()}")
+            state = store.fail(job["id"], str(e))
+            suffix = "（稍後自動重試）" if state == STATE_PENDING else ""
+            print(f"[{name}] #{job['id']} [ERROR] 失敗: {e}{suffix}")
+
+
+def run(store, workers=1, watch=False):
+    """
+    啟動執行緒領取並處理佇列中的工作
+
+    Args:
+        store: JobStore
+        workers: 同時處理的執行緒數（共用同一個模型）
+        watch: 佇列清空後是否持續等待新工作
+    """
+    recovered = store.recover_orphaned()
+    if recovered:
+        print(f"[INFO] 已復原 {recovered} 個中斷的工作")
+
+    # 所有執行緒共用同一個模型，同一時間只保留一個模型以節省記憶體
+    registry = ModelRegistry(max_models=1, num_workers=workers)
+    # 監看設定檔：解碼參數下一個工作生效，模型相關設定在背景重新載入
+    config_service = ConfigService()
+    config_service.add_listener(registry.on_config_changed)
+    config_service.start()
+    watch_job_queue(store)
+    exporter = start_metrics(Config.METRICS_PORT, Config.METRICS_SNAPSHOT_INTERVAL)
+    # 所有執行緒共用記憶體預算，合計超出時後開始的工作等待
+    governor = MemoryGovernor()
+    budget = memory_budget_mb()
+    if budget is not None:
+        print(f"[INFO] 記憶體預算: {budget:.0f} MB")
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(
+            target=worker_loop, args=(store, registry, f"runner-{i}", watch, stop_event, None, governor),
+            daemon=True
+        )
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            for t in threads:
+                t.join(timeout=0.5)
+    except KeyboardInterrupt:
+        print("\n[INFO] 停止中，執行中的工作會在下次啟動時復原...")
+        stop_event.set()
+    finally:
+        config_service.stop()
+        if exporter is not None:
+            exporter.stop()
+
+
+def print_status(store):
+    """顯示佇列統計與未完成的工作"""
+    counts = store.counts()
+    print("=" * 60)
+    print("工作佇列狀態")
+    print("=" * 60)
+    for state in ("pending", "running", "done", "failed", "cancelled"):
+        print(f"  {state:10s}: {counts.get(state, 0)}")
+    for job in store.list_jobs(states=("pending", "running", "failed")):
+        error = f" - {job['error'].splitlines()[0]}" if job["error"] else ""
+        print(f"  #{job['id']:<5d} [{job['state']}] (嘗試 {job['attempts']}/{job['max_attempts']}) "
+              f"{job['path']}{error}")
+    print("=" * 60)
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="Whisper 無介面批次執行器")
+    parser.add_argument("--db", default=None, help="工作佇列資料庫路徑")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_add = sub.add_parser("add", help="加入檔案或資料夾")
+    p_add.add_argument("paths", nargs="+")
+    p_add.add_argument("--model", help="模型大小（預設使用 whisper_settings.json）")
+    p_add.add_argument("--language", help="語言代碼")
+    p_add.add_argument("--priority", type=int, default=0, help="優先順序，數值越大越先處理")
+    p_add.add_argument("--formats", help=f"輸出格式，以逗號分隔（{','.join(SUBTITLE_FORMATS)}）")
+    p_add.add_argument("--range", dest="time_range", metavar="START-END",
+                       help="只重新轉錄此範圍並拼接回既有的 SRT，例如 1:02:00-1:05:30")
+
+    p_run = sub.add_parser("run", help="處理佇列中的工作")
+    p_run.add_argument("--workers", type=int, default=1, help="同時處理的執行緒數")
+    p_run.add_argument("--watch", action="store_true", help="佇列清空後持續等待新工作")
+
+    sub.add_parser("status", help="顯示佇列狀態")
+
+    p_retry = sub.add_parser("retry", help="重新排入失敗的工作（未指定 ID 時為全部）")
+    p_retry.add_argument("ids", nargs="*", type=int)
+
+    sub.add_parser("clear", help="刪除所有非執行中的工作")
+
+    args = parser.parse_args()
+    store = JobStore(args.db) if args.db else JobStore()
+
+    if args.command == "add":
+        params = {}
+        if args.model:
+            params["model_size"] = args.model
+        if args.language:
+            params["language"] = args.language
+        if args.formats:
+            formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+            unknown = [f for f in formats if f not in SUBTITLE_FORMATS]
+            if unknown:
+                parser.error(f"不支援的字幕格式: {', '.join(unknown)}")
+            params["output_formats"] = formats
+        if args.time_range:
+            try:
+                start, end = (parse_time(t) for t in args.time_range.split("-", 1))
+            except ValueError as e:
+                parser.error(f"--range 格式不正確（START-END）: {e}")
+            if end <= start:
+                parser.error("--range 的結束時間必須晚於開始時間")
+            params["time_range"] = [start, end]
+        paths = _collect_paths(args.paths)
+        # 重新轉錄範圍時不與同一檔案的其他工作合併
+        store.enqueue_many(paths, params, priority=args.priority, dedupe=not args.time_range)
+        print(f"✅ 已加入 {len(paths)} 個檔案")
+    elif args.command == "run":
+        run(store, workers=max(1, args.workers), watch=args.watch)
+    elif args.command == "status":
+        print_status(store)
+    elif args.command == "retry":
+        ids = args.ids or [job["id"] for job in store.list_jobs(states=(STATE_FAILED,))]
+        for job_id in ids:
+            store.retry(job_id)
+        print(f"✅ 已重新排入 {len(ids)} 個工作")
+    elif args.command == "clear":
+        store.clear()
+        print("✅ 已清除")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+字幕切分效能基準
+比較 utils.split_into_segments（Word 物件逐字處理）與
+segmentation.split_word_store（陣列化單字 + 向量化切分點）的速度與記憶體，
+並量測 segmentation.segment_optimal（動態規劃最佳斷句）的耗時
+
+用法:
+  python benchmarks/bench_segmentation.py [--words 300000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import split_into_segments
+from segmentation import WordStore, split_word_store, segment_optimal
+from synthetic import make_words
+
+
+def _best_of(repeat, fn):
+    """重複執行並回傳最短耗時與最後一次結果"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _traced_size(build):
+    """量測 build() 產生物件所佔的記憶體（tracemalloc）"""
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def run(word_count=300000, repeat=3):
+    """
+    執行基準並回傳結果 dict
+
+    Args:
+        word_count: 單字數
+        repeat: 每項重複次數（取最短）
+    """
+    words, words_bytes = _traced_size(lambda: make_words(word_count))
+    store, store_bytes = _traced_size(lambda: WordStore.from_words(words))
+
+    legacy_time, legacy = _best_of(repeat, lambda: split_into_segments(words))
+    build_time, _ = _best_of(repeat, lambda: WordStore.from_words(words))
+    fast_time, fast = _best_of(repeat, lambda: split_word_store(store))
+    optimal_time, optimal = _best_of(repeat, lambda: segment_optimal(store))
+
+    if legacy != fast:
+        raise AssertionError("split_word_store 與 split_into_segments 輸出不一致")
+
+    return {
+        "words": word_count,
+        "segments": len(fast),
+        "legacy_seconds": legacy_time,
+        "store_build_seconds": build_time,
+        "vectorized_seconds": fast_time,
+        "speedup": legacy_time / fast_time if fast_time else float("inf"),
+        "optimal_seconds": optimal_time,
+        "optimal_segments": len(optimal),
+        "word_objects_mb": words_bytes / 1024 ** 2,
+        "word_store_mb": store_bytes / 1024 ** 2,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字幕切分效能基準")
+    parser.add_argument("--words", type=int, default=300000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    r = run(args.words, args.repeat)
+    print("=" * 60)
+    print(f"單字數: {r['words']:,}  片段數: {r['segments']:,}  (輸出完全一致)")
+    print("=" * 60)
+    print(f"split_into_segments (Word 物件):  {r['legacy_seconds'] * 1000:9.1f} ms")
+    print(f"split_word_store (向量化):         {r['vectorized_seconds'] * 1000:9.1f} ms  "
+          f"(x{r['speedup']:.1f})")
+    print(f"segment_optimal (動態規劃):        {r['optimal_seconds'] * 1000:9.1f} ms  "
+          f"({r['optimal_segments']:,} 個片段)")
+    print(f"WordStore 建立:                    {r['store_build_seconds'] * 1000:9.1f} ms")
+    print(f"記憶體: Word 物件 {r['word_objects_mb']:.1f} MB -> WordStore {r['word_store_mb']:.1f} MB")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+# coding: utf-8
+"""
+效能基準套件
+以合成音訊與 FakeWhisperModel 量測程式本身（不含模型推論）的耗時，結果可重現，可寫成 JSON 與先前的結果比較
+
+- segmentation: split_into_segments 與陣列化切分（見 bench_segmentation.py）
+- write_srt: utils.write_srt 與 subtitle_writers.write_subtitles
+- batch: transcribe_file 的批次流程（解碼、切分、輸出），扣除模擬推論時間
+- live: transcription.LiveSession 以 0.1 秒區塊餵入音訊的處理耗時
+- startup: 在新的 Python 行程中匯入 transcription / main 與建立主視窗的時間
+- real_tiny: 本機已快取 tiny 模型時，以真實模型轉錄合成音訊（--real）
+
+用法:
+  python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+  python benchmarks/run_benchmarks.py --output new.json --compare baseline.json [--threshold 0.2]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import numpy as np
+
+from bench_segmentation import _best_of, run as run_segmentation
+from synthetic import FakeWhisperModel, SAMPLE_RATE, make_corpus, make_words, speech_pattern, tone
+from utils import split_into_segments, write_srt
+from subtitle_writers import write_subtitles
+
+# 完整 / 快速模式的規模
+SIZES = {
+    "full": {"words": 300000, "srt_words": 100000, "files": 8, "file_seconds": 120, "live_seconds": 120,
+             "startup_runs": 5, "repeat": 3},
+    "quick": {"words": 20000, "srt_words": 10000, "files": 2, "file_seconds": 30, "live_seconds": 30,
+              "startup_runs": 1, "repeat": 1},
+}
+
+_STARTUP_SCRIPTS = {
+    "import_transcription": "import transcription",
+    "import_main": "import main",
+    "main_window": (
+        "from PyQt6.QtWidgets import QApplication\n"
+        "app = QApplication([])\n"
+        "import main\n"
+        "window = main.MainWindow()\n"
+        "window.close()\n"
+    ),
+}
+
+
+def _percentile(values, q):
+    """百分位數（values 為空時回傳 None）"""
+    if not values:
+        return None
+    return float(np.percentile(values, q))
+
+
+def bench_segmentation(size):
+    """字幕切分"""
+    return run_segmentation(size["words"], size["repeat"])
+
+
+def bench_write_srt(size, work_dir):
+    """SRT 與多格式字幕輸出"""
+    segments = split_into_segments(make_words(size["srt_words"]))
+    path = os.path.join(work_dir, "bench.srt")
+    srt_time, _ = _best_of(size["repeat"], lambda: write_srt(segments, path))
+    all_time, _ = _best_of(
+        size["repeat"], lambda: write_subtitles(segments, os.path.join(work_dir, "bench"), ["srt", "vtt", "tsv", "json"])
+    )
+    return {
+        "segments": len(segments),
+        "write_srt_seconds": srt_time,
+        "write_subtitles_seconds": all_time,
+    }
+
+
+def bench_batch(size, work_dir, model=None):
+    """
+    批次流程：對合成音檔逐一呼叫 transcribe_file
+
+    Args:
+        model: 預設為不延遲的 FakeWhisperModel；傳入真實模型時耗時包含推論
+    """
+    from transcription import transcribe_file
+
+    fake = model is None
+    model = model or FakeWhisperModel(seed=1)
+    paths = make_corpus(os.path.join(work_dir, "batch"), size["files"], size["file_seconds"])
+    options = {"vad_enabled": True, "output_formats": ["srt"]}
+
+    stages = {}
+    segments = 0
+    start = time.perf_counter()
+    for path in paths:
+        result = transcribe_file(model, path, use_batched=fake, options=options)
+        segments += result["segment_count"]
+        for stage, seconds in result["timings"].items():
+            stages[stage] = stages.get(stage, 0.0) + seconds
+    total = time.perf_counter() - start
+    if fake:
+        total -= model.simulated_seconds
+
+    audio_seconds = size["files"] * size["file_seconds"]
+    return {
+        "files": len(paths),
+        "audio_duration": audio_seconds,
+        "segments": segments,
+        "total_seconds": total,
+        "per_audio_hour_seconds": total / audio_seconds * 3600,
+        **{f"{stage}_seconds": seconds for stage, seconds in stages.items()},
+    }
+
+
+def bench_live(size, model=None, chunk_seconds=0.1):
+    """
+    即時流程：以固定大小的區塊餵入 LiveSession（模擬麥克風回調）
+
+    Args:
+        model: 預設為不延遲的 FakeWhisperModel
+        chunk_seconds: 每次餵入的音訊長度
+    """
+    from transcription import LiveSession
+
+    fake = model is None
+    model = model or FakeWhisperModel(seed=2)
+    audio, _ = speech_pattern(size["live_seconds"], seed=2)
+    audio = np.concatenate((tone(1.0, amplitude=0.2), audio))
+    session = LiveSession(model)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+
+    feed_times = []
+    counts = {"interim": 0, "final": 0}
+    start = time.perf_counter()
+    for offset in range(0, len(audio), chunk):
+        t = time.perf_counter()
+        events = session.feed(audio[offset:offset + chunk])
+        feed_times.append(time.perf_counter() - t)
+        for event in events:
+            counts[event["type"]] += 1
+    for event in session.flush():
+        counts[event["type"]] += 1
+    total = time.perf_counter() - start
+    if fake:
+        total -= model.simulated_seconds
+
+    return {
+        "audio_duration": len(audio) / SAMPLE_RATE,
+        "chunks": len(feed_times),
+        "interim_events": counts["interim"],
+        "final_events": counts["final"],
+        "transcribe_calls": getattr(model, "calls", None),
+        "total_seconds": total,
+        "feed_p50_seconds": _percentile(feed_times, 50),
+        "feed_p95_seconds": _percentile(feed_times, 95),
+        "feed_max_seconds": max(feed_times),
+    }
+
+
+def bench_startup(size, work_dir):
+    """在新的行程中量測匯入與建立主視窗的時間（取最短）"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, QT_QPA_PLATFORM="offscreen")
+    results = {}
+    for name, script in _STARTUP_SCRIPTS.items():
+        best = float("inf")
+        for _ in range(size["startup_runs"]):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, "-c", script], cwd=work_dir, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=300,
+            )
+            elapsed = time.perf_counter() - start
+            if proc.returncode != 0:
+                print(f"[WARN] 啟動基準 {name} 失敗: {proc.stderr.strip().splitlines()[-1:]}")
+                break
+            best = min(best, elapsed)
+        if best != float("inf"):
+            results[f"{name}_seconds"] = best
+    return results
+
+
+def load_cached_model(model_size="tiny"):
+    """
+    載入本機已快取的模型（不下載）
+
+    Returns:
+        WhisperModel | None: 未快取或無法載入時回傳 None
+    """
+    try:
+        from faster_whisper import WhisperModel
+        from faster_whisper.utils import download_model
+        path = download_model(model_size, local_files_only=True)
+        return WhisperModel(path, device="cpu", compute_type="int8")
+    except Exception as e:
+        print(f"[INFO] 略過真實模型基準（{model_size} 未快取或無法載入: {e}）")
+        return None
+
+
+def bench_real_tiny(size, work_dir):
+    """以本機快取的 tiny 模型執行批次與即時流程"""
+    model = load_cached_model("tiny")
+    if model is None:
+        return None
+    small = dict(size, files=1, live_seconds=min(size["live_seconds"], 30))
+    return {
+        "batch": bench_batch(small, os.path.join(work_dir, "real"), model=model),
+        "live": bench_live(small, model=model),
+    }
+
+
+BENCHMARKS = {
+    "segmentation": lambda size, work_dir: bench_segmentation(size),
+    "write_srt": bench_write_srt,
+    "batch": bench_batch,
+    "live": lambda size, work_dir: bench_live(size),
+    "startup": bench_startup,
+}
+
+
+def run(quick=False, only=None, real=False):
+    """
+    執行基準並回傳結果 dict
+
+    Args:
+        quick: 使用較小的規模（CI 或快速檢查用）
+        only: 要執行的基準名稱列表，None 表示全部
+        real: 是否另外執行 real_tiny
+
+    Returns:
+        dict: {"meta": {...}, "benchmarks": {名稱: {指標: 數值}}}
+    """
+    size = SIZES["quick" if quick else "full"]
+    names = only or list(BENCHMARKS)
+    work_dir = tempfile.mkdtemp(prefix="whisper_bench_")
+    results = {}
+    try:
+        for name in names:
+            print(f"[INFO] 執行 {name}...")
+            results[name] = BENCHMARKS[name](size, work_dir)
+        if real:
+            tiny = bench_real_tiny(size, work_dir)
+            if tiny is not None:
+                results["real_tiny"] = tiny
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "mode": "quick" if quick else "full",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": results,
+    }
+
+
+def _flatten(results, prefix=""):
+    """{"batch": {"total_seconds": 1}} -> {"batch.total_seconds": 1}"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    比較兩次結果中的耗時指標（名稱以 _seconds 結尾，越小越好）
+
+    Args:
+        baseline: 先前的結果 dict
+        current: 本次的結果 dict
+        threshold: 變慢超過此比例視為退步
+
+    Returns:
+        list[dict]: {"metric", "baseline", "current", "change", "regression"}，依變化幅度排序
+    """
+    old = _flatten(baseline.get("benchmarks", {}))
+    new = _flatten(current.get("benchmarks", {}))
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        if not metric.endswith("_seconds") or old[metric] <= 0:
+            continue
+        change = new[metric] / old[metric] - 1
+        rows.append({
+            "metric": metric,
+            "baseline": old[metric],
+            "current": new[metric],
+            "change": change,
+            "regression": change > threshold,
+        })
+    rows.sort(key=lambda row: row["change"], reverse=True)
+    return rows
+
+
+def print_results(results):
+    """印出結果"""
+    print("=" * 60)
+    meta = results["meta"]
+    print(f"模式: {meta['mode']}  Python {meta['python']}  {meta['platform']}  CPU x{meta['cpu_count']}")
+    print("=" * 60)
+    for metric, value in _flatten(results["benchmarks"]).items():
+        if metric.endswith("_seconds"):
+            print(f"{metric:<45} {value * 1000:12.2f} ms")
+        else:
+            print(f"{metric:<45} {value:12,.2f}" if isinstance(value, float) else f"{metric:<45} {value:12,}")
+    print("=" * 60)
+
+
+def print_comparison(rows, threshold):
+    """印出比較結果"""
+    print(f"與基準比較（退步門檻 +{threshold:.0%}）")
+    for row in rows:
+        tag = "[WARN]" if row["regression"] else "[OK]"
+        print(f"{tag} {row['metric']:<45} {row['baseline'] * 1000:10.2f} -> "
+              f"{row['current'] * 1000:10.2f} ms ({row['change']:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper 效能基準套件（合成音訊 + 假模型）")
+    parser.add_argument("--quick", action="store_true", help="使用較小的規模")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="只執行指定的基準")
+    parser.add_argument("--real", action="store_true", help="本機已快取 tiny 模型時，另外以真實模型執行")
+    parser.add_argument("--output", help="將結果寫入 JSON 檔")
+    parser.add_argument("--compare", metavar="BASELINE", help="與先前的 JSON 結果比較，有退步時結束碼為 1")
+    parser.add_argument("--threshold", type=float, default=0.2, help="退步門檻（比例，預設 0.2）")
+    args = parser.parse_args()
+
+    results = run(quick=args.quick, only=args.only, real=args.real)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[OK] 結果已寫入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("mode") != results["meta"]["mode"]:
+            print("[WARN] 基準與本次的模式不同（quick / full），比較結果僅供參考")
+        rows = compare(baseline, results, args.threshold)
+        print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row["regression"]]
+        if regressions:
+            print(f"[ERROR] {len(regressions)} 項指標退步超過 {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
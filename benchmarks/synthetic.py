@@ -0,0 +1,223 @@
+# coding: utf-8
+"""
+基準測試用的合成音訊與假模型
+不需要模型權重或測試音檔，相同的 seed 產生完全相同的資料
+
+- 合成音訊: 純音、類語音雜訊（依音節速率調變振幅的濾波雜訊）、語音 / 靜音交替的段落
+- FakeWhisperModel: 與 WhisperModel.transcribe 相同介面的替身，延遲與輸出單字數可設定，
+  只在有聲音的區段產生單字，片段以惰性產生器逐一回傳（與 faster-whisper 相同）
+"""
+import os
+import random
+import time
+import wave
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# 與 faster_whisper.transcribe.Word 欄位相同的替身
+Word = namedtuple("Word", ["start", "end", "word", "probability"])
+
+_VOCAB = [" 我們", " 今天", " 討論", " 這個", " 問題", "，", " 然後", " the", " model", " is", " fast."]
+
+
+def tone(seconds, frequency=440.0, amplitude=0.3, sample_rate=SAMPLE_RATE):
+    """純音"""
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def silence(seconds, sample_rate=SAMPLE_RATE):
+    """靜音"""
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+
+def speech_like(seconds, seed=0, syllable_rate=4.0, level=0.1, sample_rate=SAMPLE_RATE):
+    """
+    類語音雜訊：低通濾波的白雜訊，振幅依音節速率起伏
+
+    Args:
+        seconds: 長度
+        seed: 亂數種子
+        syllable_rate: 每秒音節數（振幅調變頻率）
+        level: 整體 RMS（預設高於 Config.SILENCE_THRESHOLD，即時轉錄會判定為語音）
+    """
+    rng = np.random.default_rng(seed)
+    count = int(seconds * sample_rate)
+    noise = rng.standard_normal(count).astype(np.float32)
+    # 簡單的移動平均低通，讓頻譜集中在語音頻段
+    kernel = np.ones(8, dtype=np.float32) / 8
+    noise = np.convolve(noise, kernel, mode="same")
+    t = np.arange(count, dtype=np.float32) / sample_rate
+    envelope = 0.5 * (1 - np.cos(2 * np.pi * syllable_rate * t))
+    signal = noise * envelope
+    rms = np.sqrt(np.mean(np.square(signal))) or 1.0
+    return np.clip(level * signal / rms, -1.0, 1.0).astype(np.float32)
+
+
+def speech_pattern(seconds, seed=0, speech_range=(2.0, 8.0), silence_range=(0.3, 2.5), sample_rate=SAMPLE_RATE):
+    """
+    語音 / 靜音交替的段落（模擬演講或會議錄音）
+
+    Returns:
+        tuple: (音訊, [(語音開始秒數, 結束秒數), ...])
+    """
+    rng = random.Random(seed)
+    parts = []
+    spans = []
+    position = 0.0
+    while position < seconds:
+        length = min(rng.uniform(*speech_range), seconds - position)
+        parts.append(speech_like(length, seed=rng.randrange(1 << 30), sample_rate=sample_rate))
+        spans.append((position, position + length))
+        position += length
+        if position >= seconds:
+            break
+        gap = min(rng.uniform(*silence_range), seconds - position)
+        parts.append(silence(gap, sample_rate))
+        position += gap
+    # 各段取整可能少幾個樣本，補齊到指定長度
+    audio = np.concatenate(parts)
+    total = int(seconds * sample_rate)
+    return np.pad(audio[:total], (0, max(0, total - len(audio)))), spans
+
+
+def write_wav(path, audio, sample_rate=SAMPLE_RATE):
+    """寫入 16-bit PCM 單聲道 WAV"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
+
+
+def make_corpus(folder, count, seconds, seed=0):
+    """
+    產生 count 個語音 / 靜音交替的 WAV 檔
+
+    Returns:
+        list[str]: 檔案路徑
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        audio, _ = speech_pattern(seconds, seed=seed + i)
+        paths.append(write_wav(os.path.join(folder, f"synthetic_{i:03d}.wav"), audio))
+    return paths
+
+
+def make_words(count, seed=0):
+    """產生具代表性的單字序列（約 3 字/秒，偶有停頓標點與句中靜音）"""
+    rng = random.Random(seed)
+    words = []
+    t = 0.0
+    for _ in range(count):
+        duration = rng.uniform(0.12, 0.45)
+        text = rng.choice(_VOCAB)
+        if rng.random() < 0.06:
+            text += "。"
+        words.append(Word(round(t, 2), round(t + duration, 2), text, rng.uniform(0.5, 1.0)))
+        t += duration + (rng.uniform(0.5, 2.0) if rng.random() < 0.02 else 0.0)
+    return words
+
+
+def _voiced_spans(audio, sample_rate, window=0.1, threshold=0.01):
+    """以 RMS 找出有聲音的區段 [(開始秒數, 結束秒數)]"""
+    size = max(1, int(window * sample_rate))
+    usable = len(audio) - len(audio) % size
+    if usable == 0:
+        return []
+    rms = np.sqrt(np.mean(np.square(audio[:usable].reshape(-1, size)), axis=1))
+    voiced = rms > threshold
+    spans = []
+    start = None
+    for i, flag in enumerate(voiced):
+        if flag and start is None:
+            start = i
+        elif not flag and start is not None:
+            spans.append((start * window, i * window))
+            start = None
+    if start is not None:
+        spans.append((start * window, len(voiced) * window))
+    return spans
+
+
+class FakeWhisperModel:
+    """
+    WhisperModel 的替身
+
+    延遲 = load 以外每次 transcribe 的 overhead + 每段音訊秒數 x rtf（在迭代片段時才等待，
+    與 faster-whisper 的惰性解碼相同），輸出的文字由 seed 與音訊位置決定
+    """
+
+    def __init__(self, rtf=0.0, overhead=0.0, words_per_second=3.0, segment_seconds=6.0, seed=0):
+        """
+        Args:
+            rtf: 每秒音訊的模擬推論秒數
+            overhead: 每次 transcribe 呼叫的固定延遲（秒，模擬特徵擷取與語言偵測）
+            words_per_second: 有聲區段每秒產生的單字數
+            segment_seconds: 每個片段的最長秒數
+            seed: 亂數種子
+        """
+        self.rtf = rtf
+        self.overhead = overhead
+        self.words_per_second = words_per_second
+        self.segment_seconds = segment_seconds
+        self.seed = seed
+        self.calls = 0
+        self.audio_seconds = 0.0
+        self.simulated_seconds = 0.0  # 累計的模擬延遲（用於從實測時間中扣除）
+
+    def transcribe(self, audio, **params):
+        """
+        與 WhisperModel.transcribe 相同的呼叫方式
+
+        Returns:
+            tuple: (片段產生器, info)
+        """
+        if isinstance(audio, str):
+            from faster_whisper import decode_audio
+            audio = decode_audio(audio, sampling_rate=SAMPLE_RATE)
+        duration = len(audio) / SAMPLE_RATE
+        self.calls += 1
+        self.audio_seconds += duration
+        if self.overhead:
+            time.sleep(self.overhead)
+            self.simulated_seconds += self.overhead
+        info = SimpleNamespace(language=params.get("language") or "zh", language_probability=1.0,
+                               duration=duration)
+        spans = _voiced_spans(audio, SAMPLE_RATE)
+        clips = params.get("clip_timestamps")
+        if clips:
+            # 與 WhisperModel 相同：只轉錄 [開始, 結束, ...] 範圍內的音訊，時間仍以原始音訊為準
+            spans = [(max(a, s), min(b, e)) for s, e in zip(clips[::2], clips[1::2])
+                     for a, b in spans if min(b, e) > max(a, s)]
+        return self._segments(spans, params.get("word_timestamps", False)), info
+
+    def _segments(self, spans, word_timestamps):
+        rng = random.Random(self.seed + self.calls)
+        for span_start, span_end in spans:
+            start = span_start
+            while start < span_end - 1e-6:
+                end = min(span_end, start + self.segment_seconds)
+                if self.rtf:
+                    delay = (end - start) * self.rtf
+                    time.sleep(delay)
+                    self.simulated_seconds += delay
+                count = max(1, int(round((end - start) * self.words_per_second)))
+                step = (end - start) / count
+                words = [
+                    Word(round(start + i * step, 3), round(start + (i + 1) * step, 3),
+                         rng.choice(_VOCAB) + ("。" if rng.random() < 0.08 else ""), rng.uniform(0.5, 1.0))
+                    for i in range(count)
+                ]
+                yield SimpleNamespace(
+                    start=start, end=end, text="".join(w.word for w in words).strip(),
+                    words=words if word_timestamps else None,
+                )
+                start = end
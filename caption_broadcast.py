@@ -0,0 +1,255 @@
+# coding: utf-8
+"""
+字幕廣播
+將即時字幕以 Server-Sent Events 推送給 OBS 瀏覽器來源、第二螢幕或其他程式
+
+端點:
+  GET /          字幕網頁（OBS 瀏覽器來源直接使用，背景透明；?size=48 調整字級）
+  GET /events    SSE 事件串流，event 為 interim / final，data 為 JSON
+                 {"seq", "type", "text", "time"}（final 另含 "latency"，轉錄服務來源另含 "start" / "end"）
+  GET /latest    最近一句最終字幕 (JSON)
+
+- 即時轉錄 Worker 直接呼叫 publish()，只放入各連線的佇列，不在解碼執行緒上做任何網路 I/O
+- 每個連線的佇列有上限，處理太慢的連線會捨棄最舊的事件（暫定文字會被後續事件取代）
+"""
+import json
+import queue
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from constants import CAPTION_BROADCAST_HOST, CAPTION_CLIENT_QUEUE, CAPTION_HEARTBEAT
+
+CAPTION_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Whisper Captions</title>
+<style>
+  html, body { margin: 0; background: transparent; overflow: hidden; }
+  #captions { position: fixed; left: 0; right: 0; bottom: 4vh; text-align: center;
+              font-family: "Microsoft JhengHei", sans-serif; font-size: 40px; color: white;
+              text-shadow: 0 0 6px black, 0 0 2px black; }
+  #stable { font-weight: bold; }
+  #tentative { opacity: 0.7; }
+</style>
+</head>
+<body>
+<div id="captions"><div id="stable"></div><div id="tentative"></div></div>
+<script>
+  const params = new URLSearchParams(location.search);
+  if (params.get("size")) document.getElementById("captions").style.fontSize = params.get("size") + "px";
+  const stable = document.getElementById("stable");
+  const tentative = document.getElementById("tentative");
+  let clearTimer = null;
+  const source = new EventSource("/events");
+  function show(event, isFinal) {
+    const data = JSON.parse(event.data);
+    if (isFinal) { stable.textContent = data.text; tentative.textContent = ""; }
+    else { tentative.textContent = data.text; }
+    clearTimeout(clearTimer);
+    clearTimer = setTimeout(() => { stable.textContent = ""; tentative.textContent = ""; }, 8000);
+  }
+  source.addEventListener("interim", (e) => show(e, false));
+  source.addEventListener("final", (e) => show(e, true));
+</script>
+</body>
+</html>
+"""
+
+
+class CaptionBroadcaster:
+    """字幕事件的發布 / 訂閱中心（執行緒安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._seq = 0
+        self._last_final = None
+
+    def publish(self, event_type, text, **fields):
+        """
+        發布字幕事件（不阻塞）
+
+        Args:
+            event_type: "interim" 或 "final"
+            text: 字幕文字
+            **fields: 其他欄位（例如 latency、start、end）
+
+        Returns:
+            dict: 發布的事件
+        """
+        with self._lock:
+            self._seq += 1
+            event = {"seq": self._seq, "type": event_type, "text": text, "time": time.time(), **fields}
+            if event_type == "final":
+                self._last_final = event
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            self._offer(q, event)
+        return event
+
+    @staticmethod
+    def _offer(q, event):
+        """放入連線的佇列，已滿時捨棄最舊的事件"""
+        while True:
+            try:
+                q.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def subscribe(self):
+        """
+        新增訂閱（新連線會先收到最近一句最終字幕）
+
+        Returns:
+            queue.Queue: 事件佇列，收到 None 表示廣播結束
+        """
+        q = queue.Queue(maxsize=CAPTION_CLIENT_QUEUE)
+        with self._lock:
+            if self._last_final is not None:
+                q.put_nowait(self._last_final)
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        """取消訂閱"""
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def close_all(self):
+        """通知所有訂閱者結束"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for q in subscribers:
+            self._offer(q, None)
+
+    @property
+    def client_count(self):
+        """目前的訂閱數"""
+        with self._lock:
+            return len(self._subscribers)
+
+    @property
+    def last_final(self):
+        """最近一句最終字幕事件"""
+        with self._lock:
+            return self._last_final
+
+
+class CaptionServer(ThreadingHTTPServer):
+    """字幕廣播 HTTP 服務"""
+
+    daemon_threads = True
+
+    def __init__(self, address, broadcaster):
+        """
+        Args:
+            address: (host, port)
+            broadcaster: CaptionBroadcaster
+        """
+        super().__init__(address, CaptionRequestHandler)
+        self.broadcaster = broadcaster
+        self._thread = None
+
+    def start(self):
+        """在背景執行緒中開始服務"""
+        self._thread = threading.Thread(target=self.serve_forever, name="CaptionServer", daemon=True)
+        self._thread.start()
+        print(f"[OK] 字幕廣播已啟動: http://{self.server_address[0]}:{self.server_address[1]}/")
+
+    def stop(self):
+        """停止服務並結束所有事件串流"""
+        self.broadcaster.close_all()
+        if self._thread is not None:
+            self.shutdown()
+            self._thread = None
+        self.server_close()
+
+
+class CaptionRequestHandler(BaseHTTPRequestHandler):
+    """字幕廣播的請求處理"""
+
+    server_version = "WhisperDesktop"
+
+    def log_message(self, format, *args):
+        """不輸出存取紀錄"""
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path in ("/", "/index.html"):
+            self._send(HTTPStatus.OK, "text/html; charset=utf-8", CAPTION_PAGE.encode("utf-8"))
+        elif path == "/events":
+            self._events()
+        elif path == "/latest":
+            data = json.dumps(self.server.broadcaster.last_final or {}, ensure_ascii=False).encode("utf-8")
+            self._send(HTTPStatus.OK, "application/json; charset=utf-8", data)
+        else:
+            self._send(HTTPStatus.NOT_FOUND, "text/plain; charset=utf-8", b"not found")
+
+    def _send(self, status, content_type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _events(self):
+        """SSE 事件串流，直到用戶端斷線或廣播結束"""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        broadcaster = self.server.broadcaster
+        q = broadcaster.subscribe()
+        try:
+            # 斷線後瀏覽器 1 秒內重新連線
+            self.wfile.write(b"retry: 1000\n\n")
+            self.wfile.flush()
+            while True:
+                try:
+                    event = q.get(timeout=CAPTION_HEARTBEAT)
+                except queue.Empty:
+                    # 註解行作為心跳，偵測已斷線的用戶端
+                    self.wfile.write(b": ping\n\n")
+                    self.wfile.flush()
+                    continue
+                if event is None:
+                    break
+                data = json.dumps(event, ensure_ascii=False)
+                self.wfile.write(f"id: {event['seq']}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            broadcaster.unsubscribe(q)
+            self.close_connection = True
+
+
+def start_caption_server(broadcaster, port, host=CAPTION_BROADCAST_HOST):
+    """
+    啟動字幕廣播服務
+
+    Args:
+        broadcaster: CaptionBroadcaster
+        port: 監聽埠號
+        host: 監聽位址
+
+    Returns:
+        CaptionServer: 已在背景執行的服務
+
+    Raises:
+        OSError: 埠號已被使用
+    """
+    server = CaptionServer((host, port), broadcaster)
+    server.start()
+    return server
@@ -12,39 +12,108 @@ from detect_device import get_optimal_device, get_device_info
 from config_manager import ConfigManager
 
 
-class Config:
+class _LazyDeviceConfig(type):
+    """
+    延遲偵測運算裝置的 metaclass
+
+    DEVICE / COMPUTE_TYPE / DEVICE_NAME 在第一次存取時才偵測，
+    之後寫回類別屬性，不再經過 __getattr__；
+    設定檔指定 device / compute_type 時優先使用指定值
+    """
+    _DEVICE_ATTRS = ("DEVICE", "COMPUTE_TYPE", "DEVICE_NAME")
+
+    def __getattr__(cls, name):
+        if name not in cls._DEVICE_ATTRS:
+            raise AttributeError(f"type object '{cls.__name__}' has no attribute '{name}'")
+        # 自動偵測最佳運算裝置
+        device, compute_type, device_name = get_optimal_device()
+        if cls.DEVICE_PREFERENCE == "cpu" and device != "cpu":
+            device, compute_type, device_name = "cpu", "int8", "CPU (設定指定)"
+        elif cls.DEVICE_PREFERENCE == "cuda" and device != "cuda":
+            print("[WARN] 設定指定 CUDA，但未偵測到可用的 GPU，改用 CPU")
+        if cls.COMPUTE_TYPE_PREFERENCE != "auto":
+            compute_type = cls.COMPUTE_TYPE_PREFERENCE
+        for attr, value in zip(cls._DEVICE_ATTRS, (device, compute_type, device_name)):
+            if attr not in cls.__dict__:
+                setattr(cls, attr, value)
+        return cls.__dict__[name]
+
+
+class Config(metaclass=_LazyDeviceConfig):
     """Whisper 應用程式配置"""
     
     # 載入使用者自訂配置 (透過 ConfigManager)
     _user_settings = ConfigManager.load_settings()
     
     # === 裝置配置 ===
-    # 自動偵測最佳運算裝置
-    DEVICE, COMPUTE_TYPE, DEVICE_NAME = get_optimal_device()
+    # DEVICE, COMPUTE_TYPE, DEVICE_NAME 由 _LazyDeviceConfig 在第一次存取時偵測
+    DEVICE_PREFERENCE = _user_settings["device"]  # auto / cpu / cuda
+    COMPUTE_TYPE_PREFERENCE = _user_settings["compute_type"]  # auto = 依裝置與調校結果決定
     
     # === 基礎設定 ===
-    MODEL_SIZE = _user_settings.get("model_size", "tiny")
+    MODEL_SIZE = _user_settings["model_size"]
     SAMPLE_RATE = 16000
     CHANNELS = 1
     
     # === 效能設定 ===
-    BEAM_SIZE = _user_settings.get("beam_size", 1)  # 預設使用最快速度 (1), 可選 3 或 5 以提升準確度
-    BATCH_SIZE = _user_settings.get("batch_size", 16)  # 批次處理大小，提升多檔案處理效能
-    CONDITION_ON_PREVIOUS_TEXT = _user_settings.get("condition_on_previous_text", False)  # 停用上下文依賴以加速長音訊處理
+    BEAM_SIZE = _user_settings["beam_size"]  # 預設使用最快速度 (1), 可選 3 或 5 以提升準確度
+    BATCH_SIZE = _user_settings["batch_size"]  # 批次處理大小，提升多檔案處理效能
+    CONDITION_ON_PREVIOUS_TEXT = _user_settings["condition_on_previous_text"]  # 停用上下文依賴以加速長音訊處理
     
     # === 語音設定 ===
-    LANGUAGE = _user_settings.get("language", "zh")  # 預設繁體中文
+    LANGUAGE = _user_settings["language"]  # 預設繁體中文
     # Temperature 必須至少為 0.1，否則 faster-whisper 可能不會產生 clip_timestamps 導致轉錄失敗
-    TEMPERATURE = max(0.1, _user_settings.get("temperature", 0.2))  # 確保至少為 0.1
-    TASK = "transcribe"  # transcribe or translate
+    TEMPERATURE = _user_settings["temperature"]  # 設定驗證已確保至少為 0.1
+    TASK = _user_settings["task"]  # transcribe or translate
     INITIAL_PROMPT = "繁體中文"
     
+    # === 字幕切分設定 ===
+    SEGMENTATION_MODE = _user_settings["segmentation_mode"]  # optimal: 最佳斷句, greedy: 貪婪切分
+    MIN_SEGMENT_DURATION = _user_settings["min_segment_duration"]  # 秒
+    MAX_SEGMENT_DURATION = _user_settings["max_segment_duration"]  # 秒
+    MAX_SEGMENT_CHARS = _user_settings["max_segment_chars"]  # 每條字幕最多字元數
+    MAX_CHARS_PER_SECOND = _user_settings["max_chars_per_second"]  # 閱讀速度上限
+    OUTPUT_FORMATS = _user_settings["output_formats"]  # srt / vtt / tsv / json
+    
+    # === 執行緒與核心配置 ===
+    # CTranslate2 預設會使用所有核心，導致 PortAudio 回調與 UI 執行緒搶不到 CPU
+    CPU_THREADS = _user_settings["cpu_threads"]  # 每個模型副本的執行緒數，0 = 自動（調校結果或扣除保留核心）
+    NUM_WORKERS = _user_settings["num_workers"]  # 模型副本數，0 = 自動（調校結果或 1）
+    RESERVED_CORES = _user_settings["reserved_cores"]  # 保留給音訊擷取與 UI 的核心數
+    INFERENCE_AFFINITY = _user_settings["inference_affinity"]  # 推論核心清單，例如 "2-7"，空字串 = 自動
+    NUMA_NODE = _user_settings["numa_node"]  # 推論限制在指定 NUMA 節點 (Linux)，-1 = 不限
+    ARBITRATION_MODE = _user_settings["arbitration_mode"]  # 即時字幕進行中: throttle 批次降速 / pause 暫停 / off
+    LIVE_LATENCY_BUDGET = _user_settings["live_latency_budget"]  # 秒，即時語句延遲預算，超過時批次再降速
+    TRANSCRIPTION_SERVER = _user_settings["transcription_server"]  # 轉錄服務位址，空字串 = 本程式自行載入模型
+    MEMORY_BUDGET_MB = _user_settings["memory_budget_mb"]  # 記憶體預算 (MB)，0 = 實體記憶體的 MEMORY_BUDGET_FRACTION
+    DECODE_CHUNK_SECONDS = _user_settings["decode_chunk_seconds"]  # 分段解碼每段秒數，0 = 只在超出記憶體預算時分段
+    STREAM_MIN_DURATION = _user_settings["stream_min_duration"]  # 秒，達此長度的檔案改為串流解碼，0 = 停用
+    SILENCE_TRIM_MIN_DURATION = _user_settings["silence_trim_min_duration"]  # 秒，VAD 停用時略過的最短靜音，0 = 停用
+    SILENCE_TRIM_THRESHOLD = _user_settings["silence_trim_threshold"]  # 靜音略過的 RMS 閾值
+    INFERENCE_OUT_OF_PROCESS = _user_settings["inference_out_of_process"]  # 在受監控的子行程中執行推論
+    CAPTION_BROADCAST_PORT = _user_settings["caption_broadcast_port"]  # 字幕廣播埠號，0 = 停用
+    LOG_DIR = _user_settings["log_dir"]  # 日誌資料夾，空字串 = 程式所在資料夾下的 logs/
+    LIVE_ARCHIVE = _user_settings["live_archive"]  # 即時轉錄時壓縮保存錄音
+    LIVE_REPASS_MODEL = _user_settings["live_repass_model"]  # 閒置時重新轉錄錄音的模型，空字串 = 停用
+    LIVE_REPASS_IDLE_SECONDS = _user_settings["live_repass_idle_seconds"]  # 秒，閒置多久後開始重新轉錄
+    METRICS_PORT = _user_settings["metrics_port"]  # Prometheus 指標端點埠號，0 = 停用
+    METRICS_SNAPSHOT_INTERVAL = _user_settings["metrics_snapshot_interval"]  # 秒，寫入 whisper_metrics.json 的間隔，0 = 停用
+
+    # === 資料夾掃描 ===
+    SCAN_INCLUDE = _user_settings["scan_include"]  # 檔名 glob 樣式，例如 ["lecture_*"]，空白 = 全部
+    SCAN_EXCLUDE = _user_settings["scan_exclude"]  # 排除的檔名或相對路徑 glob 樣式，例如 ["*.tmp", "backup/*"]
+    SCAN_SKIP_TRANSCRIBED = _user_settings["scan_skip_transcribed"]  # 略過同名 .srt 比媒體檔新的檔案
+    SCAN_PROBE_DURATION = _user_settings["scan_probe_duration"]  # 掃描時平行讀取音訊長度
+    
+    # === 自動調校結果 (autotune.py) ===
+    TUNED = _user_settings["tuned"]  # 模型大小 -> 實測最佳的 compute_type / cpu_threads / beam_size 等
+    
     # === VAD 設定 (語音活動偵測) ===
-    VAD_ENABLED = _user_settings.get("vad_enabled", False)  # 預設停用 VAD，確保完整轉錄所有音訊
-    VAD_MIN_SILENCE_MS = _user_settings.get("vad_min_silence_ms", 300)  # 靜音片段最小持續時間
-    VAD_THRESHOLD = _user_settings.get("vad_threshold", 0.5)  # VAD 敏感度 (0.0-1.0)
-    VAD_MIN_SPEECH_MS = _user_settings.get("vad_min_speech_ms", 250)  # 語音片段最小持續時間
-    VAD_SPEECH_PAD_MS = _user_settings.get("vad_speech_pad_ms", 400)  # 語音片段前後填充時間
+    VAD_ENABLED = _user_settings["vad_enabled"]  # 預設停用 VAD，確保完整轉錄所有音訊
+    VAD_MIN_SILENCE_MS = _user_settings["vad_min_silence_ms"]  # 靜音片段最小持續時間
+    VAD_THRESHOLD = _user_settings["vad_threshold"]  # VAD 敏感度 (0.0-1.0)
+    VAD_MIN_SPEECH_MS = _user_settings["vad_min_speech_ms"]  # 語音片段最小持續時間
+    VAD_SPEECH_PAD_MS = _user_settings["vad_speech_pad_ms"]  # 語音片段前後填充時間
     
     # === 即時轉錄設定 ===
     # 靜音閾值：提高此值可過濾背景噪音（如電腦風扇聲）
@@ -52,7 +121,6 @@ class Config:
     SILENCE_THRESHOLD = 0.05  # 提高閾值以過濾背景噪音
     SILENCE_DURATION = 1.0  # 靜音持續時間（秒）
     TRANSCRIBE_INTERVAL = 0.5  # 即時轉錄間隔（秒）
-    LOG_FILE = "transcription_log.txt"
     
     # === 模型選項 ===
     AVAILABLE_MODELS = ["tiny", "base", "small", "medium", "large-v3", "large-v3-turbo"]
@@ -88,6 +156,78 @@ class Config:
             "speech_pad_ms": cls.VAD_SPEECH_PAD_MS
         }
     
+    @classmethod
+    def get_tuned_settings(cls, model_size=None) -> dict:
+        """
+        取得模型的自動調校結果（只採用在目前裝置上量測的結果）
+        
+        Args:
+            model_size: 模型大小，None 表示使用 MODEL_SIZE
+            
+        Returns:
+            dict: 調校結果，未調校時為空字典
+        """
+        tuned = cls.TUNED.get(model_size or cls.MODEL_SIZE, {})
+        return tuned if tuned.get("device") == cls.DEVICE else {}
+    
+    @classmethod
+    def get_decode_value(cls, key, model_size=None):
+        """
+        取得可由自動調校決定的解碼參數（beam_size / batch_size）
+        
+        全域設定仍為預設值時採用該模型的調校結果，使用者修改過的設定優先（同 compute_type）
+        
+        Args:
+            key: 設定鍵名，例如 "beam_size"
+            model_size: 模型大小，None 表示使用 MODEL_SIZE
+            
+        Returns:
+            設定值
+        """
+        value = getattr(cls, key.upper())
+        if value != ConfigManager.DEFAULT_SETTINGS[key]:
+            return value
+        return cls.get_tuned_settings(model_size).get(key, value)
+    
+    @classmethod
+    def get_model_kwargs(cls, model_size=None, min_workers=1) -> dict:
+        """
+        取得建立 WhisperModel 的參數（device、compute_type、cpu_threads、num_workers）
+        
+        Args:
+            model_size: 模型大小，None 表示使用 MODEL_SIZE
+            min_workers: 最少的模型副本數（多個執行緒共用同一模型時使用）
+            
+        Returns:
+            dict: 可直接傳給 WhisperModel 的關鍵字參數
+        """
+        tuned = cls.get_tuned_settings(model_size)
+        if cls.COMPUTE_TYPE_PREFERENCE != "auto":
+            # 設定檔明確指定的 compute_type 優先於調校結果
+            tuned = {k: v for k, v in tuned.items() if k != "compute_type"}
+        num_workers = max(min_workers, cls.NUM_WORKERS or tuned.get("num_workers", 1))
+        cpu_threads = cls.CPU_THREADS or tuned.get("cpu_threads", 0)
+
+        # 自動模式下，所有副本的執行緒總數不超過推論核心預算（保留核心給音訊與 UI）
+        if cls.DEVICE == "cpu" and not cls.CPU_THREADS:
+            from cpu_affinity import inference_thread_budget
+            per_worker = max(1, inference_thread_budget() // num_workers)
+            cpu_threads = min(cpu_threads, per_worker) if cpu_threads else per_worker
+
+        return {
+            "device": cls.DEVICE,
+            "compute_type": tuned.get("compute_type", cls.COMPUTE_TYPE),
+            "cpu_threads": cpu_threads,  # 0 = 由 CTranslate2 決定
+            "num_workers": num_workers,
+        }
+    
+    @classmethod
+    def reset_device(cls):
+        """清除已偵測的裝置設定，下次存取時依新的 device / compute_type 設定重新決定"""
+        for attr in _LazyDeviceConfig._DEVICE_ATTRS:
+            if attr in cls.__dict__:
+                delattr(cls, attr)
+    
     @classmethod
     def get_device_info_dict(cls):
         """取得裝置資訊"""
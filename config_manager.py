@@ -2,75 +2,258 @@
 """
 配置管理工具
 讓使用者可以輕鬆調整所有優化參數，無需修改代碼
+所有設定項的預設值、型別與範圍統一定義在 SETTINGS_SCHEMA
 """
+import copy
 import json
 import os
 
+from constants import ARBITRATION_MODES, SEGMENTATION_MODES, SUBTITLE_FORMATS
+
+# 設定變更的生效範圍
+SCOPE_DECODE = "decode"  # 下一次解碼 / 下一個檔案自動生效
+SCOPE_MODEL = "model"    # 需要重新建立模型（在背景載入後切換）
+
+COMPUTE_TYPES = ("auto", "int8", "int8_float32", "int8_float16", "int16", "float16", "float32")
+
+
+def _setting(default, scope=SCOPE_DECODE, types=None, minimum=None, maximum=None, choices=None, attr=None):
+    """
+    建立設定項規格
+
+    Args:
+        default: 預設值
+        scope: 生效範圍 (SCOPE_DECODE / SCOPE_MODEL)
+        types: 允許的型別，None 表示與預設值相同
+        minimum: 數值下限（超出時夾到邊界）
+        maximum: 數值上限（超出時夾到邊界）
+        choices: 允許的值（列表型設定則為每個元素允許的值）
+        attr: 對應的 Config 屬性名稱，None 表示鍵名轉大寫
+
+    Returns:
+        dict: 設定項規格
+    """
+    if types is None:
+        types = (float, int) if isinstance(default, float) else (type(default),)
+    return {
+        "default": default, "scope": scope, "types": types,
+        "min": minimum, "max": maximum, "choices": choices, "attr": attr,
+    }
+
+
+SETTINGS_SCHEMA = {
+    # 模型與裝置
+    "model_size": _setting("tiny", SCOPE_MODEL),
+    "device": _setting("auto", SCOPE_MODEL, choices=("auto", "cpu", "cuda"), attr="DEVICE_PREFERENCE"),
+    "compute_type": _setting("auto", SCOPE_MODEL, choices=COMPUTE_TYPES, attr="COMPUTE_TYPE_PREFERENCE"),
+    # 解碼
+    "language": _setting("zh", types=(str, type(None))),
+    "task": _setting("transcribe", choices=("transcribe", "translate")),
+    "beam_size": _setting(1, minimum=1, maximum=10),
+    "batch_size": _setting(16, minimum=1, maximum=256),
+    "vad_enabled": _setting(False),
+    "vad_min_silence_ms": _setting(300, minimum=0),
+    "vad_threshold": _setting(0.5, minimum=0.0, maximum=1.0),
+    "vad_min_speech_ms": _setting(250, minimum=0),
+    "vad_speech_pad_ms": _setting(400, minimum=0),
+    "condition_on_previous_text": _setting(False),
+    # Temperature 必須至少為 0.1，否則 faster-whisper 可能不會產生 clip_timestamps 導致轉錄失敗
+    "temperature": _setting(0.2, minimum=0.1, maximum=1.0),
+    # 字幕切分與輸出
+    "segmentation_mode": _setting("optimal", choices=SEGMENTATION_MODES),
+    "min_segment_duration": _setting(2.0, minimum=0.0),
+    "max_segment_duration": _setting(8.0, minimum=0.5),
+    "max_segment_chars": _setting(42, minimum=1),
+    "max_chars_per_second": _setting(17.0, minimum=1.0),
+    "output_formats": _setting(["srt"], choices=SUBTITLE_FORMATS),
+    # 執行緒與核心（CTranslate2 的執行緒在建立模型時決定）
+    "cpu_threads": _setting(0, SCOPE_MODEL, minimum=0),
+    "num_workers": _setting(0, SCOPE_MODEL, minimum=0),
+    "reserved_cores": _setting(1, SCOPE_MODEL, minimum=0),
+    "inference_affinity": _setting("", SCOPE_MODEL),
+    "numa_node": _setting(-1, SCOPE_MODEL, minimum=-1),
+    # 即時字幕進行中時如何讓出批次轉錄的 CPU (scheduler.py)
+    "arbitration_mode": _setting("throttle", choices=ARBITRATION_MODES),
+    "live_latency_budget": _setting(1.5, minimum=0.1),
+    # 本機轉錄服務 (transcription_server.py)，例如 "127.0.0.1:8765"，空字串 = 使用本程式載入的模型
+    "transcription_server": _setting(""),
+    # 字幕廣播埠號（OBS 瀏覽器來源開啟 http://127.0.0.1:<埠號>/），0 = 停用
+    "caption_broadcast_port": _setting(0, minimum=0, maximum=65535),
+    # 日誌資料夾（whisper_log.jsonl、transcription_log.txt），空字串 = 程式所在資料夾下的 logs/
+    "log_dir": _setting(""),
+    # 即時轉錄時將錄音壓縮保存到日誌資料夾的 live_sessions/（含每句的時間）
+    "live_archive": _setting(False),
+    # 閒置時以此模型重新轉錄保存的錄音並輸出 SRT，空字串 = 不重新轉錄
+    "live_repass_model": _setting("medium"),
+    # 沒有即時 / 檔案轉錄且 CPU 低於 IDLE_CPU_PERCENT 持續此秒數後才開始重新轉錄
+    "live_repass_idle_seconds": _setting(120.0, minimum=0.0),
+    # 執行指標: Prometheus 端點埠號（http://127.0.0.1:<埠號>/metrics）與 JSON 快照間隔（秒），0 = 停用
+    "metrics_port": _setting(0, minimum=0, maximum=65535),
+    "metrics_snapshot_interval": _setting(0.0, minimum=0.0),
+    # 記憶體預算 (MB)，0 = 實體記憶體的 75%；每個檔案開始前依預算決定批次大小、是否分段解碼與同時處理數
+    "memory_budget_mb": _setting(0, minimum=0),
+    # 分段解碼每段的秒數，0 = 只在超出記憶體預算時分段
+    "decode_chunk_seconds": _setting(0.0, minimum=0.0),
+    # 長度達此秒數的檔案改為串流解碼（邊解碼邊轉錄，記憶體與檔案長度無關），0 = 只在超出記憶體預算時
+    "stream_min_duration": _setting(1800.0, minimum=0.0),
+    # VAD 停用時略過長度達此秒數的靜音（以 clip_timestamps 只轉錄其餘部分），0 = 停用
+    "silence_trim_min_duration": _setting(3.0, minimum=0.0),
+    # 靜音略過的 RMS 閾值（約 -40 dBFS，遠低於一般說話音量）
+    "silence_trim_threshold": _setting(0.01, minimum=0.0, maximum=1.0),
+    # 在子行程中執行推論，原生錯誤不會讓 GUI 結束，也不與介面爭用 GIL
+    "inference_out_of_process": _setting(False, SCOPE_MODEL),
+    # 加入資料夾: 檔名 glob 樣式（空白 = 全部支援格式）、排除樣式、略過已有較新字幕的檔案、讀取音訊長度
+    "scan_include": _setting([]),
+    "scan_exclude": _setting([]),
+    "scan_skip_transcribed": _setting(True),
+    "scan_probe_duration": _setting(True),
+    # 自動調校結果 (autotune.py)
+    "tuned": _setting({}, SCOPE_MODEL),
+}
+
+
+def _validate_value(spec, value):
+    """
+    驗證單一設定值
+
+    Returns:
+        tuple: (是否有效, 修正後的值, 錯誤說明)
+    """
+    types = spec["types"]
+    # bool 是 int 的子類別，數值設定不接受 true/false
+    if isinstance(value, bool) and bool not in types:
+        return False, spec["default"], "型別錯誤"
+    if not isinstance(value, types):
+        return False, spec["default"], f"型別錯誤（應為 {'/'.join(t.__name__ for t in types)}）"
+    if isinstance(spec["default"], float):
+        value = float(value)
+
+    choices = spec["choices"]
+    if choices is not None:
+        items = value if isinstance(value, list) else [value]
+        invalid = [item for item in items if item not in choices]
+        if invalid:
+            return False, spec["default"], f"無效值 {invalid}（可用: {', '.join(map(str, choices))}）"
+
+    if spec["min"] is not None and value < spec["min"]:
+        return False, spec["min"], f"小於下限 {spec['min']}"
+    if spec["max"] is not None and value > spec["max"]:
+        return False, spec["max"], f"大於上限 {spec['max']}"
+    return True, value, None
+
 
 class ConfigManager:
     """配置管理器"""
     
     CONFIG_FILE = "whisper_settings.json"
     
-    DEFAULT_SETTINGS = {
-        "model_size": "tiny",
-        "language": "zh",
-        "beam_size": 1,
-        "batch_size": 16,
-        "vad_enabled": False,
-        "vad_min_silence_ms": 300,
-        "vad_threshold": 0.5,
-        "vad_min_speech_ms": 250,
-        "vad_speech_pad_ms": 400,
-        "condition_on_previous_text": False,
-        "temperature": 0.2
-    }
+    DEFAULT_SETTINGS = {key: spec["default"] for key, spec in SETTINGS_SCHEMA.items()}
+    
+    @classmethod
+    def default_settings(cls):
+        """取得預設值的副本（含列表/字典的深層複製）"""
+        return copy.deepcopy(cls.DEFAULT_SETTINGS)
+    
+    @classmethod
+    def validate_settings(cls, raw):
+        """
+        依 SETTINGS_SCHEMA 驗證設定
+        
+        無效的值改用預設值，超出範圍的數值夾到邊界，未知的鍵原樣保留
+        
+        Args:
+            raw: 從設定檔讀出的字典
+            
+        Returns:
+            tuple: (settings, errors)
+                - settings: 包含所有鍵的完整設定
+                - errors: 錯誤說明列表
+        """
+        settings = cls.default_settings()
+        errors = []
+        for key, value in raw.items():
+            spec = SETTINGS_SCHEMA.get(key)
+            if spec is None:
+                settings[key] = value
+                continue
+            valid, value, reason = _validate_value(spec, value)
+            if not valid:
+                errors.append(f"{key}: {reason}，改用 {value!r}")
+            settings[key] = value
+        return settings, errors
     
     @classmethod
-    def load_settings(cls):
-        """載入配置"""
-        if os.path.exists(cls.CONFIG_FILE):
-            try:
-                with open(cls.CONFIG_FILE, 'r', encoding='utf-8') as f:
-                    settings = json.load(f)
-                    # 合併預設值（確保所有鍵都存在）
-                    return {**cls.DEFAULT_SETTINGS, **settings}
-            except Exception as e:
-                print(f"載入配置失敗: {e}，使用預設值")
-                return cls.DEFAULT_SETTINGS.copy()
-        return cls.DEFAULT_SETTINGS.copy()
+    def load_settings(cls, path=None):
+        """載入並驗證配置"""
+        path = path or cls.CONFIG_FILE
+        if not os.path.exists(path):
+            return cls.default_settings()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            if not isinstance(raw, dict):
+                raise ValueError("設定檔內容必須是 JSON 物件")
+        except Exception as e:
+            print(f"載入配置失敗: {e}，使用預設值")
+            return cls.default_settings()
+        
+        settings, errors = cls.validate_settings(raw)
+        for error in errors:
+            print(f"[WARN] 設定 {error}")
+        return settings
     
     @classmethod
-    def save_settings(cls, settings):
-        """儲存配置"""
+    def save_settings(cls, settings, path=None):
+        """儲存配置（先寫入暫存檔再取代，避免監看端讀到寫到一半的檔案）"""
+        path = path or cls.CONFIG_FILE
+        tmp_path = f"{path}.tmp"
         try:
-            with open(cls.CONFIG_FILE, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(settings, f, indent=2, ensure_ascii=False)
-            print(f"✅ 配置已儲存到 {cls.CONFIG_FILE}")
+            os.replace(tmp_path, path)
+            print(f"✅ 配置已儲存到 {path}")
             return True
         except Exception as e:
             print(f"❌ 儲存配置失敗: {e}")
             return False
     
     @classmethod
-    def update_config_from_file(cls):
-        """從配置檔更新 Config 類別"""
-        settings = cls.load_settings()
+    def apply_to_config(cls, settings):
+        """
+        將設定寫入 Config 類別屬性
         
-        # 動態更新 Config
+        Args:
+            settings: 已驗證的完整設定
+        """
         from config import Config
-        Config.MODEL_SIZE = settings.get("model_size", "tiny")
-        Config.LANGUAGE = settings.get("language", "zh")
-        Config.BEAM_SIZE = settings.get("beam_size", 1)
-        Config.BATCH_SIZE = settings.get("batch_size", 16)
-        Config.VAD_ENABLED = settings.get("vad_enabled", True)
-        Config.VAD_MIN_SILENCE_MS = settings.get("vad_min_silence_ms", 300)
-        Config.VAD_THRESHOLD = settings.get("vad_threshold", 0.5)
-        Config.VAD_MIN_SPEECH_MS = settings.get("vad_min_speech_ms", 250)
-        Config.VAD_SPEECH_PAD_MS = settings.get("vad_speech_pad_ms", 400)
-        Config.CONDITION_ON_PREVIOUS_TEXT = settings.get("condition_on_previous_text", False)
-        Config.TEMPERATURE = settings.get("temperature", 0.0)
+        device_changed = False
+        for key, spec in SETTINGS_SCHEMA.items():
+            attr = spec["attr"] or key.upper()
+            if key in ("device", "compute_type") and getattr(Config, attr, None) != settings[key]:
+                device_changed = True
+            setattr(Config, attr, settings[key])
+        if device_changed:
+            Config.reset_device()
+    
+    @classmethod
+    def current_settings(cls):
+        """
+        從 Config 類別屬性取回目前的設定（例如傳給子行程，使其與本行程設定一致）
         
+        Returns:
+            dict: 完整設定
+        """
+        from config import Config
+        return {
+            key: copy.deepcopy(getattr(Config, spec["attr"] or key.upper()))
+            for key, spec in SETTINGS_SCHEMA.items()
+        }
+    
+    @classmethod
+    def update_config_from_file(cls):
+        """從配置檔更新 Config 類別"""
+        settings = cls.load_settings()
+        cls.apply_to_config(settings)
         return settings
     
     @classmethod
@@ -82,6 +265,7 @@ class ConfigManager:
         print("當前 Whisper 配置")
         print("=" * 60)
         print(f"模型大小: {settings['model_size']}")
+        print(f"裝置: {settings['device']} / 計算類型: {settings['compute_type']}")
         print(f"語言: {settings['language']}")
         print("\n【效能優化】")
         print(f"  Beam Size: {settings['beam_size']} (1=最快, 3=平衡, 5=最準確)")
@@ -93,6 +277,25 @@ class ConfigManager:
         print(f"  最小語音長度: {settings['vad_min_speech_ms']}ms")
         print(f"  靜音閾值: {settings['vad_min_silence_ms']}ms")
         print(f"  語音填充: {settings['vad_speech_pad_ms']}ms")
+        print("\n【字幕切分】")
+        print(f"  模式: {settings['segmentation_mode']} (optimal=最佳斷句, greedy=貪婪切分)")
+        print(f"  時長: {settings['min_segment_duration']}~{settings['max_segment_duration']} 秒")
+        print(f"  每條最多字元: {settings['max_segment_chars']}")
+        print(f"  閱讀速度上限: {settings['max_chars_per_second']} 字元/秒")
+        print(f"  輸出格式: {', '.join(settings['output_formats'])}")
+        print("\n【執行緒與核心】")
+        print(f"  推論執行緒: {settings['cpu_threads'] or '自動'} x {settings['num_workers'] or '自動'} 個模型副本")
+        print(f"  保留核心 (音訊/UI): {settings['reserved_cores']}")
+        print(f"  推論核心: {settings['inference_affinity'] or '自動'}")
+        print(f"  NUMA 節點: {settings['numa_node'] if settings['numa_node'] >= 0 else '不限'}")
+        print("\n【自動調校】")
+        if settings['tuned']:
+            for model_size, tuned in settings['tuned'].items():
+                print(f"  {model_size} ({tuned.get('device')}): {tuned.get('compute_type')}, "
+                      f"threads={tuned.get('cpu_threads')}, workers={tuned.get('num_workers')}, "
+                      f"beam={tuned.get('beam_size')}, RTF {tuned.get('rtf', 0):.3f} ({tuned.get('tuned_at')})")
+        else:
+            print("  尚未調校（執行 python autotune.py）")
         print("\n【其他】")
         print(f"  溫度: {settings['temperature']}")
         print("=" * 60 + "\n")
@@ -112,15 +315,21 @@ class ConfigManager:
             print("5. 語言設定")
             print("6. 檢視當前配置")
             print("7. 重置為預設值")
+            print("8. 自動調校 (實測最佳設定)")
+            print("9. 執行緒與核心")
             print("0. 儲存並退出")
             
-            choice = input("\n請選擇 (0-7): ").strip()
+            choice = input("\n請選擇 (0-9): ").strip()
+            tuned = settings.get('tuned', {}).get(settings['model_size'], {})
             
             if choice == "1":
                 print(f"\n當前 Beam Size: {settings['beam_size']}")
                 print("1 = 最快速度 (可能較不準確)")
                 print("3 = 平衡")
                 print("5 = 最準確 (較慢)")
+                if tuned:
+                    print(f"自動調校建議: {tuned.get('beam_size')} (RTF {tuned.get('rtf', 0):.3f}; "
+                          f"設定為預設值 {cls.DEFAULT_SETTINGS['beam_size']} 時採用)")
                 new_val = input("輸入新值 (1/3/5): ").strip()
                 if new_val in ["1", "3", "5"]:
                     settings['beam_size'] = int(new_val)
@@ -132,6 +341,9 @@ class ConfigManager:
                 print("16 = 預設")
                 print("32 = 快速")
                 print("64 = 最快 (需要更多記憶體)")
+                if tuned.get('batch_size'):
+                    print(f"自動調校建議: {tuned['batch_size']}（設定為預設值 "
+                          f"{cls.DEFAULT_SETTINGS['batch_size']} 時採用）")
                 new_val = input("輸入新值 (8/16/32/64): ").strip()
                 if new_val in ["8", "16", "32", "64"]:
                     settings['batch_size'] = int(new_val)
@@ -187,12 +399,42 @@ class ConfigManager:
                 
             elif choice == "7":
                 if input("確定重置為預設值? (y/n): ").lower() == 'y':
-                    settings = cls.DEFAULT_SETTINGS.copy()
+                    settings = cls.default_settings()
                     print("✅ 已重置")
                     
+            elif choice == "8":
+                from autotune import autotune, print_summary, save_tuned
+                model_size = settings['model_size']
+                audio = input("參考音訊檔路徑 (留空使用合成訊號): ").strip() or None
+                entry = autotune(model_size, audio_path=audio, batched=settings['vad_enabled'])
+                if entry:
+                    print_summary(model_size, entry)
+                    save_tuned(model_size, entry, settings)
+                    print("✅ 調校結果已更新（儲存後生效）")
+                else:
+                    print("❌ 調校失敗")
+                
+            elif choice == "9":
+                print("\n執行緒與核心:")
+                print(f"1. 推論執行緒 (每個副本): {settings['cpu_threads'] or '自動'}")
+                print(f"2. 模型副本數: {settings['num_workers'] or '自動'}")
+                print(f"3. 保留核心 (音訊/UI): {settings['reserved_cores']}")
+                print(f"4. 推論核心清單: {settings['inference_affinity'] or '自動'}")
+                print(f"5. NUMA 節點: {settings['numa_node']}")
+                sub = input("選擇要調整的 (1-5, 0返回): ").strip()
+                keys = {"1": "cpu_threads", "2": "num_workers", "3": "reserved_cores", "5": "numa_node"}
+                
+                if sub in keys:
+                    try:
+                        settings[keys[sub]] = int(input("輸入新值 (0=自動, NUMA -1=不限): "))
+                    except:
+                        print("❌ 無效值")
+                elif sub == "4":
+                    settings['inference_affinity'] = input("核心清單 (例如 2-7，留空=自動): ").strip()
+                
             elif choice == "0":
                 if cls.save_settings(settings):
-                    print("\n✅ 配置已儲存！重啟應用程式後生效。")
+                    print("\n✅ 配置已儲存！執行中的程式會自動套用（模型相關設定會在背景重新載入）。")
                 break
             
             else:
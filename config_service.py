@@ -0,0 +1,170 @@
+# coding: utf-8
+"""
+設定熱重載服務
+監看 whisper_settings.json，驗證後套用到 Config 並通知執行中的 Worker
+
+- 解碼參數 (beam_size、temperature、VAD 等) 在下一次解碼時自動生效，不需重新載入模型
+- 模型 / 裝置 / 計算類型 / 執行緒設定變更時，由 Worker 在背景載入新模型後切換
+"""
+import os
+import threading
+import traceback
+
+from config_manager import ConfigManager, SETTINGS_SCHEMA, SCOPE_MODEL
+from constants import CONFIG_POLL_INTERVAL
+from logging_utils import log_error
+
+
+def needs_model_reload(changes, model_size):
+    """
+    判斷設定變更是否需要重新建立指定大小的模型
+
+    model_size 本身的變更由使用端自行判斷（檔案轉錄的模型由工作參數決定）
+
+    Args:
+        changes: {鍵: (舊值, 新值)}
+        model_size: 目前載入的模型大小
+
+    Returns:
+        bool: 是否需要重新載入
+    """
+    for key, (old, new) in changes.items():
+        if key == "model_size" or SETTINGS_SCHEMA.get(key, {}).get("scope") != SCOPE_MODEL:
+            continue
+        if key == "tuned":
+            # 只有該模型的調校結果變更才需要重新載入
+            if (old or {}).get(model_size) != (new or {}).get(model_size):
+                return True
+            continue
+        return True
+    return False
+
+
+class ConfigService:
+    """設定檔監看與熱重載服務"""
+
+    def __init__(self, path=None, poll_interval=CONFIG_POLL_INTERVAL):
+        """
+        Args:
+            path: 設定檔路徑，None 表示 ConfigManager.CONFIG_FILE
+            poll_interval: 檢查間隔（秒）
+        """
+        self.path = path or ConfigManager.CONFIG_FILE
+        self.poll_interval = poll_interval
+        self._listeners = []
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._settings = ConfigManager.load_settings(self.path)
+        self._stamp = self._file_stamp()
+
+    @property
+    def settings(self):
+        """目前套用中的設定（副本）"""
+        with self._lock:
+            return dict(self._settings)
+
+    def add_listener(self, callback):
+        """
+        註冊設定變更回調
+
+        Args:
+            callback: callback(changes)，changes 為 {鍵: (舊值, 新值)}；
+                      可能在監看執行緒中被呼叫，Qt 元件請透過 signal 轉回主執行緒
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """移除設定變更回調"""
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def start(self):
+        """啟動背景監看執行緒"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止監看"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval * 2)
+            self._thread = None
+
+    def check_now(self):
+        """
+        立即檢查設定檔是否變更
+
+        Returns:
+            dict: 套用的變更，沒有變更時為空字典
+        """
+        stamp = self._file_stamp()
+        with self._lock:
+            if stamp == self._stamp:
+                return {}
+            self._stamp = stamp
+        return self._apply(ConfigManager.load_settings(self.path))
+
+    def update(self, changes, save=True):
+        """
+        由程式內部更新設定（例如 GUI 設定分頁），驗證後儲存、套用並通知
+
+        Args:
+            changes: 要更新的鍵值
+            save: 是否寫入設定檔
+
+        Returns:
+            dict: 實際變更的 {鍵: (舊值, 新值)}
+        """
+        with self._lock:
+            settings, errors = ConfigManager.validate_settings({**self._settings, **changes})
+            for error in errors:
+                print(f"[WARN] 設定 {error}")
+            if save and ConfigManager.save_settings(settings, self.path):
+                # 記錄自己寫入的時間戳，避免監看執行緒重複套用
+                self._stamp = self._file_stamp()
+        return self._apply(settings)
+
+    def _file_stamp(self):
+        """設定檔的 (修改時間, 大小)，檔案不存在時為 None"""
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _apply(self, settings):
+        """套用新設定並通知監聽者"""
+        with self._lock:
+            old = self._settings
+            changes = {
+                key: (old.get(key), value)
+                for key, value in settings.items()
+                if old.get(key) != value
+            }
+            if not changes:
+                return {}
+            self._settings = settings
+            ConfigManager.apply_to_config(settings)
+            listeners = list(self._listeners)
+
+        print(f"[INFO] 設定已更新: {', '.join(sorted(changes))}")
+        for callback in listeners:
+            try:
+                callback(changes)
+            except Exception as e:
+                log_error(f"設定變更通知失敗: {e}\n{traceback.format_exc()}")
+        return changes
+
+    def _watch(self):
+        """背景輪詢設定檔"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check_now()
+            except Exception as e:
+                log_error(f"設定檔監看失敗: {e}\n{traceback.format_exc()}")
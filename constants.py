@@ -18,28 +18,132 @@ SUBTITLE_FONT_FAMILY = "Microsoft JhengHei"
 # 自動清除延遲（毫秒）
 AUTO_CLEAR_DELAY = 8000
 
+# 浮動字幕最短重繪間隔（毫秒），間隔內的更新合併為一次繪製
+OVERLAY_FRAME_INTERVAL = 100
+
+# 即時轉錄暫定文字的結尾標記（語句尚未結束）
+INTERIM_SUFFIX = " ..."
+
 # === 檔案格式 ===
 SUPPORTED_AUDIO_FORMATS = ('.mp3', '.mp4', '.wav', '.m4a', '.mkv')
 AUDIO_FILTER_STRING = "音訊/影片 (*.mp3 *.mp4 *.wav *.m4a *.mkv)"
 
+# === 資料夾掃描 ===
+SCAN_CHUNK_SIZE = 500  # 每批加入列表的檔案數
+SCAN_PROBE_WORKERS = 4  # 平行讀取音訊長度的執行緒數（網路磁碟上主要是 I/O 等待）
+
 # === 日誌檔案 ===
-ERROR_LOG_FILE = "error_log.txt"
-TRANSCRIPTION_STATS_FILE = "transcription_stats.csv"
+LOG_DIR_NAME = "logs"  # 未設定 log_dir 時，日誌放在程式所在資料夾下的此資料夾
+APP_LOG_FILE = "whisper_log.jsonl"  # 錯誤與事件 (JSON lines)
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 單一日誌檔超過此大小時輪替
+LOG_BACKUP_COUNT = 3  # 保留的舊日誌檔數
+TRANSCRIPTION_STATS_FILE = "transcription_stats.csv"  # 舊版統計 (CSV)，開啟統計資料庫時自動匯入
+STATS_DB_FILE = "transcription_stats.db"
+STATS_ETA_SAMPLES = 50  # 預估時間使用最近幾筆同模型的紀錄
+RSS_SAMPLE_INTERVAL = 0.2  # 秒，轉錄期間取樣峰值記憶體的間隔
 TRANSCRIPTION_LOG_FILE = "transcription_log.txt"
 
+# === 效能分析 (main.py --profile) ===
+PROFILE_DIR = "profiles"
+PROFILE_SAMPLE_INTERVAL = 0.005  # 秒，取樣模式擷取呼叫堆疊的間隔
+PROFILE_MEMORY_TOP = 25  # 每個檔案的記憶體分析列出配置增加最多的幾行
+PROFILE_TRACEMALLOC_FRAMES = 1  # tracemalloc 每筆配置保留的堆疊深度（只依行號統計）
+
+# === 工作佇列 ===
+JOB_QUEUE_DB_FILE = "whisper_jobs.db"
+JOB_MAX_ATTEMPTS = 3  # 每個檔案最多嘗試次數
+JOB_RETRY_BASE_DELAY = 30.0  # 秒，第 n 次失敗後延遲 base * 2^(n-1)
+JOB_RETRY_MAX_DELAY = 3600.0  # 秒
+JOB_POLL_INTERVAL = 2.0  # 秒，無介面執行器等待新工作的輪詢間隔
+CONFIG_POLL_INTERVAL = 1.0  # 秒，設定檔變更的檢查間隔
+
+# === 即時工作階段錄音與閒置時重新轉錄 ===
+LIVE_ARCHIVE_DIR_NAME = "live_sessions"  # 錄音存放在日誌資料夾下的此資料夾
+LIVE_ARCHIVE_CODEC = "libopus"  # 語音用 Opus，16 kHz 單聲道約 24 kbps（一小時約 11 MB）
+LIVE_ARCHIVE_FALLBACK_CODEC = "flac"  # PyAV 沒有 libopus 時改用無損壓縮
+LIVE_ARCHIVE_BITRATE = 24000
+LIVE_ARCHIVE_PHRASES_SUFFIX = ".phrases.jsonl"  # 與錄音同名的語句時間檔
+LIVE_REPASS_DB_FILE = "whisper_repass.db"  # 重新轉錄工作佇列（與檔案轉錄的佇列分開，不出現在檔案列表）
+LIVE_REPASS_PRIORITY = -1
+IDLE_POLL_INTERVAL = 5.0  # 秒，檢查是否閒置的間隔
+IDLE_CPU_PERCENT = 25.0  # 系統 CPU 使用率低於此值才算閒置
+
+# === 即時 / 批次資源仲裁 ===
+ARBITRATION_MODES = ("throttle", "pause", "off")
+ARBITER_INITIAL_THROTTLE = 1.0  # 即時字幕開始時，批次每工作 1 秒休息 1 秒
+ARBITER_MAX_THROTTLE = 8.0  # 最多降到約 1/9 的 CPU 時間
+ARBITER_MAX_SLEEP = 5.0  # 秒，單次片段邊界最長休息時間
+
+# === 本機轉錄服務 ===
+SERVER_HOST = "127.0.0.1"  # 預設只接受本機連線
+SERVER_PORT = 8765
+SERVER_MAX_JSON_BYTES = 1 << 20  # JSON 請求內容上限
+SERVER_LIVE_SLOTS = 2  # 可同時與檔案工作並行的即時工作階段數
+
+# === 字幕廣播 (OBS 瀏覽器來源 / 第二螢幕) ===
+CAPTION_BROADCAST_HOST = "127.0.0.1"
+CAPTION_CLIENT_QUEUE = 64  # 每個連線最多暫存的事件數，超過時捨棄最舊的事件
+CAPTION_HEARTBEAT = 15.0  # 秒，沒有字幕時送出心跳的間隔
+MODEL_REGISTRY_MAX_MODELS = 2  # 轉錄服務同時保留的模型數
+
+# === 執行指標 (Prometheus / JSON 快照) ===
+METRICS_HOST = "127.0.0.1"
+METRICS_SNAPSHOT_FILE = "whisper_metrics.json"
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)  # 秒，延遲直方圖的區間上限
+
+# === 記憶體預算 ===
+MEMORY_BUDGET_FRACTION = 0.75  # 未設定 memory_budget_mb 時，預算為實體記憶體的此比例
+# 模型參數量（百萬），依 compute_type 的每參數位元組數換算權重大小
+MODEL_PARAMS_MILLIONS = {
+    "tiny": 39, "base": 74, "small": 244, "medium": 769,
+    "large-v1": 1550, "large-v2": 1550, "large-v3": 1550, "large-v3-turbo": 809, "distil-large-v3": 756,
+}
+MODEL_RUNTIME_OVERHEAD_MB = 300  # CTranslate2 執行環境與程式本身
+# 批次中每個 30 秒片段的編碼器 / 解碼器暫存 (MB)，大致與模型寬度成正比
+MODEL_ACTIVATION_MB = {
+    "tiny": 25, "base": 35, "small": 60, "medium": 110,
+    "large-v1": 160, "large-v2": 160, "large-v3": 160, "large-v3-turbo": 160, "distil-large-v3": 160,
+}
+AUDIO_BYTES_PER_SECOND = 16000 * 4  # 16 kHz float32
+AUDIO_MEMORY_FACTOR_BATCHED = 2.0  # 批次模式：解碼暫存 + 音訊陣列（特徵依 VAD 片段計算）
+AUDIO_MEMORY_FACTOR_SEQUENTIAL = 4.5  # 標準模式：另外對整段音訊計算 STFT 與 Mel 特徵
+DECODE_CHUNK_SECONDS = 600.0  # 超出預算時每段解碼的音訊長度
+DECODE_CHUNK_SEARCH_SECONDS = 5.0  # 在每段結尾前此範圍內找最安靜的位置切開，避免切斷單字
+STREAM_OVERLAP_SECONDS = 3.0  # 串流解碼相鄰兩窗在切點前後重疊的秒數（避免切點附近的單字缺少上下文）
+STREAM_FIRST_WINDOW_SECONDS = 30.0  # 串流解碼第一個窗的長度，較短可讓第一句字幕更早出現
+
+# === 靜音略過（VAD 停用時） ===
+SILENCE_TRIM_FRAME_SECONDS = 0.02  # 計算 RMS 的區塊長度
+SILENCE_TRIM_PADDING_SECONDS = 0.5  # 每段略過的靜音前後保留的秒數（避免切掉輕聲的開頭與結尾）
+
+# === 行程外推論 ===
+INFERENCE_SHM_SECONDS = 60.0  # 共享音訊緩衝區的初始容量（秒），較長的語句會自動擴充
+INFERENCE_RESTART_LIMIT = 3  # 推論子行程在 INFERENCE_RESTART_WINDOW 內最多重新啟動次數
+INFERENCE_RESTART_WINDOW = 60.0  # 秒
+INFERENCE_POLL_INTERVAL = 0.5  # 秒，等待結果時檢查子行程是否存活的間隔
+
 # === UI 樣式 ===
 PRIMARY_BUTTON_STYLE = "background-color: #4CAF50; color: white; font-size: 16px; padding: 10px;"
 SECONDARY_BUTTON_STYLE = "background-color: #2196F3; color: white; font-size: 16px; padding: 10px;"
 DANGER_BUTTON_STYLE = "background-color: #F44336; color: white; font-size: 16px; padding: 10px;"
 INFO_LABEL_STYLE = "background-color: #E3F2FD; padding: 8px; border-radius: 4px; font-weight: bold;"
 SUBTITLE_STYLE = "color: white; background-color: rgba(0, 0, 0, 160); border-radius: 12px; padding: 12px;"
+FILE_LIST_FLUSH_INTERVAL = 100  # 毫秒，檔案列表合併狀態更新後重繪的間隔
 
 # === 音訊處理 ===
 DEFAULT_SAMPLE_RATE = 16000
 DEFAULT_CHANNELS = 1
 AUDIO_SLEEP_INTERVAL = 0.05  # 秒
+LIVE_BLOCK_SECONDS = 0.1  # 秒，轉錄服務即時工作階段計算音量的區塊長度
 
 # === 片段切分參數 ===
 MIN_SEGMENT_DURATION = 2.0  # 秒
 MAX_SEGMENT_DURATION = 8.0  # 秒
 PAUSE_PUNCTUATION = ('，', '。', '？', '！', ',', '.', '?', '!')
+SENTENCE_END_PUNCTUATION = ('。', '？', '！', '.', '?', '!')
+MAX_SEGMENT_CHARS = 42  # 每個字幕最多字元數
+MAX_CHARS_PER_SECOND = 17.0  # 閱讀速度上限（字元/秒），超過時加罰
+SEGMENTATION_MODES = ("optimal", "greedy")  # optimal: 動態規劃最佳斷句; greedy: 逐字貪婪切分
+
+# 字幕輸出格式
+SUBTITLE_FORMATS = ("srt", "vtt", "tsv", "json")
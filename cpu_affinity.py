@@ -0,0 +1,182 @@
+# coding: utf-8
+"""
+CPU 親和性 (affinity) 控制
+將推論執行緒與音訊擷取 / UI 執行緒分配到不同的核心，避免 CTranslate2 佔滿所有核心
+
+平台差異:
+- Linux: os.sched_setaffinity(0, ...) 只作用於呼叫的執行緒，之後建立的執行緒（CTranslate2
+  的運算執行緒、PortAudio 的回調執行緒）會繼承該設定
+- Windows: SetThreadAffinityMask 只作用於目前執行緒，新執行緒不會繼承，主要依靠 cpu_threads 預算
+- macOS: 不支援親和性設定，只套用 cpu_threads 預算
+"""
+import contextlib
+import os
+import sys
+
+from config import Config
+from resource_utils import physical_cpu_count
+
+_WINDOWS = sys.platform == "win32"
+
+
+def parse_cpu_list(text):
+    """
+    解析 CPU 清單字串（與 Linux cpulist 格式相同）
+
+    Args:
+        text: 例如 "0-3,6"
+
+    Returns:
+        list[int]: 排序後的 CPU 編號
+    """
+    cpus = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def available_cpus():
+    """目前行程允許使用的 CPU"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_node_cpus(node):
+    """
+    取得 NUMA 節點的 CPU（僅 Linux）
+
+    Args:
+        node: NUMA 節點編號
+
+    Returns:
+        list[int]: CPU 編號，無法取得時為空列表
+    """
+    try:
+        with open(f"/sys/devices/system/node/node{int(node)}/cpulist", encoding="utf-8") as f:
+            return parse_cpu_list(f.read())
+    except (OSError, ValueError):
+        return []
+
+
+def plan_cpu_sets():
+    """
+    依 Config 規劃保留核心與推論核心
+
+    - 保留核心: 允許 CPU 中的前 RESERVED_CORES 個，供音訊擷取與 UI 使用
+    - 推論核心: INFERENCE_AFFINITY 指定的清單 > NUMA_NODE 的 CPU > 其餘的允許 CPU
+
+    Returns:
+        tuple: (reserved_cpus, inference_cpus)，不需要限制時 inference_cpus 為空列表
+    """
+    allowed = available_cpus()
+    reserved_count = min(max(0, int(Config.RESERVED_CORES)), len(allowed) - 1)
+    reserved = allowed[:reserved_count]
+
+    if Config.INFERENCE_AFFINITY:
+        inference = [c for c in parse_cpu_list(Config.INFERENCE_AFFINITY) if c in allowed]
+    elif Config.NUMA_NODE is not None and Config.NUMA_NODE >= 0:
+        inference = [c for c in numa_node_cpus(Config.NUMA_NODE) if c in allowed and c not in reserved]
+    else:
+        inference = []
+    if not inference:
+        inference = [c for c in allowed if c not in reserved]
+
+    if not reserved and len(inference) == len(allowed):
+        # 沒有保留核心也沒有指定親和性，不需要限制
+        inference = []
+    return reserved, inference
+
+
+def inference_thread_budget():
+    """
+    推論可用的執行緒數：推論核心數，並且不超過實體核心數扣除保留核心
+
+    Returns:
+        int: 至少為 1
+    """
+    reserved, inference = plan_cpu_sets()
+    budget = physical_cpu_count() - len(reserved)
+    if inference:
+        budget = min(budget, len(inference))
+    return max(1, budget)
+
+
+def get_thread_affinity():
+    """
+    取得目前執行緒的 CPU 親和性
+
+    Returns:
+        list[int] | None: CPU 編號，平台不支援時為 None
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return None
+
+
+def set_thread_affinity(cpus):
+    """
+    設定目前執行緒的 CPU 親和性
+
+    Args:
+        cpus: CPU 編號列表
+
+    Returns:
+        bool: 是否設定成功
+    """
+    if not cpus:
+        return False
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+            return True
+        if _WINDOWS:
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentThread.restype = ctypes.c_void_p
+            kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+            # 只處理第一個處理器群組（64 個邏輯處理器）
+            mask = sum(1 << c for c in cpus if c < 64)
+            return bool(mask) and kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) != 0
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"[WARN] 無法設定 CPU 親和性 {cpus}: {e}")
+    return False
+
+
+@contextlib.contextmanager
+def thread_affinity(cpus):
+    """
+    暫時將目前執行緒限制在指定 CPU（離開時還原）
+
+    在此區塊內建立的執行緒（Linux）會繼承這個親和性，
+    例如在保留核心上開啟 PortAudio 串流，回調執行緒就會留在保留核心
+
+    Args:
+        cpus: CPU 編號列表，空列表表示不限制
+    """
+    previous = get_thread_affinity()
+    changed = set_thread_affinity(cpus)
+    try:
+        yield changed
+    finally:
+        if changed:
+            set_thread_affinity(previous or available_cpus())
+
+
+def pin_inference_thread():
+    """
+    將目前執行緒限制在推論核心（在建立模型之前呼叫，CTranslate2 的執行緒會繼承）
+
+    Returns:
+        bool: 是否有套用親和性
+    """
+    _, inference = plan_cpu_sets()
+    return set_thread_affinity(inference)
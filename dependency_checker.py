@@ -22,6 +22,7 @@ class DependencyChecker:
     # 可選的依賴套件
     OPTIONAL_DEPENDENCIES = {
         "keyboard": "全域快捷鍵 (F2) 支援",
+        "psutil": "記憶體量測 (自動調校、Windows 峰值記憶體)",
     }
     
     @classmethod
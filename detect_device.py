@@ -2,25 +2,70 @@
 裝置偵測工具
 自動偵測系統可用的運算裝置 (CUDA GPU / CPU)
 並選擇最佳的 device 和 compute_type
+
+透過 CTranslate2（faster-whisper 的推論後端）偵測，不需要載入 PyTorch
 """
-import torch
+import functools
+import shutil
+import subprocess
+
+
+def _cuda_device_count():
+    """取得 CTranslate2 可用的 CUDA 裝置數量（無 CUDA 支援時為 0）"""
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count()
+    except Exception:
+        return 0
+
+
+def _query_nvidia_smi():
+    """
+    透過 nvidia-smi 取得第一張 GPU 的名稱、記憶體與驅動版本
+
+    Returns:
+        dict: 查詢結果，nvidia-smi 不可用時為空字典
+    """
+    if shutil.which("nvidia-smi") is None:
+        return {}
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name,memory.total,driver_version", "--format=csv,noheader,nounits", "-i", "0"],
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+        name, memory_mb, driver = [part.strip() for part in output.split(",")]
+        return {
+            "device_name": name,
+            "total_memory_gb": round(float(memory_mb) / 1024, 2),
+            "driver_version": driver,
+        }
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return {}
 
 
+@functools.lru_cache(maxsize=None)
 def get_optimal_device():
     """
-    偵測並返回最佳運算裝置配置
-    
+    偵測並返回最佳運算裝置配置（結果會被快取）
+
     Returns:
         tuple: (device, compute_type, device_name)
             - device: 'cuda' 或 'cpu'
             - compute_type: 'float16' (GPU) 或 'int8' (CPU)
             - device_name: 裝置描述字串
     """
-    if torch.cuda.is_available():
+    device_count = _cuda_device_count()
+    if device_count > 0:
         # CUDA GPU 可用
+        import ctranslate2
         device = "cuda"
-        compute_type = "float16"
-        device_name = f"CUDA GPU: {torch.cuda.get_device_name(0)}"
+        supported = ctranslate2.get_supported_compute_types("cuda")
+        # 舊款 GPU 不支援 float16 時退回 int8_float32
+        compute_type = "float16" if "float16" in supported else "int8_float32"
+        # 以 nvidia-smi 取得 GPU 型號，無法查詢時使用通用名稱
+        device_name = _query_nvidia_smi().get("device_name", "CUDA GPU")
+        if device_count > 1:
+            device_name += f" x{device_count}"
         return device, compute_type, device_name
     else:
         # 僅 CPU 可用
@@ -33,22 +78,23 @@ def get_optimal_device():
 def get_device_info():
     """
     取得詳細的裝置資訊
-    
+
     Returns:
         dict: 包含裝置資訊的字典
     """
+    device_count = _cuda_device_count()
     info = {
-        "cuda_available": torch.cuda.is_available(),
-        "device_count": torch.cuda.device_count() if torch.cuda.is_available() else 0,
+        "cuda_available": device_count > 0,
+        "device_count": device_count,
     }
-    
+
     if info["cuda_available"]:
-        info["device_name"] = torch.cuda.get_device_name(0)
-        info["cuda_version"] = torch.version.cuda
-        # 取得 GPU 記憶體資訊 (以 GB 為單位)
-        total_memory = torch.cuda.get_device_properties(0).total_memory / (1024**3)
-        info["total_memory_gb"] = round(total_memory, 2)
-    
+        import ctranslate2
+        info["ctranslate2_version"] = ctranslate2.__version__
+        info["compute_types"] = sorted(ctranslate2.get_supported_compute_types("cuda"))
+        # GPU 名稱與記憶體資訊 (以 GB 為單位)
+        info.update(_query_nvidia_smi())
+
     return info
 
 
@@ -60,7 +106,7 @@ if __name__ == "__main__":
     print(f"計算類型: {compute_type}")
     print(f"裝置名稱: {device_name}")
     print()
-    
+
     print("=== 詳細資訊 ===")
     info = get_device_info()
     for key, value in info.items():
@@ -63,3 +63,54 @@ class SubtitleGenerationError(WhisperBaseException):
     - 無法創建輸出檔案
     """
     pass
+
+
+class ClipTimestampsError(TranscriptionError):
+    """faster-whisper 找不到 clip timestamps
+    
+    使用情境：
+    - 停用 VAD 且 Temperature 低於 0.1
+    - 批次處理模式未提供 VAD 或 clip_timestamps
+    """
+    pass
+
+
+class JobQueueError(WhisperBaseException):
+    """工作佇列錯誤異常
+    
+    使用情境：
+    - 佇列資料庫無法開啟或已損壞
+    - 指定的工作不存在
+    - 工作狀態轉換不合法
+    """
+    pass
+
+
+class TranscriptionServiceError(WhisperBaseException):
+    """本機轉錄服務錯誤異常
+    
+    使用情境：
+    - 無法連線到轉錄服務
+    - 服務回傳錯誤狀態
+    - 即時串流中斷
+    """
+    pass
+
+
+class InferenceProcessError(WhisperBaseException):
+    """推論子行程錯誤異常
+    
+    使用情境：
+    - 子行程在處理請求時崩潰，重新啟動後仍然失敗
+    - 子行程短時間內反覆崩潰
+    """
+    pass
+
+
+class StatsStoreError(WhisperBaseException):
+    """轉錄統計資料庫錯誤異常
+    
+    使用情境：
+    - 統計資料庫無法開啟或已損壞
+    """
+    pass
@@ -0,0 +1,219 @@
+# coding: utf-8
+"""
+資料夾掃描
+以 os.scandir 走訪資料夾並篩選可轉錄的媒體檔案（供 GUI 的背景掃描與批次執行器使用）
+
+- 迭代式走訪，結果以產生器逐一回傳，呼叫端可分批顯示或隨時取消
+- include / exclude 為 glob 樣式：include 比對檔名，exclude 比對檔名或相對路徑（符合的資料夾整個略過）
+- 可略過已轉錄的檔案（同名 .srt 比媒體檔新）
+- 音訊長度以執行緒池平行讀取檔頭（網路磁碟上延遲主要是 I/O 等待）
+"""
+import contextlib
+import fnmatch
+import os
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from constants import SUPPORTED_AUDIO_FORMATS, SCAN_CHUNK_SIZE, SCAN_PROBE_WORKERS
+
+
+class ScanStats:
+    """掃描統計（掃描進行中可讀取）"""
+
+    def __init__(self):
+        self.found = 0  # 符合條件的檔案
+        self.skipped = 0  # 已有較新字幕而略過的檔案
+        self.errors = 0  # 無法讀取的資料夾
+        self.directories = 0  # 已走訪的資料夾
+
+
+def _matches(patterns, name, rel_path):
+    """檔名或相對路徑是否符合任一 glob 樣式（不分大小寫）"""
+    name = name.lower()
+    rel_path = rel_path.replace(os.sep, "/").lower()
+    return any(
+        fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(rel_path, pattern)
+        for pattern in patterns
+    )
+
+
+def has_newer_subtitle(path, media_mtime=None):
+    """
+    同名 .srt 是否存在且不比媒體檔舊
+
+    Args:
+        path: 媒體檔案路徑
+        media_mtime: 媒體檔的修改時間（已取得時傳入，避免重複 stat）
+
+    Returns:
+        bool
+    """
+    try:
+        srt_mtime = os.stat(os.path.splitext(path)[0] + ".srt").st_mtime
+        if media_mtime is None:
+            media_mtime = os.stat(path).st_mtime
+    except OSError:
+        return False
+    return srt_mtime >= media_mtime
+
+
+def iter_media_files(root, include=None, exclude=None, skip_transcribed=False,
+                     extensions=SUPPORTED_AUDIO_FORMATS, should_stop=None, stats=None):
+    """
+    走訪資料夾，逐一回傳符合條件的媒體檔案
+
+    Args:
+        root: 資料夾路徑
+        include: 檔名 glob 樣式列表（例如 ["*.mp3", "lecture_*"]），空白表示全部
+        exclude: 排除的 glob 樣式列表，比對檔名或相對於 root 的路徑
+        skip_transcribed: 略過同名 .srt 比媒體檔新的檔案
+        extensions: 允許的副檔名
+        should_stop: 可選的取消判斷函數，回傳 True 時停止走訪
+        stats: 可選的 ScanStats，掃描過程中更新
+
+    Yields:
+        str: 檔案的絕對路徑（每個資料夾內依名稱排序）
+    """
+    include = [pattern.lower() for pattern in include or []]
+    exclude = [pattern.lower() for pattern in exclude or []]
+    stats = stats if stats is not None else ScanStats()
+    root = os.path.abspath(root)
+    stack = [root]
+    while stack:
+        if should_stop is not None and should_stop():
+            return
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            stats.errors += 1
+            print(f"[WARN] 無法讀取資料夾 {directory}: {e}")
+            continue
+        stats.directories += 1
+
+        subdirs = []
+        for entry in entries:
+            rel_path = os.path.relpath(entry.path, root)
+            if exclude and _matches(exclude, entry.name, rel_path):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            if not entry.name.lower().endswith(extensions):
+                continue
+            if include and not _matches(include, entry.name, rel_path):
+                continue
+            if skip_transcribed:
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    mtime = None
+                if has_newer_subtitle(entry.path, mtime):
+                    stats.skipped += 1
+                    continue
+            stats.found += 1
+            yield entry.path
+        # 反向推入堆疊，使子資料夾依名稱順序走訪
+        stack.extend(reversed(subdirs))
+
+
+def iter_chunks(paths, chunk_size=SCAN_CHUNK_SIZE):
+    """
+    將路徑分批
+
+    Yields:
+        list[str]: 最多 chunk_size 個路徑
+    """
+    chunk = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def probe_duration(path):
+    """
+    讀取音訊長度（只解析檔頭，不解碼）
+
+    使用 PyAV（faster-whisper 的依賴）；未安裝時只支援 WAV
+
+    Returns:
+        float | None: 秒數，無法讀取時為 None
+    """
+    try:
+        import av
+    except ImportError:
+        av = None
+
+    if av is not None:
+        try:
+            with av.open(path, metadata_errors="ignore") as container:
+                if container.duration:
+                    return container.duration / av.time_base
+                stream = next(iter(container.streams.audio), None)
+                if stream is not None and stream.duration and stream.time_base:
+                    return float(stream.duration * stream.time_base)
+        except Exception:
+            return None
+        return None
+
+    if path.lower().endswith(".wav"):
+        try:
+            with contextlib.closing(wave.open(path, "rb")) as f:
+                return f.getnframes() / f.getframerate()
+        except (OSError, EOFError, wave.Error):
+            return None
+    return None
+
+
+class DurationProber:
+    """以執行緒池平行讀取音訊長度"""
+
+    def __init__(self, workers=SCAN_PROBE_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="DurationProbe")
+        self._futures = []
+
+    def submit(self, paths):
+        """加入要讀取長度的檔案"""
+        self._futures.extend((path, self._executor.submit(probe_duration, path)) for path in paths)
+
+    def collect(self, wait=False):
+        """
+        取出已完成的結果
+
+        Args:
+            wait: 等待所有已加入的檔案完成
+
+        Returns:
+            list[tuple]: [(path, duration)]，無法讀取的檔案不列入
+        """
+        results = []
+        remaining = []
+        for path, future in self._futures:
+            if wait or future.done():
+                duration = future.result()
+                if duration:
+                    results.append((path, duration))
+            else:
+                remaining.append((path, future))
+        self._futures = remaining
+        return results
+
+    def close(self, cancel=False):
+        """
+        結束執行緒池
+
+        Args:
+            cancel: 捨棄尚未開始的工作
+        """
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+        self._futures = []
@@ -0,0 +1,360 @@
+# coding: utf-8
+"""
+行程外推論
+在受監控的子行程中執行模型，GUI 行程只負責音訊與介面
+
+- 音訊透過 multiprocessing.shared_memory 傳遞：父行程寫入共享緩衝區，子行程以 NumPy 視圖直接讀取，不經序列化
+- 請求與結果透過 Pipe 傳遞（只有參數與文字）
+- 子行程崩潰（例如 CTranslate2 原生錯誤）不會帶走 GUI，會自動重新啟動並重試一次
+- 檔案轉錄在子行程執行 transcribe_file，片段邊界的資源仲裁透過 Pipe 轉回父行程處理
+
+InferenceProcess 提供與 WhisperModel 相同的 transcribe(audio, **params) 介面，可直接取代即時轉錄的模型
+"""
+import multiprocessing
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from config import Config
+from config_manager import ConfigManager
+from constants import (
+    INFERENCE_SHM_SECONDS, INFERENCE_RESTART_LIMIT, INFERENCE_RESTART_WINDOW, INFERENCE_POLL_INTERVAL
+)
+from exceptions import (
+    ModelLoadError, TranscriptionError, ClipTimestampsError, InferenceProcessError, SubtitleGenerationError
+)
+from logging_utils import log_error
+
+MODE_LIVE = "live"  # 即時轉錄：傳入音訊，回傳片段文字
+MODE_FILE = "file"  # 檔案轉錄：傳入檔案路徑，回傳 transcribe_file 的結果
+
+# 子行程回傳的錯誤類別名稱 -> 父行程重新拋出的例外
+_ERROR_TYPES = {
+    "ClipTimestampsError": ClipTimestampsError,
+    "ModelLoadError": ModelLoadError,
+    "SubtitleGenerationError": SubtitleGenerationError,
+}
+
+# 與 faster-whisper Segment 相容的欄位（即時轉錄只用到 text）
+Segment = namedtuple("Segment", ["start", "end", "text"])
+
+
+def _attach_shared_memory(name):
+    """
+    連接父行程建立的共享記憶體，只由父行程追蹤與 unlink
+
+    子行程的 resource_tracker 若也登記這個區段，子行程結束時會回報洩漏並可能在父行程仍使用時 unlink
+
+    Args:
+        name: SharedMemory 名稱
+
+    Returns:
+        SharedMemory
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _child_main(conn, mode, model_size, settings, model_factory=None):
+    """
+    子行程進入點：載入模型後依序處理請求
+
+    Args:
+        conn: Pipe 的子行程端
+        mode: MODE_LIVE 或 MODE_FILE
+        model_size: 模型大小
+        settings: 父行程目前的設定（確保子行程與父行程使用相同設定）
+        model_factory: 可選的無參數模型建立函數（取代 WhisperModel，例如基準測試的替身模型）
+    """
+    from cpu_affinity import pin_inference_thread
+    from transcription import _import_faster_whisper, load_file_model, wrap_file_model, transcribe_file
+
+    ConfigManager.apply_to_config(settings)
+    pin_inference_thread()
+    try:
+        if model_factory is not None:
+            model, use_batched = model_factory(), False
+            loaded_vad = Config.VAD_ENABLED
+        elif mode == MODE_FILE:
+            model, use_batched = load_file_model(model_size)
+            loaded_vad = Config.VAD_ENABLED
+        else:
+            WhisperModel, _ = _import_faster_whisper()
+            model = WhisperModel(model_size, **Config.get_model_kwargs(model_size))
+    except Exception as e:
+        conn.send(("error", type(e).__name__, str(e), traceback.format_exc()))
+        return
+    conn.send(("ready",))
+
+    def receive():
+        """接收下一個指令，設定更新在此直接套用"""
+        while True:
+            message = conn.recv()
+            if message[0] == "settings":
+                ConfigManager.apply_to_config(message[1])
+            else:
+                return message
+
+    def checkpoint(work_seconds):
+        """片段邊界：請父行程的資源仲裁器決定是否等待"""
+        conn.send(("checkpoint", work_seconds))
+        while receive()[0] != "resume":
+            pass
+
+    shm = None
+    while True:
+        try:
+            message = receive()
+        except (EOFError, OSError):
+            break
+        kind = message[0]
+        if kind == "stop":
+            break
+        if kind == "attach":
+            if shm is not None:
+                shm.close()
+            shm = _attach_shared_memory(message[1])
+            continue
+        try:
+            if kind == "transcribe":
+                _, length, params = message
+                # 直接讀取共享記憶體，不複製音訊
+                audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+                try:
+                    segments, _ = model.transcribe(audio, **params)
+                    result = [(seg.start, seg.end, seg.text) for seg in segments]
+                finally:
+                    del audio
+            elif kind == "file":
+                _, path, options = message
+                if model_factory is None and loaded_vad != Config.VAD_ENABLED:
+                    model, use_batched = wrap_file_model(model, Config.VAD_ENABLED)
+                    loaded_vad = Config.VAD_ENABLED
+                result = transcribe_file(model, path, use_batched, options, checkpoint)
+            else:
+                raise ValueError(f"未知的指令: {kind}")
+            conn.send(("result", result))
+        except Exception as e:
+            conn.send(("error", type(e).__name__, str(e), traceback.format_exc()))
+
+    if shm is not None:
+        shm.close()
+
+
+class InferenceProcess:
+    """受監控的推論子行程（執行緒安全，同一時間處理一個請求）"""
+
+    def __init__(self, model_size, mode=MODE_LIVE, model_factory=None):
+        """
+        啟動子行程並等待模型載入完成
+
+        Args:
+            model_size: 模型大小
+            mode: MODE_LIVE 或 MODE_FILE
+            model_factory: 可選的無參數模型建立函數，須可由子行程匯入（spawn 以 pickle 傳遞）
+
+        Raises:
+            ModelLoadError: 子行程無法載入模型
+        """
+        self.model_size = model_size
+        self.mode = mode
+        self.model_factory = model_factory
+        self._ctx = multiprocessing.get_context("spawn")  # 不複製 GUI 行程的 Qt 狀態
+        self._lock = threading.Lock()  # 一次一個請求
+        self._send_lock = threading.Lock()  # 設定更新可能與請求同時送出
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._restarts = deque()
+        self._start()
+
+    # === 子行程管理 ===
+    def _start(self):
+        """啟動子行程並等待 ready"""
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_child_main,
+            args=(child_conn, self.mode, self.model_size, ConfigManager.current_settings(), self.model_factory),
+            name=f"whisper-inference-{self.mode}-{self.model_size}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+
+        message = self._receive()
+        if message is None:
+            self._stop_process()
+            raise ModelLoadError(f"推論子行程啟動失敗 (exit code {process.exitcode})")
+        if message[0] == "error":
+            self._stop_process()
+            raise ModelLoadError(f"模型載入失敗 ({self.model_size}): {message[2]}")
+        if self._shm is not None:
+            self._send(("attach", self._shm.name))
+        print(f"[OK] 推論子行程已啟動 ({self.model_size}, PID {process.pid})")
+
+    def _restart(self):
+        """子行程異常結束後重新啟動（限制短時間內的次數，避免無限重啟）"""
+        exitcode = self._process.exitcode if self._process else None
+        now = time.monotonic()
+        while self._restarts and now - self._restarts[0] > INFERENCE_RESTART_WINDOW:
+            self._restarts.popleft()
+        if len(self._restarts) >= INFERENCE_RESTART_LIMIT:
+            raise InferenceProcessError(
+                f"推論子行程在 {INFERENCE_RESTART_WINDOW:.0f} 秒內異常結束 {len(self._restarts)} 次，停止重新啟動"
+            )
+        self._restarts.append(now)
+        print(f"[WARN] 推論子行程異常結束 (exit code {exitcode})，重新啟動中...")
+        self._stop_process()
+        self._start()
+
+    def _stop_process(self):
+        """結束子行程"""
+        if self._process is None:
+            return
+        try:
+            self._conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=2)
+        self._conn.close()
+        self._process = None
+
+    def close(self):
+        """結束子行程並釋放共享記憶體"""
+        with self._lock:
+            self._stop_process()
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    @property
+    def pid(self):
+        """子行程 PID"""
+        return self._process.pid if self._process else None
+
+    @property
+    def restart_count(self):
+        """INFERENCE_RESTART_WINDOW 內的重新啟動次數"""
+        return len(self._restarts)
+
+    # === 通訊 ===
+    def _send(self, message):
+        with self._send_lock:
+            self._conn.send(message)
+
+    def _receive(self):
+        """等待子行程的訊息，子行程結束時回傳 None"""
+        while True:
+            try:
+                if self._conn.poll(INFERENCE_POLL_INTERVAL):
+                    return self._conn.recv()
+            except (EOFError, OSError):
+                return None
+            if not self._process.is_alive() and not self._conn.poll():
+                return None
+
+    def _call(self, request, checkpoint=None):
+        """
+        送出請求並等待結果；子行程崩潰時重新啟動並重試一次
+
+        Raises:
+            InferenceProcessError: 重試後仍然崩潰
+            ClipTimestampsError / TranscriptionError: 子行程回報的轉錄錯誤
+        """
+        for attempt in range(2):
+            try:
+                self._send(request)
+            except (OSError, ValueError):
+                message = None
+            else:
+                message = self._receive()
+                while message is not None and message[0] == "checkpoint":
+                    if checkpoint is not None:
+                        checkpoint(message[1])
+                    self._send(("resume",))
+                    message = self._receive()
+            if message is None:
+                self._restart()
+                if attempt == 0:
+                    continue
+                raise InferenceProcessError("推論子行程處理請求時異常結束（已重新啟動）")
+            if message[0] == "error":
+                _, name, text, details = message
+                log_error(f"推論子行程錯誤 ({name}): {text}\n{details}")
+                raise _ERROR_TYPES.get(name, TranscriptionError)(text)
+            return message[1]
+
+    def _write_audio(self, audio):
+        """將音訊寫入共享記憶體（容量不足時重新配置並通知子行程）"""
+        nbytes = audio.nbytes
+        if self._shm is None or self._shm.size < nbytes:
+            size = max(nbytes, int(INFERENCE_SHM_SECONDS * Config.SAMPLE_RATE) * 4)
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._send(("attach", self._shm.name))
+        view = np.ndarray(audio.shape, dtype=np.float32, buffer=self._shm.buf)
+        view[:] = audio
+        del view
+
+    # === 推論介面 ===
+    def transcribe(self, audio, **params):
+        """
+        與 WhisperModel.transcribe 相同的介面（回傳已完成的片段列表）
+
+        Args:
+            audio: float32 單聲道 16 kHz 音訊
+            **params: faster-whisper 轉錄參數
+
+        Returns:
+            tuple: (list[Segment], None)
+        """
+        if self.mode != MODE_LIVE:
+            raise ValueError("檔案模式的推論子行程請使用 transcribe_file()")
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        with self._lock:
+            self._write_audio(audio)
+            segments = self._call(("transcribe", len(audio), params))
+        return [Segment(*seg) for seg in segments], None
+
+    def transcribe_file(self, file_path, options=None, checkpoint=None):
+        """
+        在子行程中轉錄檔案（參數與 transcription.transcribe_file 相同）
+
+        Returns:
+            dict: transcribe_file 的結果
+        """
+        if self.mode != MODE_FILE:
+            raise ValueError("即時模式的推論子行程請使用 transcribe()")
+        with self._lock:
+            return self._call(("file", file_path, options or {}), checkpoint)
+
+    def update_settings(self, settings=None):
+        """
+        將設定同步到子行程（解碼、切分與輸出設定在下一個請求生效）
+
+        Args:
+            settings: 完整設定，None 表示目前 Config 的設定
+        """
+        try:
+            self._send(("settings", settings or ConfigManager.current_settings()))
+        except (OSError, ValueError):
+            pass  # 子行程已結束，重新啟動時會帶入目前設定
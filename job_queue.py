@@ -0,0 +1,404 @@
+# coding: utf-8
+"""
+工作佇列模組
+以 SQLite (WAL 模式) 保存批次轉錄工作，應用程式重啟後佇列與狀態不會遺失
+支援優先順序、失敗重試與退避、多個 Worker（含跨行程）原子性領取工作
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from constants import (
+    JOB_QUEUE_DB_FILE, JOB_MAX_ATTEMPTS,
+    JOB_RETRY_BASE_DELAY, JOB_RETRY_MAX_DELAY
+)
+from exceptions import JobQueueError
+
+# === 工作狀態 ===
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+STATE_CANCELLED = "cancelled"
+
+ACTIVE_STATES = (STATE_PENDING, STATE_RUNNING)
+# 已在佇列中或已完成的路徑（GUI 按下開始時不重新轉錄完成的檔案）
+QUEUED_OR_DONE_STATES = (*ACTIVE_STATES, STATE_DONE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'pending',
+    priority INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    next_run_at REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_id TEXT,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (state, priority DESC, next_run_at, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs (path);
+"""
+
+
+def make_worker_id(name="worker"):
+    """
+    產生工作者識別字串（主機:PID:名稱），用於偵測崩潰後遺留的執行中工作
+
+    Args:
+        name: 同一行程內區分多個工作者的名稱
+
+    Returns:
+        str: 工作者識別字串
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{name}"
+
+
+def _pid_alive(pid):
+    """檢查本機行程是否仍存在（無法判斷時視為存在，避免重複轉錄）"""
+    if pid == os.getpid():
+        return True
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == "nt":
+        # Windows 上 os.kill 會直接終止行程，無 psutil 時無法判斷，視為仍在執行
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """持久化批次轉錄工作佇列"""
+
+    def __init__(self, db_path=JOB_QUEUE_DB_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        try:
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            raise JobQueueError(f"無法開啟工作佇列資料庫 {db_path}: {e}") from e
+
+    # === 連線管理 ===
+    def _connect(self):
+        """取得目前執行緒的連線（sqlite3 連線不可跨執行緒共用）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """以 BEGIN IMMEDIATE 取得寫入鎖，確保跨執行緒/行程的讀改寫為原子操作"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def close(self):
+        """關閉目前執行緒的連線"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @staticmethod
+    def _row_to_job(row):
+        """將資料列轉為 dict，並解碼 params/result JSON"""
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    # === 加入工作 ===
+    def enqueue(self, path, params=None, priority=0, max_attempts=JOB_MAX_ATTEMPTS, dedupe=True,
+                dedupe_states=ACTIVE_STATES):
+        """
+        加入一個轉錄工作
+
+        Args:
+            path: 音訊/影片檔案路徑
+            params: 工作參數（鍵名同 whisper_settings.json，例如 model_size、language）
+            priority: 優先順序，數值越大越先處理
+            max_attempts: 最多嘗試次數
+            dedupe: 若同一路徑已有等待中或執行中的工作則不重複加入（只重新轉錄部分範圍的工作不算）
+            dedupe_states: dedupe 比對的工作狀態
+
+        Returns:
+            int: 工作 ID（dedupe 命中時為既有工作 ID）
+        """
+        return self.enqueue_many([path], params, priority, max_attempts, dedupe, dedupe_states)[0]
+
+    def enqueue_many(self, paths, params=None, priority=0, max_attempts=JOB_MAX_ATTEMPTS, dedupe=True,
+                     dedupe_states=ACTIVE_STATES):
+        """
+        以單一交易加入多個轉錄工作
+
+        Args:
+            paths: 檔案路徑列表
+            params: 所有工作共用的參數
+            priority: 優先順序
+            max_attempts: 最多嘗試次數
+            dedupe: 是否略過已在佇列中的路徑（只重新轉錄部分範圍的工作不算，整個檔案的工作仍會加入）
+            dedupe_states: dedupe 比對的工作狀態，QUEUED_OR_DONE_STATES 表示連已完成的路徑也略過
+
+        Returns:
+            list[int]: 與 paths 對應的工作 ID
+        """
+        params_json = json.dumps(params or {}, ensure_ascii=False)
+        now = time.time()
+        state_placeholders = ", ".join("?" for _ in dedupe_states)
+        ids = []
+        with self._transaction() as conn:
+            for path in paths:
+                if dedupe:
+                    row = conn.execute(
+                        f"SELECT id FROM jobs WHERE path = ? AND state IN ({state_placeholders}) "
+                        "AND json_extract(params, '$.time_range') IS NULL ORDER BY id LIMIT 1",
+                        (path, *dedupe_states)
+                    ).fetchone()
+                    if row is not None:
+                        ids.append(row["id"])
+                        continue
+                cur = conn.execute(
+                    "INSERT INTO jobs (path, params, priority, max_attempts, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, params_json, priority, max_attempts, now)
+                )
+                ids.append(cur.lastrowid)
+        return ids
+
+    # === 領取與回報 ===
+    def claim(self, worker_id, model_size=None, job_ids=None):
+        """
+        原子性領取下一個可執行的工作（依優先順序、建立順序）
+
+        Args:
+            worker_id: 工作者識別字串（見 make_worker_id）
+            model_size: 只領取指定模型的工作，None 表示不限
+            job_ids: 只領取這些 ID 的工作，None 表示不限
+
+        Returns:
+            dict | None: 工作資料，無可執行工作時為 None
+        """
+        now = time.time()
+        sql = "SELECT * FROM jobs WHERE state = ? AND next_run_at <= ?"
+        args = [STATE_PENDING, now]
+        if model_size is not None:
+            sql += " AND COALESCE(json_extract(params, '$.model_size'), ?) = ?"
+            args.extend([model_size, model_size])
+        if job_ids is not None:
+            sql += f" AND id IN ({', '.join('?' * len(job_ids)) or 'NULL'})"
+            args.extend(job_ids)
+        sql += " ORDER BY priority DESC, id LIMIT 1"
+
+        with self._transaction() as conn:
+            job = self._row_to_job(conn.execute(sql, args).fetchone())
+            if job is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, "
+                "finished_at = NULL, worker_id = ? WHERE id = ?",
+                (STATE_RUNNING, now, worker_id, job["id"])
+            )
+        job.update(state=STATE_RUNNING, attempts=job["attempts"] + 1, started_at=now, worker_id=worker_id)
+        return job
+
+    def complete(self, job_id, result=None):
+        """
+        標記工作完成
+
+        Args:
+            job_id: 工作 ID
+            result: 結果摘要（例如 srt_path、segment_count），會以 JSON 保存
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, error = NULL, result = ? WHERE id = ?",
+                (STATE_DONE, time.time(), json.dumps(result or {}, ensure_ascii=False), job_id)
+            )
+
+    def fail(self, job_id, error, retry=True):
+        """
+        標記工作失敗；未超過嘗試次數時以指數退避重新排程
+
+        Args:
+            job_id: 工作 ID
+            error: 錯誤訊息
+            retry: 是否允許重試（設定錯誤等不可恢復的失敗應傳 False）
+
+        Returns:
+            str: 新狀態（pending 或 failed）
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise JobQueueError(f"工作不存在: {job_id}")
+            attempts = row["attempts"]
+            if retry and attempts < row["max_attempts"]:
+                delay = min(JOB_RETRY_BASE_DELAY * (2 ** max(0, attempts - 1)), JOB_RETRY_MAX_DELAY)
+                conn.execute(
+                    "UPDATE jobs SET state = ?, next_run_at = ?, finished_at = ?, error = ?, worker_id = NULL "
+                    "WHERE id = ?",
+                    (STATE_PENDING, now + delay, now, error, job_id)
+                )
+                return STATE_PENDING
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ?, error = ? WHERE id = ?",
+                (STATE_FAILED, now, error, job_id)
+            )
+            return STATE_FAILED
+
+    def release(self, job_id):
+        """將執行中的工作放回佇列（不計入嘗試次數），用於使用者中斷"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), worker_id = NULL "
+                "WHERE id = ? AND state = ?",
+                (STATE_PENDING, job_id, STATE_RUNNING)
+            )
+
+    # === 管理操作 ===
+    def cancel(self, job_id):
+        """取消等待中的工作"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, finished_at = ? WHERE id = ? AND state = ?",
+                (STATE_CANCELLED, time.time(), job_id, STATE_PENDING)
+            )
+
+    def retry(self, job_id):
+        """將失敗或已取消的工作重新排入佇列並重置嘗試次數"""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = 0, next_run_at = 0, error = NULL, worker_id = NULL "
+                "WHERE id = ? AND state IN (?, ?)",
+                (STATE_PENDING, job_id, STATE_FAILED, STATE_CANCELLED)
+            )
+
+    def clear(self, states=(STATE_PENDING, STATE_DONE, STATE_FAILED, STATE_CANCELLED)):
+        """刪除指定狀態的工作（預設保留執行中的工作）"""
+        placeholders = ", ".join("?" for _ in states)
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM jobs WHERE state IN ({placeholders})", tuple(states))
+
+    def recover_orphaned(self):
+        """
+        將本機已結束行程遺留的執行中工作放回佇列（應用程式崩潰或強制關閉後）
+
+        Returns:
+            int: 復原的工作數
+        """
+        host = socket.gethostname()
+        recovered = 0
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, worker_id FROM jobs WHERE state = ?", (STATE_RUNNING,)
+            ).fetchall()
+            for row in rows:
+                parts = (row["worker_id"] or "").split(":")
+                if len(parts) >= 2 and parts[0] == host:
+                    try:
+                        pid = int(parts[1])
+                    except ValueError:
+                        pid = None
+                    if pid is not None and _pid_alive(pid):
+                        continue
+                elif row["worker_id"]:
+                    # 其他主機的工作者，無法判斷存活狀態
+                    continue
+                conn.execute(
+                    "UPDATE jobs SET state = ?, attempts = MAX(attempts - 1, 0), worker_id = NULL WHERE id = ?",
+                    (STATE_PENDING, row["id"])
+                )
+                recovered += 1
+        return recovered
+
+    # === 查詢 ===
+    def get(self, job_id):
+        """取得單一工作"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def list_jobs(self, states=None, limit=None):
+        """
+        列出工作
+
+        Args:
+            states: 只列出指定狀態，None 表示全部
+            limit: 最多筆數
+
+        Returns:
+            list[dict]: 依 ID 排序的工作列表
+        """
+        sql = "SELECT * FROM jobs"
+        args = []
+        if states:
+            sql += f" WHERE state IN ({', '.join('?' for _ in states)})"
+            args.extend(states)
+        sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [self._row_to_job(row) for row in self._connect().execute(sql, args)]
+
+    def latest_file_jobs(self):
+        """
+        每個路徑最新的整檔工作（只重新轉錄部分範圍的工作不算）
+
+        Returns:
+            dict[str, dict]: 路徑 -> 工作，依 ID 排序
+        """
+        rows = self._connect().execute(
+            "SELECT * FROM jobs WHERE id IN ("
+            "SELECT MAX(id) FROM jobs WHERE json_extract(params, '$.time_range') IS NULL GROUP BY path"
+            ") ORDER BY id"
+        )
+        return {row["path"]: self._row_to_job(row) for row in rows}
+
+    def counts(self):
+        """
+        統計各狀態的工作數
+
+        Returns:
+            dict[str, int]: 狀態 -> 數量
+        """
+        rows = self._connect().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state")
+        return {row["state"]: row["n"] for row in rows}
+
+    def next_pending_time(self):
+        """取得最近一個等待中工作可執行的時間，無等待工作時為 None"""
+        row = self._connect().execute(
+            "SELECT MIN(next_run_at) AS t FROM jobs WHERE state = ?", (STATE_PENDING,)
+        ).fetchone()
+        return row["t"]
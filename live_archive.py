@@ -0,0 +1,262 @@
+# coding: utf-8
+"""
+即時工作階段錄音保存與閒置時重新轉錄
+
+- SessionArchive: 錄音執行緒只把音訊區塊放入佇列，由背景執行緒以 PyAV 壓縮寫入
+  日誌資料夾的 live_sessions/（Opus，約 24 kbps），每句的時間與文字另存為 .phrases.jsonl
+- IdleRepass: 沒有即時字幕與檔案轉錄、且 CPU 閒置一段時間後，
+  以較大的模型重新轉錄保存的錄音，在錄音旁輸出完整的 SRT
+"""
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from batch_runner import worker_loop
+from config import Config
+from constants import (
+    LIVE_ARCHIVE_DIR_NAME, LIVE_ARCHIVE_CODEC, LIVE_ARCHIVE_FALLBACK_CODEC, LIVE_ARCHIVE_BITRATE,
+    LIVE_ARCHIVE_PHRASES_SUFFIX, LIVE_REPASS_DB_FILE, LIVE_REPASS_PRIORITY, IDLE_POLL_INTERVAL, IDLE_CPU_PERCENT
+)
+from job_queue import JobStore, STATE_PENDING
+from logging_utils import log_error, log_event, log_path
+from model_registry import ModelRegistry
+from resource_utils import PSUTIL_AVAILABLE
+
+if PSUTIL_AVAILABLE:
+    import psutil
+
+# 編碼器 -> (容器格式, 副檔名, 取樣格式)
+_CODECS = {
+    "libopus": ("ogg", ".ogg", "flt"),
+    "flac": ("flac", ".flac", "s16"),
+}
+
+
+def _pick_codec():
+    """優先使用 Opus，PyAV 沒有編碼器時改用 FLAC"""
+    import av
+    for name in (LIVE_ARCHIVE_CODEC, LIVE_ARCHIVE_FALLBACK_CODEC):
+        try:
+            av.codec.Codec(name, "w")
+            return name
+        except Exception:
+            continue
+    raise RuntimeError(f"PyAV 沒有可用的音訊編碼器（{LIVE_ARCHIVE_CODEC} / {LIVE_ARCHIVE_FALLBACK_CODEC}）")
+
+
+def archive_dir():
+    """錄音存放資料夾（目前日誌資料夾下的 live_sessions/）"""
+    path = log_path(LIVE_ARCHIVE_DIR_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class SessionArchive:
+    """
+    將一次錄音壓縮寫入磁碟（編碼與寫檔都在背景執行緒，呼叫端不阻塞）
+
+    時間軸以已寫入的樣本數計算，與錄音長度一致，不受轉錄耗時影響
+    """
+
+    def __init__(self, directory=None, sample_rate=None, name=None):
+        """
+        Args:
+            directory: 存放資料夾，None 表示 archive_dir()
+            sample_rate: 取樣率，None 表示 Config.SAMPLE_RATE
+            name: 檔名（不含副檔名），None 表示 live_YYYYmmdd_HHMMSS
+        """
+        self.sample_rate = sample_rate or Config.SAMPLE_RATE
+        self.codec = _pick_codec()
+        container_format, extension, self._sample_format = _CODECS[self.codec]
+        name = name or datetime.datetime.now().strftime("live_%Y%m%d_%H%M%S")
+        directory = directory or archive_dir()
+        self.path = os.path.join(directory, name + extension)
+        self.phrases_path = os.path.join(directory, name + LIVE_ARCHIVE_PHRASES_SUFFIX)
+        self._container_format = container_format
+        self._samples = 0  # 已放入佇列的樣本數
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_loop, name="LiveArchive", daemon=True)
+        self._thread.start()
+
+    @property
+    def position(self):
+        """目前錄音長度（秒）"""
+        return self._samples / self.sample_rate
+
+    def write(self, samples):
+        """
+        加入一段音訊（只放入佇列）
+
+        Args:
+            samples: float32 單聲道 PCM
+        """
+        if self._closed or not len(samples):
+            return
+        self._samples += len(samples)
+        self._queue.put(("audio", samples))
+
+    def mark_phrase(self, start, end, text):
+        """
+        記錄一句的時間與即時轉錄文字
+
+        Args:
+            start: 開始時間（秒，相對錄音開頭）
+            end: 結束時間（秒）
+            text: 即時轉錄文字
+        """
+        if not self._closed:
+            self._queue.put(("phrase", {"start": round(start, 3), "end": round(end, 3), "text": text}))
+
+    def close(self):
+        """
+        寫完佇列中的音訊並關閉檔案
+
+        Returns:
+            float: 錄音長度（秒）
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._thread.join()
+        return self.position
+
+    def _write_loop(self):
+        """背景執行緒：編碼音訊並寫入語句時間"""
+        import av
+        container = None
+        phrases = None
+        written = 0
+        try:
+            container = av.open(self.path, "w", format=self._container_format)
+            stream = container.add_stream(self.codec, rate=self.sample_rate, layout="mono")
+            if self.codec == LIVE_ARCHIVE_CODEC:
+                stream.bit_rate = LIVE_ARCHIVE_BITRATE
+            phrases = open(self.phrases_path, "a", encoding="utf-8")
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                kind, payload = item
+                if kind == "phrase":
+                    phrases.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                    phrases.flush()
+                    continue
+                samples = np.asarray(payload, dtype=np.float32).reshape(1, -1)
+                if self._sample_format == "s16":
+                    samples = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+                frame = av.AudioFrame.from_ndarray(samples, format=self._sample_format, layout="mono")
+                frame.sample_rate = self.sample_rate
+                frame.pts = written
+                written += samples.shape[1]
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+            for packet in stream.encode(None):
+                container.mux(packet)
+        except Exception as e:
+            # 寫檔失敗不影響即時字幕，之後的音訊直接丟棄
+            self._closed = True
+            log_error(f"即時錄音保存失敗 ({self.path}): {e}")
+        finally:
+            if container is not None:
+                container.close()
+            if phrases is not None:
+                phrases.close()
+
+
+def repass_store():
+    """重新轉錄工作佇列（存放在日誌資料夾，與檔案轉錄的佇列分開）"""
+    return JobStore(log_path(LIVE_REPASS_DB_FILE))
+
+
+def enqueue_repass(store, archive_path, model_size=None):
+    """
+    排入一次錄音的重新轉錄工作
+
+    Args:
+        store: JobStore
+        archive_path: SessionArchive.path
+        model_size: 模型大小，None 表示 Config.LIVE_REPASS_MODEL
+
+    Returns:
+        int | None: 工作 ID，未設定重新轉錄模型時為 None
+    """
+    model_size = model_size or Config.LIVE_REPASS_MODEL
+    if not model_size:
+        return None
+    params = {"model_size": model_size, "output_formats": ["srt"]}
+    return store.enqueue(archive_path, params, priority=LIVE_REPASS_PRIORITY)
+
+
+class IdleRepass(threading.Thread):
+    """閒置時以較大的模型重新轉錄保存的即時錄音"""
+
+    def __init__(self, store, arbiter=None, busy=None, idle_seconds=None, registry=None):
+        """
+        Args:
+            store: 重新轉錄工作佇列 (JobStore)
+            arbiter: ResourceArbiter，即時字幕進行中不開始，並於片段邊界讓出 CPU
+            busy: 可選的檢查函數，回傳 True 表示其他轉錄進行中（例如 GUI 的檔案轉錄）
+            idle_seconds: 閒置多久後開始，None 表示 Config.LIVE_REPASS_IDLE_SECONDS
+            registry: ModelRegistry，None 表示只保留一個模型的新 registry
+        """
+        super().__init__(name="IdleRepass", daemon=True)
+        self.store = store
+        self.registry = registry or ModelRegistry(max_models=1)
+        self.arbiter = arbiter
+        self.busy = busy
+        self.idle_seconds = idle_seconds
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """停止（處理中的工作會在片段邊界結束，下次啟動時復原）"""
+        self._stop_event.set()
+
+    def _is_idle(self):
+        """沒有即時字幕與其他轉錄，且系統 CPU 使用率低"""
+        if self.arbiter is not None and self.arbiter.live_active:
+            return False
+        if self.busy is not None and self.busy():
+            return False
+        # 與上一次呼叫之間的平均使用率
+        return not PSUTIL_AVAILABLE or psutil.cpu_percent(interval=None) < IDLE_CPU_PERCENT
+
+    def _has_work(self):
+        """是否有可開始的工作（退避中的不算）"""
+        next_time = self.store.next_pending_time()
+        return next_time is not None and next_time <= time.time()
+
+    def run(self):
+        """等待閒置後處理佇列中的工作，處理完卸載模型"""
+        recovered = self.store.recover_orphaned()
+        if recovered:
+            print(f"[INFO] 已復原 {recovered} 個中斷的重新轉錄工作")
+        if PSUTIL_AVAILABLE:
+            psutil.cpu_percent(interval=None)
+        idle_since = None
+        while not self._stop_event.wait(IDLE_POLL_INTERVAL):
+            if not Config.LIVE_REPASS_MODEL or not self._is_idle():
+                idle_since = None
+                continue
+            idle_since = idle_since or time.time()
+            idle_seconds = Config.LIVE_REPASS_IDLE_SECONDS if self.idle_seconds is None else self.idle_seconds
+            if time.time() - idle_since < idle_seconds or not self._has_work():
+                continue
+            self.process_pending()
+            idle_since = None
+
+    def process_pending(self):
+        """處理佇列中目前可開始的工作（不等待退避中的工作），完成後卸載模型"""
+        log_event("開始閒置時重新轉錄", pending=self.store.counts().get(STATE_PENDING, 0))
+        try:
+            worker_loop(self.store, self.registry, "repass", False, self._stop_event, self.arbiter,
+                        wait_retries=False)
+        finally:
+            # 釋放較大的模型，不佔用即時字幕與檔案轉錄的記憶體
+            for model_size in self.registry.loaded_models():
+                self.registry.unload(model_size)
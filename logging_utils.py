@@ -1,43 +1,218 @@
 # coding: utf-8
 """
 日誌功能模組
-處理錯誤日誌和轉錄統計記錄
+處理錯誤日誌、轉錄統計與轉錄紀錄
+
+- 呼叫端只把紀錄放入佇列（QueueHandler），由單一背景執行緒寫檔，解碼與音訊執行緒不做任何磁碟 I/O
+- 錯誤與事件寫成 JSON lines（whisper_log.jsonl），每行一筆 {"time", "level", "logger", "thread", "message", ...}
+- 即時轉錄紀錄維持純文字（transcription_log.txt）
+- 兩個檔案都依大小輪替，存放在 log_dir 設定的資料夾（預設為程式所在資料夾下的 logs/），不受目前工作目錄影響
 """
+import atexit
+import copy
 import datetime
-import csv
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import sqlite3
+import threading
+
+from constants import (
+    APP_LOG_FILE, TRANSCRIPTION_LOG_FILE, LOG_DIR_NAME, LOG_MAX_BYTES, LOG_BACKUP_COUNT
+)
+from exceptions import StatsStoreError
+from stats_store import default_store
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_logger = logging.getLogger("whisper")
+_transcript_logger = logging.getLogger("whisper.transcript")
+_lock = threading.Lock()
+_listener = None
+_log_dir = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """將紀錄格式化為單行 JSON（extra={"fields": {...}} 的欄位併入同一層）"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """放入佇列前只固定訊息內容，格式化（含例外堆疊）留給背景執行緒"""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def default_log_dir():
+    """預設日誌資料夾：程式所在資料夾下的 logs/"""
+    return os.path.join(APP_DIR, LOG_DIR_NAME)
+
+
+def _rotating_handler(path, formatter, log_filter):
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+    )
+    handler.setFormatter(formatter)
+    handler.addFilter(log_filter)
+    return handler
 
 
-def log_error(error_msg):
+def configure_logging(log_dir=None):
     """
-    記錄錯誤到 error_log.txt
-    
+    啟動背景日誌，或切換到新的日誌資料夾（切換前佇列中的紀錄寫入舊資料夾）
+
+    Args:
+        log_dir: 日誌資料夾，None 或空字串表示 default_log_dir()
+
+    Returns:
+        str: 實際使用的日誌資料夾（絕對路徑）
+    """
+    global _listener, _log_dir
+    log_dir = os.path.abspath(log_dir or default_log_dir())
+    with _lock:
+        if _listener is not None and log_dir == _log_dir:
+            return log_dir
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+        except OSError as e:
+            print(f"[WARN] 無法建立日誌資料夾 {log_dir}: {e}，改用 {default_log_dir()}")
+            log_dir = default_log_dir()
+            os.makedirs(log_dir, exist_ok=True)
+
+        handlers = (
+            _rotating_handler(os.path.join(log_dir, APP_LOG_FILE), JsonLinesFormatter(),
+                              lambda record: record.name != _transcript_logger.name),
+            _rotating_handler(os.path.join(log_dir, TRANSCRIPTION_LOG_FILE),
+                              logging.Formatter("[%(asctime)s] %(message)s"),
+                              logging.Filter(_transcript_logger.name)),
+        )
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        # whisper.* 的紀錄都經由佇列，不傳給 root logger（避免其他函式庫的設定重複輸出）
+        for handler in list(_logger.handlers):
+            _logger.removeHandler(handler)
+        _logger.addHandler(_QueueHandler(log_queue))
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        old_listener, _listener, _log_dir = _listener, listener, log_dir
+
+    if old_listener is not None:
+        _stop_listener(old_listener)
+    return log_dir
+
+
+def _stop_listener(listener):
+    """寫完佇列中的紀錄並關閉檔案"""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def shutdown_logging():
+    """停止背景日誌（結束程式前呼叫，確保佇列中的紀錄寫入磁碟）"""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        _stop_listener(listener)
+
+
+atexit.register(shutdown_logging)
+
+
+def _ensure_started():
+    """第一次記錄時以設定的日誌資料夾啟動"""
+    if _listener is None:
+        from config import Config  # 避免 config 相關模組匯入本模組時循環匯入
+        configure_logging(Config.LOG_DIR)
+
+
+def log_path(filename=APP_LOG_FILE):
+    """
+    取得日誌檔的完整路徑
+
+    Args:
+        filename: 檔名
+
+    Returns:
+        str: 目前日誌資料夾中的路徑
+    """
+    _ensure_started()
+    return os.path.join(_log_dir, filename)
+
+
+def log_error(error_msg, **fields):
+    """
+    記錄錯誤到 whisper_log.jsonl（不阻塞）
+
     Args:
         error_msg: 錯誤訊息
+        **fields: 其他結構化欄位，例如 path、model
     """
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open("error_log.txt", "a", encoding="utf-8") as f:
-        f.write(f"[{timestamp}] ERROR:\n{error_msg}\n")
-        f.write("-" * 50 + "\n")
+    _ensure_started()
+    _logger.error(error_msg, extra={"fields": fields})
 
 
-def log_transcription_stats(file_path, duration, model_size):
+def log_event(message, **fields):
     """
-    記錄轉錄統計到 transcription_stats.csv
-    
+    記錄一般事件到 whisper_log.jsonl（不阻塞）
+
+    Args:
+        message: 事件說明
+        **fields: 結構化欄位
+    """
+    _ensure_started()
+    _logger.info(message, extra={"fields": fields})
+
+
+def log_transcript(text):
+    """
+    寫入一句即時轉錄文字到 transcription_log.txt（不阻塞）
+
+    Args:
+        text: 最終文字
+    """
+    _ensure_started()
+    _transcript_logger.info(text)
+
+
+def log_transcription_stats(file_path, result, model_size):
+    """
+    記錄轉錄統計到 transcription_stats.db（各階段耗時、RTF、裝置與解碼設定、峰值記憶體），
+    並在 whisper_log.jsonl 記錄一筆完成事件
+
     Args:
         file_path: 檔案路徑
-        duration: 處理時長（秒）
+        result: transcribe_file 的結果
         model_size: 模型大小
     """
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    extension = os.path.splitext(file_path)[1]
-    
-    # 如果檔案不存在，先寫入標頭
-    file_exists = os.path.isfile("transcription_stats.csv")
-    
-    with open("transcription_stats.csv", "a", newline='', encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(["Timestamp", "File Path", "Extension", "Model Size", "Duration (s)"])
-        writer.writerow([timestamp, file_path, extension, model_size, f"{duration:.2f}"])
+    log_event(
+        "轉錄完成", path=file_path, model=model_size, elapsed=result.get("elapsed"),
+        audio_duration=result.get("audio_duration"), rtf=result.get("rtf"), segments=result.get("segment_count"),
+        peak_rss_mb=result.get("peak_rss_mb"), estimated_mb=result.get("estimated_mb"),
+        silence_trimmed=result.get("silence_trimmed"),
+    )
+    try:
+        default_store().record(file_path, result, model_size)
+    except (StatsStoreError, sqlite3.Error) as e:
+        print(f"[WARN] 無法記錄轉錄統計: {e}")
@@ -4,59 +4,55 @@ Whisper Desktop Assistant - 主程式
 重構版本：使用模組化架構並整合進階優化
 """
 import sys
-import os
+
+import startup_profiler
+if "--profile-startup" in sys.argv:
+    # 必須在匯入 PyQt6、numpy 等模組之前安裝，才能統計到它們的匯入耗時
+    startup_profiler.install()
+
 import argparse
+import multiprocessing
+import os
+import sqlite3
 import traceback
 import datetime
-import sounddevice as sd
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QTabWidget, QComboBox, QTextEdit, 
-    QFileDialog, QProgressBar, QListWidget, QListWidgetItem, QMessageBox, QCheckBox,
-    QSystemTrayIcon, QMenu, QStyle, QDoubleSpinBox, QSpinBox, QGroupBox, QFormLayout
+    QFileDialog, QProgressBar, QTableView, QHeaderView, QAbstractItemView, QMessageBox, QCheckBox,
+    QSystemTrayIcon, QMenu, QStyle, QDoubleSpinBox, QSpinBox, QGroupBox, QFormLayout, QLineEdit,
+    QDialog, QDialogButtonBox
 )
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QFont, QAction
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QAction
 
 # 導入重構後的模組
+from caption_broadcast import CaptionBroadcaster, start_caption_server
 from config import Config
-from workers import LiveTranscriptionWorker, FileTranscriptionWorker
-
-
-# === UI: 浮動字幕視窗 ===
-class SubtitleOverlay(QWidget):
-    """浮動字幕視窗"""
-    def __init__(self):
-        super().__init__()
-        self.init_ui()
-        
-    def init_ui(self):
-        """初始化UI"""
-        self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
-        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        layout = QVBoxLayout()
-        
-        self.subtitle_label = QLabel("")
-        self.subtitle_label.setFont(QFont("Microsoft JhengHei", 24, QFont.Weight.Bold))
-        self.subtitle_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 160); border-radius: 12px; padding: 12px;")
-        self.subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.subtitle_label.setWordWrap(True)
-        layout.addWidget(self.subtitle_label)
-        self.setLayout(layout)
-        
-        screen = QApplication.primaryScreen().availableGeometry()
-        self.setGeometry((screen.width()-800)//2, screen.height()-250, 800, 200)
-
-    def update_text(self, text):
-        """更新字幕文字"""
-        self.subtitle_label.setText(text)
-        QTimer.singleShot(8000, lambda: self.subtitle_label.setText("") if self.subtitle_label.text() == text else None)
+from config_service import ConfigService
+from constants import SUBTITLE_FORMATS, AUDIO_FILTER_STRING, INTERIM_SUFFIX, PROFILE_DIR
+from exceptions import StatsStoreError
+from job_queue import (
+    JobStore, QUEUED_OR_DONE_STATES, STATE_PENDING, STATE_RUNNING, STATE_DONE, STATE_FAILED, STATE_CANCELLED
+)
+from live_archive import IdleRepass, repass_store
+from logging_utils import configure_logging
+from metrics import start_metrics, watch_job_queue
+import profiling
+from scheduler import ResourceArbiter
+from stats_store import default_store
+from subtitle_writers import parse_time
+from workers import LiveTranscriptionWorker, FileTranscriptionWorker, FolderScanWorker
+from ui.file_table_model import FileTableModel, COLUMN_FILE, COLUMN_STATUS, format_duration
+from ui.overlay import SubtitleOverlay
 
 
 # === UI: 主視窗 ===
 class MainWindow(QMainWindow):
     """主視窗"""
+    config_changed = pyqtSignal(dict)  # 設定檔變更（由監看執行緒轉回主執行緒）
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Whisper Desktop Assistant (優化版)")
@@ -66,7 +62,21 @@ class MainWindow(QMainWindow):
         self.overlay = SubtitleOverlay()
         self.live_worker = None
         self.file_worker = None
+        self.scan_worker = None
         self.file_transcription_running = False  # 新增：追蹤檔案轉錄狀態
+        self.job_store = JobStore()  # 持久化批次佇列，重啟後保留
+        self.config_service = ConfigService()  # 設定檔熱重載
+        self.arbiter = ResourceArbiter()  # 即時字幕進行中讓批次轉錄讓出 CPU
+        # 保存的即時錄音在閒置時以較大的模型重新轉錄（獨立佇列，不出現在檔案列表）
+        self.repass_store = repass_store()
+        self.idle_repass = IdleRepass(self.repass_store, self.arbiter, busy=lambda: self.file_transcription_running)
+        self.idle_repass.start()
+        self.caption_broadcaster = CaptionBroadcaster()  # 將即時字幕推送給 OBS / 第二螢幕
+        self.caption_server = None
+        self.apply_caption_broadcast()
+        self.metrics_exporter = None  # Prometheus 端點 / JSON 快照
+        watch_job_queue(self.job_store)
+        self.apply_metrics()
         
         # 介面佈局
         central_widget = QWidget()
@@ -74,9 +84,9 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
         
         # 顯示裝置資訊
-        device_info_label = QLabel(f"運算裝置: {Config.DEVICE_NAME} | Beam Size: {Config.BEAM_SIZE} | 批次大小: {Config.BATCH_SIZE}")
-        device_info_label.setStyleSheet("background-color: #E3F2FD; padding: 8px; border-radius: 4px; font-weight: bold;")
-        layout.addWidget(device_info_label)
+        self.device_info_label = QLabel(self._device_info_text())
+        self.device_info_label.setStyleSheet("background-color: #E3F2FD; padding: 8px; border-radius: 4px; font-weight: bold;")
+        layout.addWidget(self.device_info_label)
         
         # 分頁
         self.tabs = QTabWidget()
@@ -88,6 +98,33 @@ class MainWindow(QMainWindow):
         
         # 系統托盤
         self.setup_tray()
+        
+        # 設定檔變更時同步介面並通知 Worker
+        self.config_changed.connect(self.on_config_changed)
+        self.config_service.add_listener(self.config_changed.emit)
+        self.config_service.start()
+
+    def apply_caption_broadcast(self):
+        """依設定啟動、變更埠號或停止字幕廣播服務"""
+        if self.caption_server is not None:
+            self.caption_server.stop()
+            self.caption_server = None
+        if Config.CAPTION_BROADCAST_PORT:
+            try:
+                self.caption_server = start_caption_server(self.caption_broadcaster, Config.CAPTION_BROADCAST_PORT)
+            except OSError as e:
+                print(f"[WARN] 無法啟動字幕廣播 (埠號 {Config.CAPTION_BROADCAST_PORT}): {e}")
+
+    def apply_metrics(self):
+        """依設定啟動、變更或停止指標端點與快照"""
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        self.metrics_exporter = start_metrics(Config.METRICS_PORT, Config.METRICS_SNAPSHOT_INTERVAL)
+
+    @staticmethod
+    def _device_info_text():
+        """裝置資訊列文字"""
+        return f"運算裝置: {Config.DEVICE_NAME} | Beam Size: {Config.BEAM_SIZE} | 批次大小: {Config.BATCH_SIZE}"
 
     def setup_live_tab(self):
         """設置即時轉錄分頁"""
@@ -100,7 +137,8 @@ class MainWindow(QMainWindow):
         # 裝置選擇
         settings_layout.addWidget(QLabel("麥克風:"))
         self.device_combo = QComboBox()
-        self.refresh_devices()
+        # 裝置列表需要載入 PortAudio，延遲到視窗顯示後再查詢
+        QTimer.singleShot(0, self.refresh_devices)
         settings_layout.addWidget(self.device_combo)
         
         # 模型選擇
@@ -146,6 +184,18 @@ class MainWindow(QMainWindow):
         self.chk_overlay.stateChanged.connect(lambda s: self.overlay.show() if s else self.overlay.hide())
         layout.addWidget(self.chk_overlay)
         
+        # 保存錄音開關（下一次開始錄音時生效）
+        self.chk_live_archive = QCheckBox("保存錄音，閒置時以較大模型重新轉錄")
+        self.chk_live_archive.setChecked(Config.LIVE_ARCHIVE)
+        self.chk_live_archive.setToolTip(
+            "錄音壓縮保存到日誌資料夾的 live_sessions/；\n"
+            "沒有轉錄進行且電腦閒置時，以 live_repass_model 產生完整的 SRT。"
+        )
+        self.chk_live_archive.stateChanged.connect(
+            lambda s: self.config_service.update({"live_archive": bool(s)})
+        )
+        layout.addWidget(self.chk_live_archive)
+        
         # 狀態顯示
         self.lbl_live_status = QLabel("狀態: 待機中")
         self.lbl_live_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -177,19 +227,37 @@ class MainWindow(QMainWindow):
         btn_layout = QHBoxLayout()
         btn_add_file = QPushButton("加入檔案")
         btn_add_file.clicked.connect(self.add_files)
-        btn_add_folder = QPushButton("加入資料夾")
-        btn_add_folder.clicked.connect(self.add_folder)
+        self.btn_add_folder = QPushButton("加入資料夾")
+        self.btn_add_folder.clicked.connect(self.add_folder)
         btn_clear = QPushButton("清空列表")
-        btn_clear.clicked.connect(lambda: self.list_files.clear())
+        btn_clear.clicked.connect(self.clear_file_list)
         
         btn_layout.addWidget(btn_add_file)
-        btn_layout.addWidget(btn_add_folder)
+        btn_layout.addWidget(self.btn_add_folder)
         btn_layout.addWidget(btn_clear)
         layout.addLayout(btn_layout)
         
-        # 檔案列表
-        self.list_files = QListWidget()
-        layout.addWidget(self.list_files)
+        # 檔案列表（數萬個檔案時仍只繪製可見的列）
+        self.file_model = FileTableModel(self)
+        self.table_files = QTableView()
+        self.table_files.setModel(self.file_model)
+        self.table_files.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table_files.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table_files.setWordWrap(False)
+        self.table_files.verticalHeader().hide()
+        # 固定列高與欄寬，避免依內容計算尺寸時掃描所有列
+        self.table_files.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        header = self.table_files.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(COLUMN_FILE, QHeaderView.ResizeMode.Stretch)
+        header.resizeSection(COLUMN_STATUS, 260)
+        self.file_model.rows_flushed.connect(
+            lambda row: self.table_files.scrollTo(self.file_model.index(row, COLUMN_FILE))
+        )
+        self.table_files.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table_files.customContextMenuRequested.connect(self.show_file_menu)
+        layout.addWidget(self.table_files)
+        self.load_saved_jobs()
         
         # 進度條
         self.progress_bar = QProgressBar()
@@ -269,7 +337,7 @@ class MainWindow(QMainWindow):
         self.combo_language = QComboBox()
         for name, code in Config.AVAILABLE_LANGUAGES.items():
             self.combo_language.addItem(name, code)
-        self.combo_language.setCurrentText("繁體中文 (Chinese)")
+        self.combo_language.setCurrentIndex(max(0, self.combo_language.findData(Config.LANGUAGE)))
         self.combo_language.currentIndexChanged.connect(self.update_settings)
         form_layout.addRow("語言 (Language):", self.combo_language)
         
@@ -289,7 +357,7 @@ class MainWindow(QMainWindow):
         
         # 3. 翻譯模式
         self.chk_translate = QCheckBox("啟用翻譯模式 (Translate to English)")
-        self.chk_translate.setChecked(False)
+        self.chk_translate.setChecked(Config.TASK == "translate")
         self.chk_translate.stateChanged.connect(self.update_settings)
         form_layout.addRow("翻譯 (Translate):", self.chk_translate)
         
@@ -309,6 +377,74 @@ class MainWindow(QMainWindow):
         self.spin_vad.valueChanged.connect(self.update_settings)
         form_layout.addRow("VAD 最小靜音 (Min Silence):", self.spin_vad)
         
+        # 5. 字幕輸出格式
+        format_layout = QHBoxLayout()
+        self.format_checks = {}
+        for fmt in SUBTITLE_FORMATS:
+            chk = QCheckBox(fmt.upper())
+            chk.setChecked(fmt in Config.OUTPUT_FORMATS)
+            chk.stateChanged.connect(self.update_settings)
+            format_layout.addWidget(chk)
+            self.format_checks[fmt] = chk
+        form_layout.addRow("輸出格式 (Output):", format_layout)
+        
+        # 6. 即時字幕進行中的批次轉錄
+        self.combo_arbitration = QComboBox()
+        for name, mode in (("自動降速", "throttle"), ("暫停", "pause"), ("不限制", "off")):
+            self.combo_arbitration.addItem(name, mode)
+        self.combo_arbitration.setCurrentIndex(max(0, self.combo_arbitration.findData(Config.ARBITRATION_MODE)))
+        self.combo_arbitration.setToolTip(
+            "即時字幕進行中時，批次檔案轉錄如何讓出 CPU。\n"
+            "• 自動降速：依即時字幕延遲調整批次速度（預設）\n"
+            "• 暫停：停止錄音後才繼續批次轉錄"
+        )
+        self.combo_arbitration.currentIndexChanged.connect(self.update_settings)
+        form_layout.addRow("即時字幕優先 (Live Priority):", self.combo_arbitration)
+        
+        # 7. 本機轉錄服務
+        self.edit_server = QLineEdit(Config.TRANSCRIPTION_SERVER)
+        self.edit_server.setPlaceholderText("留空 = 本程式載入模型，例如 127.0.0.1:8765")
+        self.edit_server.setToolTip(
+            "連線到 transcription_server.py，與其他工具共用已載入的模型。\n"
+            "檔案路徑需可由服務讀取；下一次錄音 / 檔案轉錄開始時生效。"
+        )
+        self.edit_server.editingFinished.connect(self.update_settings)
+        form_layout.addRow("轉錄服務 (Server):", self.edit_server)
+        
+        # 8. 字幕廣播
+        self.spin_caption_port = QSpinBox()
+        self.spin_caption_port.setRange(0, 65535)
+        self.spin_caption_port.setSpecialValueText("停用")
+        self.spin_caption_port.setValue(Config.CAPTION_BROADCAST_PORT)
+        self.spin_caption_port.setToolTip(
+            "將即時字幕推送到本機網頁，供 OBS 瀏覽器來源或第二螢幕顯示。\n"
+            "啟用後開啟 http://127.0.0.1:<埠號>/ ；事件串流位於 /events (SSE)。"
+        )
+        self.spin_caption_port.editingFinished.connect(self.update_settings)
+        form_layout.addRow("字幕廣播埠 (Broadcast):", self.spin_caption_port)
+        
+        # 9. 執行指標
+        self.spin_metrics_port = QSpinBox()
+        self.spin_metrics_port.setRange(0, 65535)
+        self.spin_metrics_port.setSpecialValueText("停用")
+        self.spin_metrics_port.setValue(Config.METRICS_PORT)
+        self.spin_metrics_port.setToolTip(
+            "提供 Prometheus 格式的執行指標：http://127.0.0.1:<埠號>/metrics\n"
+            "（解碼延遲、字幕數、音訊溢位、批次吞吐量、記憶體）；JSON 位於 /metrics.json。"
+        )
+        self.spin_metrics_port.editingFinished.connect(self.update_settings)
+        form_layout.addRow("指標埠 (Metrics):", self.spin_metrics_port)
+        
+        # 10. 行程外推論
+        self.chk_out_of_process = QCheckBox("在子行程中執行推論")
+        self.chk_out_of_process.setChecked(Config.INFERENCE_OUT_OF_PROCESS)
+        self.chk_out_of_process.setToolTip(
+            "模型在獨立的子行程中執行，轉錄時介面更流暢；\n"
+            "子行程意外結束時會自動重新啟動，不會關閉本程式。"
+        )
+        self.chk_out_of_process.stateChanged.connect(self.update_settings)
+        form_layout.addRow("行程外推論 (Isolation):", self.chk_out_of_process)
+        
         group.setLayout(form_layout)
         layout.addWidget(group)
         layout.addStretch()
@@ -316,12 +452,62 @@ class MainWindow(QMainWindow):
         self.tabs.addTab(tab, "設定 (Settings)")
 
     def update_settings(self):
-        """更新配置"""
-        Config.LANGUAGE = self.combo_language.currentData()
-        Config.TEMPERATURE = self.spin_temperature.value()
-        Config.TASK = "translate" if self.chk_translate.isChecked() else "transcribe"
-        Config.VAD_ENABLED = self.chk_vad.isChecked()
-        Config.VAD_MIN_SILENCE_MS = self.spin_vad.value()
+        """更新配置（寫入設定檔，下一次解碼即生效）"""
+        self.config_service.update({
+            "language": self.combo_language.currentData(),
+            "temperature": round(self.spin_temperature.value(), 2),
+            "task": "translate" if self.chk_translate.isChecked() else "transcribe",
+            "vad_enabled": self.chk_vad.isChecked(),
+            "vad_min_silence_ms": self.spin_vad.value(),
+            # 至少保留 SRT 輸出
+            "output_formats": [fmt for fmt, chk in self.format_checks.items() if chk.isChecked()] or ["srt"],
+            "arbitration_mode": self.combo_arbitration.currentData(),
+            "transcription_server": self.edit_server.text().strip(),
+            "inference_out_of_process": self.chk_out_of_process.isChecked(),
+            "caption_broadcast_port": self.spin_caption_port.value(),
+            "metrics_port": self.spin_metrics_port.value(),
+        })
+
+    def on_config_changed(self, changes):
+        """
+        設定變更（設定分頁或外部編輯設定檔）：同步介面並通知執行中的 Worker
+
+        Args:
+            changes: {鍵: (舊值, 新值)}
+        """
+        for worker in (self.live_worker, self.file_worker):
+            if worker is not None and worker.isRunning():
+                worker.on_config_changed(changes)
+        if "caption_broadcast_port" in changes:
+            self.apply_caption_broadcast()
+        if "metrics_port" in changes or "metrics_snapshot_interval" in changes:
+            self.apply_metrics()
+        if "log_dir" in changes:
+            configure_logging(Config.LOG_DIR)
+        
+        # 同步設定分頁（暫停信號，避免再次寫回設定檔）
+        widgets = [self.combo_language, self.spin_temperature, self.chk_translate, self.chk_vad,
+                   self.spin_vad, self.model_combo, self.combo_arbitration, self.edit_server, self.chk_out_of_process,
+                   self.spin_caption_port, self.spin_metrics_port, self.chk_live_archive, *self.format_checks.values()]
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.combo_language.setCurrentIndex(max(0, self.combo_language.findData(Config.LANGUAGE)))
+        self.spin_temperature.setValue(Config.TEMPERATURE)
+        self.chk_translate.setChecked(Config.TASK == "translate")
+        self.chk_vad.setChecked(Config.VAD_ENABLED)
+        self.spin_vad.setValue(Config.VAD_MIN_SILENCE_MS)
+        self.model_combo.setCurrentText(Config.MODEL_SIZE)
+        for fmt, chk in self.format_checks.items():
+            chk.setChecked(fmt in Config.OUTPUT_FORMATS)
+        self.combo_arbitration.setCurrentIndex(max(0, self.combo_arbitration.findData(Config.ARBITRATION_MODE)))
+        self.edit_server.setText(Config.TRANSCRIPTION_SERVER)
+        self.chk_out_of_process.setChecked(Config.INFERENCE_OUT_OF_PROCESS)
+        self.spin_caption_port.setValue(Config.CAPTION_BROADCAST_PORT)
+        self.spin_metrics_port.setValue(Config.METRICS_PORT)
+        self.chk_live_archive.setChecked(Config.LIVE_ARCHIVE)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.device_info_label.setText(self._device_info_text())
 
     def setup_tray(self):
         """設置系統托盤"""
@@ -339,6 +525,12 @@ class MainWindow(QMainWindow):
     def refresh_devices(self):
         """刷新音訊裝置列表"""
         self.device_combo.clear()
+        try:
+            import sounddevice as sd
+        except (ImportError, OSError) as e:
+            print(f"[WARN] 無法載入音訊裝置 (sounddevice/PortAudio): {e}")
+            self.lbl_live_status.setText(f"無法載入音訊裝置: {e}")
+            return
         devices = sd.query_devices()
         default_input = sd.query_devices(kind='input')
         default_idx = default_input['index'] if default_input else -1
@@ -351,10 +543,8 @@ class MainWindow(QMainWindow):
                     self.device_combo.setCurrentIndex(self.device_combo.count() - 1)
 
     def on_model_changed(self, text):
-        """模型變更處理"""
-        Config.MODEL_SIZE = text
-        if self.live_worker:
-            self.lbl_live_status.setText(f"模型已變更為 {text}，請重新開始錄音以套用。")
+        """模型變更處理（執行中的即時轉錄會在背景載入新模型後切換）"""
+        self.config_service.update({"model_size": text})
 
     def toggle_live_transcription(self):
         """切換即時轉錄狀態"""
@@ -362,15 +552,14 @@ class MainWindow(QMainWindow):
             # 開始
             device_idx = self.device_combo.currentData()
             
-            # 如果 Worker 不存在，或者模型設定改變了，就重新建立
-            if self.live_worker is None or self.live_worker.model_size != Config.MODEL_SIZE:
-                if self.live_worker:
-                    self.live_worker.stop()
-                    self.live_worker.wait()
-                
-                self.live_worker = LiveTranscriptionWorker(device_idx, model_size=Config.MODEL_SIZE)
+            # Worker 不存在時才建立（模型變更由 Worker 在背景切換）
+            if self.live_worker is None or not self.live_worker.isRunning():
+                self.live_worker = LiveTranscriptionWorker(
+                    device_idx, model_size=Config.MODEL_SIZE, arbiter=self.arbiter,
+                    broadcaster=self.caption_broadcaster, repass_store=self.repass_store
+                )
                 self.live_worker.text_updated.connect(self.overlay.update_text)
-                self.live_worker.text_updated.connect(lambda t: self.txt_live_log.append(t) if not t.endswith("...") else None)
+                self.live_worker.text_updated.connect(lambda t: self.txt_live_log.append(t) if not t.endswith(INTERIM_SUFFIX) else None)
                 self.live_worker.status_updated.connect(self.lbl_live_status.setText)
                 self.live_worker.start()
             
@@ -416,105 +605,206 @@ class MainWindow(QMainWindow):
                 }
             """)
 
+    @staticmethod
+    def _job_status_text(job):
+        """將佇列工作狀態轉為列表顯示文字"""
+        state = job["state"]
+        if state == STATE_DONE:
+            count = (job["result"] or {}).get("segment_count")
+            return f"[OK] 完成! ({count} 個片段)" if count is not None else "[OK] 完成!"
+        if state == STATE_FAILED:
+            error = (job["error"] or "").splitlines()
+            return f"[ERROR] 失敗: {error[0] if error else ''}"
+        if state == STATE_PENDING and job["attempts"]:
+            return f"等待重試 (已嘗試 {job['attempts']} 次)"
+        return {
+            STATE_PENDING: "等待中",
+            STATE_RUNNING: "轉錄中...",
+            STATE_CANCELLED: "已取消",
+        }.get(state, state)
+
+    def load_saved_jobs(self):
+        """從持久化佇列還原上次未清空的檔案列表與狀態"""
+        recovered = self.job_store.recover_orphaned()
+        if recovered:
+            print(f"[INFO] 已復原 {recovered} 個中斷的轉錄工作")
+        rows = []
+        # 同一路徑重新排入或重試過時顯示最新的狀態
+        for job in self.job_store.latest_file_jobs().values():
+            result = job["result"] or {}
+            rows.append((job["path"], self._job_status_text(job), result.get("audio_duration"), result.get("elapsed")))
+        self.file_model.add_rows(rows)
+
+    def _add_paths(self, paths):
+        """將檔案加入佇列與列表（已在佇列中或已完成的檔案不重複加入）"""
+        self.job_store.enqueue_many(paths, dedupe_states=QUEUED_OR_DONE_STATES)
+        self.file_model.add_paths(paths)
+
     def add_files(self):
         """加入檔案"""
-        files, _ = QFileDialog.getOpenFileNames(self, "選擇音訊/影片檔案", "", "音訊/影片 (*.mp3 *.mp4 *.wav *.m4a *.mkv)")
-        for f in files:
-            item = QListWidgetItem(f)
-            item.setData(Qt.ItemDataRole.UserRole, f)
-            self.list_files.addItem(item)
+        files, _ = QFileDialog.getOpenFileNames(self, "選擇音訊/影片檔案", "", AUDIO_FILTER_STRING)
+        if files:
+            self._add_paths(files)
 
     def add_folder(self):
-        """加入資料夾"""
+        """加入資料夾（在背景掃描，掃描中再按一次則停止）"""
+        if self.scan_worker and self.scan_worker.isRunning():
+            self.scan_worker.should_stop = True
+            self.btn_add_folder.setEnabled(False)
+            return
         folder = QFileDialog.getExistingDirectory(self, "選擇資料夾")
-        if folder:
-            for root, dirs, files in os.walk(folder):
-                for file in files:
-                    if file.lower().endswith(('.mp3', '.mp4', '.wav', '.m4a', '.mkv')):
-                        full_path = os.path.join(root, file)
-                        item = QListWidgetItem(full_path)
-                        item.setData(Qt.ItemDataRole.UserRole, full_path)
-                        self.list_files.addItem(item)
+        if not folder:
+            return
+        self.scan_worker = FolderScanWorker(folder)
+        self.scan_worker.files_found.connect(self._add_paths)
+        self.scan_worker.durations_probed.connect(self.file_model.queue_durations)
+        self.scan_worker.scan_progress.connect(
+            lambda found, dirs: self.lbl_time_estimate.setText(f"掃描中: 已找到 {found} 個檔案（{dirs} 個資料夾）")
+        )
+        self.scan_worker.scan_finished.connect(self.on_folder_scan_finished)
+        self.btn_add_folder.setText("停止掃描")
+        self.lbl_time_estimate.setText("掃描中...")
+        self.scan_worker.start()
+
+    def on_folder_scan_finished(self, found, skipped, cancelled):
+        """資料夾掃描結束"""
+        self.btn_add_folder.setText("加入資料夾")
+        self.btn_add_folder.setEnabled(True)
+        text = f"{'已停止掃描' if cancelled else '掃描完成'}: 加入 {found} 個檔案"
+        if skipped:
+            text += f"，略過 {skipped} 個已有字幕的檔案"
+        self.lbl_time_estimate.setText(text)
+
+    def clear_file_list(self):
+        """清空列表與佇列（轉錄中的工作保留至完成）"""
+        self.job_store.clear()
+        self.file_model.clear()
 
     def estimate_transcription_time(self, files):
-        """預估轉錄時間（基於歷史記錄）"""
+        """預估轉錄時間（依同模型最近的 RTF 與音訊長度；長度未知時使用平均每檔耗時）"""
         try:
-            import csv
-            stats_file = "transcription_stats.csv"
-            
-            if not os.path.exists(stats_file):
-                return None
-            
-            # 讀取歷史記錄
-            total_duration = 0
-            count = 0
-            
-            with open(stats_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('model') == self.file_model_combo.currentText():
-                        try:
-                            total_duration += float(row['duration'])
-                            count += 1
-                        except (ValueError, KeyError):
-                            continue
-            
-            if count == 0:
-                return None
-            
-            # 計算平均每檔案時間
-            avg_time = total_duration / count
-            estimated_total = avg_time * len(files)
-            
-            # 格式化時間
-            if estimated_total < 60:
-                return f"{estimated_total:.0f}秒"
-            elif estimated_total < 3600:
-                return f"{estimated_total/60:.1f}分鐘"
-            else:
-                hours = int(estimated_total // 3600)
-                minutes = int((estimated_total % 3600) // 60)
-                return f"{hours}小時{minutes}分鐘"
-        except Exception as e:
-            print(f"預估時間失敗: {e}")
+            durations = [self.file_model.duration_of(path) for path in files]
+            estimated_total = default_store().estimate_seconds(
+                self.file_model_combo.currentText(), durations, device=Config.DEVICE
+            )
+        except (StatsStoreError, sqlite3.Error) as e:
+            print(f"[WARN] 預估時間失敗: {e}")
             return None
+        if estimated_total is None:
+            return None
+        
+        # 格式化時間
+        if estimated_total < 60:
+            return f"{estimated_total:.0f}秒"
+        elif estimated_total < 3600:
+            return f"{estimated_total/60:.1f}分鐘"
+        else:
+            hours = int(estimated_total // 3600)
+            minutes = int((estimated_total % 3600) // 60)
+            return f"{hours}小時{minutes}分鐘"
     
     def start_file_transcription(self):
         """開始檔案轉錄（使用優化後的 Worker）"""
-        count = self.list_files.count()
-        if count == 0: 
+        files = self.file_model.paths()
+        if not files:
             return
         
-        files = []
-        for i in range(count):
-            item = self.list_files.item(i)
-            path = item.data(Qt.ItemDataRole.UserRole)
-            if path is None:
-                path = item.text().split(" - [")[0]
-            files.append(path)
-        
         # 取得使用者在檔案分頁選擇的模型
         selected_model = self.file_model_combo.currentText()
-        
-        # 預估時間
-        estimated_time = self.estimate_transcription_time(files)
+
+        # 重新排入列表中最新一次失敗或取消的整檔工作，其餘尚未轉錄過的檔案加入佇列（已完成的不重新轉錄）
+        latest = self.job_store.latest_file_jobs()
+        for path in files:
+            job = latest.get(path)
+            if job is not None and job["state"] in (STATE_FAILED, STATE_CANCELLED):
+                self.job_store.retry(job["id"])
+        self.job_store.enqueue_many(files, dedupe_states=QUEUED_OR_DONE_STATES)
+        
+        # 預估時間（只計算尚未完成的檔案）
+        pending = [job["path"] for job in self.job_store.list_jobs(states=(STATE_PENDING,))]
+        estimated_time = self.estimate_transcription_time(pending)
         if estimated_time:
             self.lbl_time_estimate.setText(f"預估總時間: {estimated_time}")
         else:
             self.lbl_time_estimate.setText("預估時間: 無歷史記錄")
         
-        # 更新按鈕狀態
+        self._start_file_worker(selected_model)
+
+    def _start_file_worker(self, model_size, job_ids=None):
+        """
+        啟動從持久化佇列領取工作的 FileTranscriptionWorker（已整合批次處理）
+
+        Args:
+            model_size: 工作參數未指定模型時使用的模型大小
+            job_ids: 只處理這些工作，None 表示所有等待中的工作
+        """
         self.btn_file_start.setEnabled(False)
         self.btn_file_stop.setEnabled(True)
         self.file_transcription_running = True
-        
-        # 使用優化後的 FileTranscriptionWorker（已整合批次處理）
-        self.file_worker = FileTranscriptionWorker(files, model_size=selected_model)
+        self.file_worker = FileTranscriptionWorker(
+            model_size=model_size, job_store=self.job_store, arbiter=self.arbiter, job_ids=job_ids
+        )
         self.file_worker.progress_updated.connect(lambda c, t: self.progress_bar.setValue(int(c/t*100)))
         self.file_worker.file_status_updated.connect(self.update_file_status)
+        self.file_worker.file_timing_updated.connect(self.file_model.queue_timing)
         self.file_worker.finished_all.connect(self.on_file_transcription_finished)
         self.file_worker.start()
     
+    def show_file_menu(self, pos):
+        """檔案列表的右鍵選單"""
+        index = self.table_files.indexAt(pos)
+        if not index.isValid():
+            return
+        path = self.file_model.path_at(index.row())
+        menu = QMenu(self)
+        action = menu.addAction("重新轉錄時間範圍...")
+        action.triggered.connect(lambda: self.retranscribe_range(path))
+        menu.exec(self.table_files.viewport().mapToGlobal(pos))
+
+    def retranscribe_range(self, path):
+        """以選擇的模型只重新轉錄一段時間，拼接回既有的 SRT（不必重新轉錄整個檔案）"""
+        if not os.path.exists(os.path.splitext(path)[0] + ".srt"):
+            QMessageBox.warning(self, "重新轉錄時間範圍", "找不到這個檔案的 SRT 字幕，請先轉錄整個檔案")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("重新轉錄時間範圍")
+        form = QFormLayout(dialog)
+        edit_start = QLineEdit()
+        edit_start.setPlaceholderText("例如 1:02:00")
+        edit_end = QLineEdit()
+        edit_end.setPlaceholderText("例如 1:05:30")
+        combo_model = QComboBox()
+        combo_model.addItems(Config.AVAILABLE_MODELS)
+        combo_model.setCurrentText(self.file_model_combo.currentText())
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        form.addRow("開始:", edit_start)
+        form.addRow("結束:", edit_end)
+        form.addRow("模型:", combo_model)
+        form.addRow(buttons)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+
+        try:
+            start, end = parse_time(edit_start.text()), parse_time(edit_end.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "重新轉錄時間範圍", str(e))
+            return
+        if end <= start:
+            QMessageBox.warning(self, "重新轉錄時間範圍", "結束時間必須晚於開始時間")
+            return
+
+        # 優先處理，且不與同一檔案的其他工作合併
+        job_id = self.job_store.enqueue(
+            path, {"time_range": [start, end], "model_size": combo_model.currentText()}, priority=1, dedupe=False
+        )
+        self.file_model.queue_status(path, f"等待重新轉錄 {format_duration(start)}-{format_duration(end)}")
+        # 批次轉錄進行中時由它接著處理；否則只處理這個工作，不啟動其他等待中的檔案
+        if not self.file_transcription_running:
+            self._start_file_worker(self.file_model_combo.currentText(), job_ids=[job_id])
+
     def stop_file_transcription(self):
         """停止檔案轉錄"""
         if self.file_worker and self.file_transcription_running:
@@ -529,21 +819,12 @@ class MainWindow(QMainWindow):
             self.btn_file_start.setEnabled(True)
             return
 
-        for i in range(self.list_files.count()):
-            item = self.list_files.item(i)
-            original_path = item.data(Qt.ItemDataRole.UserRole)
-            
-            if original_path is None:
-                original_path = item.text().split(" - [")[0]
-                item.setData(Qt.ItemDataRole.UserRole, original_path)
-
-            if original_path == file_path:
-                item.setText(f"{original_path} - [{status}]")
-                self.list_files.scrollToItem(item)
-                break
+        # 暫存後由計時器合併套用，大量檔案時不會每個信號都重繪
+        self.file_model.queue_status(file_path, status)
 
     def on_file_transcription_finished(self):
         """檔案轉錄完成"""
+        self.file_model.flush()
         self.btn_file_start.setEnabled(True)
         self.btn_file_stop.setEnabled(False)
         self.file_transcription_running = False
@@ -551,6 +832,9 @@ class MainWindow(QMainWindow):
         if self.file_worker and self.file_worker.should_stop:
             self.lbl_time_estimate.setText("❌ 已取消轉錄")
             QMessageBox.information(self, "已取消", "檔案轉錄已被中斷！")
+        elif self.file_worker and self.file_worker.job_ids is not None:
+            self.lbl_time_estimate.setText("✅ 時間範圍重新轉錄完成")
+            QMessageBox.information(self, "完成", "時間範圍已重新轉錄並更新 SRT 字幕！")
         else:
             self.lbl_time_estimate.setText("✅ 所有檔案轉錄完成")
             QMessageBox.information(self, "完成", "所有檔案轉錄完成！")
@@ -558,12 +842,24 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """關閉事件處理 - 確保正確清理所有資源"""
         # 不再使用托盤隱藏，直接關閉程式
+        self.config_service.stop()
+        self.idle_repass.stop()
+        if self.caption_server is not None:
+            self.caption_server.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
         # 停止所有 worker 線程
         if self.live_worker:
             self.live_worker.stop()
             self.live_worker.wait(2000)  # 等待最多2秒
             
+        if self.scan_worker and self.scan_worker.isRunning():
+            self.scan_worker.should_stop = True
+            self.scan_worker.wait(2000)
+
         if self.file_worker and self.file_worker.isRunning():
+            # 強制結束前先寫入分析結果（執行緒不會正常離開 run()）
+            profiling.dump_active("exit")
             self.file_worker.terminate()
             self.file_worker.wait(2000)
         
@@ -592,9 +888,11 @@ def global_exception_handler(exctype, value, tb):
     print(f"捕獲到未處理的異常:\n{error_msg}", file=sys.stderr)
     
     # 寫入 log
+    log_file = "error_log.txt"
     try:
-        from logging_utils import log_error
+        from logging_utils import log_error, log_path
         log_error(f"Uncaught Exception: {error_msg}")
+        log_file = log_path()
     except:
         # 如果 logging_utils 失敗，嘗試直接寫入
         with open("error_log.txt", "a", encoding="utf-8") as f:
@@ -605,7 +903,7 @@ def global_exception_handler(exctype, value, tb):
         msg = QMessageBox()
         msg.setIcon(QMessageBox.Icon.Critical)
         msg.setWindowTitle("發生未預期的錯誤")
-        msg.setText("程式發生錯誤，請查看 error_log.txt 以獲得更多資訊。")
+        msg.setText(f"程式發生錯誤，請查看 {log_file} 以獲得更多資訊。")
         msg.setDetailedText(error_msg)
         msg.exec()
 
@@ -613,10 +911,18 @@ def global_exception_handler(exctype, value, tb):
 # === 主程式 ===
 def main():
     """主程式入口"""
+    # 打包後的執行檔以 spawn 啟動推論子行程時需要
+    multiprocessing.freeze_support()
     # 解析命令列參數
     parser = argparse.ArgumentParser(description="Whisper Desktop Assistant")
     parser.add_argument("--debug", action="store_true", help="Enable debug mode (listen on port 5678)")
+    parser.add_argument("--profile-startup", action="store_true", help="Print an import-time breakdown after the window appears")
+    parser.add_argument("--profile", choices=profiling.PROFILE_MODES,
+                        help="Profile worker threads (cprofile: .pstats, sample: speedscope JSON)")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Output folder for --profile / --profile-memory")
+    parser.add_argument("--profile-memory", action="store_true", help="Write a tracemalloc diff for each transcribed file")
     args = parser.parse_args()
+    profiling.configure(args.profile, args.profile_dir, args.profile_memory)
 
     # 啟動 Debug Port
     if args.debug:
@@ -637,6 +943,7 @@ def main():
 
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
+    startup_profiler.mark("QApplication 建立")
     
     # 顯示配置資訊
     print("=" * 60)
@@ -650,17 +957,36 @@ def main():
     print("=" * 60)
     
     window = MainWindow()
+    startup_profiler.mark("主視窗建立")
     window.show()
+    startup_profiler.mark("視窗顯示")
     
     # 全域快捷鍵 (F2)
     def on_hotkey():
         window.btn_live_toggle.click()
         
-    try:
-        import keyboard
-        keyboard.add_hotkey('F2', on_hotkey)
-    except:
-        print("無法註冊全域快捷鍵 F2")
+    def register_hotkey():
+        try:
+            import keyboard
+            keyboard.add_hotkey('F2', on_hotkey)
+        except:
+            print("無法註冊全域快捷鍵 F2")
+    
+    # 快捷鍵註冊不影響視窗顯示，放到事件迴圈開始後再執行
+    QTimer.singleShot(0, register_hotkey)
+    if profiling.is_enabled():
+        signal_name = profiling.install_signal_handler()
+        if signal_name:
+            print(f"[INFO] 送出 {signal_name} 可隨時寫入目前的效能分析結果")
+            # Qt 事件迴圈中 Python 只在執行 Python 程式碼時處理訊號，定期喚醒直譯器
+            signal_timer = QTimer(app)
+            signal_timer.timeout.connect(lambda: None)
+            signal_timer.start(200)
+    if args.profile_startup:
+        def report_startup():
+            startup_profiler.mark("事件迴圈開始")
+            startup_profiler.report()
+        QTimer.singleShot(0, report_startup)
 
     sys.exit(app.exec())
 
@@ -0,0 +1,242 @@
+# coding: utf-8
+"""
+記憶體預算管理
+每個檔案開始轉錄前估計「模型權重 + 解碼後音訊 + 批次暫存」的記憶體用量，
+在 memory_budget_mb 的預算內決定批次大小、是否分段解碼，以及可同時處理的檔案數
+
+- 預算未設定時為實體記憶體的 MEMORY_BUDGET_FRACTION（需要 psutil；無法取得時不限制）
+- 超出預算時依序：長檔案改為分段解碼 → 批次大小減半 → 等待其他檔案完成後再開始
+- 估計值只是上限參考；實際峰值記憶體記錄在轉錄結果（peak_rss_mb）與統計資料庫（estimated_mb 對照）
+"""
+import contextlib
+import threading
+
+from config import Config
+from constants import (
+    MEMORY_BUDGET_FRACTION, MODEL_PARAMS_MILLIONS, MODEL_RUNTIME_OVERHEAD_MB, MODEL_ACTIVATION_MB,
+    AUDIO_BYTES_PER_SECOND, AUDIO_MEMORY_FACTOR_BATCHED, AUDIO_MEMORY_FACTOR_SEQUENTIAL, DECODE_CHUNK_SECONDS
+)
+from file_scanner import probe_duration
+from logging_utils import log_event
+from resource_utils import PSUTIL_AVAILABLE
+
+if PSUTIL_AVAILABLE:
+    import psutil
+
+_MB = 1024 * 1024
+
+# 每個參數的位元組數（int8 系列的權重以 int8 保存）
+_BYTES_PER_PARAM = {
+    "int8": 1, "int8_float32": 1, "int8_float16": 1, "int8_bfloat16": 1,
+    "int16": 2, "float16": 2, "bfloat16": 2, "float32": 4,
+}
+
+
+def _model_key(model_size, table):
+    """查表：接受模型大小或包含模型名稱的路徑（例如 Systran/faster-whisper-large-v3）"""
+    if model_size in table:
+        return model_size
+    name = str(model_size).lower()
+    # 由長到短比對，避免 large-v3-turbo 被當成 large-v3
+    for key in sorted(table, key=len, reverse=True):
+        if key in name:
+            return key
+    return None
+
+
+def memory_budget_mb():
+    """
+    目前的記憶體預算
+
+    Returns:
+        float | None: MB，未設定且無法取得實體記憶體時為 None（不限制）
+    """
+    if Config.MEMORY_BUDGET_MB:
+        return float(Config.MEMORY_BUDGET_MB)
+    if PSUTIL_AVAILABLE:
+        return psutil.virtual_memory().total / _MB * MEMORY_BUDGET_FRACTION
+    return None
+
+
+def estimate_model_mb(model_size, compute_type=None):
+    """
+    估計模型權重與執行環境的記憶體
+
+    Args:
+        model_size: 模型大小
+        compute_type: 計算類型，None 表示依目前設定與調校結果
+
+    Returns:
+        float | None: MB，未知的模型為 None
+    """
+    key = _model_key(model_size, MODEL_PARAMS_MILLIONS)
+    if key is None:
+        return None
+    if compute_type is None:
+        compute_type = Config.get_model_kwargs(model_size)["compute_type"]
+    bytes_per_param = _BYTES_PER_PARAM.get(compute_type, 2)
+    return MODEL_PARAMS_MILLIONS[key] * 1e6 * bytes_per_param / _MB + MODEL_RUNTIME_OVERHEAD_MB
+
+
+def estimate_job_mb(model_size, audio_duration, batch_size=None, chunk_seconds=None):
+    """
+    估計單一檔案在模型之外需要的記憶體（解碼後音訊與推論暫存）
+
+    Args:
+        model_size: 模型大小
+        audio_duration: 音訊長度（秒），未知為 None
+        batch_size: 批次大小，None 表示標準（非批次）模式
+        chunk_seconds: 分段解碼每段秒數，None 或 0 表示一次解碼整個檔案
+
+    Returns:
+        float: MB
+    """
+    seconds = audio_duration or 0.0
+    if chunk_seconds:
+        seconds = min(seconds, chunk_seconds)
+    factor = AUDIO_MEMORY_FACTOR_BATCHED if batch_size else AUDIO_MEMORY_FACTOR_SEQUENTIAL
+    audio_mb = seconds * AUDIO_BYTES_PER_SECOND * factor / _MB
+    key = _model_key(model_size, MODEL_ACTIVATION_MB)
+    activation_mb = MODEL_ACTIVATION_MB[key] if key else max(MODEL_ACTIVATION_MB.values())
+    return audio_mb + activation_mb * (batch_size or 1)
+
+
+def plan_job(model_size, audio_duration, batch_size=None, chunk_seconds=None, reserved_mb=0.0, budget_mb=None):
+    """
+    在預算內決定分段解碼與批次大小
+
+    Args:
+        model_size: 模型大小
+        audio_duration: 音訊長度（秒），未知為 None
+        batch_size: 預定的批次大小，None 表示標準模式
+        chunk_seconds: 設定的分段秒數，0 / None 表示只在超出預算時分段
+        reserved_mb: 其他進行中的工作已佔用的記憶體（含其他模型）
+        budget_mb: 預算，None 表示 memory_budget_mb()
+
+    Returns:
+        dict: {"batch_size", "chunk_seconds", "estimated_mb", "budget_mb", "fits"}，
+              estimated_mb 含模型權重；無法估計或沒有預算時 fits 為 True
+    """
+    if budget_mb is None:
+        budget_mb = memory_budget_mb()
+    model_mb = estimate_model_mb(model_size)
+    plan = {"batch_size": batch_size, "chunk_seconds": chunk_seconds or None, "estimated_mb": None,
+            "budget_mb": budget_mb, "fits": True}
+    if model_mb is None:
+        return plan
+
+    def job_mb():
+        return estimate_job_mb(model_size, audio_duration, plan["batch_size"], plan["chunk_seconds"])
+
+    available = None if budget_mb is None else budget_mb - model_mb - reserved_mb
+    if available is not None:
+        if (job_mb() > available and not plan["chunk_seconds"]
+                and (audio_duration or 0) > DECODE_CHUNK_SECONDS):
+            plan["chunk_seconds"] = DECODE_CHUNK_SECONDS
+        while job_mb() > available and plan["batch_size"] and plan["batch_size"] > 1:
+            plan["batch_size"] //= 2
+        plan["fits"] = job_mb() <= available
+    plan["estimated_mb"] = model_mb + job_mb()
+    return plan
+
+
+def check_model_fits(model_size):
+    """
+    載入模型前檢查權重是否超出預算（只警告，不阻止載入）
+
+    Returns:
+        bool: 未超出或無法判斷時為 True
+    """
+    budget = memory_budget_mb()
+    model_mb = estimate_model_mb(model_size)
+    if budget is None or model_mb is None or model_mb <= budget:
+        return True
+    print(f"[WARN] 模型 {model_size} 約需 {model_mb:.0f} MB，超出記憶體預算 {budget:.0f} MB，"
+          f"可能使用大量虛擬記憶體（建議改用較小的模型或 int8）")
+    log_event("模型超出記憶體預算", model=model_size, estimated_mb=round(model_mb), budget_mb=round(budget))
+    return False
+
+
+class MemoryGovernor:
+    """
+    多個執行緒共用的記憶體預算：進行中的工作合計超出預算時，新的工作等待其他工作完成
+
+    用法:
+        with governor.admit(model_size, file_path, options, use_batched) as plan:
+            result = transcribe_file(model, file_path, use_batched, {**options, **plan["overrides"]})
+            result["estimated_mb"] = plan["estimated_mb"]
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = {}  # 工作識別 -> (模型大小, 模型以外的估計 MB)
+
+    def _reserved_mb(self, model_size):
+        """其他工作佔用的記憶體（須持有 self._cond）：各自的暫存 + 其他模型的權重"""
+        reserved = sum(job_mb for _, job_mb in self._active.values())
+        for size in {size for size, _ in self._active.values()} - {model_size}:
+            reserved += estimate_model_mb(size) or 0.0
+        return reserved
+
+    def active_count(self):
+        """進行中的工作數"""
+        with self._cond:
+            return len(self._active)
+
+    @contextlib.contextmanager
+    def admit(self, model_size, file_path, options=None, use_batched=False, audio_duration=None):
+        """
+        取得執行許可並回傳要套用的參數覆寫
+
+        Args:
+            model_size: 模型大小
+            file_path: 檔案路徑（用於讀取音訊長度）
+            options: 工作的參數覆寫
+            use_batched: 是否使用 BatchedInferencePipeline
+            audio_duration: 已知的音訊長度，None 表示讀取檔頭
+
+        Yields:
+            dict: plan_job 的結果，另含 "overrides"（要併入工作參數的 batch_size / decode_chunk_seconds，
+                  只含需要變更的項目）
+        """
+        options = options or {}
+        if audio_duration is None and options.get("time_range"):
+            start, end = options["time_range"]
+            audio_duration = end - start  # 只重新轉錄部分範圍
+        if audio_duration is None:
+            audio_duration = probe_duration(file_path)
+        batch_size = None
+        if use_batched and options.get("vad_enabled", Config.VAD_ENABLED):
+            batch_size = options.get("batch_size", Config.get_decode_value("batch_size", model_size))
+        chunk_seconds = options.get("decode_chunk_seconds", Config.DECODE_CHUNK_SECONDS)
+        stream_min = options.get("stream_min_duration", Config.STREAM_MIN_DURATION)
+        if not chunk_seconds and stream_min and (audio_duration or 0) >= stream_min:
+            chunk_seconds = DECODE_CHUNK_SECONDS  # transcribe_file 會自行改為串流解碼
+
+        token = object()
+        with self._cond:
+            while True:
+                plan = plan_job(model_size, audio_duration, batch_size, chunk_seconds,
+                                reserved_mb=self._reserved_mb(model_size))
+                # 沒有其他工作時一定執行（單一檔案本身超出預算時只能盡量縮小）
+                if plan["fits"] or not self._active:
+                    break
+                self._cond.wait()
+            job_mb = (plan["estimated_mb"] or 0.0) - (estimate_model_mb(model_size) or 0.0)
+            self._active[token] = (model_size, job_mb)
+
+        overrides = plan["overrides"] = {}
+        if plan["batch_size"] != batch_size:
+            overrides["batch_size"] = plan["batch_size"]
+        if plan["chunk_seconds"] and plan["chunk_seconds"] != chunk_seconds:
+            overrides["decode_chunk_seconds"] = plan["chunk_seconds"]
+        if overrides or not plan["fits"]:
+            print(f"[INFO] 記憶體預算 {plan['budget_mb']:.0f} MB，預估 {plan['estimated_mb']:.0f} MB: "
+                  f"batch_size={plan['batch_size']}, 分段解碼={plan['chunk_seconds'] or '否'}"
+                  + ("（仍超出預算）" if not plan["fits"] else ""))
+        try:
+            yield plan
+        finally:
+            with self._cond:
+                del self._active[token]
+                self._cond.notify_all()
@@ -0,0 +1,476 @@
+# coding: utf-8
+"""
+執行指標
+以計數器 / 量測值 / 直方圖記錄即時與批次轉錄的狀態，供 Prometheus 抓取或寫成 JSON 快照
+
+端點（預設只接受本機連線）:
+  GET /metrics        Prometheus 文字格式
+  GET /metrics.json   JSON 快照（與定期寫入的快照檔相同）
+
+- 記錄指標只是在鎖內加總，不做任何 I/O，可長期開啟（PortAudio 回調中也可呼叫）
+- 直方圖使用固定的區間，記錄時只增加單一區間的計數，輸出時才累加
+- 佇列深度與記憶體等量測值以函數註冊，只在抓取或寫入快照時才計算
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from constants import METRICS_HOST, METRICS_SNAPSHOT_FILE, METRICS_LATENCY_BUCKETS
+from resource_utils import current_rss_mb
+
+
+def _format_value(value):
+    """Prometheus 數值格式"""
+    if isinstance(value, int):
+        return str(value)
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def _format_labels(names, values, extra=None):
+    """組成 {name="value",...} 標籤字串"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Metric:
+    """指標基底類別：依標籤值分組保存數值"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        """
+        Args:
+            name: 指標名稱
+            help_text: 說明
+            labelnames: 標籤名稱
+        """
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 的標籤應為 {self.labelnames}，收到 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """
+        Returns:
+            list: [(標籤值, 數值)]
+        """
+        with self._lock:
+            return sorted(self._values.items())
+
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        """增加計數"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """可任意變動的量測值，也可註冊函數在讀取時計算"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        """設定數值"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, func, **labels):
+        """
+        註冊讀取時才計算的數值
+
+        Args:
+            func: 無參數函數，回傳數值（None 表示目前無法取得）
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = func
+
+    def remove(self, **labels):
+        """移除一組標籤的數值與函數"""
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+            self._functions.pop(key, None)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = list(self._functions.items())
+        for key, func in functions:
+            try:
+                value = func()
+            except Exception:
+                continue  # 資料來源暫時無法讀取（例如資料庫鎖定），本次略過
+            if value is not None:
+                values[key] = value
+        return sorted(values.items())
+
+
+class Histogram(_Metric):
+    """固定區間的直方圖"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        """
+        Args:
+            buckets: 遞增的區間上限（不含 +Inf）
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """記錄一個觀測值"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [各區間計數（最後一個為 +Inf）, 總和, 筆數]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            return sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+
+
+class MetricsRegistry:
+    """指標登錄表"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指標名稱重複: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        """建立並註冊計數器"""
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        """建立並註冊量測值"""
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        """建立並註冊直方圖"""
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self):
+        """
+        輸出 Prometheus 文字格式 (text/plain; version=0.0.4)
+
+        Returns:
+            str
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in metric.samples():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for upper, bucket_count in zip((*metric.buckets, float("inf")), counts):
+                    cumulative += bucket_count
+                    le = ("le", _format_value(float(upper)))
+                    lines.append(f"{metric.name}_bucket{_format_labels(metric.labelnames, key, le)} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        目前所有指標的 JSON 相容內容
+
+        Returns:
+            dict: {"time": ..., "metrics": {名稱: {"type", "help", "samples": [{"labels", ...}]}}}
+        """
+        result = {}
+        for metric in self.metrics():
+            samples = []
+            for key, value in metric.samples():
+                labels = dict(zip(metric.labelnames, key))
+                if metric.kind == "histogram":
+                    counts, total, count = value
+                    samples.append({
+                        "labels": labels, "count": count, "sum": total,
+                        "buckets": dict(zip([*map(str, metric.buckets), "+Inf"], counts)),
+                    })
+                else:
+                    samples.append({"labels": labels, "value": value})
+            result[metric.name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+        return {"time": time.time(), "metrics": result}
+
+
+REGISTRY = MetricsRegistry()
+
+# === 即時轉錄 ===
+LIVE_DECODE_SECONDS = REGISTRY.histogram(
+    "whisper_live_decode_seconds", "即時轉錄每次解碼的耗時", ("kind",)
+)
+LIVE_PHRASE_LATENCY = REGISTRY.histogram(
+    "whisper_live_phrase_latency_seconds", "語句結束到取得最終文字的延遲"
+)
+LIVE_CAPTIONS = REGISTRY.counter(
+    "whisper_live_captions_total", "送出的字幕數", ("kind",)
+)
+LIVE_AUDIO_STATUS = REGISTRY.counter(
+    "whisper_live_audio_status_total", "音訊串流回報的異常（溢位 / 欠載）次數", ("status",)
+)
+LIVE_AUDIO_QUEUE = REGISTRY.gauge(
+    "whisper_live_audio_queue_blocks", "等待處理的音訊區塊數"
+)
+
+# === 批次轉錄 ===
+BATCH_FILES = REGISTRY.counter(
+    "whisper_batch_files_total", "處理完成的檔案數", ("model", "result")
+)
+BATCH_AUDIO_SECONDS = REGISTRY.counter(
+    "whisper_batch_audio_seconds_total", "已轉錄的音訊長度（秒）", ("model",)
+)
+BATCH_PROCESSING_SECONDS = REGISTRY.counter(
+    "whisper_batch_processing_seconds_total", "轉錄耗時（秒）", ("model",)
+)
+BATCH_STAGE_SECONDS = REGISTRY.counter(
+    "whisper_batch_stage_seconds_total", "各階段累計耗時（秒）", ("model", "stage")
+)
+BATCH_THROUGHPUT = REGISTRY.gauge(
+    "whisper_batch_throughput_ratio", "最近一個檔案每秒轉錄的音訊秒數", ("model",)
+)
+BATCH_PEAK_RSS = REGISTRY.gauge(
+    "whisper_batch_peak_rss_megabytes", "最近一個檔案轉錄期間的峰值記憶體 (MB)", ("model",)
+)
+JOB_QUEUE_DEPTH = REGISTRY.gauge(
+    "whisper_job_queue_depth", "工作佇列中的工作數", ("state",)
+)
+
+# === 模型與行程 ===
+MODEL_RSS = REGISTRY.gauge(
+    "whisper_model_rss_megabytes", "載入模型時增加的記憶體 (MB)", ("model",)
+)
+MODEL_LOAD_SECONDS = REGISTRY.gauge(
+    "whisper_model_load_seconds", "最近一次載入模型的耗時", ("model",)
+)
+PROCESS_RSS = REGISTRY.gauge(
+    "whisper_process_rss_megabytes", "行程目前的常駐記憶體 (MB)"
+)
+PROCESS_RSS.set_function(current_rss_mb)
+
+
+def observe_transcription(result, model_size):
+    """
+    記錄一個檔案的轉錄結果（transcribe_file 的回傳值）
+
+    Args:
+        result: transcribe_file 的結果
+        model_size: 模型大小
+    """
+    BATCH_FILES.inc(model=model_size, result="ok")
+    elapsed = result.get("elapsed") or 0.0
+    duration = result.get("audio_duration")
+    BATCH_PROCESSING_SECONDS.inc(elapsed, model=model_size)
+    if duration:
+        BATCH_AUDIO_SECONDS.inc(duration, model=model_size)
+        if elapsed > 0:
+            BATCH_THROUGHPUT.set(duration / elapsed, model=model_size)
+    for stage, seconds in (result.get("timings") or {}).items():
+        BATCH_STAGE_SECONDS.inc(seconds, model=model_size, stage=stage)
+    if result.get("peak_rss_mb") is not None:
+        BATCH_PEAK_RSS.set(result["peak_rss_mb"], model=model_size)
+
+
+def observe_failure(model_size):
+    """記錄一個轉錄失敗的檔案"""
+    BATCH_FILES.inc(model=model_size, result="error")
+
+
+def watch_job_queue(store):
+    """
+    以 JobStore 的統計提供佇列深度（只在抓取時查詢）
+
+    Args:
+        store: JobStore
+    """
+    for state in ("pending", "running", "failed"):
+        JOB_QUEUE_DEPTH.set_function(lambda state=state: store.counts().get(state, 0), state=state)
+
+
+@contextmanager
+def model_load_metrics(model_size):
+    """
+    量測載入模型的耗時與增加的記憶體
+
+    用法:
+        with model_load_metrics("small"):
+            model = WhisperModel("small", ...)
+    """
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    yield
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - start, model=model_size)
+    rss_after = current_rss_mb()
+    if rss_before is not None and rss_after is not None:
+        MODEL_RSS.set(max(0.0, rss_after - rss_before), model=model_size)
+
+
+def write_snapshot(path=METRICS_SNAPSHOT_FILE, registry=REGISTRY):
+    """
+    寫入 JSON 快照（先寫暫存檔再取代，讀取端不會讀到寫一半的檔案）
+
+    Args:
+        path: 快照檔路徑
+        registry: MetricsRegistry
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """指標端點的請求處理"""
+
+    server_version = "WhisperDesktop"
+
+    def log_message(self, format, *args):
+        """不輸出存取紀錄（Prometheus 會定期抓取）"""
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            data = self.server.registry.render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            data = json.dumps(self.server.registry.snapshot(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MetricsExporter:
+    """指標 HTTP 端點與定期 JSON 快照"""
+
+    def __init__(self, port=0, snapshot_interval=0.0, snapshot_path=METRICS_SNAPSHOT_FILE,
+                 host=METRICS_HOST, registry=REGISTRY):
+        """
+        Args:
+            port: HTTP 埠號，0 表示不提供端點
+            snapshot_interval: 寫入快照的間隔（秒），0 表示不寫入
+            snapshot_path: 快照檔路徑
+            host: 監聽位址
+            registry: MetricsRegistry
+        """
+        self.port = port
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_path = snapshot_path
+        self.host = host
+        self.registry = registry
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """啟動端點與快照執行緒（埠號無法使用時只輸出警告，快照照常寫入）"""
+        if self.port:
+            try:
+                self.server = ThreadingHTTPServer((self.host, self.port), MetricsRequestHandler)
+            except OSError as e:
+                print(f"[WARN] 無法啟動指標端點 (埠號 {self.port}): {e}")
+            else:
+                self.server.daemon_threads = True
+                self.server.registry = self.registry
+                self._threads.append(
+                    threading.Thread(target=self.server.serve_forever, name="MetricsServer", daemon=True)
+                )
+                print(f"[OK] 指標端點已啟動: http://{self.host}:{self.server.server_address[1]}/metrics")
+        if self.snapshot_interval > 0:
+            self._threads.append(threading.Thread(target=self._snapshot_loop, name="MetricsSnapshot", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            self._write_snapshot()
+        self._write_snapshot()
+
+    def _write_snapshot(self):
+        try:
+            write_snapshot(self.snapshot_path, self.registry)
+        except OSError as e:
+            print(f"[WARN] 無法寫入指標快照 ({self.snapshot_path}): {e}")
+
+    def stop(self):
+        """停止端點與快照執行緒（結束前寫入最後一次快照）"""
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+
+def start_metrics(port, snapshot_interval, snapshot_path=METRICS_SNAPSHOT_FILE):
+    """
+    依設定啟動指標輸出，兩者皆停用時不建立任何執行緒
+
+    Args:
+        port: HTTP 埠號，0 = 停用
+        snapshot_interval: JSON 快照間隔（秒），0 = 停用
+        snapshot_path: 快照檔路徑
+
+    Returns:
+        MetricsExporter | None: 已啟動的輸出，停用時為 None
+    """
+    if not port and snapshot_interval <= 0:
+        return None
+    return MetricsExporter(port, snapshot_interval, snapshot_path).start()
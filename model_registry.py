@@ -0,0 +1,150 @@
+# coding: utf-8
+"""
+模型登錄表
+在同一個行程內共用已載入的模型（轉錄服務的檔案工作與多個即時工作階段共用同一份權重）
+
+- 依模型大小快取 WhisperModel，超過上限時卸載最久未使用的模型
+- 檔案轉錄依 VAD 設定包裝 BatchedInferencePipeline（共用權重，不重新載入）
+- num_workers 決定 CTranslate2 可同時處理的請求數，多個請求可並行使用同一個模型
+- 模型相關設定變更時在背景載入新模型，載入完成前繼續使用舊模型
+"""
+import threading
+from collections import OrderedDict
+
+from config import Config
+from config_service import needs_model_reload
+from constants import MODEL_REGISTRY_MAX_MODELS
+from exceptions import ModelLoadError
+from logging_utils import log_error
+from memory_governor import check_model_fits
+from metrics import model_load_metrics
+from transcription import _import_faster_whisper, wrap_file_model, BackgroundModelLoader
+
+
+class ModelRegistry:
+    """執行緒安全的模型快取"""
+
+    def __init__(self, max_models=MODEL_REGISTRY_MAX_MODELS, num_workers=1):
+        """
+        Args:
+            max_models: 同時保留的模型數上限
+            num_workers: 每個模型可同時執行 transcribe 的請求數
+        """
+        self.max_models = max(1, max_models)
+        self.num_workers = max(1, num_workers)
+        self._lock = threading.Lock()
+        self._models = OrderedDict()  # 模型大小 -> WhisperModel（依使用順序）
+        self._wrapped = {}  # 模型大小 -> (VAD 設定, 權重模型, 檔案轉錄用模型, use_batched)
+        self._load_locks = {}  # 模型大小 -> 載入鎖，避免同一模型重複載入
+        self._loaders = {}  # 模型大小 -> BackgroundModelLoader
+
+    def _create_model(self, model_size):
+        """建立 WhisperModel"""
+        check_model_fits(model_size)
+        try:
+            WhisperModel, _ = _import_faster_whisper()
+            with model_load_metrics(model_size):
+                return WhisperModel(model_size, **Config.get_model_kwargs(model_size, min_workers=self.num_workers))
+        except Exception as e:
+            raise ModelLoadError(f"模型載入失敗 ({model_size}): {e}") from e
+
+    def _take_reloaded(self, model_size):
+        """取用背景重新載入完成的模型（須持有 self._lock）"""
+        loader = self._loaders.get(model_size)
+        ready = loader.take() if loader is not None else None
+        if ready is None:
+            return
+        _, model, error = ready
+        if error is not None:
+            log_error(f"背景載入模型失敗 ({model_size}): {error}")
+            return
+        self._models[model_size] = model
+        self._wrapped.pop(model_size, None)
+
+    def base_model(self, model_size):
+        """
+        取得指定大小的 WhisperModel（必要時載入）
+
+        Args:
+            model_size: 模型大小
+
+        Returns:
+            WhisperModel
+
+        Raises:
+            ModelLoadError: 模型載入失敗
+        """
+        with self._lock:
+            self._take_reloaded(model_size)
+            if model_size in self._models:
+                self._models.move_to_end(model_size)
+                return self._models[model_size]
+            load_lock = self._load_locks.setdefault(model_size, threading.Lock())
+
+        # 只鎖住同一個模型的載入，其他模型的請求不受影響
+        with load_lock:
+            with self._lock:
+                if model_size in self._models:
+                    return self._models[model_size]
+                # 先卸載最久未使用的模型，避免載入期間同時佔用兩份記憶體
+                while len(self._models) >= self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    self._wrapped.pop(evicted, None)
+                    print(f"[INFO] 卸載最久未使用的模型 ({evicted})")
+            print(f"[INFO] 載入模型 ({model_size})...")
+            model = self._create_model(model_size)
+            with self._lock:
+                self._models[model_size] = model
+            print(f"[OK] 模型已載入 ({model_size})")
+            return model
+
+    def get(self, model_size):
+        """
+        取得檔案轉錄用模型（依目前 VAD 設定包裝）
+
+        Args:
+            model_size: 模型大小
+
+        Returns:
+            tuple: (model, use_batched)
+
+        Raises:
+            ModelLoadError: 模型載入失敗
+        """
+        base = self.base_model(model_size)
+        vad_enabled = Config.VAD_ENABLED
+        with self._lock:
+            wrapped = self._wrapped.get(model_size)
+            if wrapped is None or wrapped[0] != vad_enabled or wrapped[1] is not base:
+                model, use_batched = wrap_file_model(base, vad_enabled)
+                wrapped = (vad_enabled, base, model, use_batched)
+                self._wrapped[model_size] = wrapped
+            return wrapped[2], wrapped[3]
+
+    def loaded_models(self):
+        """目前已載入的模型大小（最近使用的在後）"""
+        with self._lock:
+            return list(self._models)
+
+    def unload(self, model_size):
+        """卸載指定模型"""
+        with self._lock:
+            self._wrapped.pop(model_size, None)
+            return self._models.pop(model_size, None) is not None
+
+    def on_config_changed(self, changes):
+        """
+        設定變更通知：需要重新建立的模型在背景載入，完成後於下一次取用時切換
+
+        Args:
+            changes: {鍵: (舊值, 新值)}
+        """
+        with self._lock:
+            sizes = [size for size in self._models if needs_model_reload(changes, size)]
+            for size in sizes:
+                loader = self._loaders.get(size)
+                if loader is None:
+                    loader = self._loaders[size] = BackgroundModelLoader(self._create_model)
+                loader.request(size)
+        for size in sizes:
+            print(f"[INFO] 設定已變更，背景重新載入模型 ({size})")
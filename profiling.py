@@ -0,0 +1,327 @@
+# coding: utf-8
+"""
+Worker 執行緒效能分析
+用法: python main.py --profile cprofile|sample [--profile-dir profiles] [--profile-memory]
+
+- cprofile: 以 cProfile 記錄每個 Worker 執行緒的每次函數呼叫，輸出 .pstats
+  （python -m pstats、snakeviz 開啟）
+- sample: 背景執行緒定期擷取 Worker 的呼叫堆疊（負擔低，呼叫原生程式碼的時間也計入呼叫它的函數），
+  輸出 speedscope 格式 .speedscope.json（https://www.speedscope.app/ 開啟）
+- --profile-memory: 以 tracemalloc 比較每個檔案轉錄前後的記憶體配置，輸出 memory-*.txt
+
+Worker 結束時寫入分析結果；執行期間送出 SIGUSR1（Windows 為 Ctrl+Break / SIGBREAK）可隨時寫入目前的結果。
+未啟用時所有函數都不做任何事。
+"""
+import abc
+import cProfile
+import json
+import marshal
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from constants import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_MEMORY_TOP, PROFILE_TRACEMALLOC_FRAMES
+
+PROFILE_MODES = ("cprofile", "sample")
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_MB = 1024 * 1024
+
+_mode = None
+_output_dir = PROFILE_DIR
+_trace_memory = False
+_lock = threading.Lock()
+_active = {}  # 執行緒 ident -> 分析中的 _ThreadProfile
+_sequence = 0
+_sampler = None
+
+
+def configure(mode=None, output_dir=PROFILE_DIR, trace_memory=False):
+    """
+    設定效能分析（需在 Worker 啟動前呼叫）
+
+    Args:
+        mode: "cprofile"、"sample" 或 None（不分析執行緒）
+        output_dir: 輸出資料夾
+        trace_memory: 是否以 tracemalloc 記錄每個檔案的記憶體配置
+
+    Raises:
+        ValueError: 不支援的分析模式
+    """
+    global _mode, _output_dir, _trace_memory
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"不支援的分析模式: {mode}（可用: {', '.join(PROFILE_MODES)}）")
+    _mode = mode
+    _output_dir = output_dir
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+    if mode or trace_memory:
+        os.makedirs(output_dir, exist_ok=True)
+        print(f"[INFO] 效能分析已啟用 ({mode or 'memory'})，結果寫入: {os.path.abspath(output_dir)}")
+
+
+def is_enabled():
+    """是否啟用任何分析"""
+    return _mode is not None or _trace_memory
+
+
+def _output_path(name, suffix):
+    """產生不重複的輸出檔路徑: <name>-<pid>-<序號>-<時間><suffix>"""
+    global _sequence
+    with _lock:
+        _sequence += 1
+        sequence = _sequence
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(_output_dir, f"{name}-{os.getpid()}-{sequence:03d}-{stamp}{suffix}")
+
+
+class _ThreadProfile(abc.ABC):
+    """單一執行緒的分析狀態"""
+
+    def __init__(self, name):
+        self.name = name
+
+    @abc.abstractmethod
+    def start(self):
+        """開始分析（在被分析的執行緒中呼叫）"""
+
+    @abc.abstractmethod
+    def stop(self):
+        """停止分析"""
+
+    @abc.abstractmethod
+    def dump(self, label=None):
+        """
+        寫入目前的分析結果（分析中的執行緒也可呼叫）
+
+        Args:
+            label: 附加在檔名中的說明，例如 "signal"
+
+        Returns:
+            str: 輸出檔路徑
+        """
+
+    def _name(self, label):
+        return f"{self.name}-{label}" if label else self.name
+
+
+class _CProfileThread(_ThreadProfile):
+    """以 cProfile 分析（只記錄呼叫 enable() 的執行緒）"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def dump(self, label=None):
+        path = _output_path(self._name(label), ".pstats")
+        # snapshot_stats 不停止分析，可從其他執行緒（例如訊號處理）呼叫
+        self.profile.snapshot_stats()
+        with open(path, "wb") as f:
+            marshal.dump(self.profile.stats, f)
+        return path
+
+
+class _Sampler(threading.Thread):
+    """定期擷取已登錄執行緒的呼叫堆疊"""
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        super().__init__(name="ProfileSampler", daemon=True)
+        self.interval = interval
+        self.frames = []  # speedscope 共用的 frame 列表
+        self._frame_ids = {}  # code 物件 -> frames 索引
+        self._lock = threading.Lock()
+        self._threads = {}  # 執行緒 ident -> Counter(堆疊 -> 樣本數)
+
+    def register(self, ident):
+        with self._lock:
+            counts = self._threads[ident] = Counter()
+        return counts
+
+    def unregister(self, ident):
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def _frame_id(self, code):
+        index = self._frame_ids.get(code)
+        if index is None:
+            index = self._frame_ids[code] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            current = sys._current_frames()
+            with self._lock:
+                for ident, counts in self._threads.items():
+                    frame = current.get(ident)
+                    stack = []
+                    while frame is not None:
+                        stack.append(self._frame_id(frame.f_code))
+                        frame = frame.f_back
+                    if stack:
+                        counts[tuple(reversed(stack))] += 1
+
+    def speedscope(self, name, counts):
+        """
+        轉為 speedscope 的 sampled profile（相同堆疊合併為一個樣本並以權重表示）
+
+        Returns:
+            dict: speedscope 檔案內容
+        """
+        with self._lock:
+            items = list(counts.items())
+            frames = list(self.frames)
+        weights = [count * self.interval * 1000 for _, count in items]
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "whisper-desktop profiling.py",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": [list(stack) for stack, _ in items],
+                "weights": weights,
+            }],
+        }
+
+
+class _SampledThread(_ThreadProfile):
+    """以取樣分析（所有執行緒共用一個取樣執行緒）"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.ident = threading.get_ident()
+        self.counts = None
+
+    def start(self):
+        global _sampler
+        with _lock:
+            if _sampler is None:
+                _sampler = _Sampler()
+                _sampler.start()
+        self.counts = _sampler.register(self.ident)
+
+    def stop(self):
+        _sampler.unregister(self.ident)
+
+    def dump(self, label=None):
+        path = _output_path(self._name(label), ".speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(_sampler.speedscope(self.name, self.counts), f)
+        return path
+
+
+@contextmanager
+def profile_thread(name):
+    """
+    分析目前執行緒在區塊內的執行（在 Worker 的 run() 中使用），結束時寫入結果
+
+    Args:
+        name: 輸出檔名稱，例如 "live"、"file"
+    """
+    if _mode is None:
+        yield
+        return
+    profile = _CProfileThread(name) if _mode == "cprofile" else _SampledThread(name)
+    ident = threading.get_ident()
+    with _lock:
+        _active[ident] = profile
+    profile.start()
+    try:
+        yield
+    finally:
+        profile.stop()
+        with _lock:
+            _active.pop(ident, None)
+        _write(profile)
+
+
+def _write(profile, label=None):
+    """寫入結果並輸出路徑"""
+    try:
+        print(f"[OK] 效能分析 ({profile.name}) 已寫入: {profile.dump(label)}")
+    except OSError as e:
+        print(f"[WARN] 無法寫入效能分析結果 ({profile.name}): {e}")
+
+
+def dump_active(label="snapshot"):
+    """
+    寫入所有分析中執行緒目前的結果（不停止分析）
+
+    Args:
+        label: 附加在檔名中的說明
+    """
+    with _lock:
+        profiles = list(_active.values())
+    for profile in profiles:
+        _write(profile, label)
+
+
+def install_signal_handler():
+    """
+    註冊 SIGUSR1（Windows 為 SIGBREAK）寫入目前的分析結果
+
+    Qt 事件迴圈執行期間 Python 只在執行 Python 程式碼時處理訊號，呼叫端需定期喚醒直譯器
+
+    Returns:
+        str | None: 註冊的訊號名稱，平台不支援時為 None
+    """
+    signum = getattr(signal, "SIGUSR1", None) or getattr(signal, "SIGBREAK", None)
+    if signum is None:
+        return None
+    signal.signal(signum, lambda *_: dump_active("signal"))
+    return signal.Signals(signum).name
+
+
+@contextmanager
+def trace_file_memory(file_path):
+    """
+    以 tracemalloc 比較單一檔案轉錄前後的記憶體配置（未啟用 --profile-memory 時不做任何事）
+
+    tracemalloc 記錄整個行程，同時進行的即時轉錄也會計入
+
+    Args:
+        file_path: 轉錄中的檔案（用於輸出檔名與標題）
+    """
+    if not _trace_memory:
+        yield
+        return
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__),
+                  tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        path = _output_path(f"memory-{name}", ".txt")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"{file_path}\n")
+                f.write(f"峰值 {peak / _MB:.1f} MB，結束時 {current / _MB:.1f} MB（Python 物件，不含原生配置）\n\n")
+                for stat in diff[:PROFILE_MEMORY_TOP]:
+                    f.write(f"{stat}\n")
+            print(f"[INFO] 記憶體配置 ({os.path.basename(file_path)}): 峰值 {peak / _MB:.1f} MB -> {path}")
+        except OSError as e:
+            print(f"[WARN] 無法寫入記憶體分析結果: {e}")
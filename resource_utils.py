@@ -0,0 +1,117 @@
+# coding: utf-8
+"""
+系統資源工具
+提供 CPU 核心數與記憶體 (RSS) 量測，psutil 為可選依賴
+"""
+import os
+import sys
+import threading
+
+from constants import RSS_SAMPLE_INTERVAL
+
+# 嘗試導入 psutil（Windows 上量測峰值記憶體需要）
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows 沒有 resource 模組
+    RESOURCE_AVAILABLE = False
+
+_MB = 1024 * 1024
+
+
+def physical_cpu_count():
+    """
+    取得實體核心數（psutil 不可用時退回邏輯核心數）
+
+    Returns:
+        int: 核心數，至少為 1
+    """
+    count = None
+    if PSUTIL_AVAILABLE:
+        count = psutil.cpu_count(logical=False)
+    return count or os.cpu_count() or 1
+
+
+def current_rss_mb():
+    """
+    取得目前行程的常駐記憶體 (RSS)
+
+    Returns:
+        float | None: MB，無法量測時為 None
+    """
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / _MB
+    return None
+
+
+def peak_rss_mb():
+    """
+    取得目前行程啟動以來的峰值常駐記憶體
+
+    Returns:
+        float | None: MB，無法量測時為 None
+    """
+    if RESOURCE_AVAILABLE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 單位為 KB，macOS 為 bytes
+        return peak / _MB if sys.platform == "darwin" else peak / 1024
+    if PSUTIL_AVAILABLE:
+        info = psutil.Process().memory_info()
+        # Windows 提供 peak_wset（峰值工作集）
+        return getattr(info, "peak_wset", info.rss) / _MB
+    return None
+
+
+class PeakRSSSampler:
+    """
+    量測一段程式碼執行期間的峰值 RSS
+
+    有 psutil 時在背景執行緒定期取樣；否則退回行程啟動以來的峰值（peak_rss_mb）
+
+    用法:
+        with PeakRSSSampler() as sampler:
+            ...
+        sampler.peak_mb
+    """
+
+    def __init__(self, interval=RSS_SAMPLE_INTERVAL):
+        """
+        Args:
+            interval: 取樣間隔（秒）
+        """
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if PSUTIL_AVAILABLE:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, name="PeakRSSSampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._sample()
+        else:
+            self.peak_mb = peak_rss_mb()
+        return False
@@ -0,0 +1,119 @@
+# coding: utf-8
+"""
+即時 / 批次轉錄的資源仲裁
+即時字幕進行中時，在批次轉錄的片段邊界暫停或降速，讓出核心給即時轉錄
+
+- throttle（預設）: 批次每解碼一段就休息「工作時間 × 降速倍率」，
+  倍率依即時語句延遲自動調整：超過預算就加倍，低於一半預算就減半
+- pause: 即時字幕進行中完全暫停批次，停止錄音後繼續
+- off: 不仲裁
+
+CTranslate2 的運算執行緒數在建立模型時就固定，執行中無法縮減，
+因此以片段邊界的工作週期 (duty cycle) 控制批次佔用的 CPU 時間
+"""
+import threading
+import time
+
+from config import Config
+from constants import ARBITER_INITIAL_THROTTLE, ARBITER_MAX_THROTTLE, ARBITER_MAX_SLEEP
+
+
+class ResourceArbiter:
+    """即時轉錄與批次轉錄之間的資源仲裁器（執行緒安全）"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._live_sessions = 0
+        self._throttle = 0.0
+
+    @property
+    def live_active(self):
+        """是否有即時字幕進行中"""
+        with self._cond:
+            return self._live_sessions > 0
+
+    @property
+    def throttle(self):
+        """目前的降速倍率（批次每工作 1 秒休息的秒數）"""
+        with self._cond:
+            return self._throttle
+
+    def live_started(self):
+        """即時字幕開始錄音時呼叫"""
+        with self._cond:
+            self._live_sessions += 1
+            if self._live_sessions == 1:
+                self._throttle = ARBITER_INITIAL_THROTTLE
+                if Config.ARBITRATION_MODE != "off":
+                    print(f"[INFO] 即時字幕進行中，批次轉錄{self._mode_text()}")
+
+    def live_stopped(self):
+        """即時字幕停止錄音時呼叫，喚醒等待中的批次轉錄"""
+        with self._cond:
+            if self._live_sessions == 0:
+                return
+            self._live_sessions -= 1
+            if self._live_sessions == 0:
+                self._throttle = 0.0
+                self._cond.notify_all()
+                if Config.ARBITRATION_MODE != "off":
+                    print("[INFO] 即時字幕已停止，批次轉錄恢復全速")
+
+    def report_live_latency(self, latency):
+        """
+        回報即時語句延遲，依延遲預算調整降速倍率
+
+        Args:
+            latency: 語句延遲（秒）
+        """
+        budget = Config.LIVE_LATENCY_BUDGET
+        with self._cond:
+            if self._live_sessions == 0:
+                return
+            if latency > budget:
+                self._throttle = min(ARBITER_MAX_THROTTLE, max(ARBITER_INITIAL_THROTTLE / 4, self._throttle * 2))
+            elif latency < budget / 2:
+                self._throttle = self._throttle / 2 if self._throttle >= ARBITER_INITIAL_THROTTLE / 4 else 0.0
+
+    def batch_checkpoint(self, work_seconds, should_stop=None):
+        """
+        批次轉錄在片段邊界呼叫：依模式暫停或休息一段時間
+
+        Args:
+            work_seconds: 自上一個片段邊界以來的解碼時間（秒）
+            should_stop: 可選的停止檢查函數，回傳 True 時立即返回
+
+        Returns:
+            float: 實際等待的秒數
+        """
+        mode = Config.ARBITRATION_MODE
+        start = time.monotonic()
+        with self._cond:
+            if mode == "off" or self._live_sessions == 0:
+                return 0.0
+            resumed = lambda: self._live_sessions == 0 or (should_stop is not None and should_stop())
+            if mode == "pause":
+                # 定期醒來檢查停止標誌
+                while not resumed():
+                    self._cond.wait(timeout=0.5)
+            else:
+                delay = min(work_seconds * self._throttle, ARBITER_MAX_SLEEP)
+                if delay > 0:
+                    self._cond.wait_for(resumed, timeout=delay)
+        return time.monotonic() - start
+
+    def checkpoint_for(self, should_stop=None):
+        """
+        產生可傳給 transcribe_file 的片段邊界回調
+
+        Args:
+            should_stop: 可選的停止檢查函數
+
+        Returns:
+            callable: checkpoint(work_seconds)
+        """
+        return lambda work_seconds: self.batch_checkpoint(work_seconds, should_stop)
+
+    def _mode_text(self):
+        """目前模式的說明文字"""
+        return "暫停中" if Config.ARBITRATION_MODE == "pause" else "降速中"
@@ -0,0 +1,511 @@
+# coding: utf-8
+"""
+字幕切分引擎模組
+以 NumPy 結構化陣列保存單字時間戳，文字集中於單一字串緩衝區並以位移索引
+切分點以向量化的時長/標點遮罩計算，長音訊（數十萬個單字）也能以線性時間完成
+另提供以動態規劃全域選擇斷點的最佳斷句引擎 (segment_optimal)
+"""
+import operator
+
+import numpy as np
+
+from constants import (
+    PAUSE_PUNCTUATION, SENTENCE_END_PUNCTUATION,
+    MIN_SEGMENT_DURATION, MAX_SEGMENT_DURATION,
+    MAX_SEGMENT_CHARS, MAX_CHARS_PER_SECOND
+)
+
+# 單字時間戳欄位
+WORD_DTYPE = np.dtype([("start", "f8"), ("end", "f8"), ("probability", "f4")])
+
+# 字元查表：str.strip() 會移除的空白字元（最大為 U+3000）
+# 用於向量化計算「去除空白後的最後一個字元」是否為標點
+_WHITESPACE_TABLE = np.array([chr(c).isspace() for c in range(0x3001)], dtype=bool)
+
+
+def _char_table(chars):
+    """建立字元碼查表（索引為字元碼）"""
+    table = np.zeros(max(ord(c) for c in chars) + 1, dtype=bool)
+    table[[ord(c) for c in chars]] = True
+    return table
+
+
+def _lookup(table, codes):
+    """以查表判斷字元碼是否屬於集合（超出表格範圍者為 False）"""
+    inside = codes < len(table)
+    return inside & table[np.where(inside, codes, 0)]
+
+
+_GET_START = operator.attrgetter("start")
+_GET_END = operator.attrgetter("end")
+_GET_PROBABILITY = operator.attrgetter("probability")
+_GET_WORD = operator.attrgetter("word")
+
+# 累積多少個單字後才寫入 NumPy 陣列（避免每個 segment 都呼叫 NumPy）
+_FLUSH_THRESHOLD = 8192
+
+
+class WordStore:
+    """緊湊的單字儲存：時間戳結構化陣列 + 單一文字緩衝區"""
+
+    def __init__(self, capacity=1024):
+        self._words = np.empty(max(1, capacity), dtype=WORD_DTYPE)
+        self._lengths = np.empty(max(1, capacity), dtype=np.int64)
+        self._size = 0
+        # 尚未寫入陣列的單字（最多 _FLUSH_THRESHOLD 個），批次轉換以減少 NumPy 呼叫
+        self._pending = []
+        self._chunks = []  # 每次寫入陣列時的文字合併為一個片段，取用時才串成單一緩衝區
+        self._text = None
+        self._offsets = None
+        self._pause = None
+
+    def __len__(self):
+        return self._size + len(self._pending)
+
+    def _reserve(self, extra):
+        """確保容量足以再放入 extra 個單字（容量倍增，攤銷 O(1)）"""
+        needed = self._size + extra
+        capacity = len(self._words)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        words = np.empty(capacity, dtype=WORD_DTYPE)
+        words[:self._size] = self._words[:self._size]
+        lengths = np.empty(capacity, dtype=np.int64)
+        lengths[:self._size] = self._lengths[:self._size]
+        self._words, self._lengths = words, lengths
+
+    def _flush(self):
+        """將暫存的單字寫入陣列後釋放 Word 物件"""
+        pending = self._pending
+        count = len(pending)
+        if count == 0:
+            return
+        self._reserve(count)
+        block = self._words[self._size:self._size + count]
+        block["start"] = np.fromiter(map(_GET_START, pending), dtype=np.float64, count=count)
+        block["end"] = np.fromiter(map(_GET_END, pending), dtype=np.float64, count=count)
+        try:
+            block["probability"] = np.fromiter(map(_GET_PROBABILITY, pending), dtype=np.float32, count=count)
+        except AttributeError:
+            block["probability"] = [getattr(w, "probability", np.nan) for w in pending]
+        texts = list(map(_GET_WORD, pending))
+        self._lengths[self._size:self._size + count] = np.fromiter(map(len, texts), dtype=np.int64, count=count)
+        self._chunks.append("".join(texts))
+        self._size += count
+        self._pending = []
+
+    def append_words(self, words):
+        """
+        加入一批單字（例如一個 faster-whisper segment 的 words）
+
+        Args:
+            words: 具有 start、end、word（與可選 probability）屬性的物件序列
+        """
+        if not words:
+            return
+        self._pending.extend(words)
+        self._text = None
+        self._offsets = None
+        self._pause = None
+        if len(self._pending) >= _FLUSH_THRESHOLD:
+            self._flush()
+
+    @classmethod
+    def from_words(cls, words):
+        """由單字物件列表建立"""
+        store = cls(capacity=len(words))
+        store.append_words(words)
+        store._flush()
+        return store
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        由 faster-whisper segments（可為生成器）建立，不保留中間的 Word 物件
+
+        Args:
+            segments: 具有 words 屬性的片段序列
+        """
+        store = cls()
+        for segment in segments:
+            if segment.words:
+                store.append_words(segment.words)
+        store._flush()
+        return store
+
+    # === 唯讀視圖 ===
+    @property
+    def starts(self):
+        self._flush()
+        return self._words["start"][:self._size]
+
+    @property
+    def ends(self):
+        self._flush()
+        return self._words["end"][:self._size]
+
+    @property
+    def probabilities(self):
+        self._flush()
+        return self._words["probability"][:self._size]
+
+    @property
+    def text(self):
+        """所有單字串接而成的文字緩衝區"""
+        self._flush()
+        if self._text is None:
+            self._text = "".join(self._chunks)
+            self._chunks = [self._text] if self._text else []
+        return self._text
+
+    @property
+    def offsets(self):
+        """文字位移（長度 n+1），第 i 個單字為 text[offsets[i]:offsets[i+1]]"""
+        self._flush()
+        if self._offsets is None:
+            offsets = np.zeros(self._size + 1, dtype=np.int64)
+            np.cumsum(self._lengths[:self._size], out=offsets[1:])
+            self._offsets = offsets
+        return self._offsets
+
+    def word_text(self, index):
+        """取得第 index 個單字的文字"""
+        offsets = self.offsets
+        return self.text[offsets[index]:offsets[index + 1]]
+
+    def trailing_char_mask(self, chars):
+        """
+        向量化計算每個單字去除空白後是否以 chars 中的字元結尾
+
+        Args:
+            chars: 單一字元組成的 tuple（例如 PAUSE_PUNCTUATION）
+
+        Returns:
+            np.ndarray[bool]: 長度 n 的遮罩
+        """
+        offsets = self.offsets
+        text = self.text
+        mask = np.zeros(self._size, dtype=bool)
+        non_empty = np.flatnonzero(offsets[1:] > offsets[:-1])
+        if len(non_empty):
+            table = _char_table(chars)
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            last = codes[offsets[non_empty + 1] - 1]
+            trailing_space = _lookup(_WHITESPACE_TABLE, last)
+            # 一般情況：單字最後一個字元不是空白，直接查表
+            solid = non_empty[~trailing_space]
+            mask[solid] = _lookup(table, last[~trailing_space])
+            # 少數以空白結尾的單字（例如 "？\n"）退回 str.rstrip()
+            for i in non_empty[trailing_space].tolist():
+                stripped = text[offsets[i]:offsets[i + 1]].rstrip()
+                mask[i] = stripped.endswith(chars)
+        return mask
+
+    def pause_mask(self):
+        """
+        每個單字去除空白後是否以停頓標點 (PAUSE_PUNCTUATION) 結尾（結果會快取）
+
+        Returns:
+            np.ndarray[bool]: 長度 n 的遮罩
+        """
+        if self._pause is None:
+            self._pause = self.trailing_char_mask(PAUSE_PUNCTUATION)
+        return self._pause
+
+
+def _first_at_least(values, thresholds, base):
+    """
+    向量化求每個 i 的第一個索引 j，使 values[j] - base[i] >= thresholds
+
+    values 需為非遞減。浮點數比較 a - c >= d 與 a >= c + d 可能差一個 ulp，
+    因此 searchsorted 的結果以原始運算式修正，確保與逐字演算法完全一致
+
+    Args:
+        values: 非遞減陣列
+        thresholds: 門檻（純量）
+        base: 每個查詢的起始時間陣列
+
+    Returns:
+        np.ndarray[int64]: 第一個符合的索引，沒有則為 len(values)
+    """
+    n = len(values)
+    idx = np.searchsorted(values, base + thresholds, "left").astype(np.int64)
+    if n == 0:
+        return idx
+    while True:
+        back = idx > 0
+        back[back] = values[idx[back] - 1] - base[back] >= thresholds
+        if not back.any():
+            break
+        idx[back] -= 1
+    while True:
+        ahead = idx < n
+        ahead[ahead] = ~(values[idx[ahead]] - base[ahead] >= thresholds)
+        if not ahead.any():
+            break
+        idx[ahead] += 1
+    return idx
+
+
+def _split_monotonic(store, pause, min_duration, max_duration):
+    """
+    單字結束時間非遞減時的向量化切分（一般情況）
+
+    對每個可能的片段起點 s 一次算出下一個切分點，
+    之後只需沿著切分點鏈結走訪，迴圈次數等於片段數
+    """
+    n = len(store)
+    ends = np.ascontiguousarray(store.ends)
+    text = store.text
+
+    # 片段從第 s 個單字開始時的開始時間：第一段為 words[0].start，其餘為前一個單字的結束時間
+    seg_start = np.empty(n, dtype=np.float64)
+    seg_start[0] = store.starts[0]
+    seg_start[1:] = ends[:-1]
+    first = np.arange(n, dtype=np.int64)
+
+    # 強制切分：第一個 j >= s 使 end[j] - start >= max_duration
+    split_at = np.maximum(_first_at_least(ends, max_duration, seg_start), first)
+
+    # 可切分：第一個標點單字 j >= s + 1 使 end[j] - start >= min_duration
+    pause_idx = np.flatnonzero(pause)
+    if len(pause_idx):
+        pause_ends = np.ascontiguousarray(ends[pause_idx])
+        # 第 s 個單字（含）之前的標點數 = 第一個索引 >= s + 1 的標點在 pause_idx 中的位置
+        k = np.maximum(
+            _first_at_least(pause_ends, min_duration, seg_start),
+            np.cumsum(pause, dtype=np.int64)
+        )
+        j_pause = np.append(pause_idx, n)[k]
+        np.minimum(split_at, j_pause, out=split_at)
+
+    # 沿切分點鏈結走訪（迴圈次數 = 片段數），再以陣列一次取出各片段的時間與文字位移
+    next_split = split_at.item
+    chain = []
+    s = 0
+    while s < n:
+        j = next_split(s)
+        if j >= n:
+            break
+        chain.append(s)
+        s = j + 1
+
+    seg_first = np.array(chain, dtype=np.int64)
+    seg_last = split_at[seg_first]
+    offsets = store.offsets
+    segments = [
+        {"start": start, "end": end, "text": text[lo:hi].strip()}
+        for start, end, lo, hi in zip(
+            seg_start[seg_first].tolist(), ends[seg_last].tolist(),
+            offsets[seg_first].tolist(), offsets[seg_last + 1].tolist()
+        )
+    ]
+
+    # 處理剩餘的
+    if s < n:
+        segments.append({
+            "start": float(seg_start[s]),
+            "end": float(ends[n - 1]),
+            "text": text[offsets[s]:].strip()
+        })
+    return segments
+
+
+def _split_scalar(store, pause, min_duration, max_duration):
+    """單字時間非單調時的逐字切分（與 utils.split_into_segments 相同邏輯，但不需 Word 物件）"""
+    ends = store.ends.tolist()
+    pause = pause.tolist()
+    text, offsets = store.text, store.offsets.tolist()
+
+    segments = []
+    s = 0
+    current_start = float(store.starts[0])
+    for j, end in enumerate(ends):
+        current_duration = end - current_start
+        is_pause = j > s and pause[j]
+        if current_duration >= max_duration or (current_duration >= min_duration and is_pause):
+            segments.append({
+                "start": current_start,
+                "end": end,
+                "text": text[offsets[s]:offsets[j + 1]].strip()
+            })
+            current_start = end
+            s = j + 1
+
+    if s < len(ends):
+        segments.append({
+            "start": current_start,
+            "end": ends[-1],
+            "text": text[offsets[s]:].strip()
+        })
+    return segments
+
+
+def split_word_store(store, min_duration=MIN_SEGMENT_DURATION, max_duration=MAX_SEGMENT_DURATION):
+    """
+    將 WordStore 重新組合成 2~8 秒的片段，結果與 utils.split_into_segments 完全相同
+
+    所有候選切分點以 searchsorted 在時長/標點遮罩上一次算出，Python 迴圈次數等於片段數
+
+    Args:
+        store: WordStore
+        min_duration: 最小片段長度（秒）
+        max_duration: 最大片段長度（秒）
+
+    Returns:
+        list: 切分後的片段列表（dict: start, end, text）
+    """
+    if len(store) == 0:
+        return []
+    pause = store.pause_mask()
+    ends = store.ends
+    if len(ends) < 2 or bool(np.all(ends[1:] >= ends[:-1])):
+        return _split_monotonic(store, pause, min_duration, max_duration)
+    return _split_scalar(store, pause, min_duration, max_duration)
+
+
+# === 最佳斷句（動態規劃）成本權重 ===
+_W_BREAK = 1.0  # 在無標點、無停頓處斷句的基本成本
+_W_SENTENCE_END = 0.9  # 句末標點處斷句的折抵
+_W_PAUSE_PUNCT = 0.6  # 逗號等停頓標點處斷句的折抵
+_W_GAP = 0.8  # 單字間停頓每秒的折抵（最多計 1 秒）
+_W_SHORT = 2.0  # 字幕短於最小時長的懲罰
+_W_READING_SPEED = 1.0  # 閱讀速度超出上限的懲罰
+_W_LENGTH = 0.3  # 偏離目標時長（最小與最大時長的中點）的懲罰
+_DP_BLOCK = 2048  # 每次向量化計算成本矩陣的單字數
+_DP_MAX_WINDOW = 256  # 每個字幕最多單字數（限制 k 以控制記憶體）
+
+
+def _break_costs(store, starts, ends):
+    """每個單字之後斷句的成本：句末/停頓標點與停頓越長成本越低"""
+    n = len(ends)
+    sentence_end = store.trailing_char_mask(SENTENCE_END_PUNCTUATION)
+    pause = store.pause_mask() & ~sentence_end
+    gaps = np.zeros(n, dtype=np.float64)
+    gaps[:-1] = np.clip(starts[1:] - ends[:-1], 0.0, 1.0)
+    costs = _W_BREAK - _W_SENTENCE_END * sentence_end - _W_PAUSE_PUNCT * pause - _W_GAP * gaps
+    np.maximum(costs, 0.0, out=costs)
+    costs[-1] = 0.0
+    return costs
+
+
+def segment_optimal(store, min_duration=MIN_SEGMENT_DURATION, max_duration=MAX_SEGMENT_DURATION,
+                    max_chars=MAX_SEGMENT_CHARS, max_cps=MAX_CHARS_PER_SECOND):
+    """
+    以動態規劃全域選擇字幕斷點（O(n·k)，k 為單一字幕最多可容納的單字數）
+
+    硬性限制：字幕時長 <= max_duration、字元數 <= max_chars（單一單字超過時自成一條）
+    軟性成本：斷點的標點/停頓、短於 min_duration、閱讀速度超過 max_cps、偏離目標時長
+    成本矩陣以區塊向量化計算，逐字的 DP 只剩 k 個候選的 min
+
+    Args:
+        store: WordStore
+        min_duration: 最小片段長度（秒）
+        max_duration: 最大片段長度（秒）
+        max_chars: 每個字幕最多字元數（以單字原始長度計）
+        max_cps: 閱讀速度上限（字元/秒）
+
+    Returns:
+        list: 切分後的片段列表（dict: start, end, text）
+    """
+    n = len(store)
+    if n == 0:
+        return []
+    starts = np.ascontiguousarray(store.starts)
+    ends = np.ascontiguousarray(store.ends)
+    offsets = store.offsets
+    text = store.text
+    breaks = _break_costs(store, starts, ends)
+
+    # 每個結尾單字 j 的候選起點下界（時長與字元數限制；單字時間非單調時以後綴最小值保守估計）
+    start_key = np.minimum.accumulate(starts[::-1])[::-1]
+    lo_duration = np.searchsorted(start_key, ends - max_duration - 1e-9, "left")
+    lo_chars = np.searchsorted(offsets[:-1], offsets[1:] - max_chars, "left")
+    last = np.arange(n, dtype=np.int64)
+    window = np.clip(last - np.maximum(lo_duration, lo_chars) + 1, 1, _DP_MAX_WINDOW)
+    window = np.minimum(window, last + 1)
+
+    target = (min_duration + max_duration) / 2.0
+    inf = float("inf")
+    best = [0.0] + [inf] * n  # best[t] = 前 t 個單字的最小成本
+    back = [0] * (n + 1)  # back[t] = 最後一條字幕的起始單字
+    add = operator.add
+    window_list = window.tolist()
+
+    for b0 in range(0, n, _DP_BLOCK):
+        b1 = min(b0 + _DP_BLOCK, n)
+        js = last[b0:b1]
+        k = int(window[b0:b1].max())
+        d = np.arange(k, dtype=np.int64)
+        first = js[:, None] - d[None, :]
+        valid = (d[None, :] < window[b0:b1, None]) & (first >= 0)
+        first = np.maximum(first, 0)
+
+        duration = ends[js][:, None] - starts[first]
+        chars = offsets[js + 1][:, None] - offsets[first]
+        single = d[None, :] == 0
+        valid &= ((duration <= max_duration) & (chars <= max_chars)) | single
+
+        safe_duration = np.maximum(duration, 1e-3)
+        cost = breaks[js][:, None] + _W_LENGTH * ((duration - target) / max_duration) ** 2
+        if min_duration > 0:
+            cost += _W_SHORT * (np.clip(min_duration - duration, 0.0, None) / min_duration) ** 2
+        if max_cps > 0:
+            cost += _W_READING_SPEED * np.clip(chars / safe_duration / max_cps - 1.0, 0.0, None)
+        cost[~valid] = inf
+
+        for row, j in zip(cost.tolist(), range(b0, b1)):
+            kj = window_list[j]
+            # 候選起點 i = j - d 對應 best[i]，d = 0..kj-1
+            prev = best[j - kj + 1:j + 1]
+            prev.reverse()
+            totals = list(map(add, prev, row[:kj]))
+            m = min(totals)
+            best[j + 1] = m
+            back[j + 1] = j - totals.index(m)
+
+    # 回溯斷點
+    cues = []
+    j = n
+    while j > 0:
+        i = back[j]
+        cues.append((i, j - 1))
+        j = i
+    cues.reverse()
+
+    segments = []
+    previous_end = 0.0
+    for i, j in cues:
+        # 避免與前一條字幕時間重疊
+        start = max(float(starts[i]), previous_end)
+        end = max(float(ends[j]), start)
+        segments.append({
+            "start": start,
+            "end": end,
+            "text": text[offsets[i]:offsets[j + 1]].strip()
+        })
+        previous_end = end
+    return segments
+
+
+def segment_words(store, mode="optimal", min_duration=MIN_SEGMENT_DURATION, max_duration=MAX_SEGMENT_DURATION,
+                  max_chars=MAX_SEGMENT_CHARS, max_cps=MAX_CHARS_PER_SECOND):
+    """
+    依模式切分字幕
+
+    Args:
+        store: WordStore
+        mode: "optimal"（動態規劃最佳斷句）或 "greedy"（與 split_into_segments 相同的貪婪切分）
+        min_duration: 最小片段長度（秒）
+        max_duration: 最大片段長度（秒）
+        max_chars: 每個字幕最多字元數（僅 optimal）
+        max_cps: 閱讀速度上限（僅 optimal）
+
+    Returns:
+        list: 切分後的片段列表
+    """
+    if mode == "greedy":
+        return split_word_store(store, min_duration, max_duration)
+    return segment_optimal(store, min_duration, max_duration, max_chars, max_cps)
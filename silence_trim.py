@@ -0,0 +1,92 @@
+# coding: utf-8
+"""
+能量式靜音略過
+VAD 停用時（預設，確保不漏字）先以向量化的區塊 RMS 找出長時間的靜音（休息、空白、斷線），
+轉錄時以 clip_timestamps 只送其餘部分給解碼器，減少計算量與靜音上的幻覺文字
+
+- 只略過長度達 min_duration 的靜音，前後各保留 padding 秒，語音的覆蓋範圍不變
+- clip_timestamps 的片段時間仍以原始音訊為準，SRT 時間不需要另外換算
+"""
+import numpy as np
+
+from constants import DEFAULT_SAMPLE_RATE, SILENCE_TRIM_FRAME_SECONDS, SILENCE_TRIM_PADDING_SECONDS
+
+
+def frame_rms(audio, sample_rate=DEFAULT_SAMPLE_RATE, frame_seconds=SILENCE_TRIM_FRAME_SECONDS):
+    """
+    計算每個區塊的 RMS（最後不足一個區塊的樣本自成一塊）
+
+    Args:
+        audio: float32 單聲道 PCM
+        sample_rate: 取樣率
+        frame_seconds: 區塊長度（秒）
+
+    Returns:
+        np.ndarray: 每個區塊的 RMS
+    """
+    frame = max(1, int(frame_seconds * sample_rate))
+    count = len(audio) // frame
+    frames = audio[:count * frame].reshape(count, frame)
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+    rest = audio[count * frame:]
+    if len(rest):
+        energy = np.append(energy, np.dot(rest, rest) / len(rest))
+    return np.sqrt(energy)
+
+
+def find_silences(audio, threshold, min_duration, sample_rate=DEFAULT_SAMPLE_RATE,
+                  frame_seconds=SILENCE_TRIM_FRAME_SECONDS):
+    """
+    找出 RMS 持續低於 threshold 且長度達 min_duration 的區段
+
+    Args:
+        audio: float32 單聲道 PCM
+        threshold: RMS 閾值
+        min_duration: 最短靜音秒數
+        sample_rate: 取樣率
+        frame_seconds: 區塊長度（秒）
+
+    Returns:
+        list: [(開始秒數, 結束秒數)]，結束不超過音訊長度
+    """
+    if not len(audio):
+        return []
+    quiet = frame_rms(audio, sample_rate, frame_seconds) < threshold
+    # 靜音區段的邊界：False→True 為開始，True→False 為結束
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], quiet, [False])).astype(np.int8)))
+    starts, ends = edges[::2] * frame_seconds, edges[1::2] * frame_seconds
+    duration = len(audio) / sample_rate
+    keep = ends - starts >= min_duration
+    return [(float(start), float(min(end, duration))) for start, end in zip(starts[keep], ends[keep])]
+
+
+def speech_clips(audio, threshold, min_duration, padding=SILENCE_TRIM_PADDING_SECONDS,
+                 sample_rate=DEFAULT_SAMPLE_RATE):
+    """
+    略過長時間靜音後要轉錄的範圍，格式同 WhisperModel.transcribe 的 clip_timestamps
+
+    Args:
+        audio: float32 單聲道 PCM
+        threshold: RMS 閾值
+        min_duration: 最短靜音秒數
+        padding: 每段靜音前後保留的秒數
+        sample_rate: 取樣率
+
+    Returns:
+        tuple: (clips, trimmed)，clips 為 [開始, 結束, 開始, 結束, ...]（秒），整段都是靜音時為空串列；
+               trimmed 為略過的秒數
+    """
+    duration = len(audio) / sample_rate
+    points = [0.0]
+    trimmed = 0.0
+    for start, end in find_silences(audio, threshold, max(min_duration, 2 * padding), sample_rate):
+        # 檔案開頭與結尾的靜音不需要保留緩衝
+        start = start + padding if start > 0 else 0.0
+        end = end - padding if end < duration else duration
+        if end <= start:
+            continue
+        points += [round(start, 3), round(end, 3)]
+        trimmed += end - start
+    points.append(duration)
+    clips = [t for pair in zip(points[::2], points[1::2]) if pair[1] > pair[0] for t in pair]
+    return clips, trimmed
@@ -0,0 +1,111 @@
+# coding: utf-8
+"""
+啟動時間分析工具
+攔截 import 統計每個模組的匯入耗時，並記錄啟動過程中的里程碑
+用法: python main.py --profile-startup
+"""
+import builtins
+import importlib.util
+import sys
+import time
+
+_original_import = None
+_install_time = None
+_records = []      # (模組名稱, 累計耗時, 自身耗時, 巢狀深度)
+_milestones = []   # (標籤, 距安裝的秒數)
+_stack = []        # 目前巢狀匯入中子模組已花費的時間
+
+
+def _resolve(name, globals, level):
+    """將相對匯入轉為完整模組名稱"""
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__") or ""
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    """替代 builtins.__import__，只計時尚未載入的模組"""
+    module_name = _resolve(name, globals, level)
+    if module_name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    depth = len(_stack)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += elapsed
+        _records.append((module_name, elapsed, elapsed - children, depth))
+
+
+def install():
+    """安裝匯入計時器（需在匯入 PyQt6 等重量級模組之前呼叫）"""
+    global _original_import, _install_time
+    if _original_import is not None:
+        return
+    _install_time = time.perf_counter()
+    _original_import = builtins.__import__
+    builtins.__import__ = _timed_import
+
+
+def uninstall():
+    """還原原本的 __import__"""
+    global _original_import
+    if _original_import is not None:
+        builtins.__import__ = _original_import
+        _original_import = None
+
+
+def is_installed():
+    """是否正在分析啟動時間"""
+    return _original_import is not None
+
+
+def mark(label):
+    """
+    記錄啟動里程碑（未安裝時不做任何事）
+
+    Args:
+        label: 里程碑名稱，例如 "主視窗建立"
+    """
+    if _install_time is not None:
+        _milestones.append((label, time.perf_counter() - _install_time))
+
+
+def report(top=20):
+    """
+    印出匯入耗時統計並停止計時
+
+    Args:
+        top: 顯示耗時最多的前幾個模組
+    """
+    uninstall()
+    if _install_time is None:
+        return
+
+    total_import = sum(cumulative for _, cumulative, _, depth in _records if depth == 0)
+    print("=" * 60)
+    print("啟動時間分析 (--profile-startup)")
+    print("=" * 60)
+    for label, offset in _milestones:
+        print(f"  {offset * 1000:8.1f} ms  {label}")
+    print(f"\n匯入總耗時: {total_import * 1000:.1f} ms ({len(_records)} 個模組)")
+
+    print(f"\n【頂層匯入（含子模組）】")
+    top_level = sorted((r for r in _records if r[3] == 0), key=lambda r: r[1], reverse=True)
+    for module_name, cumulative, _, _ in top_level[:top]:
+        print(f"  {cumulative * 1000:8.1f} ms  {module_name}")
+
+    print(f"\n【自身耗時最多的模組】")
+    by_self = sorted(_records, key=lambda r: r[2], reverse=True)
+    for module_name, cumulative, self_time, _ in by_self[:top]:
+        print(f"  {self_time * 1000:8.1f} ms  (累計 {cumulative * 1000:7.1f} ms)  {module_name}")
+    print("=" * 60)
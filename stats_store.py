@@ -0,0 +1,342 @@
+# coding: utf-8
+"""
+轉錄統計資料庫
+以 SQLite 保存每個檔案的轉錄統計（各階段耗時、RTF、硬體與解碼設定、峰值記憶體），
+供預估批次轉錄時間與比較不同版本 / 設定的效能
+
+- 開啟時自動匯入舊版 transcription_stats.csv（匯入後改名為 .migrated）
+- 預估時間以同模型、同裝置最近幾筆紀錄的 RTF 中位數乘上音訊長度；長度未知時使用平均每檔耗時
+
+用法:
+  python stats_store.py summary [--days 30]
+  python stats_store.py recent [--limit 20]
+"""
+import argparse
+import csv
+import datetime
+import os
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+
+from constants import STATS_DB_FILE, TRANSCRIPTION_STATS_FILE, STATS_ETA_SAMPLES
+from exceptions import StatsStoreError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcription_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    path TEXT NOT NULL,
+    extension TEXT,
+    model_size TEXT,
+    device TEXT,
+    compute_type TEXT,
+    beam_size INTEGER,
+    batch_size INTEGER,
+    vad_enabled INTEGER,
+    audio_duration REAL,
+    total_time REAL NOT NULL,
+    decode_time REAL,
+    vad_time REAL,
+    inference_time REAL,
+    write_time REAL,
+    wait_time REAL,
+    rtf REAL,
+    peak_rss_mb REAL,
+    segment_count INTEGER,
+    estimated_mb REAL
+);
+CREATE INDEX IF NOT EXISTS idx_stats_config ON transcription_stats (model_size, device, compute_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_stats_created ON transcription_stats (created_at);
+"""
+
+_COLUMNS = (
+    "created_at", "path", "extension", "model_size", "device", "compute_type", "beam_size", "batch_size",
+    "vad_enabled", "audio_duration", "total_time", "decode_time", "vad_time", "inference_time",
+    "write_time", "wait_time", "rtf", "peak_rss_mb", "segment_count", "estimated_mb",
+)
+
+# 建立資料表之後才加入的欄位（開啟舊版資料庫時補上）
+_ADDED_COLUMNS = {"estimated_mb": "REAL"}
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """
+    行程共用的統計資料庫（第一次使用時開啟，並匯入舊版 CSV）
+
+    Returns:
+        StatsStore
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = StatsStore()
+        return _default_store
+
+
+class StatsStore:
+    """轉錄統計資料庫"""
+
+    def __init__(self, db_path=STATS_DB_FILE, legacy_csv=TRANSCRIPTION_STATS_FILE):
+        """
+        Args:
+            db_path: 資料庫路徑
+            legacy_csv: 舊版 CSV 統計檔，存在時匯入，None 表示不匯入
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        try:
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(transcription_stats)")}
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE transcription_stats ADD COLUMN {column} {column_type}")
+        except sqlite3.Error as e:
+            raise StatsStoreError(f"無法開啟統計資料庫 {db_path}: {e}") from e
+        if legacy_csv and os.path.isfile(legacy_csv):
+            self.migrate_csv(legacy_csv)
+
+    def _connect(self):
+        """取得目前執行緒的連線（sqlite3 連線不可跨執行緒共用）"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """關閉目前執行緒的連線"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _insert(self, conn, rows):
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        conn.executemany(
+            f"INSERT INTO transcription_stats ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+            ([row.get(column) for column in _COLUMNS] for row in rows)
+        )
+
+    # === 寫入 ===
+    def record(self, file_path, result, model_size):
+        """
+        記錄一個檔案的轉錄統計
+
+        Args:
+            file_path: 檔案路徑
+            result: transcribe_file 的結果（舊版或轉錄服務的結果可能缺少部分欄位）
+            model_size: 模型大小
+
+        Returns:
+            dict: 寫入的紀錄
+        """
+        timings = result.get("timings") or {}
+        audio_duration = result.get("audio_duration")
+        total_time = result["elapsed"]
+        row = {
+            "created_at": time.time(),
+            "path": file_path,
+            "extension": os.path.splitext(file_path)[1].lower(),
+            "model_size": model_size,
+            "device": result.get("device"),
+            "compute_type": result.get("compute_type"),
+            "beam_size": result.get("beam_size"),
+            "batch_size": result.get("batch_size"),
+            "vad_enabled": None if result.get("vad_enabled") is None else int(result["vad_enabled"]),
+            "audio_duration": audio_duration,
+            "total_time": total_time,
+            "decode_time": timings.get("decode"),
+            "vad_time": timings.get("vad"),
+            "inference_time": timings.get("inference"),
+            "write_time": timings.get("write"),
+            "wait_time": timings.get("wait"),
+            "rtf": result.get("rtf") or (total_time / audio_duration if audio_duration else None),
+            "peak_rss_mb": result.get("peak_rss_mb"),
+            "segment_count": result.get("segment_count"),
+            "estimated_mb": result.get("estimated_mb"),
+        }
+        self._insert(self._connect(), [row])
+        return row
+
+    def migrate_csv(self, csv_path):
+        """
+        匯入舊版 transcription_stats.csv（只有耗時，沒有音訊長度），完成後改名為 .migrated
+
+        Returns:
+            int: 匯入的筆數
+        """
+        rows = []
+        try:
+            with open(csv_path, newline="", encoding="utf-8") as f:
+                for item in csv.DictReader(f):
+                    try:
+                        created_at = datetime.datetime.strptime(item["Timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+                        rows.append({
+                            "created_at": created_at,
+                            "path": item["File Path"],
+                            "extension": (item.get("Extension") or "").lower(),
+                            "model_size": item["Model Size"],
+                            "total_time": float(item["Duration (s)"]),
+                        })
+                    except (KeyError, TypeError, ValueError):
+                        continue
+        except OSError as e:
+            print(f"[WARN] 無法讀取舊版統計檔 {csv_path}: {e}")
+            return 0
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(conn, rows)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        try:
+            os.replace(csv_path, csv_path + ".migrated")
+        except OSError as e:
+            print(f"[WARN] 無法重新命名舊版統計檔 {csv_path}: {e}")
+        print(f"[INFO] 已匯入 {len(rows)} 筆舊版轉錄統計 ({csv_path})")
+        return len(rows)
+
+    # === 查詢 ===
+    def recent(self, model_size=None, device=None, compute_type=None, limit=STATS_ETA_SAMPLES):
+        """
+        最近的統計紀錄（新的在前）
+
+        Args:
+            model_size / device / compute_type: 篩選條件，None 表示不限
+            limit: 最多筆數
+
+        Returns:
+            list[dict]
+        """
+        sql = "SELECT * FROM transcription_stats"
+        conditions, args = [], []
+        for column, value in (("model_size", model_size), ("device", device), ("compute_type", compute_type)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                args.append(value)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        args.append(limit)
+        return [dict(row) for row in self._connect().execute(sql, args)]
+
+    def estimate_seconds(self, model_size, audio_durations, device=None):
+        """
+        預估轉錄時間
+
+        Args:
+            model_size: 模型大小
+            audio_durations: 每個檔案的音訊長度（秒），未知為 None
+            device: 運算裝置，None 表示不限；該裝置沒有紀錄時改用所有裝置的紀錄
+
+        Returns:
+            float | None: 預估秒數，沒有可用紀錄時為 None
+        """
+        rows = self.recent(model_size, device)
+        if not rows and device is not None:
+            rows = self.recent(model_size)
+        if not rows:
+            return None
+        rtfs = [row["rtf"] for row in rows if row["rtf"]]
+        rtf = statistics.median(rtfs) if rtfs else None
+        per_file = statistics.fmean(row["total_time"] for row in rows)
+
+        total = 0.0
+        for duration in audio_durations:
+            total += duration * rtf if duration and rtf is not None else per_file
+        return total
+
+    def summary(self, since=None):
+        """
+        依模型、裝置與 compute_type 彙總（比較不同設定或版本的效能）
+
+        Args:
+            since: 只統計此時間（Unix 秒）之後的紀錄
+
+        Returns:
+            list[dict]: {"model_size", "device", "compute_type", "count", "rtf_p50", "rtf_p90",
+                         "decode", "vad", "inference", "write", "peak_rss_mb", "estimated_mb"}
+                        （各階段為平均秒數，記憶體為最大值）
+        """
+        sql = "SELECT * FROM transcription_stats"
+        args = []
+        if since is not None:
+            sql += " WHERE created_at >= ?"
+            args.append(since)
+        groups = {}
+        for row in self._connect().execute(sql + " ORDER BY id", args):
+            key = (row["model_size"], row["device"], row["compute_type"])
+            groups.setdefault(key, []).append(row)
+
+        def mean(rows, column):
+            values = [row[column] for row in rows if row[column] is not None]
+            return statistics.fmean(values) if values else None
+
+        result = []
+        for (model_size, device, compute_type), rows in sorted(groups.items(), key=lambda item: str(item[0])):
+            rtfs = sorted(row["rtf"] for row in rows if row["rtf"] is not None)
+            result.append({
+                "model_size": model_size,
+                "device": device,
+                "compute_type": compute_type,
+                "count": len(rows),
+                "rtf_p50": statistics.median(rtfs) if rtfs else None,
+                "rtf_p90": rtfs[min(len(rtfs) - 1, int(len(rtfs) * 0.9))] if rtfs else None,
+                "decode": mean(rows, "decode_time"),
+                "vad": mean(rows, "vad_time"),
+                "inference": mean(rows, "inference_time"),
+                "write": mean(rows, "write_time"),
+                "peak_rss_mb": max((row["peak_rss_mb"] for row in rows if row["peak_rss_mb"]), default=None),
+                "estimated_mb": max((row["estimated_mb"] for row in rows if row["estimated_mb"]), default=None),
+            })
+        return result
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def main():
+    """命令列介面"""
+    parser = argparse.ArgumentParser(description="轉錄統計")
+    parser.add_argument("--db", default=STATS_DB_FILE, help="統計資料庫路徑")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_summary = sub.add_parser("summary", help="依模型 / 裝置 / compute_type 彙總")
+    p_summary.add_argument("--days", type=float, help="只統計最近 N 天")
+    p_recent = sub.add_parser("recent", help="最近的紀錄")
+    p_recent.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    store = StatsStore(args.db)
+    if args.command == "summary":
+        since = time.time() - args.days * 86400 if args.days else None
+        print(f"{'模型':<10}{'裝置':<6}{'compute':<14}{'筆數':>6}{'RTF p50':>9}{'RTF p90':>9}"
+              f"{'解碼':>8}{'VAD':>8}{'推論':>8}{'輸出':>8}{'峰值MB':>9}{'預估MB':>9}")
+        for row in store.summary(since):
+            print(f"{row['model_size'] or '-':<10}{row['device'] or '-':<6}{row['compute_type'] or '-':<14}"
+                  f"{row['count']:>6}{_fmt(row['rtf_p50'], '.3f'):>9}{_fmt(row['rtf_p90'], '.3f'):>9}"
+                  f"{_fmt(row['decode']):>8}{_fmt(row['vad']):>8}{_fmt(row['inference']):>8}"
+                  f"{_fmt(row['write']):>8}{_fmt(row['peak_rss_mb'], '.0f'):>9}{_fmt(row['estimated_mb'], '.0f'):>9}")
+    else:
+        for row in store.recent(limit=args.limit):
+            when = datetime.datetime.fromtimestamp(row["created_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"{when}  {row['model_size'] or '-':<8} RTF {_fmt(row['rtf'], '.3f'):>6}  "
+                  f"{_fmt(row['total_time'], '.1f'):>7}s  {row['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
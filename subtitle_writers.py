@@ -0,0 +1,329 @@
+# coding: utf-8
+"""
+字幕輸出模組
+將片段一次正規化為陣列後，以向量化方式批次格式化時間戳，
+並在同一輪中輸出 SRT、WebVTT、TSV、JSON 等格式（每個檔案只寫入一次）
+另提供讀取既有 SRT 與拼接部分範圍重新轉錄結果的功能
+"""
+import json
+import operator
+import re
+
+import numpy as np
+
+from constants import SUBTITLE_FORMATS
+from exceptions import SubtitleGenerationError
+
+_GET_FIELDS = {
+    dict: operator.itemgetter("start", "end", "text"),
+    object: operator.attrgetter("start", "end", "text"),
+}
+
+
+class SubtitleTrack:
+    """正規化後的字幕資料：開始/結束時間陣列與去除空白的文字列表"""
+
+    def __init__(self, starts, ends, texts):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.texts)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        由片段建立（兼容 dict (自定義切分) 和 object (原始 segment)）
+
+        同類型的片段列表只判斷一次類型，不在每個欄位上重複判斷
+
+        Args:
+            segments: 片段列表
+
+        Returns:
+            SubtitleTrack
+        """
+        segments = list(segments)
+        if not segments:
+            return cls([], [], [])
+        if all(isinstance(s, dict) for s in segments):
+            rows = list(map(_GET_FIELDS[dict], segments))
+        elif not any(isinstance(s, dict) for s in segments):
+            rows = list(map(_GET_FIELDS[object], segments))
+        else:
+            rows = [_GET_FIELDS[dict if isinstance(s, dict) else object](s) for s in segments]
+        starts, ends, texts = zip(*rows)
+        return cls(starts, ends, [t.strip() for t in texts])
+
+
+_SRT_TIME = re.compile(
+    r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})"
+)
+
+
+def parse_srt(content):
+    """
+    解析 SRT 內容（容許 BOM、CRLF 與缺少序號的字幕）
+
+    Args:
+        content: SRT 文字
+
+    Returns:
+        SubtitleTrack
+
+    Raises:
+        SubtitleGenerationError: 內容中沒有任何時間軸但不是空白
+    """
+    starts, ends, texts = [], [], []
+    for block in re.split(r"\n\s*\n", content.lstrip("\ufeff").replace("\r\n", "\n").strip()):
+        lines = block.split("\n")
+        for i, line in enumerate(lines[:2]):
+            match = _SRT_TIME.search(line)
+            if match:
+                h1, m1, s1, ms1, h2, m2, s2, ms2 = map(int, match.groups())
+                # 加半毫秒：format_timestamps 捨去毫秒以下，避免 7.8 寫回時因浮點誤差變成 7.799
+                starts.append(h1 * 3600 + m1 * 60 + s1 + (ms1 + 0.5) / 1000)
+                ends.append(h2 * 3600 + m2 * 60 + s2 + (ms2 + 0.5) / 1000)
+                texts.append("\n".join(lines[i + 1:]).strip())
+                break
+    if not texts and content.strip():
+        raise SubtitleGenerationError("無法解析 SRT：找不到時間軸")
+    return SubtitleTrack(starts, ends, texts)
+
+
+def parse_time(text):
+    """
+    解析時間文字：秒數（90、90.5）、M:SS、H:MM:SS 或 SRT 格式（00:01:30,500）
+
+    Args:
+        text: 時間文字
+
+    Returns:
+        float: 秒數
+
+    Raises:
+        ValueError: 格式不正確
+    """
+    parts = text.strip().replace(",", ".").split(":")
+    if not 1 <= len(parts) <= 3 or not all(parts):
+        raise ValueError(f"無效的時間: {text}")
+    seconds = 0.0
+    try:
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"無效的時間: {text}") from None
+    if seconds < 0:
+        raise ValueError(f"無效的時間: {text}")
+    return seconds
+
+
+def read_srt(path):
+    """
+    讀取 SRT 檔案
+
+    Args:
+        path: 檔案路徑
+
+    Returns:
+        SubtitleTrack
+
+    Raises:
+        SubtitleGenerationError: 檔案無法讀取或解析
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        raise SubtitleGenerationError(f"無法讀取字幕檔 {path}: {e}") from e
+    return parse_srt(content)
+
+
+def snap_range(track, start, end):
+    """
+    將重新轉錄的範圍擴大到不切開既有字幕：跨越 start 或 end 的字幕整句納入範圍
+
+    Args:
+        track: 既有字幕
+        start: 開始秒數
+        end: 結束秒數
+
+    Returns:
+        tuple: (start, end)
+    """
+    crossing = (track.starts < start) & (track.ends > start)
+    if crossing.any():
+        start = float(track.starts[crossing].min())
+    crossing = (track.starts < end) & (track.ends > end)
+    if crossing.any():
+        end = float(track.ends[crossing].max())
+    return start, end
+
+
+def splice_track(track, segments, start, end):
+    """
+    以新的片段取代 [start, end) 範圍內的字幕（範圍應已由 snap_range 對齊）
+
+    新片段限制在範圍內，不與範圍外保留的字幕重疊；落在範圍外或長度為 0 的片段捨棄
+
+    Args:
+        track: 既有字幕
+        segments: 範圍內重新轉錄的片段（時間為整個檔案的秒數）
+        start: 開始秒數
+        end: 結束秒數
+
+    Returns:
+        tuple: (SubtitleTrack, 被取代的字幕數)
+    """
+    new = segments if isinstance(segments, SubtitleTrack) else SubtitleTrack.from_segments(segments)
+    new_starts = np.clip(new.starts, start, end)
+    new_ends = np.clip(new.ends, start, end)
+    valid = (new_ends > new_starts) & np.array([bool(t) for t in new.texts], dtype=bool)
+
+    # 與範圍重疊的舊字幕全部取代（snap_range 之後只剩完全落在範圍內的字幕）
+    keep = (track.ends <= start) | (track.starts >= end)
+    starts = np.concatenate([track.starts[keep], new_starts[valid]])
+    ends = np.concatenate([track.ends[keep], new_ends[valid]])
+    texts = [t for t, k in zip(track.texts, keep) if k] + [t for t, v in zip(new.texts, valid) if v]
+    order = np.argsort(starts, kind="stable")
+    spliced = SubtitleTrack(starts[order], ends[order], [texts[i] for i in order.tolist()])
+    return spliced, int(len(track) - keep.sum())
+
+
+def format_timestamps(seconds, decimal_marker=","):
+    """
+    批次將秒數轉換為 HH:MM:SS,mmm（與 utils.format_timestamp 結果相同）
+
+    Args:
+        seconds: 秒數陣列
+        decimal_marker: 毫秒分隔字元（SRT 為 ","，WebVTT 為 "."）
+
+    Returns:
+        list[str]: 時間戳字串列表
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    if len(seconds) == 0:
+        return []
+    total = seconds.astype(np.int64)
+    millis = ((seconds - total) * 1000).astype(np.int64)
+    hours = total // 3600
+    minutes = (total % 3600) // 60
+    secs = total % 60
+
+    # 以 ASCII 碼直接填入 12 個字元的矩陣，再整批轉為字串
+    zero = ord("0")
+    chars = np.empty((len(seconds), 12), dtype=np.uint8)
+    chars[:, 0] = hours // 10 % 10 + zero
+    chars[:, 1] = hours % 10 + zero
+    chars[:, 2] = chars[:, 5] = ord(":")
+    chars[:, 3] = minutes // 10 + zero
+    chars[:, 4] = minutes % 10 + zero
+    chars[:, 6] = secs // 10 + zero
+    chars[:, 7] = secs % 10 + zero
+    chars[:, 8] = ord(decimal_marker)
+    chars[:, 9] = millis // 100 % 10 + zero
+    chars[:, 10] = millis // 10 % 10 + zero
+    chars[:, 11] = millis % 10 + zero
+    stamps = chars.view("S12").ravel().astype("U12").tolist()
+
+    # 超過 99 小時或負值時退回逐筆格式化
+    for i in np.flatnonzero((hours > 99) | (total < 0) | (millis < 0)).tolist():
+        stamps[i] = (
+            f"{int(hours[i]):02d}:{int(minutes[i]):02d}:{int(secs[i]):02d}"
+            f"{decimal_marker}{int(millis[i]):03d}"
+        )
+    return stamps
+
+
+def render_srt(track):
+    """產生 SRT 內容"""
+    starts = format_timestamps(track.starts)
+    ends = format_timestamps(track.ends)
+    return "".join([
+        f"{i}\n{start} --> {end}\n{text}\n\n"
+        for i, (start, end, text) in enumerate(zip(starts, ends, track.texts), start=1)
+    ])
+
+
+def render_vtt(track):
+    """產生 WebVTT 內容"""
+    starts = format_timestamps(track.starts, decimal_marker=".")
+    ends = format_timestamps(track.ends, decimal_marker=".")
+    cues = [f"{start} --> {end}\n{text}\n\n" for start, end, text in zip(starts, ends, track.texts)]
+    return "WEBVTT\n\n" + "".join(cues)
+
+
+def render_tsv(track):
+    """產生 TSV 內容（start/end 為整數毫秒，與 OpenAI Whisper 的 TSV 格式相同）"""
+    starts = np.round(track.starts * 1000).astype(np.int64).tolist()
+    ends = np.round(track.ends * 1000).astype(np.int64).tolist()
+    rows = [
+        f"{start}\t{end}\t{' '.join(text.split())}\n"
+        for start, end, text in zip(starts, ends, track.texts)
+    ]
+    return "start\tend\ttext\n" + "".join(rows)
+
+
+def render_json(track):
+    """產生 JSON 內容"""
+    segments = [
+        {"id": i, "start": start, "end": end, "text": text}
+        for i, (start, end, text) in enumerate(
+            zip(track.starts.tolist(), track.ends.tolist(), track.texts), start=1
+        )
+    ]
+    # 不使用 indent，才能走 json 的 C 編碼器
+    return json.dumps({"segments": segments}, ensure_ascii=False)
+
+
+RENDERERS = {
+    "srt": render_srt,
+    "vtt": render_vtt,
+    "tsv": render_tsv,
+    "json": render_json,
+}
+
+
+def write_track(track, output_path, fmt="srt"):
+    """
+    以單次寫入輸出一個字幕檔
+
+    Args:
+        track: SubtitleTrack
+        output_path: 輸出檔案路徑
+        fmt: 格式（srt/vtt/tsv/json）
+
+    Raises:
+        SubtitleGenerationError: 不支援的格式或檔案寫入失敗
+    """
+    renderer = RENDERERS.get(fmt)
+    if renderer is None:
+        raise SubtitleGenerationError(f"不支援的字幕格式: {fmt}（可用: {', '.join(SUBTITLE_FORMATS)}）")
+    content = renderer(track)
+    try:
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    except OSError as e:
+        raise SubtitleGenerationError(f"無法寫入字幕檔 {output_path}: {e}") from e
+
+
+def write_subtitles(segments, base_path, formats=("srt",)):
+    """
+    由同一份片段資料一次輸出多種字幕格式
+
+    Args:
+        segments: 片段列表（dict 或具有 start/end/text 的物件）
+        base_path: 不含副檔名的輸出路徑，例如 "D:/video1"
+        formats: 要輸出的格式
+
+    Returns:
+        dict[str, str]: 格式 -> 輸出檔案路徑
+    """
+    track = segments if isinstance(segments, SubtitleTrack) else SubtitleTrack.from_segments(segments)
+    paths = {}
+    for fmt in dict.fromkeys(formats):
+        path = f"{base_path}.{fmt}"
+        write_track(track, path, fmt)
+        paths[fmt] = path
+    return paths
@@ -0,0 +1,153 @@
+# coding: utf-8
+"""
+Audio Stream Verification Test
+Tests overlapping window boundaries, background prefetch and that streamed transcription
+stitches window seams without duplicate or missing words
+"""
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Audio Stream Verification Test")
+print("=" * 60)
+
+import numpy as np
+
+import audio_stream
+from audio_stream import iter_audio_windows, prefetch
+from constants import STREAM_OVERLAP_SECONDS
+
+SR = 16000
+WORD_SECONDS = 0.5
+
+
+def stepped_pcm(seconds):
+    """每 WORD_SECONDS 一個階梯的 int16 訊號，數值即為從檔案開頭算起的單字編號（可由任一段音訊還原絕對時間）"""
+    count = int(round(seconds * SR))
+    return (np.arange(count) // int(WORD_SECONDS * SR) + 100).astype(np.int16)
+
+
+def use_pcm(pcm, block=4321):
+    """以不規則大小的區塊取代檔案解碼"""
+    audio_stream._iter_pcm = lambda file_path, sample_rate, start=0.0: (
+        pcm[i:i + block] for i in range(0, len(pcm), block)
+    )
+
+
+class StepModel:
+    """把每個階梯當成一個單字，每 4 個單字一個片段（邊緣被切掉的單字照樣輸出，由保留範圍去除）"""
+
+    def transcribe(self, audio, **params):
+        values = np.round(audio * 32768).astype(np.int64)
+        edges = np.flatnonzero(np.diff(values)) + 1
+        starts = np.concatenate(([0], edges))
+        ends = np.concatenate((edges, [len(values)]))
+        words = [SimpleNamespace(start=s / SR, end=e / SR, word=f" w{values[s] - 100}", probability=1.0)
+                 for s, e in zip(starts, ends)]
+        segments = [
+            SimpleNamespace(start=group[0].start, end=group[-1].end, text="".join(w.word for w in group).strip(),
+                            words=group)
+            for group in (words[i:i + 4] for i in range(0, len(words), 4))
+        ]
+        return iter(segments), None
+
+
+# Test 1: Windows overlap around each cut, keep ranges tile the file, the last window is short
+print("\n[Test 1] Window boundaries...")
+try:
+    overlap = STREAM_OVERLAP_SECONDS
+    counts = []
+    for seconds, window, first in ((100.3, 20.0, 12.0), (41.0, 20.0, None), (7.0, 20.0, None)):
+        pcm = stepped_pcm(seconds)
+        use_pcm(pcm)
+        windows = list(iter_audio_windows("synthetic.wav", window, SR, overlap_seconds=overlap,
+                                          first_window_seconds=first))
+        assert windows[0].offset == 0.0 and windows[0].keep_start == 0.0 and windows[-1].keep_end is None
+        for i, w in enumerate(windows):
+            begin = int(round(w.offset * SR))
+            assert np.array_equal(w.audio, pcm[begin:begin + len(w.audio)].astype(np.float32) / 32768.0)
+            limit = (first or window) if i == 0 else window
+            if w.keep_end is not None:
+                nxt = windows[i + 1]
+                assert nxt.keep_start == w.keep_end, "keep ranges must meet at the cut"
+                assert abs(w.offset + len(w.audio) / SR - (w.keep_end + overlap)) < 1e-9, "overlap after cut"
+                assert abs(nxt.offset - (w.keep_end - overlap)) < 1e-9, "overlap before cut"
+                assert limit - 5.0 - 1e-9 <= w.keep_end - w.offset <= limit, "cut inside the search range"
+        last = windows[-1]
+        assert abs(last.offset + len(last.audio) / SR - seconds) < 1e-9, "last window reaches the end"
+        if len(windows) > 1:
+            assert len(last.audio) / SR < window + overlap
+        counts.append(len(windows))
+    assert counts[-1] == 1, "file shorter than a window is a single window"
+    print(f"[OK] window counts {counts}; seams overlap by {overlap:.0f}s on both sides")
+except Exception as e:
+    print(f"[FAIL] window boundaries: {e}")
+    sys.exit(1)
+
+# Test 2: Prefetch keeps order, re-raises source errors and stops when the consumer leaves early
+print("\n[Test 2] Prefetch...")
+try:
+    assert list(prefetch(iter(range(10)), depth=2)) == list(range(10))
+
+    def failing():
+        yield 1
+        raise ValueError("decode failed")
+
+    received = []
+    try:
+        for item in prefetch(failing()):
+            received.append(item)
+        raise AssertionError("source error should propagate")
+    except ValueError:
+        pass
+    assert received == [1]
+
+    closed = []
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            closed.append(True)
+
+    items = prefetch(endless())
+    assert next(items) == 0 and next(items) == 1
+    items.close()
+    assert closed == [True], "source generator closed when the consumer stops"
+    print("[OK] ordered, errors re-raised, source closed on early exit")
+except Exception as e:
+    print(f"[FAIL] prefetch: {e}")
+    sys.exit(1)
+
+# Test 3: Streamed transcription keeps every word exactly once at its absolute time
+print("\n[Test 3] Stitched segments...")
+try:
+    from transcription import _StreamingTranscription
+
+    seconds = 95.0
+    use_pcm(stepped_pcm(seconds))
+    stream = _StreamingTranscription(StepModel(), "synthetic.wav", 20.0, {})
+    segments = list(stream)
+    words = [w for seg in segments for w in seg.words]
+    indices = [int(w.word.strip()[1:]) for w in words]
+    assert indices == list(range(int(seconds / WORD_SECONDS))), "each word once, in order"
+    for index, w in zip(indices, words):
+        assert abs(w.start - index * WORD_SECONDS) < 1e-6 and abs(w.end - (index + 1) * WORD_SECONDS) < 1e-6
+    assert all(a.end <= b.start + 1e-6 for a, b in zip(segments, segments[1:])), "segments don't overlap"
+    assert all(seg.text == "".join(w.word for w in seg.words).strip() for seg in segments)
+    assert abs(stream.duration - seconds) < 1e-6
+    print(f"[OK] {len(words)} words in {len(segments)} segments, no duplicates or gaps at the seams")
+except Exception as e:
+    print(f"[FAIL] stitched segments: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All audio stream tests passed!")
+print("=" * 60)
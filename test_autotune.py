@@ -0,0 +1,92 @@
+# coding: utf-8
+"""
+Autotune Verification Test
+Tests Pareto selection over speed, memory and accuracy, and how tuned values combine with user settings
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Autotune Verification Test")
+print("=" * 60)
+
+from autotune import pareto_front, choose_best
+from config import Config
+
+
+def result(compute_type, beam_size, rtf, rss, threads=4):
+    return {"compute_type": compute_type, "beam_size": beam_size, "cpu_threads": threads, "num_workers": 1,
+            "rtf": rtf, "peak_rss_mb": rss}
+
+
+results = [
+    result("int8", 1, 0.10, 500),
+    result("int8", 1, 0.14, 500, threads=2),   # 較慢且其他條件相同 -> 被支配
+    result("int8", 3, 0.20, 505),
+    result("int8", 5, 0.30, 510),
+    result("float32", 1, 0.25, 900),           # 比 int8 beam 3 慢、記憶體多且精度排序較低 -> 被支配
+    result("float32", 5, 0.80, 920),
+    result("int8_float32", 1, 0.40, 950),      # 比 float32 beam 1 慢、記憶體多且精度較低 -> 被支配
+]
+
+# Test 1: Slower, higher-accuracy configs stay on the front
+print("\n[Test 1] Pareto front...")
+try:
+    front = pareto_front(results)
+    labels = [(r["compute_type"], r["beam_size"]) for r in front]
+    assert labels == [("int8", 1), ("int8", 3), ("int8", 5), ("float32", 5)], labels
+    assert [r["rtf"] for r in front] == sorted(r["rtf"] for r in front)
+    assert pareto_front([]) == []
+    print(f"[OK] {len(front)} of {len(results)} configs on the front")
+except Exception as e:
+    print(f"[FAIL] pareto front: {e}")
+    sys.exit(1)
+
+# Test 2: Most accurate config within the RTF and memory limits wins
+print("\n[Test 2] Choose best...")
+try:
+    cases = [
+        # (target_rtf, max_rss_mb, 預期 (compute_type, beam_size))
+        (0.5, None, ("int8", 5)),
+        (1.0, None, ("float32", 5)),
+        (1.0, 800, ("int8", 5)),
+        (0.22, None, ("int8", 3)),
+        (0.05, None, ("int8", 1)),          # 沒有組合達標 -> 最快
+        (0.05, 100, ("int8", 1)),           # 記憶體也不符 -> 最快
+    ]
+    for target_rtf, max_rss_mb, expected in cases:
+        chosen = choose_best(front, target_rtf, max_rss_mb)
+        assert (chosen["compute_type"], chosen["beam_size"]) == expected, (target_rtf, max_rss_mb, chosen)
+    assert choose_best([]) is None
+    print(f"[OK] {len(cases)} selection cases")
+except Exception as e:
+    print(f"[FAIL] choose best: {e}")
+    sys.exit(1)
+
+# Test 3: Tuned decode values apply only while the user setting is at its default
+print("\n[Test 3] Tuned vs user settings...")
+try:
+    from memory_governor import MemoryGovernor
+    from transcription import _prepare_transcription_params
+
+    Config.TUNED = {"tiny": {"device": Config.DEVICE, "beam_size": 5, "batch_size": 32}}
+    Config.BEAM_SIZE, Config.BATCH_SIZE = 1, 16
+    assert _prepare_transcription_params(overrides={"model_size": "tiny"})["beam_size"] == 5
+    assert Config.get_decode_value("batch_size", "tiny") == 32
+    assert Config.get_decode_value("beam_size", "base") == 1
+    Config.BEAM_SIZE, Config.BATCH_SIZE = 3, 8
+    assert _prepare_transcription_params(overrides={"model_size": "tiny"})["beam_size"] == 3
+    assert _prepare_transcription_params(overrides={"model_size": "tiny", "beam_size": 2})["beam_size"] == 2
+    with MemoryGovernor().admit("tiny", None, {"vad_enabled": True}, True, 60.0) as plan:
+        assert plan["batch_size"] == 8, plan
+    print("[OK] explicit beam_size / batch_size override tuned values")
+except Exception as e:
+    print(f"[FAIL] tuned vs user settings: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All autotune tests passed!")
+print("=" * 60)
@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+Benchmark Suite Verification Test
+Tests synthetic audio determinism, the fake model stand-in and regression detection
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+print("=" * 60)
+print("Benchmark Suite Verification Test")
+print("=" * 60)
+
+import numpy as np
+
+from synthetic import FakeWhisperModel, speech_pattern, write_wav
+import run_benchmarks
+
+# Test 1: Same seed gives the same audio and the same fake transcript
+print("\n[Test 1] Deterministic synthetic audio and fake model...")
+try:
+    audio, spans = speech_pattern(20, seed=3)
+    again, _ = speech_pattern(20, seed=3)
+    assert np.array_equal(audio, again) and len(audio) == 20 * 16000
+    segments, info = FakeWhisperModel(seed=1).transcribe(audio, word_timestamps=True)
+    first = [(s.start, s.end, s.text) for s in segments]
+    second = [(s.start, s.end, s.text) for s in FakeWhisperModel(seed=1).transcribe(audio, word_timestamps=True)[0]]
+    assert first and first == second
+    # 片段只出現在有聲音的區段
+    assert all(any(a - 0.1 <= s <= b + 0.1 for a, b in spans) for s, _, _ in first)
+    print(f"[OK] {len(first)} segments over {len(spans)} speech spans, identical across runs")
+except Exception as e:
+    print(f"[FAIL] deterministic data: {e}")
+    sys.exit(1)
+
+# Test 2: The fake model drives the real batch pipeline
+print("\n[Test 2] transcribe_file with the fake model...")
+try:
+    from transcription import transcribe_file
+    path = write_wav(os.path.join(tempfile.mkdtemp(), "speech.wav"), audio)
+    model = FakeWhisperModel(rtf=0.01, seed=1)
+    result = transcribe_file(model, path, use_batched=True, options={"vad_enabled": True, "output_formats": ["srt"]})
+    assert os.path.exists(result["srt_path"]) and result["segment_count"] > 0
+    assert abs(model.simulated_seconds - 0.01 * sum(b - a for a, b in spans)) < 0.05
+    print(f"[OK] {result['segment_count']} subtitle segments, {model.simulated_seconds:.2f}s simulated inference")
+except Exception as e:
+    print(f"[FAIL] batch pipeline: {e}")
+    sys.exit(1)
+
+# Test 3: Only timing metrics beyond the threshold count as regressions
+print("\n[Test 3] Regression detection...")
+try:
+    baseline = {"benchmarks": {"batch": {"total_seconds": 1.0, "segments": 10}, "live": {"feed_p95_seconds": 0.001}}}
+    current = {"benchmarks": {"batch": {"total_seconds": 1.5, "segments": 20}, "live": {"feed_p95_seconds": 0.0011}}}
+    rows = run_benchmarks.compare(baseline, current, threshold=0.2)
+    assert [row["metric"] for row in rows] == ["batch.total_seconds", "live.feed_p95_seconds"], rows
+    assert [row["regression"] for row in rows] == [True, False]
+    print("[OK] batch.total_seconds +50% flagged, live.feed_p95_seconds +10% within threshold")
+except Exception as e:
+    print(f"[FAIL] regression detection: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All benchmark suite tests passed!")
+print("=" * 60)
@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+Config Service Verification Test
+Tests schema validation and hot reload of whisper_settings.json
+"""
+import sys
+import os
+import json
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Config Service Verification Test")
+print("=" * 60)
+
+from config import Config
+from config_manager import ConfigManager, SETTINGS_SCHEMA
+from config_service import ConfigService, needs_model_reload
+
+tmp_dir = tempfile.mkdtemp()
+settings_path = os.path.join(tmp_dir, "whisper_settings.json")
+
+# Test 1: Single schema drives defaults and validation
+print("\n[Test 1] Schema validation...")
+try:
+    assert set(ConfigManager.DEFAULT_SETTINGS) == set(SETTINGS_SCHEMA)
+    settings, errors = ConfigManager.validate_settings({
+        "beam_size": 3,
+        "temperature": 0.0,          # 低於下限 -> 夾到 0.1
+        "vad_enabled": "yes",        # 型別錯誤 -> 預設值
+        "output_formats": ["srt", "docx"],
+        "min_segment_duration": 1,   # int 可用於 float 設定
+        "future_option": 42,         # 未知的鍵原樣保留
+    })
+    assert settings["beam_size"] == 3
+    assert settings["temperature"] == 0.1
+    assert settings["vad_enabled"] is False
+    assert settings["output_formats"] == ["srt"]
+    assert settings["min_segment_duration"] == 1.0
+    assert settings["future_option"] == 42
+    assert len(errors) == 3, errors
+    # 預設值不可被共用修改
+    ConfigManager.default_settings()["output_formats"].append("vtt")
+    assert ConfigManager.DEFAULT_SETTINGS["output_formats"] == ["srt"]
+    print("[OK] validation clamps, resets and preserves as expected")
+except Exception as e:
+    print(f"[FAIL] validation: {e}")
+    sys.exit(1)
+
+# Test 2: File changes are detected, applied to Config and pushed to listeners
+print("\n[Test 2] Hot reload...")
+try:
+    ConfigManager.save_settings(ConfigManager.default_settings(), settings_path)
+    service = ConfigService(settings_path, poll_interval=0.05)
+    received = []
+    service.add_listener(received.append)
+    service.start()
+
+    with open(settings_path, "w", encoding="utf-8") as f:
+        json.dump({"beam_size": 5, "temperature": 0.4}, f)
+    deadline = time.time() + 5
+    while not received and time.time() < deadline:
+        time.sleep(0.05)
+    service.stop()
+
+    assert received, "listener was not notified"
+    assert set(received[0]) == {"beam_size", "temperature"}, received[0]
+    assert Config.BEAM_SIZE == 5 and Config.TEMPERATURE == 0.4
+    assert not needs_model_reload(received[0], "tiny"), "decode-only change must not reload the model"
+    print("[OK] decode parameters applied without model reload")
+except Exception as e:
+    print(f"[FAIL] hot reload: {e}")
+    sys.exit(1)
+
+# Test 3: Model-scope changes and programmatic updates
+print("\n[Test 3] Model reload detection...")
+try:
+    changes = service.update({"cpu_threads": 2})
+    assert needs_model_reload(changes, "tiny")
+    assert Config.CPU_THREADS == 2
+    with open(settings_path, encoding="utf-8") as f:
+        assert json.load(f)["cpu_threads"] == 2
+    assert service.check_now() == {}, "own write must not be applied twice"
+
+    tuned_other = {"tuned": ({}, {"small": {"device": "cpu", "beam_size": 3}})}
+    assert not needs_model_reload(tuned_other, "tiny")
+    assert needs_model_reload(tuned_other, "small")
+    ConfigManager.apply_to_config(ConfigManager.default_settings())
+    print("[OK] model-scope changes trigger a reload only when relevant")
+except Exception as e:
+    print(f"[FAIL] model reload detection: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All config service tests passed!")
+print("=" * 60)
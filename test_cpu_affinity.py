@@ -0,0 +1,78 @@
+# coding: utf-8
+"""
+CPU Affinity Verification Test
+Tests CPU list parsing and how reserved / inference core sets are planned from the settings
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("CPU Affinity Verification Test")
+print("=" * 60)
+
+import cpu_affinity
+from config import Config
+from cpu_affinity import parse_cpu_list, plan_cpu_sets
+
+# Test 1: cpulist syntax
+print("\n[Test 1] CPU list parsing...")
+try:
+    cases = [
+        ("0-3,6", [0, 1, 2, 3, 6]),
+        (" 2 , 0 ", [0, 2]),
+        ("4-4", [4]),
+        ("1-2,2-3", [1, 2, 3]),
+        ("", []),
+        ("0,,1,", [0, 1]),
+        (7, [7]),
+    ]
+    for text, expected in cases:
+        assert parse_cpu_list(text) == expected, (text, parse_cpu_list(text))
+    try:
+        parse_cpu_list("0-x")
+        raise AssertionError("invalid range should raise")
+    except ValueError:
+        pass
+    print(f"[OK] {len(cases)} cpulist strings parsed")
+except Exception as e:
+    print(f"[FAIL] CPU list parsing: {e}")
+    sys.exit(1)
+
+# Test 2: Reserved / inference sets for a fixed allowed-CPU set
+print("\n[Test 2] Core planning...")
+try:
+    numa = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7], 2: [8, 9]}
+    cpu_affinity.numa_node_cpus = lambda node: numa.get(node, [])
+    cases = [
+        # (允許的 CPU, RESERVED_CORES, INFERENCE_AFFINITY, NUMA_NODE, 預期 (保留, 推論))
+        (range(8), 0, "", -1, ([], [])),                                  # 不需限制
+        (range(8), 1, "", -1, ([0], [1, 2, 3, 4, 5, 6, 7])),
+        (range(8), 8, "", -1, ([0, 1, 2, 3, 4, 5, 6], [7])),              # 保留數 >= CPU 數，至少留一個推論核心
+        (range(8), 20, "", -1, ([0, 1, 2, 3, 4, 5, 6], [7])),
+        ([0], 4, "", -1, ([], [])),                                       # 單核心不保留
+        (range(8), 1, "4-7,12", -1, ([0], [4, 5, 6, 7])),                 # 12 不在允許集合中
+        (range(8), 1, "10-12", -1, ([0], [1, 2, 3, 4, 5, 6, 7])),         # 全部不允許 -> 其餘核心
+        (range(8), 0, "2-3", -1, ([], [2, 3])),
+        (range(8), 2, "", 1, ([0, 1], [4, 5, 6, 7])),
+        (range(8), 2, "", 0, ([0, 1], [2, 3])),                           # 排除節點中的保留核心
+        (range(8), 1, "", 2, ([0], [1, 2, 3, 4, 5, 6, 7])),               # 節點沒有允許的 CPU -> 其餘核心
+        (range(8), 1, "", 5, ([0], [1, 2, 3, 4, 5, 6, 7])),               # 不存在的節點
+        ([2, 3, 5, 7], 1, "", -1, ([2], [3, 5, 7])),                      # 允許集合不連續
+        ([2, 3, 5, 7], 0, "5", 1, ([], [5])),                              # 指定清單優先於 NUMA 節點
+    ]
+    for allowed, reserved_cores, affinity, node, expected in cases:
+        cpu_affinity.available_cpus = lambda allowed=allowed: list(allowed)
+        Config.RESERVED_CORES, Config.INFERENCE_AFFINITY, Config.NUMA_NODE = reserved_cores, affinity, node
+        plan = plan_cpu_sets()
+        assert plan == expected, (list(allowed), reserved_cores, affinity, node, plan)
+    print(f"[OK] {len(cases)} planning cases")
+except Exception as e:
+    print(f"[FAIL] core planning: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All CPU affinity tests passed!")
+print("=" * 60)
@@ -0,0 +1,100 @@
+# coding: utf-8
+"""
+File Scanner Verification Test
+Tests folder scanning filters, skipping of transcribed files and duration probing
+"""
+import sys
+import os
+import tempfile
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("File Scanner Verification Test")
+print("=" * 60)
+
+from file_scanner import ScanStats, DurationProber, iter_media_files, iter_chunks
+
+
+def touch(path, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb"):
+        pass
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+root = tempfile.mkdtemp()
+now = time.time()
+touch(os.path.join(root, "a.mp3"))
+touch(os.path.join(root, "notes.txt"))
+touch(os.path.join(root, "lecture_01.WAV"))
+touch(os.path.join(root, "sub", "b.mp4"))
+touch(os.path.join(root, "sub", "deep", "c.m4a"))
+touch(os.path.join(root, "backup", "old.mp3"))
+touch(os.path.join(root, "done.mkv"), now - 100)
+touch(os.path.join(root, "done.srt"), now)
+touch(os.path.join(root, "stale.mkv"), now)
+touch(os.path.join(root, "stale.srt"), now - 100)
+
+
+def names(paths):
+    return [os.path.relpath(p, root).replace(os.sep, "/") for p in paths]
+
+
+# Test 1: Extension, include and exclude filters
+print("\n[Test 1] Filters...")
+try:
+    found = names(iter_media_files(root))
+    assert found == ["a.mp3", "done.mkv", "lecture_01.WAV", "stale.mkv", "backup/old.mp3",
+                     "sub/b.mp4", "sub/deep/c.m4a"], found
+    found = names(iter_media_files(root, include=["lecture_*", "*.m4a"]))
+    assert found == ["lecture_01.WAV", "sub/deep/c.m4a"], found
+    found = names(iter_media_files(root, exclude=["backup", "sub/deep/*", "a.*"]))
+    assert found == ["done.mkv", "lecture_01.WAV", "stale.mkv", "sub/b.mp4"], found
+    print("[OK] scandir walk honours extensions and glob patterns")
+except Exception as e:
+    print(f"[FAIL] filters: {e}")
+    sys.exit(1)
+
+# Test 2: Skipping transcribed files and cancellation
+print("\n[Test 2] Skip transcribed and cancel...")
+try:
+    stats = ScanStats()
+    found = names(iter_media_files(root, skip_transcribed=True, stats=stats))
+    assert "done.mkv" not in found and "stale.mkv" in found, found
+    assert stats.skipped == 1 and stats.found == 6, (stats.skipped, stats.found)
+    found = list(iter_media_files(root, should_stop=lambda: True))
+    assert found == [], found
+    assert [len(c) for c in iter_chunks(range(5), chunk_size=2)] == [2, 2, 1]
+    print("[OK] newer .srt skipped, cancellation stops the walk")
+except Exception as e:
+    print(f"[FAIL] skip transcribed: {e}")
+    sys.exit(1)
+
+# Test 3: Parallel duration probing
+print("\n[Test 3] Duration probing...")
+try:
+    wav_path = os.path.join(root, "tone.wav")
+    with wave.open(wav_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\x00\x00" * 16000 * 3)
+    prober = DurationProber(workers=2)
+    prober.submit([wav_path, os.path.join(root, "a.mp3")])
+    results = prober.collect(wait=True)
+    prober.close()
+    assert len(results) == 1 and results[0][0] == wav_path, results
+    assert abs(results[0][1] - 3.0) < 0.05, results
+    print("[OK] durations probed, unreadable files skipped")
+except Exception as e:
+    print(f"[FAIL] duration probing: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All file scanner tests passed!")
+print("=" * 60)
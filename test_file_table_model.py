@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+File Table Model Verification Test
+Tests bulk insertion and batched status updates of the batch file list
+"""
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+print("=" * 60)
+print("File Table Model Verification Test")
+print("=" * 60)
+
+from PyQt6.QtCore import QCoreApplication
+
+from ui.file_table_model import FileTableModel, COLUMN_DURATION, COLUMN_STATUS, COLUMN_RTF
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+# Test 1: Bulk insertion notifies the view once and skips duplicates
+print("\n[Test 1] Bulk insertion...")
+try:
+    model = FileTableModel()
+    inserts = []
+    model.rowsInserted.connect(lambda parent, first, last: inserts.append((first, last)))
+    paths = [f"/data/{i:05d}.wav" for i in range(20000)]
+    assert model.add_paths(paths) == 20000
+    assert model.add_paths(paths[:10] + ["/data/new.wav", "/data/new.wav"]) == 1
+    assert inserts == [(0, 19999), (20000, 20000)], inserts
+    assert model.row_of("/data/12345.wav") == 12345
+    assert model.paths()[-1] == "/data/new.wav"
+    print("[OK] 20001 rows inserted with two notifications")
+except Exception as e:
+    print(f"[FAIL] bulk insertion: {e}")
+    sys.exit(1)
+
+# Test 2: Status updates are buffered and applied in one dataChanged
+print("\n[Test 2] Batched status updates...")
+try:
+    changes = []
+    model.dataChanged.connect(lambda top, bottom, roles: changes.append((top.row(), bottom.row())))
+    for i in range(100, 200):
+        model.queue_status(paths[i], "轉錄中...")
+    model.queue_status(paths[150], "[OK] 完成!")
+    model.queue_timing(paths[150], 120.0, 30.0)
+    model.queue_status("/not/in/list.wav", "ignored")
+    assert changes == [], "updates should wait for flush"
+    model.flush()
+    assert changes == [(100, 199)], changes
+    index = model.index(150, COLUMN_STATUS)
+    assert model.data(index) == "[OK] 完成!"
+    assert model.data(model.index(150, COLUMN_DURATION)) == "2:00"
+    assert model.data(model.index(150, COLUMN_RTF)) == "0.25"
+    assert model.data(model.index(151, COLUMN_RTF)) == ""
+    model.flush()
+    assert len(changes) == 1, "empty flush should not notify"
+    model.clear()
+    assert model.rowCount() == 0 and model.row_of(paths[0]) is None
+    print("[OK] 101 updates applied in a single dataChanged")
+except Exception as e:
+    print(f"[FAIL] batched status updates: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All file table model tests passed!")
+print("=" * 60)
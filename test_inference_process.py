@@ -0,0 +1,119 @@
+# coding: utf-8
+"""
+Inference Process Verification Test
+Tests the supervised inference child with a stub model: shared-memory audio, checkpoint relay,
+restart after a crash mid-request and the restart limit
+
+子行程以 spawn 啟動會重新匯入本檔案，所有測試都放在 main() 中
+"""
+import sys
+import os
+import signal
+import tempfile
+import threading
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+
+def _kill_after(pid, delay):
+    """delay 秒後強制結束子行程（模擬 CTranslate2 原生崩潰）"""
+    def kill():
+        time.sleep(delay)
+        os.kill(pid, signal.SIGKILL)
+    thread = threading.Thread(target=kill, daemon=True)
+    thread.start()
+    return thread
+
+
+def main():
+    print("=" * 60)
+    print("Inference Process Verification Test")
+    print("=" * 60)
+
+    import inference_process
+    from constants import INFERENCE_SHM_SECONDS
+    from exceptions import InferenceProcessError, TranscriptionError
+    from inference_process import InferenceProcess, MODE_LIVE, MODE_FILE
+    from synthetic import FakeWhisperModel, speech_like, write_wav
+
+    tmp_dir = tempfile.mkdtemp()
+
+    # Test 1: Audio goes through shared memory, and the buffer grows for long phrases
+    print("\n[Test 1] Live requests over shared memory...")
+    try:
+        live = InferenceProcess("tiny", MODE_LIVE, model_factory=partial(FakeWhisperModel, seed=1))
+        short = speech_like(5, seed=1)
+        # 替身模型的文字隨呼叫次數變化，比較片段時間
+        expected = [(seg.start, seg.end) for seg in FakeWhisperModel(seed=1).transcribe(short)[0]]
+        assert [(seg.start, seg.end) for seg in live.transcribe(short)[0]] == expected
+        first_shm = live._shm.name
+        long_audio = speech_like(INFERENCE_SHM_SECONDS + 10, seed=2)
+        expected = [(seg.start, seg.end) for seg in FakeWhisperModel(seed=1).transcribe(long_audio)[0]]
+        assert [(seg.start, seg.end) for seg in live.transcribe(long_audio)[0]] == expected
+        assert live._shm.name != first_shm and live._shm.size >= long_audio.nbytes
+        live.close()
+        print("[OK] child read audio from shared memory, buffer re-attached after growing")
+    except Exception as e:
+        print(f"[FAIL] live requests: {e}")
+        sys.exit(1)
+
+    # Test 2: A crash mid-request restarts the child and retries, up to the restart limit
+    print("\n[Test 2] Crash, restart and restart limit...")
+    try:
+        inference_process.INFERENCE_RESTART_LIMIT = 1
+        slow = InferenceProcess("tiny", MODE_LIVE, model_factory=partial(FakeWhisperModel, rtf=0.4, seed=1))
+        audio = speech_like(5, seed=3)
+        first_pid = slow.pid
+        _kill_after(first_pid, 0.5)
+        segments, _ = slow.transcribe(audio)
+        assert segments and slow.pid != first_pid and slow.restart_count == 1
+        shm_name = slow._shm.name
+        assert slow.transcribe(audio)[0], "shared memory still usable after the child was killed"
+        assert slow._shm.name == shm_name
+
+        _kill_after(slow.pid, 0.5)
+        try:
+            slow.transcribe(audio)
+            raise AssertionError("second crash within the window should exceed the restart limit")
+        except InferenceProcessError:
+            pass
+        slow.close()
+        print(f"[OK] retried after a crash (PID {first_pid} -> new child), then stopped at the limit")
+    except Exception as e:
+        print(f"[FAIL] crash and restart: {e}")
+        sys.exit(1)
+
+    # Test 3: File requests relay checkpoints to the parent and report child errors
+    print("\n[Test 3] File requests, checkpoints and errors...")
+    try:
+        path = write_wav(os.path.join(tmp_dir, "talk.wav"), speech_like(20, seed=4))
+        worker = InferenceProcess("tiny", MODE_FILE, model_factory=partial(FakeWhisperModel, seed=1))
+        checkpoints = []
+        result = worker.transcribe_file(path, {"vad_enabled": False, "output_formats": ["srt"]},
+                                        checkpoints.append)
+        assert os.path.exists(result["srt_path"]) and result["segment_count"] > 0
+        assert len(checkpoints) >= result["segment_count"] and all(w >= 0 for w in checkpoints), checkpoints
+        pid = worker.pid
+        try:
+            worker.transcribe_file(os.path.join(tmp_dir, "missing.wav"), {"vad_enabled": False})
+            raise AssertionError("missing file should raise")
+        except TranscriptionError:
+            pass
+        assert worker.pid == pid and worker.restart_count == 0, "child errors must not restart the process"
+        worker.close()
+        print(f"[OK] {len(checkpoints)} checkpoints relayed, child error raised in the parent")
+    except Exception as e:
+        print(f"[FAIL] file requests: {e}")
+        sys.exit(1)
+
+    # Summary
+    print("\n" + "=" * 60)
+    print("[SUCCESS] All inference process tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
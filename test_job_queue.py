@@ -0,0 +1,152 @@
+# coding: utf-8
+"""
+Job Queue Verification Test
+Tests the persistent SQLite job store (enqueue, claim, retry/backoff, recovery)
+"""
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Job Queue Verification Test")
+print("=" * 60)
+
+from job_queue import (
+    JobStore, make_worker_id, QUEUED_OR_DONE_STATES,
+    STATE_PENDING, STATE_RUNNING, STATE_DONE, STATE_FAILED
+)
+
+tmp_dir = tempfile.mkdtemp()
+db_path = os.path.join(tmp_dir, "jobs.db")
+
+# Test 1: Enqueue, dedupe and priority ordering
+print("\n[Test 1] Enqueue, dedupe and priority...")
+try:
+    store = JobStore(db_path)
+    ids = store.enqueue_many(["a.mp3", "b.mp3"], {"language": "en"})
+    dup = store.enqueue("a.mp3")
+    urgent = store.enqueue("c.mp3", priority=5)
+    assert dup == ids[0], "duplicate path should reuse the active job"
+    assert store.counts()[STATE_PENDING] == 3
+
+    job = store.claim(make_worker_id("t1"))
+    assert job["id"] == urgent, "higher priority job should be claimed first"
+    assert job["state"] == STATE_RUNNING and job["attempts"] == 1
+    print("[OK] enqueue/claim ordering correct")
+except Exception as e:
+    print(f"[FAIL] enqueue/claim: {e}")
+    sys.exit(1)
+
+# Test 2: Retry with backoff, then permanent failure
+print("\n[Test 2] Retry and backoff...")
+try:
+    job = store.claim(make_worker_id("t1"))
+    assert job["params"] == {"language": "en"}
+    state = store.fail(job["id"], "boom")
+    assert state == STATE_PENDING
+    assert store.get(job["id"])["next_run_at"] > job["started_at"], "retry must be delayed"
+    assert store.fail(job["id"], "fatal", retry=False) == STATE_FAILED
+    store.retry(job["id"])
+    assert store.get(job["id"])["state"] == STATE_PENDING
+    print("[OK] retry/backoff transitions correct")
+except Exception as e:
+    print(f"[FAIL] retry/backoff: {e}")
+    sys.exit(1)
+
+# Test 3: Concurrent workers never claim the same job
+print("\n[Test 3] Concurrent atomic claims...")
+try:
+    store.clear()
+    store.enqueue_many([f"file_{i}.wav" for i in range(200)])
+    claimed = []
+    lock = threading.Lock()
+
+    def worker(name):
+        local = JobStore(db_path)
+        while True:
+            job = local.claim(make_worker_id(name))
+            if job is None:
+                break
+            with lock:
+                claimed.append(job["id"])
+            local.complete(job["id"], {"segment_count": 1})
+
+    threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(claimed) == 200 and len(set(claimed)) == 200, "every job claimed exactly once"
+    assert store.counts()[STATE_DONE] == 200
+    print(f"[OK] 4 workers claimed {len(claimed)} jobs without duplicates")
+except Exception as e:
+    print(f"[FAIL] concurrent claims: {e}")
+    sys.exit(1)
+
+# Test 4: Recovery of jobs orphaned by a dead process
+print("\n[Test 4] Orphaned job recovery...")
+try:
+    job_id = store.enqueue("orphan.mp4")
+    store.claim("{}:{}:gui".format(make_worker_id().split(":")[0], 2 ** 22 + 12345))
+    assert store.recover_orphaned() == 1
+    assert store.get(job_id)["state"] == STATE_PENDING
+    print("[OK] orphaned job returned to the queue")
+except Exception as e:
+    print(f"[FAIL] recovery: {e}")
+    sys.exit(1)
+
+# Test 5: Range jobs don't absorb full-file requests and can be claimed on their own
+print("\n[Test 5] Range jobs...")
+try:
+    range_store = JobStore(os.path.join(tmp_dir, "range.db"))
+    other = range_store.enqueue("other.mp4", priority=5)
+    range_id = range_store.enqueue("talk.mp4", {"time_range": [60.0, 90.0]}, dedupe=False)
+    full_id = range_store.enqueue("talk.mp4")
+    assert full_id != range_id, "full-file request must not dedupe against a range job"
+    assert range_store.enqueue("talk.mp4") == full_id
+    worker = make_worker_id("t5")
+    assert range_store.claim(worker, job_ids=[range_id])["id"] == range_id
+    assert range_store.claim(worker, job_ids=[range_id]) is None
+    assert range_store.claim(worker, job_ids=[]) is None
+    assert range_store.claim(worker)["id"] == other
+    print("[OK] range job kept separate and claimed by id")
+except Exception as e:
+    print(f"[FAIL] range jobs: {e}")
+    sys.exit(1)
+
+# Test 6: Each path reports its newest full-file job
+print("\n[Test 6] Latest job per path...")
+try:
+    latest_store = JobStore(os.path.join(tmp_dir, "latest.db"))
+    worker = make_worker_id("t6")
+    failed_id = latest_store.enqueue("a.wav")
+    latest_store.claim(worker)
+    latest_store.fail(failed_id, "decode error", retry=False)
+    done_id = latest_store.enqueue("a.wav")
+    latest_store.claim(worker)
+    latest_store.complete(done_id, {"segment_count": 3})
+    latest_store.enqueue("a.wav", {"time_range": [10.0, 20.0]}, dedupe=False)
+    other_id = latest_store.enqueue("b.wav")
+    latest = latest_store.latest_file_jobs()
+    assert list(latest) == ["a.wav", "b.wav"], latest
+    assert latest["a.wav"]["id"] == done_id and latest["a.wav"]["state"] == STATE_DONE
+    assert latest["b.wav"]["id"] == other_id
+
+    # GUI 按下開始時：已完成的路徑不重新加入，尚未轉錄的才加入
+    ids = latest_store.enqueue_many(["a.wav", "b.wav", "c.wav"], dedupe_states=QUEUED_OR_DONE_STATES)
+    assert ids[:2] == [done_id, other_id], ids
+    counts = latest_store.counts()
+    assert counts == {STATE_DONE: 1, STATE_FAILED: 1, STATE_PENDING: 3}, counts
+    assert latest_store.enqueue("a.wav") != done_id, "default dedupe still re-queues completed paths"
+    print("[OK] retried file shows its newest job, range job ignored, completed path not re-enqueued")
+except Exception as e:
+    print(f"[FAIL] latest job per path: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All job queue tests passed!")
+print("=" * 60)
@@ -0,0 +1,105 @@
+# coding: utf-8
+"""
+Live Archive Verification Test
+Tests compressed session recording with phrase timestamps and the idle re-transcription queue
+"""
+import sys
+import os
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+print("=" * 60)
+print("Live Archive Verification Test")
+print("=" * 60)
+
+import numpy as np
+
+from synthetic import FakeWhisperModel, silence, speech_like
+from job_queue import JobStore, STATE_DONE, STATE_PENDING
+from live_archive import SessionArchive, IdleRepass, enqueue_repass
+from logging_utils import configure_logging
+from model_registry import ModelRegistry
+from scheduler import ResourceArbiter
+
+tmp_dir = tempfile.mkdtemp()
+# 日誌與轉錄統計寫到暫存資料夾
+configure_logging(os.path.join(tmp_dir, "logs"))
+os.chdir(tmp_dir)
+audio = np.concatenate([speech_like(12, seed=1), silence(3), speech_like(8, seed=2)])
+
+# Test 1: Audio written in small blocks round-trips at full length with phrase times
+print("\n[Test 1] Session archive...")
+try:
+    from faster_whisper.audio import decode_audio
+
+    archive = SessionArchive(tmp_dir, name="session")
+    for offset in range(0, len(audio), 1600):
+        archive.write(audio[offset:offset + 1600])
+    archive.mark_phrase(0.0, 12.0, "第一句")
+    archive.mark_phrase(15.0, 23.0, "第二句")
+    assert archive.close() == len(audio) / 16000
+    decoded = decode_audio(archive.path)
+    assert abs(len(decoded) - len(audio)) <= 16000 * 0.05, (len(decoded), len(audio))
+    with open(archive.phrases_path, encoding="utf-8") as f:
+        phrases = [json.loads(line) for line in f]
+    assert [p["text"] for p in phrases] == ["第一句", "第二句"] and phrases[1]["end"] == 23.0
+    size_kb = os.path.getsize(archive.path) / 1024
+    print(f"[OK] {archive.codec}: {len(audio) / 16000:.0f}s in {size_kb:.0f} KB, {len(phrases)} phrases")
+except Exception as e:
+    print(f"[FAIL] session archive: {e}")
+    sys.exit(1)
+
+# Test 2: Re-pass waits for idle and writes an SRT beside the recording
+print("\n[Test 2] Idle re-transcription...")
+try:
+    class FakeRegistry(ModelRegistry):
+        def _create_model(self, model_size):
+            return FakeWhisperModel(seed=1)
+
+    store = JobStore(os.path.join(tmp_dir, "repass.db"))
+    job_id = enqueue_repass(store, archive.path, model_size="medium")
+    arbiter = ResourceArbiter()
+    busy = [False]
+    repass = IdleRepass(store, arbiter, busy=lambda: busy[0], registry=FakeRegistry(max_models=1))
+    arbiter.live_started()
+    assert not repass._is_idle()
+    arbiter.live_stopped()
+    busy[0] = True
+    assert not repass._is_idle()
+
+    repass.process_pending()
+    job = store.get(job_id)
+    assert job["state"] == STATE_DONE and job["params"]["model_size"] == "medium", job
+    srt_path = os.path.splitext(archive.path)[0] + ".srt"
+    assert os.path.exists(srt_path) and repass.registry.loaded_models() == []
+    print(f"[OK] job #{job_id} transcribed to {os.path.basename(srt_path)}, model unloaded")
+except Exception as e:
+    print(f"[FAIL] idle re-transcription: {e}")
+    sys.exit(1)
+
+# Test 3: A job in retry backoff doesn't keep the re-pass model loaded
+print("\n[Test 3] Retry backoff...")
+try:
+    import time
+
+    retry_id = enqueue_repass(store, os.path.join(tmp_dir, "missing.ogg"), model_size="medium")
+    started = time.time()
+    repass.process_pending()
+    job = store.get(retry_id)
+    assert job["state"] == STATE_PENDING and job["next_run_at"] > time.time(), job
+    assert not repass._has_work() and repass.registry.loaded_models() == []
+    repass.process_pending()
+    elapsed = time.time() - started
+    assert elapsed < 10, f"process_pending waited {elapsed:.1f}s for the backoff"
+    print(f"[OK] returned after {elapsed:.1f}s with job #{retry_id} still in backoff, model unloaded")
+except Exception as e:
+    print(f"[FAIL] retry backoff: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All live archive tests passed!")
+print("=" * 60)
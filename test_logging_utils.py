@@ -0,0 +1,76 @@
+# coding: utf-8
+"""
+Logging Verification Test
+Tests the background JSON-lines log, the plain-text transcript log and size-based rotation
+"""
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Logging Verification Test")
+print("=" * 60)
+
+import logging_utils
+from constants import APP_LOG_FILE, TRANSCRIPTION_LOG_FILE, LOG_BACKUP_COUNT
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+# Test 1: Errors and events become JSON lines, transcript lines stay plain text
+print("\n[Test 1] Structured records...")
+try:
+    log_dir = logging_utils.configure_logging(os.path.join(tempfile.mkdtemp(), "logs"))
+    logging_utils.log_error("檔案轉錄失敗", path="D:/a.mp3", model="small")
+    worker = threading.Thread(target=logging_utils.log_transcript, args=("你好",), name="LiveWorker")
+    worker.start()
+    worker.join()
+    logging_utils.log_event("轉錄完成", rtf=0.25)
+    logging_utils.shutdown_logging()
+
+    records = [json.loads(line) for line in read_lines(os.path.join(log_dir, APP_LOG_FILE))]
+    assert [r["level"] for r in records] == ["ERROR", "INFO"], records
+    assert records[0]["message"] == "檔案轉錄失敗" and records[0]["path"] == "D:/a.mp3"
+    assert records[1]["rtf"] == 0.25
+    transcript = read_lines(os.path.join(log_dir, TRANSCRIPTION_LOG_FILE))
+    assert len(transcript) == 1 and transcript[0].endswith("] 你好"), transcript
+    print("[OK] JSON lines and transcript written by the background listener")
+except Exception as e:
+    print(f"[FAIL] structured records: {e}")
+    sys.exit(1)
+
+# Test 2: Callers never wait for disk I/O, files rotate by size and log_dir can change at runtime
+print("\n[Test 2] Non-blocking writes and rotation...")
+try:
+    log_dir = logging_utils.configure_logging(os.path.join(tempfile.mkdtemp(), "logs"))
+    start = time.perf_counter()
+    line = "x" * 1000
+    for _ in range(20000):
+        logging_utils.log_transcript(line)
+    enqueue_time = time.perf_counter() - start
+    other_dir = logging_utils.configure_logging(os.path.join(tempfile.mkdtemp(), "other"))
+    logging_utils.log_error("after switch")
+    logging_utils.shutdown_logging()
+
+    names = sorted(os.listdir(log_dir))
+    assert TRANSCRIPTION_LOG_FILE in names and f"{TRANSCRIPTION_LOG_FILE}.{LOG_BACKUP_COUNT}" in names, names
+    assert f"{TRANSCRIPTION_LOG_FILE}.{LOG_BACKUP_COUNT + 1}" not in names
+    assert "after switch" in read_lines(os.path.join(other_dir, APP_LOG_FILE))[0]
+    assert not os.path.exists(os.path.join(log_dir, APP_LOG_FILE))
+    print(f"[OK] 20000 lines queued in {enqueue_time * 1000:.0f} ms, rotated to {LOG_BACKUP_COUNT} backups")
+except Exception as e:
+    print(f"[FAIL] non-blocking writes and rotation: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All logging tests passed!")
+print("=" * 60)
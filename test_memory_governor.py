@@ -0,0 +1,119 @@
+# coding: utf-8
+"""
+Memory Governor Verification Test
+Tests budget planning, shared admission between threads and streaming decode
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+print("=" * 60)
+print("Memory Governor Verification Test")
+print("=" * 60)
+
+from config import Config
+from constants import DECODE_CHUNK_SECONDS
+import memory_governor
+from memory_governor import MemoryGovernor, plan_job, estimate_model_mb
+
+# Test 1: Large models and long files are planned into the budget
+print("\n[Test 1] Budget planning...")
+try:
+    model_mb = estimate_model_mb("large-v3", "float16")
+    assert 3000 < model_mb < 3600, model_mb
+    assert estimate_model_mb("large-v3", "int8") < model_mb / 1.8
+    assert estimate_model_mb("/models/faster-whisper-large-v3-turbo", "int8") == estimate_model_mb("large-v3-turbo", "int8")
+
+    four_hours = 4 * 3600
+    roomy = plan_job("small", four_hours, batch_size=16, budget_mb=64000)
+    assert roomy["fits"] and roomy["batch_size"] == 16 and roomy["chunk_seconds"] is None
+    tight = plan_job("small", four_hours, batch_size=16, budget_mb=1200)
+    assert tight["fits"] and tight["chunk_seconds"] == DECODE_CHUNK_SECONDS and tight["batch_size"] < 16, tight
+    assert tight["estimated_mb"] <= 1200
+    hopeless = plan_job("large-v3", four_hours, batch_size=16, budget_mb=500)
+    assert not hopeless["fits"] and hopeless["batch_size"] == 1
+    print(f"[OK] 4h file with small: {roomy['estimated_mb']:.0f} MB unconstrained, "
+          f"{tight['estimated_mb']:.0f} MB with chunked decode and batch_size={tight['batch_size']}")
+except Exception as e:
+    print(f"[FAIL] budget planning: {e}")
+    sys.exit(1)
+
+# Test 2: Threads sharing a governor wait instead of exceeding the budget together
+print("\n[Test 2] Shared admission...")
+try:
+    Config.MEMORY_BUDGET_MB = int(estimate_model_mb("tiny") + memory_governor.estimate_job_mb("tiny", 600) * 1.5)
+    memory_governor.probe_duration = lambda path: 600.0
+    governor = MemoryGovernor()
+    peak = [0]
+    lock = threading.Lock()
+
+    def job(name):
+        with governor.admit("tiny", name):
+            with lock:
+                peak[0] = max(peak[0], governor.active_count())
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=job, args=(f"{i}.wav",)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak[0] == 1, peak
+    with governor.admit("tiny", "alone.wav", audio_duration=36000) as plan:
+        assert plan["chunk_seconds"] == DECODE_CHUNK_SECONDS and "batch_size" not in plan["overrides"], plan
+    print("[OK] three 10-minute files ran one at a time, a 10-hour file was planned with streaming decode")
+except Exception as e:
+    print(f"[FAIL] shared admission: {e}")
+    sys.exit(1)
+finally:
+    Config.MEMORY_BUDGET_MB = 0
+
+# Test 3: Streaming decode gives the same audio and subtitles as decoding the whole file
+print("\n[Test 3] Streaming transcription...")
+try:
+    import numpy as np
+    from synthetic import FakeWhisperModel, speech_pattern, write_wav
+    from faster_whisper import decode_audio
+    from audio_stream import iter_audio_windows, prefetch
+    from transcription import transcribe_file
+
+    audio, _ = speech_pattern(90, seed=5)
+    folder = tempfile.mkdtemp()
+    path = write_wav(os.path.join(folder, "long.wav"), audio)
+    windows = list(prefetch(iter_audio_windows(path, 20, overlap_seconds=2.0, first_window_seconds=5)))
+    assert len(windows[0].audio) <= 7 * 16000 and len(windows) >= 5
+    # 依保留範圍拼接回去與一次解碼完全相同
+    kept = [w.audio[round((w.keep_start - w.offset) * 16000):
+                    None if w.keep_end is None else round((w.keep_end - w.offset) * 16000)] for w in windows]
+    assert np.array_equal(np.concatenate(kept), decode_audio(path))
+
+    def srt(chunk_seconds, stream_min=0):
+        options = {"vad_enabled": False, "output_formats": ["srt"], "decode_chunk_seconds": chunk_seconds,
+                   "stream_min_duration": stream_min}
+        seen = []
+        result = transcribe_file(FakeWhisperModel(seed=1), path, False, options,
+                                 progress=lambda seconds, text: seen.append(seconds))
+        assert seen == sorted(seen) and len(seen) == result["segment_count"]
+        with open(result["srt_path"], encoding="utf-8") as f:
+            return result, [line for line in f.read().splitlines() if "-->" in line]
+
+    whole_result, whole = srt(0)
+    streamed_result, streamed = srt(0, stream_min=60)
+    assert streamed_result["decode_chunk_seconds"] == DECODE_CHUNK_SECONDS and abs(streamed_result["audio_duration"] - 90) < 0.01
+    windowed_result, windowed = srt(20)
+    assert whole[-1][-12:] == windowed[-1][-12:], (whole[-1], windowed[-1])
+    assert len(set(windowed)) == len(windowed)  # 重疊部分沒有重複的字幕
+    print(f"[OK] {len(windows)} windows, last cue ends at {windowed[-1][-12:]} in both modes")
+except Exception as e:
+    print(f"[FAIL] streaming transcription: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All memory governor tests passed!")
+print("=" * 60)
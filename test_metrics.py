@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Metrics Verification Test
+Tests Prometheus text output, the HTTP endpoint and the JSON snapshot file
+"""
+import sys
+import os
+import json
+import socket
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Metrics Verification Test")
+print("=" * 60)
+
+from metrics import MetricsRegistry, MetricsExporter, REGISTRY, BATCH_THROUGHPUT, observe_transcription
+
+# Test 1: Counters, callback gauges and cumulative histogram buckets
+print("\n[Test 1] Prometheus text format...")
+try:
+    registry = MetricsRegistry()
+    captions = registry.counter("test_captions_total", "captions", ("kind",))
+    depth = registry.gauge("test_queue_depth", "depth")
+    latency = registry.histogram("test_latency_seconds", "latency", buckets=(0.1, 1.0))
+    captions.inc(kind="final")
+    captions.inc(2, kind="interim")
+    depth.set_function(lambda: 7)
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value)
+    text = registry.render_prometheus()
+    for line in (
+        '# TYPE test_captions_total counter',
+        'test_captions_total{kind="final"} 1.0',
+        'test_captions_total{kind="interim"} 2.0',
+        'test_queue_depth 7',
+        'test_latency_seconds_bucket{le="0.1"} 1',
+        'test_latency_seconds_bucket{le="1.0"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        'test_latency_seconds_count 4',
+    ):
+        assert line in text.splitlines(), (line, text)
+    try:
+        captions.inc()
+        raise AssertionError("missing labels accepted")
+    except ValueError:
+        pass
+    print("[OK] counters, callback gauges and histograms rendered")
+except Exception as e:
+    print(f"[FAIL] Prometheus text format: {e}")
+    sys.exit(1)
+
+# Test 2: Endpoint and snapshot expose batch throughput
+print("\n[Test 2] Endpoint and JSON snapshot...")
+try:
+    observe_transcription({"elapsed": 10.0, "audio_duration": 60.0, "timings": {"inference": 8.0}}, "tiny")
+    snapshot_path = os.path.join(tempfile.mkdtemp(), "metrics.json")
+    # 取得一個可用的埠號
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    exporter = MetricsExporter(port=port, snapshot_interval=0.05, snapshot_path=snapshot_path).start()
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        body = response.read().decode("utf-8")
+    assert 'whisper_batch_throughput_ratio{model="tiny"} 6.0' in body, body
+    assert 'whisper_batch_audio_seconds_total{model="tiny"} 60.0' in body
+    deadline = time.time() + 5
+    while not os.path.exists(snapshot_path) and time.time() < deadline:
+        time.sleep(0.01)
+    exporter.stop()
+    with open(snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    samples = snapshot["metrics"][BATCH_THROUGHPUT.name]["samples"]
+    assert samples == [{"labels": {"model": "tiny"}, "value": 6.0}], samples
+    assert set(snapshot["metrics"]) == {metric.name for metric in REGISTRY.metrics()}
+    print("[OK] /metrics and snapshot file report audio-seconds per second")
+except Exception as e:
+    print(f"[FAIL] endpoint and snapshot: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All metrics tests passed!")
+print("=" * 60)
@@ -0,0 +1,102 @@
+# coding: utf-8
+"""
+Subtitle Overlay Verification Test
+Tests stable / tentative caption splitting and that rapid updates are coalesced into one repaint per frame
+"""
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+print("=" * 60)
+print("Subtitle Overlay Verification Test")
+print("=" * 60)
+
+from PyQt6.QtWidgets import QApplication
+
+from constants import INTERIM_SUFFIX, OVERLAY_FRAME_INTERVAL
+from ui.overlay import SubtitleOverlay
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def wait_frame():
+    """等待超過一個畫面間隔並處理計時器事件"""
+    deadline = time.monotonic() + OVERLAY_FRAME_INTERVAL * 2 / 1000
+    while time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+overlay = SubtitleOverlay()
+set_calls = {"stable": [], "tentative": []}
+for name, label in (("stable", overlay.subtitle_label), ("tentative", overlay.tentative_label)):
+    original = label.setText
+    label.setText = lambda text, name=name, original=original: (set_calls[name].append(text), original(text))
+
+
+def shown():
+    return overlay.subtitle_label.text(), overlay.tentative_label.text(), overlay.frame.isVisibleTo(overlay)
+
+
+# Test 1: Interim text goes to the tentative label without its suffix; a final line replaces it
+print("\n[Test 1] Stable and tentative text...")
+try:
+    wait_frame()
+    overlay.update_text("你好" + INTERIM_SUFFIX)
+    assert shown() == ("", "你好", True), shown()
+    wait_frame()
+    overlay.update_text("你好，世界。")
+    wait_frame()
+    assert shown() == ("你好，世界。", "", True), shown()
+    wait_frame()
+    overlay.update_text("下一句" + INTERIM_SUFFIX)
+    wait_frame()
+    assert shown() == ("你好，世界。", "下一句", True), shown()
+    print("[OK] suffix stripped, final line clears the tentative label")
+except Exception as e:
+    print(f"[FAIL] stable and tentative text: {e}")
+    sys.exit(1)
+
+# Test 2: Updates within one frame are coalesced; unchanged labels are not re-set
+print("\n[Test 2] Coalescing...")
+try:
+    wait_frame()
+    for name in set_calls:
+        set_calls[name].clear()
+    overlay.update_text("下一句話" + INTERIM_SUFFIX)  # 距離上次繪製超過一個畫面 -> 立即繪製
+    for i in range(20):
+        overlay.update_text("下一句話" + "還在說" * (i + 1) + INTERIM_SUFFIX)
+    assert shown()[1] == "下一句話", "later updates wait for the next frame"
+    wait_frame()
+    assert shown()[1] == "下一句話" + "還在說" * 20
+    assert set_calls == {"stable": [], "tentative": ["下一句話", "下一句話" + "還在說" * 20]}, set_calls
+
+    wait_frame()
+    overlay.update_text("下一句話" + "還在說" * 20 + INTERIM_SUFFIX)
+    wait_frame()
+    assert len(set_calls["tentative"]) == 2, "identical text must not call setText"
+    print(f"[OK] 22 updates rendered with {len(set_calls['tentative'])} setText calls")
+except Exception as e:
+    print(f"[FAIL] coalescing: {e}")
+    sys.exit(1)
+
+# Test 3: Clearing hides the frame and cancels a pending frame
+print("\n[Test 3] Clear...")
+try:
+    overlay.update_text("最後一句。")
+    overlay.clear()
+    wait_frame()
+    assert shown() == ("", "", False), shown()
+    assert not overlay._frame_timer.isActive()
+    print("[OK] overlay cleared and hidden")
+except Exception as e:
+    print(f"[FAIL] clear: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All overlay tests passed!")
+print("=" * 60)
@@ -0,0 +1,129 @@
+# coding: utf-8
+"""
+Profiling Verification Test
+Tests per-thread cProfile / sampling output and per-file tracemalloc diffs
+"""
+import sys
+import os
+import glob
+import json
+import pstats
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Profiling Verification Test")
+print("=" * 60)
+
+import profiling
+
+
+def busy_decode(seconds):
+    """模擬 Worker 中耗時的解碼"""
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(1000))
+    return total
+
+
+def run_worker(name):
+    def target():
+        with profiling.profile_thread(name):
+            busy_decode(0.3)
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+# Test 1: cProfile writes a pstats file per worker thread
+print("\n[Test 1] cProfile mode...")
+try:
+    out_dir = tempfile.mkdtemp()
+    profiling.configure("cprofile", out_dir)
+    run_worker("file")
+    files = glob.glob(os.path.join(out_dir, "file-*.pstats"))
+    assert len(files) == 1, files
+    stats = pstats.Stats(files[0])
+    assert any(func[2] == "busy_decode" for func in stats.stats), "busy_decode not profiled"
+    print("[OK] pstats written when the thread finishes")
+except Exception as e:
+    print(f"[FAIL] cProfile mode: {e}")
+    sys.exit(1)
+
+# Test 2: Sampling mode writes speedscope JSON, also on demand while running
+print("\n[Test 2] Sampling mode...")
+try:
+    out_dir = tempfile.mkdtemp()
+    profiling.configure("sample", out_dir)
+    started = threading.Event()
+
+    def target():
+        with profiling.profile_thread("live"):
+            started.set()
+            busy_decode(0.4)
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    started.wait()
+    time.sleep(0.1)
+    profiling.dump_active("signal")
+    thread.join()
+    assert len(glob.glob(os.path.join(out_dir, "live-signal-*.speedscope.json"))) == 1
+    final = [p for p in glob.glob(os.path.join(out_dir, "live-*.speedscope.json")) if "signal" not in p]
+    with open(final[0], encoding="utf-8") as f:
+        data = json.load(f)
+    profile = data["profiles"][0]
+    assert profile["type"] == "sampled" and len(profile["samples"]) == len(profile["weights"])
+    names = {frame["name"] for frame in data["shared"]["frames"]}
+    assert "busy_decode" in names, names
+    assert profile["endValue"] > 100, profile["endValue"]
+    print("[OK] speedscope profiles written on demand and at thread exit")
+except Exception as e:
+    print(f"[FAIL] sampling mode: {e}")
+    sys.exit(1)
+
+# Test 3: tracemalloc diff around each file
+print("\n[Test 3] Per-file memory trace...")
+try:
+    out_dir = tempfile.mkdtemp()
+    profiling.configure(None, out_dir, trace_memory=True)
+    with profiling.trace_file_memory("D:/audio/lecture.mp3"):
+        buffers = [bytearray(1024 * 1024) for _ in range(4)]
+    files = glob.glob(os.path.join(out_dir, "memory-lecture-*.txt"))
+    assert len(files) == 1, files
+    with open(files[0], encoding="utf-8") as f:
+        report = f.read()
+    assert "test_profiling.py" in report, report
+    print("[OK] allocation diff written for the file")
+except Exception as e:
+    print(f"[FAIL] memory trace: {e}")
+    sys.exit(1)
+
+# Test 4: A profiler missing a method fails when created
+print("\n[Test 4] Incomplete profiler...")
+try:
+    class _NoDump(profiling._ThreadProfile):
+        def start(self):
+            pass
+
+        def stop(self):
+            pass
+
+    try:
+        _NoDump("worker")
+        raise AssertionError("subclass without dump() should not be instantiable")
+    except TypeError:
+        pass
+    print("[OK] missing dump() rejected at construction")
+except Exception as e:
+    print(f"[FAIL] incomplete profiler: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All profiling tests passed!")
+print("=" * 60)
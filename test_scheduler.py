@@ -0,0 +1,86 @@
+# coding: utf-8
+"""
+Resource Arbiter Verification Test
+Tests pausing and throttling of batch transcription while live captions run
+"""
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Resource Arbiter Verification Test")
+print("=" * 60)
+
+from config import Config
+from constants import ARBITER_INITIAL_THROTTLE, ARBITER_MAX_THROTTLE
+from scheduler import ResourceArbiter
+from transcription import _with_checkpoints
+
+# Test 1: No live session -> batch runs at full speed
+print("\n[Test 1] Idle arbiter...")
+try:
+    arbiter = ResourceArbiter()
+    calls = []
+    segments = list(_with_checkpoints(iter(range(3)), lambda w: calls.append(arbiter.batch_checkpoint(w))))
+    assert segments == [0, 1, 2]
+    assert calls == [0.0, 0.0, 0.0], calls
+    print("[OK] checkpoints return immediately without live captions")
+except Exception as e:
+    print(f"[FAIL] idle arbiter: {e}")
+    sys.exit(1)
+
+# Test 2: Throttle adapts to the live latency budget
+print("\n[Test 2] Adaptive throttle...")
+try:
+    Config.ARBITRATION_MODE = "throttle"
+    Config.LIVE_LATENCY_BUDGET = 1.0
+    arbiter.live_started()
+    assert arbiter.throttle == ARBITER_INITIAL_THROTTLE
+    waited = arbiter.batch_checkpoint(0.05)
+    assert 0.04 <= waited < 0.5, waited
+    for _ in range(10):
+        arbiter.report_live_latency(3.0)
+    assert arbiter.throttle == ARBITER_MAX_THROTTLE
+    for _ in range(10):
+        arbiter.report_live_latency(0.1)
+    assert arbiter.throttle == 0.0
+    arbiter.live_stopped()
+    print("[OK] throttle grows over budget and relaxes under budget")
+except Exception as e:
+    print(f"[FAIL] adaptive throttle: {e}")
+    sys.exit(1)
+
+# Test 3: Pause mode blocks until live captions stop
+print("\n[Test 3] Pause mode...")
+try:
+    Config.ARBITRATION_MODE = "pause"
+    arbiter.live_started()
+    waited = []
+    batch = threading.Thread(target=lambda: waited.append(arbiter.batch_checkpoint(0.01)))
+    batch.start()
+    time.sleep(0.3)
+    assert batch.is_alive(), "batch should be paused"
+    arbiter.live_stopped()
+    batch.join(timeout=2)
+    assert not batch.is_alive() and waited[0] >= 0.25, waited
+
+    stop = threading.Event()
+    arbiter.live_started()
+    batch = threading.Thread(target=lambda: arbiter.batch_checkpoint(0.01, stop.is_set))
+    batch.start()
+    stop.set()
+    batch.join(timeout=2)
+    assert not batch.is_alive(), "stop request must end the pause"
+    arbiter.live_stopped()
+    print("[OK] batch paused while live and resumed afterwards")
+except Exception as e:
+    print(f"[FAIL] pause mode: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All resource arbiter tests passed!")
+print("=" * 60)
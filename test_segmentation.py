@@ -0,0 +1,99 @@
+# coding: utf-8
+"""
+Segmentation Verification Test
+Tests the array-backed WordStore, vectorized split_word_store against utils.split_into_segments,
+and the constraints honoured by the dynamic-programming segment_optimal
+"""
+import sys
+import os
+import random
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Segmentation Verification Test")
+print("=" * 60)
+
+from utils import split_into_segments
+from segmentation import WordStore, split_word_store, segment_optimal
+
+Word = namedtuple("Word", ["start", "end", "word", "probability"])
+Segment = namedtuple("Segment", ["words"])
+
+VOCAB = [" hello", " world,", " 你好", "。", " ok.", "  ", "　嗎？", " x!", " y?\n", "", " 嗯，", " a"]
+
+
+def random_words(rng, count, monotonic=True):
+    words = []
+    t = rng.random() * 3
+    for _ in range(count):
+        duration = rng.choice([0.0, 0.1, 0.3, 0.7, 1.3, 2.9])
+        end = t + duration if monotonic or rng.random() > 0.2 else t - rng.random()
+        words.append(Word(round(t, 3), round(end, 3), rng.choice(VOCAB), 0.9))
+        t = max(t, end) + (0 if monotonic else rng.random() * 0.2)
+    return words
+
+
+# Test 1: WordStore round trip
+print("\n[Test 1] WordStore storage...")
+try:
+    words = [Word(0.0, 0.5, " 你好", 0.9), Word(0.5, 1.0, "，", 0.8), Word(1.0, 1.4, " world.", 0.7)]
+    store = WordStore.from_segments([Segment(words[:2]), Segment([]), Segment(words[2:])])
+    assert len(store) == 3
+    assert store.text == " 你好， world."
+    assert [store.word_text(i) for i in range(3)] == [w.word for w in words]
+    assert store.ends.tolist() == [0.5, 1.0, 1.4]
+    assert store.pause_mask().tolist() == [False, True, True]
+    print("[OK] arrays, text buffer and pause mask correct")
+except Exception as e:
+    print(f"[FAIL] WordStore: {e}")
+    sys.exit(1)
+
+# Test 2: Identical output to split_into_segments
+print("\n[Test 2] split_word_store matches split_into_segments...")
+try:
+    rng = random.Random(42)
+    for trial in range(2000):
+        words = random_words(rng, rng.randint(0, 60), monotonic=rng.random() < 0.8)
+        min_d = rng.choice([0.0, 0.5, 2.0, 3.3])
+        max_d = rng.choice([0.1, 2.0, 5.5, 8.0])
+        expected = split_into_segments(words, min_d, max_d)
+        actual = split_word_store(WordStore.from_words(words), min_d, max_d)
+        assert actual == expected, f"trial {trial} differs"
+    print("[OK] 2000 random transcripts produce identical segments")
+except Exception as e:
+    print(f"[FAIL] split_word_store: {e}")
+    sys.exit(1)
+
+# Test 3: segment_optimal honours hard limits and prefers punctuation
+print("\n[Test 3] segment_optimal constraints...")
+try:
+    rng = random.Random(7)
+    for trial in range(500):
+        words = random_words(rng, rng.randint(1, 80))
+        store = WordStore.from_words(words)
+        cues = segment_optimal(store, min_duration=1.0, max_duration=4.0, max_chars=20)
+        joined = "".join("".join(c["text"].split()) for c in cues)
+        assert joined == "".join("".join(w.word for w in words).split()), f"trial {trial}: text lost"
+        assert all(c["end"] >= c["start"] for c in cues)
+        assert all(a["end"] <= b["start"] for a, b in zip(cues, cues[1:])), "cues must not overlap"
+        single_words = {w.word.strip() for w in words}
+        for c in cues:
+            # 超過字元上限的字幕只能是單一單字
+            assert len(c["text"]) <= 20 or c["text"] in single_words, f"trial {trial}: {c}"
+
+    # 明確的句末標點應成為斷點
+    words = [Word(i * 0.5, i * 0.5 + 0.4, w, 0.9) for i, w in enumerate(
+        [" This", " is", " one.", " And", " here", " is", " another", " sentence."])]
+    cues = segment_optimal(WordStore.from_words(words), min_duration=1.0, max_duration=3.0)
+    assert [c["text"] for c in cues] == ["This is one.", "And here is another sentence."], cues
+    print("[OK] limits honoured, sentence ends preferred as boundaries")
+except Exception as e:
+    print(f"[FAIL] segment_optimal: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All segmentation tests passed!")
+print("=" * 60)
@@ -0,0 +1,73 @@
+# coding: utf-8
+"""
+Silence Trim Verification Test
+Tests energy-based silence detection and that trimmed transcription keeps the original timeline
+"""
+import sys
+import os
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+
+print("=" * 60)
+print("Silence Trim Verification Test")
+print("=" * 60)
+
+import numpy as np
+
+from synthetic import FakeWhisperModel, silence, speech_like, write_wav
+from silence_trim import find_silences, speech_clips
+
+# 10 秒靜音 + 20 秒語音 + 1 秒停頓 + 10 秒語音 + 30 秒靜音 + 5 秒語音
+audio = np.concatenate([
+    silence(10), speech_like(20, seed=1), silence(1), speech_like(10, seed=2), silence(30), speech_like(5, seed=3)
+])
+
+# Test 1: Only long silent runs are trimmed, with padding around speech
+print("\n[Test 1] Silence detection...")
+try:
+    silences = find_silences(audio, threshold=0.01, min_duration=3.0)
+    assert [(round(a), round(b)) for a, b in silences] == [(0, 10), (41, 71)], silences
+    clips, trimmed = speech_clips(audio, threshold=0.01, min_duration=3.0)
+    assert np.allclose(clips, [9.5, 41.5, 70.5, 76.0], atol=0.1), clips
+    assert abs(trimmed - 38.5) < 0.2
+    assert speech_clips(silence(20), threshold=0.01, min_duration=3.0)[0] == []
+    print(f"[OK] {len(silences)} long silences, {trimmed:.1f}s of {len(audio) / 16000:.0f}s trimmed, 1s pause kept")
+except Exception as e:
+    print(f"[FAIL] silence detection: {e}")
+    sys.exit(1)
+
+# Test 2: Trimmed transcription sends clip_timestamps and keeps subtitle timing
+print("\n[Test 2] Trimmed transcription...")
+try:
+    from transcription import transcribe_file
+
+    path = write_wav(os.path.join(tempfile.mkdtemp(), "gaps.wav"), audio)
+    sent = []
+
+    class RecordingModel(FakeWhisperModel):
+        def transcribe(self, audio, **params):
+            sent.append(params.get("clip_timestamps"))
+            return super().transcribe(audio, **params)
+
+    def srt(min_duration):
+        options = {"vad_enabled": False, "output_formats": ["srt"], "silence_trim_min_duration": min_duration}
+        result = transcribe_file(RecordingModel(seed=1), path, False, options)
+        with open(result["srt_path"], encoding="utf-8") as f:
+            return result, f.read()
+
+    full_result, full = srt(0)
+    trimmed_result, trimmed_srt = srt(3.0)
+    assert sent == [None, clips], sent
+    assert full == trimmed_srt
+    assert full_result["silence_trimmed"] == 0.0 and trimmed_result["silence_trimmed"] == trimmed
+    print(f"[OK] {trimmed_result['segment_count']} segments with identical timestamps")
+except Exception as e:
+    print(f"[FAIL] trimmed transcription: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All silence trim tests passed!")
+print("=" * 60)
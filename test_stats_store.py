@@ -0,0 +1,85 @@
+# coding: utf-8
+"""
+Stats Store Verification Test
+Tests per-stage transcription timings, CSV migration and ETA queries
+"""
+import sys
+import os
+import tempfile
+import types
+import wave
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Stats Store Verification Test")
+print("=" * 60)
+
+from stats_store import StatsStore
+
+tmp_dir = tempfile.mkdtemp()
+
+# Test 1: Legacy CSV rows are imported once
+print("\n[Test 1] CSV migration...")
+try:
+    csv_path = os.path.join(tmp_dir, "transcription_stats.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        f.write("Timestamp,File Path,Extension,Model Size,Duration (s)\n")
+        f.write("2024-01-01 10:00:00,D:/a.mp3,.mp3,small,30.00\n")
+        f.write("2024-01-01 10:05:00,D:/b.mp3,.mp3,small,50.00\n")
+        f.write("broken row\n")
+    store = StatsStore(os.path.join(tmp_dir, "stats.db"), legacy_csv=csv_path)
+    assert not os.path.exists(csv_path) and os.path.exists(csv_path + ".migrated")
+    rows = store.recent("small")
+    assert [row["total_time"] for row in rows] == [50.0, 30.0], rows
+    # 只有耗時的舊紀錄：每個檔案以平均耗時預估
+    assert store.estimate_seconds("small", [None, 600.0]) == 80.0
+    assert store.estimate_seconds("large-v3", [60.0]) is None
+    print("[OK] legacy rows imported and used for per-file ETA")
+except Exception as e:
+    print(f"[FAIL] CSV migration: {e}")
+    sys.exit(1)
+
+# Test 2: transcribe_file reports per-stage timings that feed RTF-based ETA
+print("\n[Test 2] Stage timings and RTF...")
+try:
+    from config import Config
+    from transcription import transcribe_file
+
+    class FakeModel:
+        def transcribe(self, audio, **params):
+            assert len(audio) == 16000 * 4
+            segments = [types.SimpleNamespace(start=0.0, end=2.0, text="hello"),
+                        types.SimpleNamespace(start=2.0, end=4.0, text="world")]
+            return iter(segments), None
+
+    wav_path = os.path.join(tmp_dir, "speech.wav")
+    with wave.open(wav_path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(b"\x00\x00" * 16000 * 4)
+    result = transcribe_file(FakeModel(), wav_path, options={"vad_enabled": False, "output_formats": ["srt"]})
+    assert result["segment_count"] == 2
+    assert abs(result["audio_duration"] - 4.0) < 1e-6
+    assert set(result["timings"]) == {"decode", "vad", "inference", "write", "wait"}
+    assert all(value >= 0 for value in result["timings"].values())
+    assert result["device"] == Config.DEVICE and result["beam_size"] >= 1
+
+    # 固定 RTF 的紀錄：預估 = 音訊長度 x RTF 中位數
+    store.record(wav_path, {**result, "elapsed": 2.0, "rtf": None}, "small")
+    store.record(wav_path, {**result, "elapsed": 1.0, "rtf": None}, "small")
+    store.record(wav_path, {**result, "elapsed": 1.2, "rtf": None}, "small")
+    estimate = store.estimate_seconds("small", [100.0], device=Config.DEVICE)
+    assert abs(estimate - 30.0) < 1e-6, estimate
+    summary = [row for row in store.summary() if row["device"] == Config.DEVICE]
+    assert summary[0]["count"] == 3 and abs(summary[0]["rtf_p50"] - 0.3) < 1e-6, summary
+    print("[OK] stage timings recorded, ETA uses median RTF x audio duration")
+except Exception as e:
+    print(f"[FAIL] stage timings: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All stats store tests passed!")
+print("=" * 60)
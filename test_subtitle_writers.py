@@ -0,0 +1,152 @@
+# coding: utf-8
+"""
+Subtitle Writers Verification Test
+Tests bulk timestamp formatting and single-pass SRT/VTT/TSV/JSON output
+"""
+import sys
+import os
+import json
+import random
+import tempfile
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+print("=" * 60)
+print("Subtitle Writers Verification Test")
+print("=" * 60)
+
+from utils import format_timestamp, write_srt
+from subtitle_writers import (
+    SubtitleTrack, format_timestamps, write_subtitles, read_srt, snap_range, splice_track, parse_time
+)
+
+tmp_dir = tempfile.mkdtemp()
+rng = random.Random(29)
+
+
+def legacy_srt(segments):
+    """舊版逐筆格式化的 SRT 內容，作為比對基準"""
+    lines = []
+    for i, segment in enumerate(segments, start=1):
+        start_time = segment["start"] if isinstance(segment, dict) else segment.start
+        end_time = segment["end"] if isinstance(segment, dict) else segment.end
+        text = segment["text"] if isinstance(segment, dict) else segment.text
+        lines.append(f"{i}\n{format_timestamp(start_time)} --> {format_timestamp(end_time)}\n{text.strip()}\n\n")
+    return "".join(lines)
+
+
+# Test 1: Bulk timestamps match format_timestamp
+print("\n[Test 1] Bulk timestamp formatting...")
+try:
+    values = [rng.uniform(0, 400000) for _ in range(5000)] + [0.0, 0.999, 59.9995, 3599.999, 360000.5]
+    expected = [format_timestamp(v) for v in values]
+    assert format_timestamps(values) == expected, "bulk timestamps differ from format_timestamp"
+    assert format_timestamps([61.25], decimal_marker=".") == ["00:01:01.250"]
+    assert format_timestamps([]) == []
+    print(f"[OK] {len(values)} timestamps identical")
+except Exception as e:
+    print(f"[FAIL] timestamps: {e}")
+    sys.exit(1)
+
+# Test 2: write_srt output is byte-identical to the legacy writer
+print("\n[Test 2] SRT output identity...")
+try:
+    segments = []
+    t = 0.0
+    for i in range(2000):
+        end = t + rng.uniform(0.5, 8.0)
+        text = f" 第{i}句，hello world. "
+        if i % 2:
+            segments.append({"start": t, "end": end, "text": text})
+        else:
+            segments.append(SimpleNamespace(start=t, end=end, text=text))
+        t = end
+    path = os.path.join(tmp_dir, "out.srt")
+    write_srt(segments, path)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == legacy_srt(segments), "SRT content changed"
+    print("[OK] mixed dict/object segments produce identical SRT")
+except Exception as e:
+    print(f"[FAIL] SRT identity: {e}")
+    sys.exit(1)
+
+# Test 3: Multiple formats from one track
+print("\n[Test 3] VTT/TSV/JSON output...")
+try:
+    segments = [
+        {"start": 0.0, "end": 1.5, "text": " 你好 "},
+        {"start": 1.5, "end": 3.2505, "text": "tab\there\nline"},
+    ]
+    base = os.path.join(tmp_dir, "multi")
+    paths = write_subtitles(segments, base, ["srt", "vtt", "tsv", "json"])
+    assert sorted(paths) == ["json", "srt", "tsv", "vtt"]
+
+    with open(paths["vtt"], encoding="utf-8") as f:
+        vtt = f.read()
+    assert vtt.startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n你好\n\n"), vtt
+
+    with open(paths["tsv"], encoding="utf-8") as f:
+        rows = f.read().splitlines()
+    assert rows == ["start\tend\ttext", "0\t1500\t你好", "1500\t3250\ttab here line"], rows
+
+    with open(paths["json"], encoding="utf-8") as f:
+        data = json.load(f)
+    assert [s["text"] for s in data["segments"]] == ["你好", "tab\there\nline"]
+    assert len(SubtitleTrack.from_segments(segments)) == 2
+    print("[OK] all formats written from a single track")
+except Exception as e:
+    print(f"[FAIL] multi-format: {e}")
+    sys.exit(1)
+
+# Test 4: Re-transcribed range is spliced into an existing SRT
+print("\n[Test 4] SRT read and range splice...")
+try:
+    old = [{"start": i * 3.0, "end": i * 3.0 + 2.5, "text": f"舊 {i}"} for i in range(10)]
+    srt_path = write_subtitles(old, os.path.join(tmp_dir, "splice"), ["srt"])["srt"]
+    track = read_srt(srt_path)
+    assert track.texts == [s["text"] for s in old] and abs(track.ends[-1] - 29.5) < 0.001
+
+    # 10.0 落在「舊 3」(9.0-11.5) 中間、17.8 在「舊 5」之後的空隙：範圍擴大到不切開字幕
+    start, end = snap_range(track, 10.0, 17.8)
+    assert abs(start - 9.0) < 0.001 and end == 17.8, (start, end)
+    new = [{"start": 8.0, "end": 12.0, "text": "新 A"}, {"start": 12.0, "end": 19.0, "text": "新 B"}]
+    spliced, replaced = splice_track(track, new, start, end)
+    assert replaced == 3 and len(spliced) == 9
+    assert spliced.texts[2:6] == ["舊 2", "新 A", "新 B", "舊 6"], spliced.texts
+    # 新字幕限制在範圍內，不與保留的字幕重疊
+    assert spliced.starts[3] == start and spliced.ends[4] == 17.8
+    assert all(spliced.ends[:-1] <= spliced.starts[1:])
+    assert parse_time("1:02:03,5") == 3723.5 and parse_time("90") == 90.0
+    print(f"[OK] {replaced} cues replaced by {len(new)}, neighbours untouched")
+except Exception as e:
+    print(f"[FAIL] range splice: {e}")
+    sys.exit(1)
+
+# Test 5: transcribe_file with time_range only decodes and replaces that range
+print("\n[Test 5] Partial re-transcription...")
+try:
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "benchmarks"))
+    from synthetic import FakeWhisperModel, speech_pattern, write_wav
+    from transcription import transcribe_file
+
+    audio, _ = speech_pattern(120, seed=2)
+    path = write_wav(os.path.join(tmp_dir, "partial.wav"), audio)
+    options = {"vad_enabled": False, "output_formats": ["srt"]}
+    full = read_srt(transcribe_file(FakeWhisperModel(seed=1), path, False, options)["srt_path"])
+    result = transcribe_file(FakeWhisperModel(seed=7), path, False, {**options, "time_range": [40, 61]})
+    start, end = result["time_range"]
+    partial = read_srt(result["srt_path"])
+    assert start <= 40 and end >= 61 and abs(result["audio_duration"] - (end - start)) < 0.01
+    outside = lambda t: [(s, e, x) for s, e, x in zip(t.starts, t.ends, t.texts) if e <= start or s >= end]
+    assert outside(partial) == outside(full) and partial.texts != full.texts
+    assert all(partial.ends[:-1] <= partial.starts[1:])
+    print(f"[OK] {result['replaced_count']} cues in {start:.1f}-{end:.1f}s replaced by {result['segment_count']}")
+except Exception as e:
+    print(f"[FAIL] partial re-transcription: {e}")
+    sys.exit(1)
+
+# Summary
+print("\n" + "=" * 60)
+print("[SUCCESS] All subtitle writer tests passed!")
+print("=" * 60)
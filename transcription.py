@@ -0,0 +1,659 @@
+# coding: utf-8
+"""
+轉錄核心模組
+不依賴 Qt 的模型載入與單檔轉錄流程
+供 GUI Worker、無介面批次執行器 (batch_runner.py) 與轉錄服務 (transcription_server.py) 共用
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from audio_stream import iter_audio_windows, decode_range, prefetch
+from config import Config
+from constants import LIVE_BLOCK_SECONDS, DECODE_CHUNK_SECONDS, STREAM_OVERLAP_SECONDS, STREAM_FIRST_WINDOW_SECONDS
+from cpu_affinity import pin_inference_thread
+from exceptions import ModelLoadError, ClipTimestampsError, SubtitleGenerationError
+from file_scanner import probe_duration
+from memory_governor import check_model_fits
+from metrics import LIVE_DECODE_SECONDS, LIVE_CAPTIONS, model_load_metrics
+from resource_utils import PeakRSSSampler
+from segmentation import WordStore, segment_words
+from silence_trim import speech_clips
+from subtitle_writers import read_srt, snap_range, splice_track, write_subtitles
+
+
+def _prepare_transcription_params(include_word_timestamps=False, overrides=None):
+    """
+    準備 Whisper 轉錄參數（消除重複代碼）
+
+    Args:
+        include_word_timestamps: 是否包含單字級別時間戳（需要 VAD 支援）
+        overrides: 單一工作的參數覆寫（鍵名同 whisper_settings.json），None 表示全部使用 Config
+
+    Returns:
+        dict: 轉錄參數字典
+    """
+    overrides = overrides or {}
+    # 優先順序：工作覆寫 > 修改過的全域設定 > 該模型的自動調校結果 > 預設值
+    model_size = overrides.get("model_size")
+
+    # 溫度處理
+    temp = overrides.get("temperature", Config.TEMPERATURE)
+    if temp is None or not isinstance(temp, (int, float)):
+        temp = 0.0
+
+    vad_enabled = overrides.get("vad_enabled", Config.VAD_ENABLED)
+
+    # 基礎參數
+    params = {
+        "beam_size": overrides.get("beam_size", Config.get_decode_value("beam_size", model_size)),
+        "initial_prompt": Config.INITIAL_PROMPT,
+        "language": overrides.get("language", Config.LANGUAGE),
+        "task": overrides.get("task", Config.TASK),
+        "temperature": temp,
+        "vad_filter": vad_enabled,
+        "condition_on_previous_text": overrides.get(
+            "condition_on_previous_text", Config.CONDITION_ON_PREVIOUS_TEXT
+        )
+    }
+
+    # 只有在啟用 VAD 時才添加 VAD 參數
+    if vad_enabled:
+        params["vad_parameters"] = Config.get_vad_parameters()
+
+    # 加入單字時間戳（如需要）
+    if include_word_timestamps:
+        params["word_timestamps"] = vad_enabled
+
+    return params
+
+
+def _import_faster_whisper():
+    """
+    延遲載入 faster-whisper（匯入需數百毫秒，不應拖慢程式啟動）
+
+    Returns:
+        tuple: (WhisperModel, BatchedInferencePipeline)，不支援批次處理時後者為 None
+    """
+    from faster_whisper import WhisperModel
+
+    # 嘗試導入批次處理支援
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        BatchedInferencePipeline = None
+    return WhisperModel, BatchedInferencePipeline
+
+
+def load_file_model(model_size, vad_enabled=None, num_workers=1):
+    """
+    載入檔案轉錄用模型，VAD 啟用時盡量包裝為 BatchedInferencePipeline
+
+    Args:
+        model_size: 模型大小
+        vad_enabled: 是否啟用 VAD，None 表示使用 Config.VAD_ENABLED
+        num_workers: 可同時執行 transcribe 的執行緒數（多個 Worker 共用同一模型時使用），
+            與設定或自動調校結果取較大值
+
+    Returns:
+        tuple: (model, use_batched)
+
+    Raises:
+        ModelLoadError: 模型載入失敗
+    """
+    if vad_enabled is None:
+        vad_enabled = Config.VAD_ENABLED
+
+    check_model_fits(model_size)
+    try:
+        WhisperModel, _ = _import_faster_whisper()
+        with model_load_metrics(model_size):
+            base_model = WhisperModel(model_size, **Config.get_model_kwargs(model_size, min_workers=num_workers))
+    except Exception as e:
+        raise ModelLoadError(f"模型載入失敗: {e}") from e
+
+    return wrap_file_model(base_model, vad_enabled)
+
+
+def wrap_file_model(model, vad_enabled=None):
+    """
+    依 VAD 設定包裝或解除 BatchedInferencePipeline（共用同一份模型權重，不重新載入）
+
+    Args:
+        model: WhisperModel 或 BatchedInferencePipeline
+        vad_enabled: 是否啟用 VAD，None 表示使用 Config.VAD_ENABLED
+
+    Returns:
+        tuple: (model, use_batched)
+    """
+    if vad_enabled is None:
+        vad_enabled = Config.VAD_ENABLED
+
+    _, BatchedInferencePipeline = _import_faster_whisper()
+    if BatchedInferencePipeline is not None and isinstance(model, BatchedInferencePipeline):
+        base_model = model.model
+    else:
+        base_model = model
+
+    # 嘗試使用批次處理（僅在 VAD 啟用時）
+    # BatchedInferencePipeline 需要 VAD 或 clip_timestamps，因此只在 VAD 啟用時使用
+    if BatchedInferencePipeline is not None and vad_enabled:
+        if base_model is not model:  # 已經是批次模式
+            return model, True
+        try:
+            model = BatchedInferencePipeline(model=base_model)
+            print("[OK] 使用批次處理模式")
+            return model, True
+        except Exception as e:
+            print(f"[WARN] 批次處理初始化失敗，使用標準模式: {e}")
+            return base_model, False
+
+    if not vad_enabled:
+        print("[INFO] VAD 未啟用，使用標準模式（批次處理需要 VAD）")
+    else:
+        print("[INFO] BatchedInferencePipeline 不可用，使用標準模式")
+    return base_model, False
+
+
+class BackgroundModelLoader:
+    """
+    在背景執行緒載入模型，載入期間目前的模型繼續使用
+
+    使用端在安全時機（語句或檔案之間）呼叫 take() 取得新模型；
+    連續請求時只保留最後一次的結果
+    """
+
+    def __init__(self, load_fn):
+        """
+        Args:
+            load_fn: 載入函數，參數與 request() 相同
+        """
+        self._load_fn = load_fn
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._ready = None
+
+    def request(self, *args):
+        """開始在背景載入（覆蓋尚未完成的請求）"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        threading.Thread(
+            target=self._load, args=(generation, args), name="ModelLoader", daemon=True
+        ).start()
+
+    def take(self):
+        """
+        取得已載入完成的結果
+
+        Returns:
+            tuple | None: (args, model, error)，尚未完成時為 None
+        """
+        with self._lock:
+            ready, self._ready = self._ready, None
+        return ready
+
+    def _load(self, generation, args):
+        """背景執行緒：載入模型"""
+        # 新執行緒不會繼承 Worker 的核心限制，需自行限制在推論核心
+        pin_inference_thread()
+        try:
+            model, error = self._load_fn(*args), None
+        except Exception as e:
+            model, error = None, e
+        with self._lock:
+            if generation == self._generation:
+                self._ready = (args, model, error)
+
+
+def _with_checkpoints(segments, checkpoint):
+    """
+    逐一產生片段，並在每個片段邊界呼叫 checkpoint
+
+    faster-whisper 的 segments 是惰性產生器，每次取下一段才會解碼，
+    因此在片段之間等待就能讓出 CPU
+
+    Args:
+        segments: 片段產生器
+        checkpoint: checkpoint(work_seconds)，work_seconds 為解碼該片段所花的時間
+    """
+    start = time.perf_counter()
+    for segment in segments:
+        checkpoint(time.perf_counter() - start)
+        yield segment
+        start = time.perf_counter()
+
+
+def _decode_audio(file_path):
+    """解碼為 16 kHz 單聲道 float32（與 faster-whisper 傳入路徑時的解碼相同）"""
+    from faster_whisper import decode_audio
+    return decode_audio(file_path, sampling_rate=Config.SAMPLE_RATE)
+
+
+def _start_transcription(model, audio, params, file_path):
+    """
+    呼叫 model.transcribe（完成 VAD、特徵擷取與語言偵測，片段在迭代時才解碼）
+
+    Raises:
+        ClipTimestampsError: faster-whisper 找不到 clip timestamps
+    """
+    try:
+        return model.transcribe(audio, **params)
+    except RuntimeError as e:
+        if "No clip timestamps found" in str(e):
+            # 提供清晰的解決方案
+            raise ClipTimestampsError(
+                f"檔案 {file_path} 轉錄失敗。\n"
+                f"原因: {e}\n\n"
+                f"解決方案（二選一）：\n"
+                f"1. 在「設定」分頁中，將 Temperature 調整為 0.1 或以上\n"
+                f"2. 在「設定」分頁中，勾選「啟用 VAD」（需要安裝 onnxruntime）\n"
+                f"\n建議使用方案 1（將 Temperature 改為 0.2）"
+            ) from e
+        raise
+
+
+def _trim_silence(params, audio, min_duration, threshold):
+    """
+    VAD 停用時以 clip_timestamps 略過長時間的靜音（見 silence_trim）
+
+    Args:
+        params: 轉錄參數
+        audio: float32 PCM
+        min_duration: 最短靜音秒數，0 表示不略過
+        threshold: RMS 閾值
+
+    Returns:
+        tuple: (轉錄參數, 略過的秒數)
+    """
+    if not min_duration:
+        return params, 0.0
+    clips, trimmed = speech_clips(audio, threshold, min_duration, sample_rate=Config.SAMPLE_RATE)
+    if not trimmed:
+        return params, 0.0
+    # 空串列會被 faster-whisper 當成整段轉錄，整段都是靜音時改為長度 0 的範圍
+    return {**params, "clip_timestamps": clips or [0.0, 0.0]}, trimmed
+
+
+# 串流轉錄時加上時間偏移的片段與單字（欄位與 faster-whisper 的 Segment / Word 相同）
+_OffsetSegment = namedtuple("_OffsetSegment", ["start", "end", "text", "words"])
+_OffsetWord = namedtuple("_OffsetWord", ["start", "end", "word", "probability"])
+
+
+def _in_window(start, end, keep_start, keep_end):
+    """中點是否落在窗的保留範圍內（keep_end 為 None 表示到檔案結尾）"""
+    middle = (start + end) / 2
+    return middle >= keep_start and (keep_end is None or middle < keep_end)
+
+
+def _offset_segments(segments, offset, keep_start, keep_end):
+    """加上時間偏移，只保留中點落在 [keep_start, keep_end) 的單字（無單字時間戳時為片段）"""
+    for segment in segments:
+        start, end = segment.start + offset, segment.end + offset
+        if segment.words:
+            words = [
+                _OffsetWord(w.start + offset, w.end + offset, w.word, w.probability) for w in segment.words
+                if _in_window(w.start + offset, w.end + offset, keep_start, keep_end)
+            ]
+            if len(words) == len(segment.words):
+                yield _OffsetSegment(start, end, segment.text, words)
+            elif words:
+                # 部分單字落在範圍外（由相鄰的窗負責），文字與時間只取保留的單字
+                text = "".join(w.word for w in words).strip()
+                yield _OffsetSegment(words[0].start, words[-1].end, text, words)
+        elif _in_window(start, end, keep_start, keep_end):
+            yield _OffsetSegment(start, end, segment.text, segment.words)
+
+
+class _StreamingTranscription:
+    """
+    串流解碼並逐窗轉錄（見 audio_stream.iter_audio_windows），片段與單字時間加上窗的起始秒數
+
+    - 背景執行緒解碼下一個窗，同一時間最多保留三個窗的音訊，記憶體與檔案長度無關
+    - 重疊部分兩個窗都會轉錄：有單字時間戳時依單字中點、否則依片段中點只保留落在保留範圍內的部分
+    - decode_seconds 為等待解碼的時間（與推論重疊的部分不計入），transcribe_seconds 為各窗 transcribe() 的合計
+    - trim 為 (最短靜音秒數, RMS 閾值) 時逐窗略過長時間的靜音，trimmed_seconds 為各窗略過的合計（重疊部分可能重複計算）
+    """
+
+    def __init__(self, model, file_path, window_seconds, params, trim=(0.0, 0.0)):
+        self.model = model
+        self.file_path = file_path
+        self.window_seconds = window_seconds
+        self.params = params
+        self.trim = trim
+        self.decode_seconds = 0.0
+        self.transcribe_seconds = 0.0
+        self.trimmed_seconds = 0.0
+        self.duration = 0.0
+
+    def __iter__(self):
+        windows = prefetch(iter_audio_windows(
+            self.file_path, self.window_seconds, Config.SAMPLE_RATE,
+            overlap_seconds=STREAM_OVERLAP_SECONDS,
+            first_window_seconds=min(self.window_seconds, STREAM_FIRST_WINDOW_SECONDS),
+        ))
+        try:
+            while True:
+                start = time.perf_counter()
+                window = next(windows, None)
+                self.decode_seconds += time.perf_counter() - start
+                if window is None:
+                    return
+                offset, audio, keep_start, keep_end = window
+                self.duration = max(self.duration, offset + len(audio) / Config.SAMPLE_RATE)
+                start = time.perf_counter()
+                params, trimmed = _trim_silence(self.params, audio, *self.trim)
+                self.trimmed_seconds += trimmed
+                segments, _ = _start_transcription(self.model, audio, params, self.file_path)
+                self.transcribe_seconds += time.perf_counter() - start
+                del window, audio  # 只由 segments 持有，該窗轉錄完即可釋放
+                yield from _offset_segments(segments, offset, keep_start, keep_end)
+        finally:
+            windows.close()
+
+
+def _with_progress(segments, progress):
+    """逐一產生片段，並回報已轉錄到的位置 progress(秒數, 文字)"""
+    for segment in segments:
+        progress(segment.end, segment.text)
+        yield segment
+
+
+def transcribe_file(model, file_path, use_batched=False, options=None, checkpoint=None, progress=None):
+    """
+    轉錄單一檔案並在同目錄輸出 SRT
+
+    長度超過 stream_min_duration 的檔案（或記憶體預算不足時由 MemoryGovernor 指定 decode_chunk_seconds）
+    改為串流解碼：逐窗解碼並轉錄，記憶體與檔案長度無關，第一個片段在第一個窗轉錄後就出現
+    VAD 停用時先略過長時間的靜音（silence_trim_min_duration），片段時間仍以原始音訊為準
+    options 含 time_range [開始秒數, 結束秒數] 時只解碼並重新轉錄該範圍，拼接回既有的 SRT
+    （範圍擴大到不切開既有字幕，其餘字幕保持不變），可搭配較大的模型修正單一段落
+
+    Args:
+        model: WhisperModel 或 BatchedInferencePipeline
+        file_path: 音訊/影片檔案路徑
+        use_batched: model 是否為 BatchedInferencePipeline
+        options: 單一工作的參數覆寫（鍵名同 whisper_settings.json）
+        checkpoint: 可選的片段邊界回調 checkpoint(work_seconds)，
+                    用於即時字幕進行中暫停或降速（見 scheduler.ResourceArbiter）
+        progress: 可選的進度回調 progress(seconds, text)，每產生一個片段呼叫一次
+
+    Returns:
+        dict: {"srt_path", "output_paths", "segment_count", "elapsed", "audio_duration", "rtf",
+               "timings", "peak_rss_mb", "device", "compute_type", "beam_size", "batch_size", "vad_enabled",
+               "decode_chunk_seconds", "silence_trimmed", "time_range", "replaced_count"}
+              silence_trimmed 為 VAD 停用時略過的靜音秒數；
+              重新轉錄範圍時 time_range 為對齊後的範圍、segment_count 為新字幕數、replaced_count 為被取代的字幕數；
+              timings 為各階段秒數 {"decode", "vad", "inference", "write", "wait"}；
+              串流解碼時 decode 為等待解碼的時間、vad 為各窗的合計，decode_chunk_seconds 為窗長（否則為 None）
+
+    Raises:
+        ClipTimestampsError: faster-whisper 找不到 clip timestamps
+        SubtitleGenerationError: 重新轉錄範圍時找不到或無法解析既有的 SRT
+        ValueError: time_range 不是有效的範圍
+    """
+    options = options or {}
+    vad_enabled = options.get("vad_enabled", Config.VAD_ENABLED)
+    start_time = time.time()
+    timings = {}
+
+    # 使用共用函數準備基礎參數
+    transcribe_params = _prepare_transcription_params(include_word_timestamps=True, overrides=options)
+
+    # 如果使用批次處理，加入 batch_size
+    if use_batched and vad_enabled:
+        transcribe_params["batch_size"] = options.get(
+            "batch_size", Config.get_decode_value("batch_size", options.get("model_size"))
+        )
+
+    # VAD 停用時（標準模式）略過長時間的靜音
+    trim = (
+        0.0 if vad_enabled or use_batched
+        else options.get("silence_trim_min_duration", Config.SILENCE_TRIM_MIN_DURATION),
+        options.get("silence_trim_threshold", Config.SILENCE_TRIM_THRESHOLD),
+    )
+
+    # 部分範圍重新轉錄：讀取既有字幕並對齊範圍（短範圍不需要串流解碼）
+    time_range = options.get("time_range")
+    if time_range:
+        range_start, range_end = map(float, time_range)
+        if not 0 <= range_start < range_end:
+            raise ValueError(f"無效的時間範圍: {time_range}")
+        srt_path = os.path.splitext(file_path)[0] + ".srt"
+        if not os.path.exists(srt_path):
+            raise SubtitleGenerationError(f"找不到既有字幕檔 {srt_path}，請先轉錄整個檔案")
+        existing = read_srt(srt_path)
+        range_start, range_end = snap_range(existing, range_start, range_end)
+
+    # 串流解碼：不把整個檔案解碼成一個陣列
+    chunk_seconds = None if time_range else options.get("decode_chunk_seconds", Config.DECODE_CHUNK_SECONDS)
+    if not chunk_seconds and not time_range:
+        stream_min = options.get("stream_min_duration", Config.STREAM_MIN_DURATION)
+        duration = probe_duration(file_path) if stream_min else None
+        if duration and duration >= stream_min:
+            chunk_seconds = DECODE_CHUNK_SECONDS
+    streaming = None
+
+    with PeakRSSSampler() as rss:
+        if chunk_seconds:
+            # 解碼與 transcribe() 穿插在迭代片段期間，結束後再從推論時間中扣除
+            streaming = _StreamingTranscription(model, file_path, chunk_seconds, transcribe_params, trim)
+            segments = iter(streaming)
+        else:
+            # 解碼
+            stage = time.perf_counter()
+            audio = decode_range(file_path, range_start, range_end) if time_range else _decode_audio(file_path)
+            audio_duration = len(audio) / Config.SAMPLE_RATE
+            timings["decode"] = time.perf_counter() - stage
+
+            # 轉錄：transcribe() 本身先完成 VAD、特徵擷取與語言偵測，片段在迭代時才解碼
+            stage = time.perf_counter()
+            params, trimmed_seconds = _trim_silence(transcribe_params, audio, *trim)
+            segments, info = _start_transcription(model, audio, params, file_path)
+            timings["vad"] = time.perf_counter() - stage
+            if time_range:
+                segments = _offset_segments(segments, range_start, range_start, range_end)
+
+        # 資源仲裁的等待時間另外計算，不計入推論時間
+        waited = [0.0]
+        if checkpoint is not None:
+            def timed_checkpoint(work_seconds):
+                wait_start = time.perf_counter()
+                checkpoint(work_seconds)
+                waited[0] += time.perf_counter() - wait_start
+
+            segments = _with_checkpoints(segments, timed_checkpoint)
+        if progress is not None:
+            segments = _with_progress(segments, progress)
+
+        stage = time.perf_counter()
+        # 收集所有單字或片段
+        optimized_segments = []
+
+        # 只有在 VAD 啟用時才使用單字級別時間戳
+        if vad_enabled and use_batched:
+            # VAD 啟用：單字存入陣列化的 WordStore，不保留 Word 物件
+            words = WordStore.from_segments(segments)
+            timings["inference"] = time.perf_counter() - stage - waited[0]
+            stage = time.perf_counter()
+
+            # 重新切分（預設以動態規劃選擇最佳斷點）
+            optimized_segments = segment_words(
+                words,
+                mode=options.get("segmentation_mode", Config.SEGMENTATION_MODE),
+                min_duration=options.get("min_segment_duration", Config.MIN_SEGMENT_DURATION),
+                max_duration=options.get("max_segment_duration", Config.MAX_SEGMENT_DURATION),
+                max_chars=options.get("max_segment_chars", Config.MAX_SEGMENT_CHARS),
+                max_cps=options.get("max_chars_per_second", Config.MAX_CHARS_PER_SECOND)
+            )
+        else:
+            # VAD 停用：直接使用 segment 級別
+            for segment in segments:
+                optimized_segments.append({
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text
+                })
+            timings["inference"] = time.perf_counter() - stage - waited[0]
+            stage = time.perf_counter()
+
+        if streaming is not None:
+            timings["decode"] = streaming.decode_seconds
+            timings["vad"] = streaming.transcribe_seconds
+            timings["inference"] -= streaming.decode_seconds + streaming.transcribe_seconds
+            audio_duration = streaming.duration
+            trimmed_seconds = streaming.trimmed_seconds
+
+        # 儲存
+        base_name = os.path.splitext(file_path)[0]
+        formats = options.get("output_formats", Config.OUTPUT_FORMATS) or ["srt"]
+        if time_range:
+            track, replaced = splice_track(existing, optimized_segments, range_start, range_end)
+            output_paths = write_subtitles(track, base_name, formats)
+        else:
+            output_paths = write_subtitles(optimized_segments, base_name, formats)
+        timings["write"] = time.perf_counter() - stage
+        timings["wait"] = waited[0]
+
+    elapsed = time.time() - start_time
+    return {
+        "srt_path": output_paths.get("srt", next(iter(output_paths.values()))),
+        "output_paths": output_paths,
+        "segment_count": len(optimized_segments),
+        "elapsed": elapsed,
+        "audio_duration": audio_duration,
+        "rtf": elapsed / audio_duration if audio_duration else None,
+        "timings": timings,
+        "peak_rss_mb": rss.peak_mb,
+        "device": Config.DEVICE,
+        "compute_type": Config.get_model_kwargs(options.get("model_size"))["compute_type"],
+        "beam_size": transcribe_params["beam_size"],
+        "batch_size": transcribe_params.get("batch_size"),
+        "vad_enabled": vad_enabled,
+        "decode_chunk_seconds": chunk_seconds or None,
+        "silence_trimmed": trimmed_seconds,
+        "time_range": [range_start, range_end] if time_range else None,
+        "replaced_count": replaced if time_range else None,
+    }
+
+
+class LiveSession:
+    """
+    不依賴 Qt 與音訊裝置的即時轉錄工作階段（轉錄服務的 /live 端點使用）
+
+    以收到的音訊時間（而非系統時間）判斷語句結束，用戶端傳送速度不影響斷句：
+    靜音超過 SILENCE_DURATION 輸出最終文字，語音中每 TRANSCRIBE_INTERVAL 輸出臨時文字
+    """
+
+    def __init__(self, model, options=None, sample_rate=None):
+        """
+        Args:
+            model: WhisperModel
+            options: 解碼參數覆寫（鍵名同 whisper_settings.json）
+            sample_rate: 取樣率，None 表示 Config.SAMPLE_RATE
+        """
+        self.model = model
+        self.options = options or {}
+        self.sample_rate = sample_rate or Config.SAMPLE_RATE
+        self._block = max(1, int(self.sample_rate * LIVE_BLOCK_SECONDS))
+        self._pending = np.empty(0, dtype=np.float32)  # 不足一個區塊的尾端
+        self._buffer = []
+        self._position = 0  # 已收到的樣本數
+        self._phrase_start = 0
+        self._last_speech = 0
+        self._last_transcribe = 0
+
+    def feed(self, samples):
+        """
+        加入音訊並回傳產生的文字事件
+
+        Args:
+            samples: float32 單聲道 PCM
+
+        Returns:
+            list[dict]: {"type": "interim" | "final", "text", "start", "end"}，
+                        最終文字另含 "latency"（轉錄耗時，秒）
+        """
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        usable = len(samples) - len(samples) % self._block
+        self._pending = samples[usable:]
+
+        events = []
+        for offset in range(0, usable, self._block):
+            block = samples[offset:offset + self._block]
+            if not self._buffer:
+                self._phrase_start = self._position
+            self._buffer.append(block)
+            self._position += len(block)
+            # 以區塊的 RMS 判斷是否為語音
+            if np.sqrt(np.mean(np.square(block))) > Config.SILENCE_THRESHOLD:
+                self._last_speech = self._position
+            event = self._check()
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self):
+        """
+        結束工作階段，轉錄剩餘的語音
+
+        Returns:
+            list[dict]: 最終文字事件（沒有剩餘語音時為空列表）
+        """
+        if self._buffer and self._last_speech > self._phrase_start:
+            return [self._finalize()]
+        return []
+
+    def _check(self):
+        """依靜音時長決定輸出最終文字、臨時文字或丟棄純靜音"""
+        has_speech = self._last_speech > self._phrase_start
+        silence = (self._position - self._last_speech) / self.sample_rate
+        if silence > Config.SILENCE_DURATION:
+            if not has_speech:
+                # 緩衝區內沒有語音，不必轉錄
+                self._buffer = []
+                return None
+            return self._finalize()
+        if has_speech and (self._position - self._last_transcribe) / self.sample_rate > Config.TRANSCRIBE_INTERVAL:
+            self._last_transcribe = self._position
+            start = time.perf_counter()
+            text = self._transcribe(np.concatenate(self._buffer))
+            LIVE_DECODE_SECONDS.observe(time.perf_counter() - start, kind="interim")
+            return self._event("interim", text)
+        return None
+
+    def _finalize(self):
+        """轉錄目前語句並清空緩衝區"""
+        start = time.perf_counter()
+        text = self._transcribe(np.concatenate(self._buffer))
+        event = self._event("final", text)
+        event["latency"] = time.perf_counter() - start
+        LIVE_DECODE_SECONDS.observe(event["latency"], kind="final")
+        self._buffer = []
+        self._last_transcribe = self._position
+        return event
+
+    def _event(self, kind, text):
+        """建立文字事件"""
+        LIVE_CAPTIONS.inc(kind=kind)
+        return {
+            "type": kind,
+            "text": text,
+            "start": round(self._phrase_start / self.sample_rate, 3),
+            "end": round(self._position / self.sample_rate, 3),
+        }
+
+    def _transcribe(self, audio):
+        """轉錄一段音訊"""
+        params = _prepare_transcription_params(overrides=self.options)
+        segments, _ = self.model.transcribe(audio, **params)
+        return " ".join(seg.text for seg in segments).strip()
+
+
+def format_elapsed(seconds):
+    """將耗時格式化為「N秒」或「N分鐘」"""
+    return f"{seconds:.1f}秒" if seconds < 60 else f"{seconds/60:.1f}分鐘"
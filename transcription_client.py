@@ -0,0 +1,248 @@
+# coding: utf-8
+"""
+本機轉錄服務用戶端
+GUI 與外部腳本透過此模組使用 transcription_server.py 已載入的模型
+
+用法:
+  python transcription_client.py health
+  python transcription_client.py submit <檔案...> [--model small] [--wait]
+  python transcription_client.py jobs [--state pending,running]
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from constants import SERVER_HOST, SERVER_PORT
+from exceptions import TranscriptionServiceError
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class LiveStream:
+    """即時轉錄串流：send() 傳送音訊，events() 讀取文字事件（可在不同執行緒使用）"""
+
+    def __init__(self, sock, response):
+        self._sock = sock
+        self._response = response
+        self._closed = False
+
+    def send(self, samples):
+        """
+        傳送一段音訊
+
+        Args:
+            samples: float32 單聲道 PCM（16 kHz）
+        """
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        if pcm:
+            self._write(f"{len(pcm):x}\r\n".encode("ascii") + pcm + b"\r\n")
+
+    def close(self):
+        """結束傳送，服務會轉錄剩餘語音後結束事件串流"""
+        if not self._closed:
+            self._closed = True
+            try:
+                self._write(b"0\r\n\r\n")
+            except TranscriptionServiceError:
+                pass
+
+    def events(self):
+        """
+        逐一讀取文字事件，直到服務結束串流
+
+        Yields:
+            dict: {"type": "interim" | "final", "text", "start", "end"}
+
+        Raises:
+            TranscriptionServiceError: 串流中斷或服務回報錯誤
+        """
+        try:
+            for line in self._response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "error":
+                    raise TranscriptionServiceError(f"即時轉錄失敗: {event.get('error')}")
+                yield event
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise TranscriptionServiceError(f"即時串流中斷: {e}") from e
+        finally:
+            self._response.close()
+            self._sock.close()
+
+    def _write(self, data):
+        try:
+            self._sock.sendall(data)
+        except OSError as e:
+            raise TranscriptionServiceError(f"即時串流中斷: {e}") from e
+
+
+class TranscriptionClient:
+    """轉錄服務的 HTTP 用戶端"""
+
+    def __init__(self, url=None, timeout=10.0):
+        """
+        Args:
+            url: 服務位址，例如 "http://127.0.0.1:8765"（可省略 http://），None 表示預設位址
+            timeout: 一般請求的逾時秒數
+        """
+        url = url or f"http://{SERVER_HOST}:{SERVER_PORT}"
+        if "://" not in url:
+            url = "http://" + url
+        parts = urlsplit(url)
+        self.host = parts.hostname or SERVER_HOST
+        self.port = parts.port or SERVER_PORT
+        self.timeout = timeout
+
+    def _request(self, method, path, payload=None):
+        """送出 JSON 請求並解析回應"""
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise TranscriptionServiceError(f"無法連線到轉錄服務 {self.host}:{self.port}: {e}") from e
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise TranscriptionServiceError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def health(self):
+        """服務狀態"""
+        return self._request("GET", "/health")
+
+    def submit(self, paths, params=None, priority=0, dedupe=True):
+        """
+        加入檔案轉錄工作（路徑必須是服務所在電腦可讀取的路徑）
+
+        Args:
+            paths: 檔案路徑列表
+            params: 工作參數（鍵名同 whisper_settings.json）
+            priority: 優先順序
+            dedupe: 同一路徑已在佇列中時是否沿用既有工作
+
+        Returns:
+            list[int]: 工作 ID
+        """
+        payload = {"paths": list(paths), "params": params or {}, "priority": priority, "dedupe": dedupe}
+        return self._request("POST", "/jobs", payload)["ids"]
+
+    def get_job(self, job_id):
+        """取得工作狀態與結果"""
+        return self._request("GET", f"/jobs/{int(job_id)}")
+
+    def list_jobs(self, states=None):
+        """列出工作，states 為狀態列表"""
+        query = f"?{urlencode({'state': ','.join(states)})}" if states else ""
+        return self._request("GET", f"/jobs{query}")["jobs"]
+
+    def cancel(self, job_id):
+        """取消等待中的工作"""
+        return self._request("DELETE", f"/jobs/{int(job_id)}")
+
+    def wait(self, job_id, poll_interval=0.5):
+        """
+        等待工作結束（完成、失敗或取消；自動重試中的工作會繼續等待）
+
+        Returns:
+            dict: 工作資料
+        """
+        while True:
+            job = self.get_job(job_id)
+            if job["state"] in FINISHED_STATES:
+                return job
+            time.sleep(poll_interval)
+
+    def open_live(self, model_size=None, language=None):
+        """
+        開啟即時轉錄串流（服務需要時會先載入模型）
+
+        Args:
+            model_size: 模型大小，None 表示服務的預設模型
+            language: 語言代碼，None 表示服務的設定
+
+        Returns:
+            LiveStream
+
+        Raises:
+            TranscriptionServiceError: 無法連線或服務拒絕請求
+        """
+        query = {"format": "s16le"}
+        if model_size:
+            query["model"] = model_size
+        if language:
+            query["language"] = language
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.connect()
+            # 事件可能間隔很久（靜音），串流期間不設逾時
+            conn.sock.settimeout(None)
+            conn.putrequest("POST", f"/live?{urlencode(query)}")
+            conn.putheader("Content-Type", "application/octet-stream")
+            conn.putheader("Transfer-Encoding", "chunked")
+            conn.endheaders()
+            # 回應結束後 HTTPConnection 可能釋放 socket，傳送音訊直接使用底層 socket
+            sock = conn.sock
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise TranscriptionServiceError(f"無法連線到轉錄服務 {self.host}:{self.port}: {e}") from e
+        if response.status != 200:
+            try:
+                error = json.loads(response.read() or b"{}").get("error")
+            except ValueError:
+                error = None
+            conn.close()
+            raise TranscriptionServiceError(error or f"HTTP {response.status}")
+        return LiveStream(sock, response)
+
+
+def main():
+    """命令列介面"""
+    parser = argparse.ArgumentParser(description="Whisper 本機轉錄服務用戶端")
+    parser.add_argument("--url", default=None, help=f"服務位址（預設 http://{SERVER_HOST}:{SERVER_PORT}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("health", help="顯示服務狀態")
+    p_submit = sub.add_parser("submit", help="加入檔案轉錄工作")
+    p_submit.add_argument("paths", nargs="+")
+    p_submit.add_argument("--model", help="模型大小")
+    p_submit.add_argument("--wait", action="store_true", help="等待工作完成")
+    p_jobs = sub.add_parser("jobs", help="列出工作")
+    p_jobs.add_argument("--state", help="以逗號分隔的狀態")
+    args = parser.parse_args()
+
+    client = TranscriptionClient(args.url)
+    try:
+        if args.command == "health":
+            print(json.dumps(client.health(), ensure_ascii=False, indent=2))
+        elif args.command == "submit":
+            params = {"model_size": args.model} if args.model else {}
+            ids = client.submit([os.path.abspath(p) for p in args.paths], params)
+            print(f"✅ 已加入工作: {', '.join(map(str, ids))}")
+            if args.wait:
+                for job_id in ids:
+                    job = client.wait(job_id)
+                    detail = (job["result"] or {}).get("srt_path") or job["error"] or ""
+                    print(f"  #{job_id} [{job['state']}] {detail}")
+        elif args.command == "jobs":
+            states = args.state.split(",") if args.state else None
+            for job in client.list_jobs(states):
+                print(f"  #{job['id']:<5d} [{job['state']}] {job['path']}")
+    except TranscriptionServiceError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
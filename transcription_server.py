@@ -0,0 +1,397 @@
+# coding: utf-8
+"""
+本機轉錄服務
+在單一行程內載入模型，讓 GUI、OBS 疊加層與腳本共用同一份已載入的模型，不必各自載入
+
+端點（JSON，預設只接受本機連線）:
+  GET    /health                 服務狀態與已載入的模型
+  GET    /metrics                執行指標（Prometheus 文字格式）
+  GET    /jobs[?state=pending]   列出工作
+  POST   /jobs                   加入工作 {"paths": [...], "params": {...}, "priority": 0, "dedupe": true}
+                                 params.time_range = [開始秒數, 結束秒數] 時只重新轉錄該範圍並拼接回既有的 SRT
+  GET    /jobs/<id>              工作狀態與結果
+  DELETE /jobs/<id>              取消等待中的工作
+  POST   /live?model=tiny&language=zh&format=s16le
+                                 即時轉錄：請求內容為 16 kHz 單聲道 PCM（可用 chunked 持續傳送），
+                                 回應為逐行 JSON 事件 {"type": "interim" | "final", "text", "start", "end"}
+
+用法:
+  python transcription_server.py [--host 127.0.0.1] [--port 8765] [--workers 1] [--no-jobs]
+"""
+import argparse
+import json
+import sys
+import threading
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+from batch_runner import worker_loop
+from config import Config
+from config_service import ConfigService
+from constants import (
+    SERVER_HOST, SERVER_PORT, SERVER_MAX_JSON_BYTES, SERVER_LIVE_SLOTS, SUBTITLE_FORMATS
+)
+from exceptions import ModelLoadError
+from job_queue import JobStore, STATE_PENDING
+from logging_utils import log_error
+from memory_governor import MemoryGovernor
+from metrics import REGISTRY, watch_job_queue, start_metrics
+from model_registry import ModelRegistry
+from scheduler import ResourceArbiter
+from transcription import LiveSession
+
+# PCM 格式 -> (numpy dtype, 轉為 float32 的縮放)
+PCM_FORMATS = {
+    "s16le": (np.dtype("<i2"), 1.0 / 32768.0),
+    "f32le": (np.dtype("<f4"), 1.0),
+}
+
+
+class _BadRequest(Exception):
+    """請求內容不合法（回應 400）"""
+
+
+class TranscriptionServer(ThreadingHTTPServer):
+    """每個連線一個執行緒的 HTTP 服務，共用工作佇列、模型登錄表與資源仲裁器"""
+
+    daemon_threads = True
+
+    def __init__(self, address, store, registry, arbiter):
+        """
+        Args:
+            address: (host, port)
+            store: JobStore
+            registry: ModelRegistry
+            arbiter: ResourceArbiter
+        """
+        super().__init__(address, TranscriptionRequestHandler)
+        self.store = store
+        self.registry = registry
+        self.arbiter = arbiter
+
+
+class TranscriptionRequestHandler(BaseHTTPRequestHandler):
+    """轉錄服務的請求處理"""
+
+    protocol_version = "HTTP/1.1"  # 即時端點需要 chunked 傳輸
+    server_version = "WhisperDesktop"
+
+    def log_message(self, format, *args):
+        """不輸出每個請求的存取紀錄（狀態輪詢會大量洗版）"""
+
+    # === 路由 ===
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["health"]:
+            self._handle(self._health)
+        elif parts == ["metrics"]:
+            self._handle(self._metrics)
+        elif parts == ["jobs"]:
+            self._handle(self._list_jobs, parse_qs(url.query))
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._handle(self._get_job, parts[1])
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"未知的路徑: {url.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["jobs"]:
+            self._handle(self._submit_jobs)
+        elif parts == ["live"]:
+            self._handle(self._live, parse_qs(url.query))
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"未知的路徑: {url.path}"})
+
+    def do_DELETE(self):
+        parts = [p for p in urlsplit(self.path).path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "jobs":
+            self._handle(self._cancel_job, parts[1])
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"未知的路徑: {self.path}"})
+
+    def _handle(self, handler, *args):
+        """執行處理函數並將例外轉為錯誤回應"""
+        try:
+            handler(*args)
+        except _BadRequest as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except ModelLoadError as e:
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            log_error(f"轉錄服務請求失敗 ({self.command} {self.path}): {e}\n{traceback.format_exc()}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+
+    # === JSON 端點 ===
+    def _health(self):
+        self._send_json(HTTPStatus.OK, {
+            "status": "ok",
+            "device": Config.DEVICE,
+            "compute_type": Config.COMPUTE_TYPE,
+            "models": self.server.registry.loaded_models(),
+            "jobs": self.server.store.counts(),
+            "live_active": self.server.arbiter.live_active,
+        })
+
+    def _metrics(self):
+        data = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _list_jobs(self, query):
+        states = [s for value in query.get("state", []) for s in value.split(",") if s] or None
+        self._send_json(HTTPStatus.OK, {"jobs": self.server.store.list_jobs(states=states)})
+
+    def _get_job(self, job_id):
+        job = self.server.store.get(self._job_id(job_id))
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"工作不存在: {job_id}"})
+        else:
+            self._send_json(HTTPStatus.OK, job)
+
+    def _submit_jobs(self):
+        body = self._read_json()
+        paths = body.get("paths") or ([body["path"]] if body.get("path") else [])
+        params = body.get("params") or {}
+        if not paths or not all(isinstance(p, str) for p in paths):
+            raise _BadRequest("請提供 paths（檔案路徑列表）")
+        if not isinstance(params, dict):
+            raise _BadRequest("params 必須是物件")
+        unknown = [f for f in params.get("output_formats", []) if f not in SUBTITLE_FORMATS]
+        if unknown:
+            raise _BadRequest(f"不支援的字幕格式: {', '.join(map(str, unknown))}")
+        time_range = params.get("time_range")
+        if time_range is not None and not (
+            isinstance(time_range, list) and len(time_range) == 2
+            and all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in time_range)
+            and 0 <= time_range[0] < time_range[1]
+        ):
+            raise _BadRequest("time_range 必須是 [開始秒數, 結束秒數]")
+        try:
+            priority = int(body.get("priority", 0))
+        except (TypeError, ValueError):
+            raise _BadRequest("priority 必須是整數")
+        # 重新轉錄範圍的工作預設不與同一檔案的其他工作合併
+        dedupe = bool(body.get("dedupe", time_range is None))
+        ids = self.server.store.enqueue_many(paths, params, priority=priority, dedupe=dedupe)
+        self._send_json(HTTPStatus.CREATED, {"ids": ids})
+
+    def _cancel_job(self, job_id):
+        job_id = self._job_id(job_id)
+        self.server.store.cancel(job_id)
+        job = self.server.store.get(job_id)
+        if job is None:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"工作不存在: {job_id}"})
+        else:
+            self._send_json(HTTPStatus.OK, job)
+
+    # === 即時串流 ===
+    def _live(self, query):
+        """以 PCM 串流進行即時轉錄，逐行回傳 JSON 事件"""
+        fmt = query.get("format", ["s16le"])[0]
+        if fmt not in PCM_FORMATS:
+            raise _BadRequest(f"不支援的 PCM 格式: {fmt}（可用: {', '.join(PCM_FORMATS)}）")
+        if query.get("rate", [str(Config.SAMPLE_RATE)])[0] != str(Config.SAMPLE_RATE):
+            raise _BadRequest(f"取樣率必須為 {Config.SAMPLE_RATE} Hz")
+        model_size = query.get("model", [Config.MODEL_SIZE])[0]
+        if model_size not in Config.AVAILABLE_MODELS:
+            raise _BadRequest(f"未知的模型: {model_size}")
+        options = {"model_size": model_size}
+        if "language" in query:
+            options["language"] = query["language"][0] or None
+
+        # 先載入模型再回應，載入失敗時用戶端會收到 503
+        session = LiveSession(self.server.registry.base_model(model_size), options)
+        dtype, scale = PCM_FORMATS[fmt]
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.flush()
+        self.close_connection = True
+
+        arbiter = self.server.arbiter
+        arbiter.live_started()
+        try:
+            leftover = b""
+            for data in self._iter_body():
+                data = leftover + data
+                usable = len(data) - len(data) % dtype.itemsize
+                leftover = data[usable:]
+                samples = np.frombuffer(data[:usable], dtype=dtype).astype(np.float32) * scale
+                for event in session.feed(samples):
+                    self._write_event(event)
+            for event in session.flush():
+                self._write_event(event)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            # 回應標頭已送出，改以錯誤事件通知用戶端
+            log_error(f"即時轉錄失敗: {e}\n{traceback.format_exc()}")
+            self._write_event({"type": "error", "error": str(e)})
+        finally:
+            arbiter.live_stopped()
+        self._write_chunk(b"")
+
+    def _write_event(self, event):
+        """送出一個事件，並回報最終文字的延遲給資源仲裁器"""
+        if "latency" in event:
+            self.server.arbiter.report_live_latency(event["latency"])
+        self._write_chunk(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def _write_chunk(self, data):
+        """以 chunked 編碼送出資料（空資料表示結束）"""
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _iter_body(self):
+        """逐段讀取請求內容（支援 chunked 與 Content-Length）"""
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            while True:
+                size_line = self.rfile.readline(1024)
+                if not size_line:
+                    return
+                try:
+                    size = int(size_line.split(b";", 1)[0].strip(), 16)
+                except ValueError:
+                    raise _BadRequest("chunked 編碼格式錯誤")
+                if size == 0:
+                    # 略過 trailer
+                    while self.rfile.readline(1024) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                data = self.rfile.read(size)
+                self.rfile.readline(1024)
+                if data:
+                    yield data
+        else:
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining > 0:
+                data = self.rfile.read(min(remaining, 65536))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    # === 工具 ===
+    @staticmethod
+    def _job_id(text):
+        try:
+            return int(text)
+        except ValueError:
+            raise _BadRequest(f"工作 ID 必須是整數: {text}")
+
+    def _read_json(self):
+        """讀取 JSON 請求內容"""
+        length = int(self.headers.get("Content-Length", 0))
+        if length > SERVER_MAX_JSON_BYTES:
+            raise _BadRequest("請求內容過大")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise _BadRequest(f"JSON 格式錯誤: {e}")
+        if not isinstance(body, dict):
+            raise _BadRequest("請求內容必須是 JSON 物件")
+        return body
+
+    def _send_json(self, status, payload):
+        """送出 JSON 回應"""
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        if status >= HTTPStatus.BAD_REQUEST:
+            # 請求內容可能尚未讀完（例如即時串流），不沿用此連線
+            self.close_connection = True
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(host=SERVER_HOST, port=SERVER_PORT, workers=1, process_jobs=True, store=None):
+    """
+    啟動轉錄服務（阻塞直到 Ctrl+C）
+
+    Args:
+        host: 監聽位址
+        port: 監聽埠號
+        workers: 處理檔案工作的執行緒數
+        process_jobs: 是否處理佇列中的檔案工作
+        store: JobStore，None 表示預設資料庫
+    """
+    store = store or JobStore()
+    recovered = store.recover_orphaned()
+    if recovered:
+        print(f"[INFO] 已復原 {recovered} 個中斷的工作")
+
+    # 檔案工作與即時工作階段共用同一份模型，CTranslate2 可同時處理 workers + SERVER_LIVE_SLOTS 個請求
+    registry = ModelRegistry(num_workers=workers + SERVER_LIVE_SLOTS)
+    arbiter = ResourceArbiter()
+    config_service = ConfigService()
+    config_service.add_listener(registry.on_config_changed)
+    config_service.start()
+    # 服務本身提供 /metrics；另外設定 metrics_port / metrics_snapshot_interval 時再啟動獨立端點與快照
+    watch_job_queue(store)
+    exporter = start_metrics(Config.METRICS_PORT, Config.METRICS_SNAPSHOT_INTERVAL)
+
+    stop_event = threading.Event()
+    threads = []
+    if process_jobs:
+        governor = MemoryGovernor()  # 檔案工作共用記憶體預算
+        threads = [
+            threading.Thread(
+                target=worker_loop, args=(store, registry, f"server-{i}", True, stop_event, arbiter, governor),
+                daemon=True
+            )
+            for i in range(workers)
+        ]
+        for t in threads:
+            t.start()
+
+    server = TranscriptionServer((host, port), store, registry, arbiter)
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        print(f"[WARN] 轉錄服務監聽在 {host}，其他電腦也能存取此服務與本機檔案")
+    print(f"[OK] 轉錄服務已啟動: http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[INFO] 停止中，執行中的工作會在下次啟動時復原...")
+    finally:
+        stop_event.set()
+        server.server_close()
+        config_service.stop()
+        if exporter is not None:
+            exporter.stop()
+
+
+def main():
+    """主程式"""
+    parser = argparse.ArgumentParser(description="Whisper 本機轉錄服務")
+    parser.add_argument("--host", default=SERVER_HOST, help="監聽位址（預設只接受本機連線）")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="監聽埠號")
+    parser.add_argument("--workers", type=int, default=1, help="處理檔案工作的執行緒數")
+    parser.add_argument("--no-jobs", action="store_true", help="不處理檔案工作，只提供即時轉錄")
+    parser.add_argument("--db", default=None, help="工作佇列資料庫路徑")
+    args = parser.parse_args()
+
+    store = JobStore(args.db) if args.db else JobStore()
+    pending = store.counts().get(STATE_PENDING, 0)
+    if pending and not args.no_jobs:
+        print(f"[INFO] 佇列中有 {pending} 個等待中的工作")
+    serve(args.host, args.port, max(1, args.workers), not args.no_jobs, store)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
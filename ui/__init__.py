@@ -4,5 +4,6 @@ UI 模組
 包含使用者介面相關元件
 """
 from .overlay import SubtitleOverlay
+from .file_table_model import FileTableModel
 
-__all__ = ['SubtitleOverlay']
+__all__ = ['SubtitleOverlay', 'FileTableModel']
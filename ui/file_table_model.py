@@ -0,0 +1,215 @@
+# coding: utf-8
+"""
+批次檔案列表模型
+以 QAbstractTableModel 提供檔案轉錄分頁的列表，支援數萬個檔案
+
+- 路徑 -> 列號索引，狀態更新為 O(1)，不需逐列搜尋
+- 狀態更新先暫存，由計時器一次套用並合併成一個 dataChanged，避免每個信號都觸發重繪
+- 一次插入多列（單一 beginInsertRows），加入整個資料夾不會逐列通知視圖
+"""
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+
+from constants import FILE_LIST_FLUSH_INTERVAL
+
+COLUMN_FILE, COLUMN_DURATION, COLUMN_STATUS, COLUMN_ELAPSED, COLUMN_RTF = range(5)
+COLUMN_HEADERS = ("檔案", "長度", "狀態", "耗時", "RTF")
+
+# 每列資料的欄位位置
+_PATH, _DURATION, _STATUS, _ELAPSED = range(4)
+
+
+def format_duration(seconds):
+    """將秒數格式化為 H:MM:SS 或 M:SS"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+class FileTableModel(QAbstractTableModel):
+    """批次檔案列表（欄位：檔案、長度、狀態、耗時、RTF）"""
+
+    rows_flushed = pyqtSignal(int)  # 套用狀態更新後發出，參數為最後更新狀態的列號
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []  # [path, duration, status, elapsed]
+        self._row_index = {}  # 路徑 -> 列號
+        self._pending = {}  # 路徑 -> 尚未套用的欄位更新 {欄位位置: 值}
+        self._last_path = None
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(FILE_LIST_FLUSH_INTERVAL)
+        self._flush_timer.timeout.connect(self.flush)
+
+    # === QAbstractTableModel 介面 ===
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMN_HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMN_HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._display_text(row, column)
+        if role == Qt.ItemDataRole.UserRole:
+            return row[_PATH]
+        if role == Qt.ItemDataRole.ToolTipRole and column in (COLUMN_FILE, COLUMN_STATUS):
+            return row[_PATH] if column == COLUMN_FILE else row[_STATUS]
+        if role == Qt.ItemDataRole.TextAlignmentRole and column not in (COLUMN_FILE, COLUMN_STATUS):
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    @staticmethod
+    def _display_text(row, column):
+        """各欄位的顯示文字"""
+        path, duration, status, elapsed = row
+        if column == COLUMN_FILE:
+            return path
+        if column == COLUMN_STATUS:
+            return status
+        if column == COLUMN_DURATION:
+            return format_duration(duration) if duration else ""
+        if column == COLUMN_ELAPSED:
+            return format_duration(elapsed) if elapsed is not None else ""
+        if column == COLUMN_RTF:
+            return f"{elapsed / duration:.2f}" if duration and elapsed is not None else ""
+        return None
+
+    # === 列表操作 ===
+    def add_rows(self, rows):
+        """
+        一次加入多列（已在列表中的路徑略過）
+
+        Args:
+            rows: 可迭代的 (path, status, duration, elapsed)，duration/elapsed 未知時為 None
+
+        Returns:
+            int: 實際加入的列數
+        """
+        new_rows = []
+        seen = set()
+        for path, status, duration, elapsed in rows:
+            if path in self._row_index or path in seen:
+                continue
+            seen.add(path)
+            new_rows.append([path, duration, status, elapsed])
+        if not new_rows:
+            return 0
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+        for offset, row in enumerate(new_rows):
+            self._row_index[row[_PATH]] = first + offset
+        self._rows.extend(new_rows)
+        self.endInsertRows()
+        return len(new_rows)
+
+    def add_paths(self, paths, status="等待中"):
+        """
+        加入檔案路徑
+
+        Args:
+            paths: 檔案路徑列表
+            status: 初始狀態文字
+
+        Returns:
+            int: 實際加入的列數
+        """
+        return self.add_rows((path, status, None, None) for path in paths)
+
+    def paths(self):
+        """依列表順序回傳所有檔案路徑"""
+        return [row[_PATH] for row in self._rows]
+
+    def path_at(self, row):
+        """指定列的檔案路徑"""
+        return self._rows[row][_PATH]
+
+    def duration_of(self, path):
+        """檔案的音訊長度（秒），未知時為 None"""
+        row = self._row_index.get(path)
+        return self._rows[row][_DURATION] if row is not None else None
+
+    def row_of(self, path):
+        """路徑所在的列號，不在列表中時為 None"""
+        return self._row_index.get(path)
+
+    def clear(self):
+        """清空列表（捨棄尚未套用的更新）"""
+        self._flush_timer.stop()
+        self._pending.clear()
+        self.beginResetModel()
+        self._rows = []
+        self._row_index = {}
+        self.endResetModel()
+
+    # === 批次狀態更新 ===
+    def queue_status(self, path, status):
+        """暫存狀態更新，於下一次 flush 套用"""
+        self._queue(path, {_STATUS: status})
+
+    def queue_timing(self, path, duration, elapsed):
+        """
+        暫存長度與耗時更新（RTF 由兩者計算）
+
+        Args:
+            path: 檔案路徑
+            duration: 音訊長度（秒），未知時為 None
+            elapsed: 轉錄耗時（秒）
+        """
+        updates = {_ELAPSED: elapsed}
+        if duration:
+            updates[_DURATION] = duration
+        self._queue(path, updates)
+
+    def queue_durations(self, durations):
+        """
+        暫存音訊長度（掃描資料夾時平行讀取的結果）
+
+        Args:
+            durations: [(path, duration)]
+        """
+        for path, duration in durations:
+            self._pending.setdefault(path, {})[_DURATION] = duration
+        if durations and not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _queue(self, path, updates):
+        self._pending.setdefault(path, {}).update(updates)
+        self._last_path = path
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """套用暫存的更新，合併成一個 dataChanged 通知"""
+        self._flush_timer.stop()
+        pending, self._pending = self._pending, {}
+        top = bottom = None
+        for path, updates in pending.items():
+            row = self._row_index.get(path)
+            if row is None:
+                continue
+            for field, value in updates.items():
+                self._rows[row][field] = value
+            top = row if top is None else min(top, row)
+            bottom = row if bottom is None else max(bottom, row)
+        if top is None:
+            return
+        self.dataChanged.emit(
+            self.index(top, 0), self.index(bottom, len(COLUMN_HEADERS) - 1),
+            [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole]
+        )
+        # 只有狀態或耗時更新才通知（捲動到最後處理的檔案），掃描時的長度更新不影響捲動位置
+        last_row = self._row_index.get(self._last_path) if self._last_path in pending else None
+        self._last_path = None
+        if last_row is not None:
+            self.rows_flushed.emit(last_row)
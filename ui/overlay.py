@@ -1,32 +1,126 @@
 # coding: utf-8
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QApplication
+"""
+浮動字幕視窗
+
+- 已確定的語句（stable）與辨識中的暫定文字（tentative）分成兩個標籤，暫定文字更新時只重新排版暫定標籤
+- 與上次繪製的文字比較，內容相同時不呼叫 setText
+- 更新合併到固定的畫面間隔，每 0.5 秒的暫定結果或連續的語句不會逐一觸發重繪
+- 單一自動清除計時器，不為每次更新建立新的計時器
+"""
+import time
+
+from PyQt6.QtWidgets import QWidget, QFrame, QVBoxLayout, QLabel, QApplication
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QFont
 
+from constants import (
+    SUBTITLE_FONT_FAMILY, SUBTITLE_FONT_SIZE, SUBTITLE_STYLE, AUTO_CLEAR_DELAY,
+    INTERIM_SUFFIX, OVERLAY_FRAME_INTERVAL, OVERLAY_WIDTH, OVERLAY_HEIGHT, OVERLAY_BOTTOM_MARGIN
+)
+
+TENTATIVE_STYLE = "color: rgba(255, 255, 255, 170); background: transparent;"
+
+
 class SubtitleOverlay(QWidget):
     """浮動字幕視窗"""
     def __init__(self):
         super().__init__()
+        self._rendered = ("", "")  # 目前畫面上的 (stable, tentative)
+        self._pending = ("", "")  # 下一個畫面要顯示的 (stable, tentative)
+        self._last_render = 0.0
         self.init_ui()
-        
+
     def init_ui(self):
         """初始化UI"""
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Tool)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         layout = QVBoxLayout()
-        
+
+        # 背景畫在外框上，兩個標籤本身透明
+        self.frame = QFrame()
+        self.frame.setObjectName("subtitleFrame")
+        self.frame.setStyleSheet(f"#subtitleFrame {{ {SUBTITLE_STYLE} }}")
+        frame_layout = QVBoxLayout(self.frame)
+        frame_layout.setContentsMargins(0, 0, 0, 0)
+        frame_layout.setSpacing(4)
+
         self.subtitle_label = QLabel("")
-        self.subtitle_label.setFont(QFont("Microsoft JhengHei", 24, QFont.Weight.Bold))
-        self.subtitle_label.setStyleSheet("color: white; background-color: rgba(0, 0, 0, 160); border-radius: 12px; padding: 12px;")
+        self.subtitle_label.setFont(QFont(SUBTITLE_FONT_FAMILY, SUBTITLE_FONT_SIZE, QFont.Weight.Bold))
+        self.subtitle_label.setStyleSheet("color: white; background: transparent;")
         self.subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.subtitle_label.setWordWrap(True)
-        layout.addWidget(self.subtitle_label)
+        frame_layout.addWidget(self.subtitle_label)
+
+        self.tentative_label = QLabel("")
+        self.tentative_label.setFont(QFont(SUBTITLE_FONT_FAMILY, SUBTITLE_FONT_SIZE))
+        self.tentative_label.setStyleSheet(TENTATIVE_STYLE)
+        self.tentative_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.tentative_label.setWordWrap(True)
+        frame_layout.addWidget(self.tentative_label)
+
+        self.frame.hide()
+        layout.addWidget(self.frame)
         self.setLayout(layout)
-        
+
+        # 畫面計時器：合併間隔內的更新
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self._render)
+        # 自動清除計時器：畫面內容改變時重新計時
+        self._clear_timer = QTimer(self)
+        self._clear_timer.setSingleShot(True)
+        self._clear_timer.setInterval(AUTO_CLEAR_DELAY)
+        self._clear_timer.timeout.connect(self.clear)
+
         screen = QApplication.primaryScreen().availableGeometry()
-        self.setGeometry((screen.width()-800)//2, screen.height()-250, 800, 200)
+        self.setGeometry(
+            (screen.width() - OVERLAY_WIDTH) // 2, screen.height() - OVERLAY_BOTTOM_MARGIN,
+            OVERLAY_WIDTH, OVERLAY_HEIGHT
+        )
 
     def update_text(self, text):
-        """更新字幕文字"""
-        self.subtitle_label.setText(text)
-        QTimer.singleShot(8000, lambda: self.subtitle_label.setText("") if self.subtitle_label.text() == text else None)
+        """
+        更新字幕文字（以 INTERIM_SUFFIX 結尾的是辨識中的暫定文字）
+
+        Args:
+            text: 即時轉錄 Worker 送出的文字
+        """
+        stable, tentative = self._pending
+        if text.endswith(INTERIM_SUFFIX):
+            tentative = text[:-len(INTERIM_SUFFIX)]
+        else:
+            stable, tentative = text, ""
+        self._pending = (stable, tentative)
+        self._schedule()
+
+    def clear(self):
+        """清除字幕"""
+        self._pending = ("", "")
+        self._frame_timer.stop()
+        self._render()
+
+    def _schedule(self):
+        """距離上次繪製已超過一個畫面間隔時立即繪製，否則合併到下一個畫面"""
+        if self._frame_timer.isActive():
+            return
+        wait_ms = OVERLAY_FRAME_INTERVAL - (time.monotonic() - self._last_render) * 1000
+        if wait_ms <= 0:
+            self._render()
+        else:
+            self._frame_timer.start(int(wait_ms))
+
+    def _render(self):
+        """只更新內容有變動的標籤"""
+        if self._pending == self._rendered:
+            return
+        stable, tentative = self._pending
+        if stable != self._rendered[0]:
+            self.subtitle_label.setText(stable)
+        if tentative != self._rendered[1]:
+            self.tentative_label.setText(tentative)
+        # 標籤保持顯示（避免切換時整個外框重新排版），只在沒有文字時隱藏外框
+        self.frame.setVisible(bool(stable or tentative))
+        self._rendered = self._pending
+        self._last_render = time.monotonic()
+        if stable or tentative:
+            self._clear_timer.start()
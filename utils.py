@@ -3,13 +3,11 @@
 工具函數模組
 包含 SRT 格式化、片段切分等工具函數
 """
-import datetime
 from constants import PAUSE_PUNCTUATION, MIN_SEGMENT_DURATION, MAX_SEGMENT_DURATION
 
 
 def format_timestamp(seconds: float):
     """將秒數轉換為 SRT 格式 (HH:MM:SS,mmm)"""
-    td = datetime.timedelta(seconds=seconds)
     total_seconds = int(seconds)
     hours = total_seconds // 3600
     minutes = (total_seconds % 3600) // 60
@@ -88,17 +86,6 @@ def write_srt(segments, output_path):
         segments: 片段列表
         output_path: 輸出檔案路徑
     """
-    with open(output_path, "w", encoding="utf-8") as f:
-        for i, segment in enumerate(segments, start=1):
-            # 兼容 dict (自定義切分) 和 object (原始 segment)
-            start_time = segment["start"] if isinstance(segment, dict) else segment.start
-            end_time = segment["end"] if isinstance(segment, dict) else segment.end
-            text = segment["text"] if isinstance(segment, dict) else segment.text
-            
-            start = format_timestamp(start_time)
-            end = format_timestamp(end_time)
-            text = text.strip()
-            
-            f.write(f"{i}\n")
-            f.write(f"{start} --> {end}\n")
-            f.write(f"{text}\n\n")
+    # 批次格式化並一次寫入，其他格式請使用 subtitle_writers.write_subtitles
+    from subtitle_writers import SubtitleTrack, write_track
+    write_track(SubtitleTrack.from_segments(segments), output_path, "srt")
@@ -4,64 +4,42 @@ Worker 模組
 包含即時轉錄和檔案轉錄的 Worker 類別
 已整合進階優化：批次處理、完整VAD參數、條件文本控制
 """
+import os
 import time
-import datetime
 import queue
+import threading
 import numpy as np
-import sounddevice as sd
 import traceback
-import os
 from PyQt6.QtCore import QThread, pyqtSignal
-from faster_whisper import WhisperModel
-
-# 嘗試導入批次處理支援
-try:
-    from faster_whisper import BatchedInferencePipeline
-    BATCHED_AVAILABLE = True
-except ImportError:
-    BATCHED_AVAILABLE = False
 
 from config import Config
-from utils import split_into_segments, write_srt
-from logging_utils import log_error, log_transcription_stats
-
-
-# === 共用輔助函數 ===
-def _prepare_transcription_params(include_word_timestamps=False):
-    """
-    準備 Whisper 轉錄參數（消除重複代碼）
-    
-    Args:
-        include_word_timestamps: 是否包含單字級別時間戳（需要 VAD 支援）
-    
-    Returns:
-        dict: 轉錄參數字典
-    """
-    # 溫度處理
-    temp = Config.TEMPERATURE
-    if temp is None or not isinstance(temp, (int, float)):
-        temp = 0.0
-    
-    # 基礎參數
-    params = {
-        "beam_size": Config.BEAM_SIZE,
-        "initial_prompt": Config.INITIAL_PROMPT,
-        "language": Config.LANGUAGE,
-        "task": Config.TASK,
-        "temperature": temp,
-        "vad_filter": Config.VAD_ENABLED,
-        "condition_on_previous_text": Config.CONDITION_ON_PREVIOUS_TEXT
-    }
-    
-    # 只有在啟用 VAD 時才添加 VAD 參數
-    if Config.VAD_ENABLED:
-        params["vad_parameters"] = Config.get_vad_parameters()
-    
-    # 加入單字時間戳（如需要）
-    if include_word_timestamps:
-        params["word_timestamps"] = Config.VAD_ENABLED
-    
-    return params
+from config_service import needs_model_reload
+from constants import INTERIM_SUFFIX
+from cpu_affinity import plan_cpu_sets, pin_inference_thread, thread_affinity
+from exceptions import ModelLoadError, ClipTimestampsError, SubtitleGenerationError, TranscriptionServiceError
+from file_scanner import ScanStats, DurationProber, iter_media_files, iter_chunks
+from job_queue import make_worker_id, STATE_PENDING
+from live_archive import SessionArchive, enqueue_repass
+from logging_utils import log_error, log_event, log_transcription_stats, log_transcript
+from memory_governor import MemoryGovernor, check_model_fits
+from metrics import (
+    LIVE_DECODE_SECONDS, LIVE_PHRASE_LATENCY, LIVE_CAPTIONS, LIVE_AUDIO_STATUS, LIVE_AUDIO_QUEUE,
+    model_load_metrics, observe_transcription, observe_failure
+)
+from transcription import (
+    _prepare_transcription_params, _import_faster_whisper, BackgroundModelLoader,
+    load_file_model, wrap_file_model, transcribe_file, format_elapsed
+)
+from profiling import profile_thread, trace_file_memory
+from transcription_client import TranscriptionClient
+from ui.file_table_model import format_duration
+from inference_process import InferenceProcess, MODE_LIVE, MODE_FILE
+
+
+def _release_model(model):
+    """結束推論子行程（在背景執行，不阻塞呼叫端）；一般模型交給垃圾回收"""
+    if isinstance(model, InferenceProcess):
+        threading.Thread(target=model.close, name="InferenceClose", daemon=True).start()
 
 
 class LiveTranscriptionWorker(QThread):
@@ -69,7 +47,17 @@ class LiveTranscriptionWorker(QThread):
     text_updated = pyqtSignal(str) 
     status_updated = pyqtSignal(str)
 
-    def __init__(self, device_index=None, model_size="tiny", preloaded_model=None):
+    def __init__(self, device_index=None, model_size="tiny", preloaded_model=None, arbiter=None, broadcaster=None,
+                 repass_store=None):
+        """
+        Args:
+            device_index: 音訊輸入裝置索引
+            model_size: 模型大小
+            preloaded_model: 預載模型
+            arbiter: ResourceArbiter，錄音期間讓批次轉錄讓出 CPU
+            broadcaster: CaptionBroadcaster，將暫定與最終字幕推送給 OBS 等外部顯示
+            repass_store: JobStore，保存錄音時於錄音結束後排入閒置時的重新轉錄
+        """
         super().__init__()
         self.device_index = device_index
         self.model_size = model_size
@@ -80,83 +68,258 @@ class LiveTranscriptionWorker(QThread):
         self.model = preloaded_model
         self.last_speech_time = 0
         self.last_transcribe_time = 0
+        self.overflow_count = 0
+        self.phrase_latencies = []
+        self.arbiter = arbiter
+        self.broadcaster = broadcaster
+        self.repass_store = repass_store
+        self.archive = None  # 本次錄音的 SessionArchive（未啟用 live_archive 時為 None）
+        self._model_loader = BackgroundModelLoader(self._create_model)
+
+    @staticmethod
+    def _create_model(model_size):
+        """建立即時轉錄用模型（設定為行程外推論時改為啟動推論子行程）"""
+        if Config.INFERENCE_OUT_OF_PROCESS:
+            return InferenceProcess(model_size, MODE_LIVE)
+        check_model_fits(model_size)
+        WhisperModel, _ = _import_faster_whisper()
+        with model_load_metrics(model_size):
+            return WhisperModel(model_size, **Config.get_model_kwargs(model_size))
 
     def load_model(self):
         """載入模型"""
         if self.model is None:
             self.status_updated.emit(f"載入模型中 ({self.model_size})...")
             try:
-                self.model = WhisperModel(
-                    self.model_size, 
-                    device=Config.DEVICE, 
-                    compute_type=Config.COMPUTE_TYPE
-                )
+                self.model = self._create_model(self.model_size)
                 self.status_updated.emit(f"模型已載入 ({self.model_size})")
             except Exception as e:
                 error_msg = f"模型載入失敗: {e}\n{traceback.format_exc()}"
                 log_error(error_msg)
                 self.status_updated.emit(f"模型載入失敗: {e}")
 
+    def on_config_changed(self, changes):
+        """
+        設定變更通知：解碼參數在下一次轉錄時自動生效，
+        模型相關設定則在背景載入新模型，載入期間繼續使用舊模型
+
+        Args:
+            changes: {鍵: (舊值, 新值)}
+        """
+        if Config.TRANSCRIPTION_SERVER:
+            # 模型由轉錄服務載入，下一次錄音改用新的模型大小，並釋放本地模型
+            self.model_size = Config.MODEL_SIZE
+            _release_model(self.model)
+            self.model = None
+            return
+        if Config.MODEL_SIZE != self.model_size or needs_model_reload(changes, self.model_size):
+            self.status_updated.emit(f"背景載入模型中 ({Config.MODEL_SIZE})...")
+            self._model_loader.request(Config.MODEL_SIZE)
+
+    def _swap_pending_model(self):
+        """在語句之間切換為背景載入完成的模型"""
+        ready = self._model_loader.take()
+        if ready is None:
+            return
+        (model_size,), model, error = ready
+        if error is not None:
+            log_error(f"背景載入模型失敗 ({model_size}): {error}")
+            self.status_updated.emit(f"模型切換失敗，繼續使用 {self.model_size}: {error}")
+            return
+        _release_model(self.model)
+        self.model = model
+        self.model_size = model_size
+        self.status_updated.emit(f"已切換模型 ({model_size})")
+
     def run(self):
+        """Worker 執行緒入口（以 --profile 啟動時分析此執行緒）"""
+        with profile_thread("live"):
+            self._run()
+
+    def _run(self):
         """執行即時轉錄"""
-        self.load_model()
-        if not self.model:
-            return
+        # 先限制在推論核心再載入模型，CTranslate2 的運算執行緒會繼承
+        pin_inference_thread()
+        reserved_cpus, _ = plan_cpu_sets()
+        # 使用轉錄服務時由服務載入模型
+        if not Config.TRANSCRIPTION_SERVER:
+            self.load_model()
+            if not self.model:
+                return
 
         self.status_updated.emit("待機中")
+        # sounddevice 載入 PortAudio，延遲到實際錄音時才匯入
+        import sounddevice as sd
         
         while self.running:
             if self.is_recording:
                 try:
-                    with sd.InputStream(
-                        samplerate=Config.SAMPLE_RATE, 
-                        channels=Config.CHANNELS, 
-                        device=self.device_index,
-                        dtype='float32', 
-                        callback=self.audio_callback
-                    ):
-                        self.status_updated.emit("錄音中...")
-                        self.last_speech_time = time.time()
-                        
-                        while self.is_recording and self.running:
-                            try:
-                                while True:
-                                    data = self.audio_queue.get_nowait()
-                                    self.current_phrase_buffer.append(data)
-                                    energy = np.linalg.norm(data) / len(data)
-                                    if energy > Config.SILENCE_THRESHOLD:
-                                        self.last_speech_time = time.time()
-                            except queue.Empty:
-                                pass
-                            
-                            now = time.time()
-                            has_audio = len(self.current_phrase_buffer) > 0
-                            
-                            if has_audio and (now - self.last_speech_time > Config.SILENCE_DURATION):
-                                self.finalize_phrase()
-                            elif has_audio and (now - self.last_transcribe_time > Config.TRANSCRIBE_INTERVAL):
-                                self.interim_transcribe()
-                                
-                            time.sleep(0.05)
-                            
-                    if self.current_phrase_buffer:
-                        self.finalize_phrase()
+                    self._open_archive()
+                    if Config.TRANSCRIPTION_SERVER:
+                        self._record_remote(sd, reserved_cpus)
                     else:
-                        self.status_updated.emit("待機中")
+                        self._record_local(sd, reserved_cpus)
+                    self.report_latency()
 
                 except Exception as e:
                     error_msg = f"錄音錯誤: {e}\n{traceback.format_exc()}"
                     log_error(error_msg)
                     self.status_updated.emit(f"錄音錯誤: {e}")
+                    # 避免裝置或服務無法使用時不斷重試
+                    time.sleep(1.0)
+                finally:
+                    self._close_archive()
             else:
+                self._swap_pending_model()
                 time.sleep(0.1)
+        _release_model(self.model)
+
+    def _open_archive(self):
+        """設定啟用時開始保存本次錄音（壓縮與寫檔在背景執行緒）"""
+        if not Config.LIVE_ARCHIVE:
+            return
+        try:
+            self.archive = SessionArchive()
+        except Exception as e:
+            log_error(f"無法保存即時錄音: {e}")
+
+    def _close_archive(self):
+        """寫完錄音檔，並排入閒置時以較大模型重新轉錄"""
+        archive, self.archive = self.archive, None
+        if archive is None:
+            return
+        duration = archive.close()
+        if not duration:
+            return
+        log_event("即時錄音已保存", path=archive.path, duration=duration, codec=archive.codec)
+        if self.repass_store is not None and enqueue_repass(self.repass_store, archive.path) is not None:
+            print(f"[INFO] 錄音已保存，閒置時以 {Config.LIVE_REPASS_MODEL} 重新轉錄: {archive.path}")
+
+    def _open_stream(self, sd, reserved_cpus):
+        """在保留核心上開啟並啟動輸入串流，PortAudio 回調執行緒不與推論搶核心"""
+        with thread_affinity(reserved_cpus):
+            stream = sd.InputStream(
+                samplerate=Config.SAMPLE_RATE, 
+                channels=Config.CHANNELS, 
+                device=self.device_index,
+                dtype='float32', 
+                callback=self.audio_callback
+            )
+            stream.start()
+        return stream
+
+    def _record_local(self, sd, reserved_cpus):
+        """錄音並以本地模型轉錄，直到停止錄音"""
+        if self.model is None:
+            self.load_model()
+            if self.model is None:
+                self.stop_recording()
+                return
+        stream = self._open_stream(sd, reserved_cpus)
+        # 已啟動的串流再次 start() 不會出錯，with 區塊結束時停止並關閉
+        with stream:
+            self.status_updated.emit("錄音中...")
+            self.last_speech_time = time.time()
+            
+            while self.is_recording and self.running:
+                self._swap_pending_model()
+                LIVE_AUDIO_QUEUE.set(self.audio_queue.qsize())
+                try:
+                    while True:
+                        data = self.audio_queue.get_nowait()
+                        self.current_phrase_buffer.append(data)
+                        if self.archive is not None:
+                            self.archive.write(data)
+                        energy = np.linalg.norm(data) / len(data)
+                        if energy > Config.SILENCE_THRESHOLD:
+                            self.last_speech_time = time.time()
+                except queue.Empty:
+                    pass
+                
+                now = time.time()
+                has_audio = len(self.current_phrase_buffer) > 0
+                
+                if has_audio and (now - self.last_speech_time > Config.SILENCE_DURATION):
+                    self.finalize_phrase()
+                elif has_audio and (now - self.last_transcribe_time > Config.TRANSCRIBE_INTERVAL):
+                    self.interim_transcribe()
+                    
+                time.sleep(0.05)
+                
+        if self.current_phrase_buffer:
+            self.finalize_phrase()
+        else:
+            self.status_updated.emit("待機中")
+
+    def _record_remote(self, sd, reserved_cpus):
+        """錄音並串流到轉錄服務，直到停止錄音（斷句與轉錄都在服務端進行）"""
+        live = TranscriptionClient(Config.TRANSCRIPTION_SERVER).open_live(self.model_size, Config.LANGUAGE)
+        relay = threading.Thread(target=self._relay_events, args=(live,), name="LiveRelay", daemon=True)
+        relay.start()
+        try:
+            with self._open_stream(sd, reserved_cpus):
+                self.status_updated.emit("錄音中（轉錄服務）...")
+                while self.is_recording and self.running:
+                    LIVE_AUDIO_QUEUE.set(self.audio_queue.qsize())
+                    chunks = []
+                    try:
+                        while True:
+                            chunks.append(self.audio_queue.get_nowait())
+                    except queue.Empty:
+                        pass
+                    if chunks:
+                        block = np.concatenate(chunks)
+                        live.send(block)
+                        if self.archive is not None:
+                            self.archive.write(block)
+                    time.sleep(0.05)
+        finally:
+            # 結束傳送後等待服務回傳最後一句
+            live.close()
+            relay.join(timeout=30)
+        self.status_updated.emit("待機中")
+
+    def _relay_events(self, live):
+        """接收轉錄服務的文字事件（在獨立執行緒中執行）"""
+        try:
+            for event in live.events():
+                times = {"start": event["start"], "end": event["end"]} if "start" in event else {}
+                if event["type"] == "final":
+                    if "latency" in event:
+                        self.phrase_latencies.append(event["latency"])
+                        LIVE_PHRASE_LATENCY.observe(event["latency"])
+                        times["latency"] = event["latency"]
+                    self._emit_final(event["text"], **times)
+                elif event["text"]:
+                    self._emit_interim(event["text"], **times)
+        except TranscriptionServiceError as e:
+            log_error(str(e))
+            self.status_updated.emit(f"轉錄服務錯誤: {e}")
 
     def audio_callback(self, indata, frames, time_info, status):
-        """音訊回調"""
+        """音訊回調（在 PortAudio 執行緒中執行，避免在此輸出訊息）"""
         if status:
-            print(f"音訊狀態: {status}")
+            if status.input_overflow:
+                self.overflow_count += 1
+                LIVE_AUDIO_STATUS.inc(status="input_overflow")
+            if status.input_underflow:
+                LIVE_AUDIO_STATUS.inc(status="input_underflow")
         self.audio_queue.put(indata.copy().flatten())
 
+    def report_latency(self):
+        """輸出本次錄音的語句延遲與音訊溢位統計，用於比較執行緒/核心設定的效果"""
+        if self.phrase_latencies:
+            latencies = np.array(self.phrase_latencies) * 1000
+            print(
+                f"[INFO] 即時轉錄: {len(latencies)} 句, "
+                f"延遲 p50 {np.percentile(latencies, 50):.0f} ms / p95 {np.percentile(latencies, 95):.0f} ms, "
+                f"音訊溢位 {self.overflow_count} 次"
+            )
+        elif self.overflow_count:
+            print(f"[WARN] 音訊溢位 {self.overflow_count} 次")
+        self.phrase_latencies = []
+        self.overflow_count = 0
+
     def finalize_phrase(self):
         """完成一個語句的轉錄"""
         if len(self.current_phrase_buffer) == 0:
@@ -165,10 +328,38 @@ class LiveTranscriptionWorker(QThread):
         self.current_phrase_buffer = []
         self.last_transcribe_time = time.time()
         text = self.transcribe_audio(audio_data)
+        LIVE_DECODE_SECONDS.observe(time.time() - self.last_transcribe_time, kind="final")
+        # 語句延遲：從判定語句結束（最後語音 + 靜音時長）到取得文字
+        latency = max(0.0, time.time() - self.last_speech_time - Config.SILENCE_DURATION)
+        self.phrase_latencies.append(latency)
+        LIVE_PHRASE_LATENCY.observe(latency)
+        if self.arbiter is not None:
+            self.arbiter.report_live_latency(latency)
+        times = {}
+        if self.archive is not None:
+            # 緩衝區的音訊都已寫入錄音，語句結束於目前的錄音長度
+            end = self.archive.position
+            times = {"start": max(0.0, end - len(audio_data) / Config.SAMPLE_RATE), "end": end}
+        self._emit_final(text, latency=latency, **times)
+
+    def _emit_interim(self, text, **fields):
+        """送出辨識中的暫定文字"""
+        self.text_updated.emit(text + INTERIM_SUFFIX)
+        LIVE_CAPTIONS.inc(kind="interim")
+        if self.broadcaster is not None:
+            self.broadcaster.publish("interim", text, **fields)
+
+    def _emit_final(self, text, **fields):
+        """送出語句的最終文字並寫入轉錄紀錄（由日誌背景執行緒寫檔）"""
         if text:
             self.text_updated.emit(text)
-            with open(Config.LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(f"[{datetime.datetime.now()}] {text}\n")
+            LIVE_CAPTIONS.inc(kind="final")
+            if self.broadcaster is not None:
+                self.broadcaster.publish("final", text, **fields)
+            log_transcript(text)
+            archive = self.archive
+            if archive is not None and "start" in fields:
+                archive.mark_phrase(fields["start"], fields["end"], text)
 
     def interim_transcribe(self):
         """臨時轉錄"""
@@ -177,8 +368,9 @@ class LiveTranscriptionWorker(QThread):
         audio_data = np.concatenate(self.current_phrase_buffer)
         self.last_transcribe_time = time.time()
         text = self.transcribe_audio(audio_data)
+        LIVE_DECODE_SECONDS.observe(time.time() - self.last_transcribe_time, kind="interim")
         if text:
-            self.text_updated.emit(text + " ...")
+            self._emit_interim(text)
 
     def transcribe_audio(self, audio_data):
         """
@@ -188,7 +380,7 @@ class LiveTranscriptionWorker(QThread):
         """
         try:
             # 使用共用函數準備參數
-            params = _prepare_transcription_params()
+            params = _prepare_transcription_params(overrides={"model_size": self.model_size})
             
             segments, info = self.model.transcribe(audio_data, **params)
             result = " ".join([seg.text for seg in segments]).strip()
@@ -201,158 +393,331 @@ class LiveTranscriptionWorker(QThread):
 
     def start_recording(self):
         """開始錄音"""
+        if not self.is_recording and self.arbiter is not None:
+            self.arbiter.live_started()
         self.is_recording = True
 
     def stop_recording(self):
         """停止錄音"""
+        if self.is_recording and self.arbiter is not None:
+            self.arbiter.live_stopped()
         self.is_recording = False
 
     def stop(self):
         """停止 Worker"""
+        self.stop_recording()
         self.running = False
-        self.is_recording = False
 
 
 class FileTranscriptionWorker(QThread):
     """檔案轉錄 Worker（已整合批次處理優化）"""
     progress_updated = pyqtSignal(int, int)
     file_status_updated = pyqtSignal(str, str)
+    file_timing_updated = pyqtSignal(str, float, float)  # 路徑, 音訊長度（秒，未知為 0）, 轉錄耗時（秒）
     time_estimate_updated = pyqtSignal(str)  # 新增：預估時間信號
     finished_all = pyqtSignal()
 
-    def __init__(self, file_paths, model_size="tiny", preloaded_model=None):
+    def __init__(self, file_paths=None, model_size="tiny", preloaded_model=None, job_store=None, arbiter=None,
+                 job_ids=None):
+        """
+        Args:
+            file_paths: 要轉錄的檔案列表（未提供 job_store 時使用）
+            model_size: 模型大小（工作參數未指定 model_size 時使用）
+            preloaded_model: 預載模型
+            job_store: JobStore，提供時改為從持久化佇列領取工作
+            arbiter: ResourceArbiter，即時字幕進行中於片段邊界暫停或降速
+            job_ids: 只處理佇列中的這些工作（例如重新轉錄時間範圍），None 表示所有等待中的工作
+        """
         super().__init__()
-        self.file_paths = file_paths
+        self.file_paths = file_paths or []
         self.model_size = model_size
         self.model = preloaded_model
+        self.job_store = job_store
+        self.arbiter = arbiter
+        self.job_ids = job_ids
+        self.client = None  # 使用轉錄服務時的 TranscriptionClient
+        self.worker_id = make_worker_id(f"gui-{id(self):x}")
         self.should_stop = False  # 新增：停止標誌
+        self._loaded_size = model_size if preloaded_model is not None else None
+        self._use_batched = False
+        self._loaded_vad = Config.VAD_ENABLED
+        self._model_loader = BackgroundModelLoader(load_file_model)
+        self._governor = MemoryGovernor()
+
+    def on_config_changed(self, changes):
+        """
+        設定變更通知：模型相關設定在背景載入新模型，於下一個檔案開始前切換
+
+        Args:
+            changes: {鍵: (舊值, 新值)}
+        """
+        if isinstance(self.model, InferenceProcess):
+            if needs_model_reload(changes, self._loaded_size):
+                # 推論子行程在下一個檔案開始前重新建立
+                self._loaded_size = None
+            else:
+                # 解碼、切分與輸出設定同步到子行程
+                self.model.update_settings()
+            return
+        if Config.INFERENCE_OUT_OF_PROCESS:
+            return  # 下一個檔案改用推論子行程
+        if self._loaded_size is not None and needs_model_reload(changes, self._loaded_size):
+            self.file_status_updated.emit("System", f"設定已變更，背景重新載入模型 ({self._loaded_size})")
+            self._model_loader.request(self._loaded_size)
+
+    def _get_model(self, model_size):
+        """取得指定大小的模型，與目前載入的不同時才重新載入"""
+        if Config.INFERENCE_OUT_OF_PROCESS:
+            if not isinstance(self.model, InferenceProcess) or self._loaded_size != model_size:
+                self._close_process()
+                self.model = InferenceProcess(model_size, MODE_FILE)
+                self._loaded_size = model_size
+            return self.model, False
+        self._close_process()
+
+        ready = self._model_loader.take()
+        if ready is not None:
+            (loaded_size,), loaded, error = ready
+            if error is None:
+                # VAD 可能在載入期間變更，依目前設定重新包裝
+                self.model, self._use_batched = wrap_file_model(loaded[0], Config.VAD_ENABLED)
+                self._loaded_size = loaded_size
+                self._loaded_vad = Config.VAD_ENABLED
+            else:
+                log_error(f"背景載入模型失敗 ({loaded_size}): {error}")
+
+        if self.model is None or self._loaded_size != model_size:
+            self.model = None
+            self.model, self._use_batched = load_file_model(model_size)
+            self._loaded_size = model_size
+            self._loaded_vad = Config.VAD_ENABLED
+        elif self._loaded_vad != Config.VAD_ENABLED:
+            # VAD 切換只需重新包裝批次管線，不必重新載入權重
+            self.model, self._use_batched = wrap_file_model(self.model, Config.VAD_ENABLED)
+            self._loaded_vad = Config.VAD_ENABLED
+        return self.model, self._use_batched
+
+    def _close_process(self):
+        """結束推論子行程（切換回行程內推論或更換模型時）"""
+        if isinstance(self.model, InferenceProcess):
+            self.model.close()
+            self.model = None
+            self._loaded_size = None
 
     def run(self):
+        """Worker 執行緒入口（以 --profile 啟動時分析此執行緒）"""
+        with profile_thread("file"):
+            self._run()
+
+    def _run(self):
         """執行檔案轉錄（使用批次處理）"""
-        # 如果沒有預載模型，才載入
-        if self.model is None:
+        # 限制在推論核心，保留核心給音訊擷取與 UI
+        pin_inference_thread()
+        if Config.TRANSCRIPTION_SERVER:
+            # 交由轉錄服務處理，本程式不載入模型
+            self.client = TranscriptionClient(Config.TRANSCRIPTION_SERVER)
+        else:
+            # 如果沒有預載模型，才載入
             try:
-                base_model = WhisperModel(
-                    self.model_size, 
-                    device=Config.DEVICE, 
-                    compute_type=Config.COMPUTE_TYPE
-                )
-                
-                # 嘗試使用批次處理（僅在 VAD 啟用時）
-                # BatchedInferencePipeline 需要 VAD 或 clip_timestamps，因此只在 VAD 啟用時使用
-                if BATCHED_AVAILABLE and Config.VAD_ENABLED:
-                    try:
-                        model = BatchedInferencePipeline(model=base_model)
-                        use_batched = True
-                        print(f"[OK] 使用批次處理模式 (batch_size={Config.BATCH_SIZE})")
-                    except Exception as e:
-                        model = base_model
-                        use_batched = False
-                        print(f"[WARN] 批次處理初始化失敗，使用標準模式: {e}")
-                else:
-                    model = base_model
-                    use_batched = False
-                    if not Config.VAD_ENABLED:
-                        print("[INFO] VAD 未啟用，使用標準模式（批次處理需要 VAD）")
-                    else:
-                        print("[INFO] BatchedInferencePipeline 不可用，使用標準模式")
-                    
-            except Exception as e:
-                error_msg = f"模型載入失敗: {e}\n{traceback.format_exc()}"
+                self._get_model(self.model_size)
+            except ModelLoadError as e:
+                error_msg = f"{e}\n{traceback.format_exc()}"
                 log_error(error_msg)
-                self.file_status_updated.emit("System", f"模型載入失敗: {e}")
+                self.file_status_updated.emit("System", str(e))
                 return
+
+        if self.job_store is not None:
+            self._run_jobs()
         else:
-            model = self.model
-            use_batched = False
+            for i, file_path in enumerate(self.file_paths, start=1):
+                # 檢查是否應該停止
+                if self.should_stop:
+                    self.file_status_updated.emit(file_path, "已取消")
+                    break
+
+                self.progress_updated.emit(i, len(self.file_paths))
+                self._process_file(file_path)
 
-        for i, file_path in enumerate(self.file_paths, start=1):
-            # 檢查是否應該停止
-            if self.should_stop:
-                self.file_status_updated.emit(file_path, "已取消")
+        self._close_process()
+        self.finished_all.emit()
+
+    def _run_jobs(self):
+        """從持久化佇列逐一領取並處理工作，直到沒有可執行的工作"""
+        total = len(self.job_ids) if self.job_ids is not None else self.job_store.counts().get(STATE_PENDING, 0)
+        done = 0
+        while not self.should_stop:
+            job = self.job_store.claim(self.worker_id, job_ids=self.job_ids)
+            if job is None:
                 break
-                
-            self.progress_updated.emit(i, len(self.file_paths))
-            self.file_status_updated.emit(file_path, "轉錄中...")
-            
-            start_time = time.time()
-            try:
-                # 使用共用函數準備基礎參數
-                transcribe_params = _prepare_transcription_params(include_word_timestamps=True)
-                
-                # 如果使用批次處理，加入 batch_size
-                if use_batched and Config.VAD_ENABLED:
-                    transcribe_params["batch_size"] = Config.BATCH_SIZE
-                
-                
-                # 轉錄
-                try:
-                    segments, info = model.transcribe(file_path, **transcribe_params)
-                except RuntimeError as e:
-                    if "No clip timestamps found" in str(e):
-                        # 提供清晰的解決方案
-                        error_msg = (
-                            f"檔案 {file_path} 轉錄失敗。\n"
-                            f"原因: {e}\n\n"
-                            f"解決方案（二選一）：\n"
-                            f"1. 在「設定」分頁中，將 Temperature 調整為 0.1 或以上\n"
-                            f"2. 在「設定」分頁中，勾選「啟用 VAD」（需要安裝 onnxruntime）\n"
-                            f"\n建議使用方案 1（將 Temperature 改為 0.2）"
-                        )
-                        print(f"[ERROR] {error_msg}")
-                        log_error(error_msg)
-                        self.file_status_updated.emit(
-                            file_path, 
-                            "失敗：請將 Temperature 設為 0.1 以上"
-                        )
-                        continue
-                    else:
-                        raise e
-                
-                # 收集所有單字或片段
-                all_words = []
-                optimized_segments = []
-                
-                # 只有在 VAD 啟用時才使用單字級別時間戳
-                if Config.VAD_ENABLED and use_batched:
-                    # VAD 啟用：使用單字級別處理
-                    for segment in segments:
-                        if segment.words:
-                            all_words.extend(segment.words)
-                    
-                    # 重新切分
-                    if all_words:
-                        optimized_segments = split_into_segments(all_words, min_duration=2.0, max_duration=8.0)
-                else:
-                    # VAD 停用：直接使用 segment 級別
-                    for segment in segments:
-                        optimized_segments.append({
-                            "start": segment.start,
-                            "end": segment.end,
-                            "text": segment.text
-                        })
-                
-                # 儲存
-                base_name = os.path.splitext(file_path)[0]
-                srt_path = f"{base_name}.srt"
-                write_srt(optimized_segments, srt_path)
-                
-                # 計算轉錄時間
-                end_time = time.time()
-                duration = end_time - start_time
-                
+            done += 1
+            self.progress_updated.emit(min(done, total) if total else done, max(total, done))
+            self._process_file(job["path"], job)
+
+    def _transcribe_remote(self, file_path, options):
+        """
+        交由轉錄服務轉錄並等待結果（檔案路徑需可由服務讀取）
+
+        Returns:
+            dict: 與 transcribe_file 相同格式的結果
+
+        Raises:
+            TranscriptionServiceError: 服務無法連線或工作失敗
+        """
+        # 服務可能與本程式共用工作佇列資料庫，不可沿用本程式正在處理的同一筆工作
+        job_id = self.client.submit([os.path.abspath(file_path)], options, dedupe=False)[0]
+        job = self.client.wait(job_id)
+        if job["state"] != "done":
+            raise TranscriptionServiceError(job["error"] or f"轉錄服務工作 #{job_id} 狀態: {job['state']}")
+        return job["result"]
+
+    def _progress_reporter(self, file_path, interval=1.0):
+        """
+        建立 transcribe_file 的進度回調：在狀態欄顯示已轉錄到的位置與最新的字幕（最多每 interval 秒更新一次）
+
+        Args:
+            file_path: 檔案路徑
+            interval: 更新間隔（秒）
+
+        Returns:
+            callable: progress(seconds, text)
+        """
+        last = [0.0]
+
+        def progress(seconds, text):
+            now = time.monotonic()
+            if now - last[0] < interval:
+                return
+            last[0] = now
+            self.file_status_updated.emit(file_path, f"轉錄中... {format_duration(seconds)} {text.strip()[:40]}")
+
+        return progress
+
+    def _process_file(self, file_path, job=None):
+        """
+        轉錄單一檔案並回報狀態；提供 job 時同步更新佇列狀態
+
+        Args:
+            file_path: 檔案路徑
+            job: JobStore 工作資料，None 表示非佇列模式
+        """
+        self.file_status_updated.emit(file_path, "轉錄中...")
+        options = job["params"] if job else None
+
+        try:
+            model_size = (options or {}).get("model_size", self.model_size)
+            if self.client is not None:
+                result = self._transcribe_remote(file_path, {**(options or {}), "model_size": model_size})
+            else:
+                model, use_batched = self._get_model(model_size)
+                # 帶入實際使用的模型，以套用該模型的自動調校結果
+                options = {**(options or {}), "model_size": model_size}
+                checkpoint = self.arbiter.checkpoint_for(lambda: self.should_stop) if self.arbiter else None
+                # 依記憶體預算調整批次大小與分段解碼（分段解碼在推論子行程中同樣生效）
+                with self._governor.admit(model_size, file_path, options, use_batched) as plan:
+                    options = {**options, **plan["overrides"]}
+                    with trace_file_memory(file_path):
+                        if isinstance(model, InferenceProcess):
+                            result = model.transcribe_file(file_path, options, checkpoint)
+                        else:
+                            result = transcribe_file(model, file_path, use_batched, options, checkpoint,
+                                                     self._progress_reporter(file_path))
+                result["estimated_mb"] = plan["estimated_mb"]
+
+            if result.get("time_range"):
+                # 部分範圍重新轉錄：音訊長度只是範圍長度，不更新列表的長度與耗時欄位
+                start, end = result["time_range"]
+                self.file_status_updated.emit(
+                    file_path,
+                    f"[OK] 已重新轉錄 {format_duration(start)}-{format_duration(end)} "
+                    f"(耗時: {format_elapsed(result['elapsed'])}, {result['replaced_count']} → {result['segment_count']} 個片段)"
+                )
+            else:
                 # 顯示完整路徑、片段數量和轉錄時間
-                time_str = f"{duration:.1f}秒" if duration < 60 else f"{duration/60:.1f}分鐘"
                 self.file_status_updated.emit(
-                    file_path, 
-                    f"[OK] 完成! (耗時: {time_str}, {len(optimized_segments)} 個片段)"
+                    file_path,
+                    f"[OK] 完成! (耗時: {format_elapsed(result['elapsed'])}, {result['segment_count']} 個片段)"
                 )
-                
-                log_transcription_stats(file_path, duration, self.model_size)
-                
-            except Exception as e:
-                error_msg = f"檔案轉錄失敗 ({file_path}): {e}\n{traceback.format_exc()}"
-                log_error(error_msg)
-                self.file_status_updated.emit(file_path, f"[ERROR] 失敗: {e}")
-        
-        self.finished_all.emit()
+                self.file_timing_updated.emit(file_path, result.get("audio_duration") or 0.0, result["elapsed"])
+            if job:
+                self.job_store.complete(job["id"], result)
+
+            log_transcription_stats(file_path, result, model_size)
+            observe_transcription(result, model_size)
+
+        except ClipTimestampsError as e:
+            observe_failure(model_size)
+            print(f"[ERROR] {e}")
+            log_error(str(e))
+            self.file_status_updated.emit(file_path, "失敗：請將 Temperature 設為 0.1 以上")
+            if job:
+                self.job_store.fail(job["id"], str(e), retry=False)
+
+        except SubtitleGenerationError as e:
+            observe_failure(model_size)
+            log_error(str(e))
+            self.file_status_updated.emit(file_path, f"[ERROR] 失敗: {e}")
+            if job:
+                self.job_store.fail(job["id"], str(e), retry=False)
+
+        except Exception as e:
+            observe_failure(model_size)
+            error_msg = f"檔案轉錄失敗 ({file_path}): {e}\n{traceback.format_exc()}"
+            log_error(error_msg)
+            status = f"[ERROR] 失敗: {e}"
+            if job and self.job_store.fail(job["id"], str(e)) == STATE_PENDING:
+                status += "（稍後自動重試）"
+            self.file_status_updated.emit(file_path, status)
+
+
+class FolderScanWorker(QThread):
+    """背景資料夾掃描 Worker：分批回傳找到的檔案，並可平行讀取音訊長度"""
+    files_found = pyqtSignal(list)  # 一批檔案路徑
+    durations_probed = pyqtSignal(list)  # [(路徑, 音訊長度秒數)]
+    scan_progress = pyqtSignal(int, int)  # 已找到的檔案數, 已走訪的資料夾數
+    scan_finished = pyqtSignal(int, int, bool)  # 找到的檔案數, 略過的檔案數, 是否被取消
+
+    def __init__(self, folder, include=None, exclude=None, skip_transcribed=None, probe_duration=None):
+        """
+        Args:
+            folder: 要掃描的資料夾
+            include / exclude: glob 樣式列表，None 表示使用設定值
+            skip_transcribed: 略過已有較新字幕的檔案，None 表示使用設定值
+            probe_duration: 是否讀取音訊長度，None 表示使用設定值
+        """
+        super().__init__()
+        self.folder = folder
+        self.include = Config.SCAN_INCLUDE if include is None else include
+        self.exclude = Config.SCAN_EXCLUDE if exclude is None else exclude
+        self.skip_transcribed = Config.SCAN_SKIP_TRANSCRIBED if skip_transcribed is None else skip_transcribed
+        self.probe_duration = Config.SCAN_PROBE_DURATION if probe_duration is None else probe_duration
+        self.should_stop = False
+
+    def run(self):
+        """掃描資料夾"""
+        stats = ScanStats()
+        prober = DurationProber() if self.probe_duration else None
+        try:
+            paths = iter_media_files(
+                self.folder, self.include, self.exclude, self.skip_transcribed,
+                should_stop=lambda: self.should_stop, stats=stats
+            )
+            for chunk in iter_chunks(paths):
+                self.files_found.emit(chunk)
+                self.scan_progress.emit(stats.found, stats.directories)
+                if prober is not None:
+                    prober.submit(chunk)
+                    self._emit_durations(prober.collect())
+                if self.should_stop:
+                    break
+            if prober is not None and not self.should_stop:
+                self._emit_durations(prober.collect(wait=True))
+        except Exception as e:
+            log_error(f"資料夾掃描失敗 ({self.folder}): {e}\n{traceback.format_exc()}")
+        finally:
+            if prober is not None:
+                prober.close(cancel=self.should_stop)
+        self.scan_finished.emit(stats.found, stats.skipped, self.should_stop)
+
+    def _emit_durations(self, durations):
+        if durations:
+            self.durations_probed.emit(durations)